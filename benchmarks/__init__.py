@@ -0,0 +1 @@
+"""振动监测系统性能基准 (每个 bench_*.py 均可单独运行, 结果以 JSON 输出)"""
@@ -0,0 +1,42 @@
+"""
+依次运行全部基准, 每个基准输出一个 JSON 文件
+
+运行: python -m benchmarks [--output-dir benchmark_results] [--quick] [--only parsing ingest]
+对比两次结果: python -m benchmarks.compare 旧目录 新目录
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+from benchmarks.common import ROOT_DIR
+
+BENCHMARKS = ["parsing", "ingest", "recorder", "metrics", "startup", "gui", "async_driver", "collector", "publisher", "shared_ring", "batch_analysis", "diagnostics", "severity", "anomaly", "trend", "resampling", "alignment", "derived", "pipeline", "channels", "render"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="运行全部基准")
+    parser.add_argument('--output-dir', default='benchmark_results', help='结果目录')
+    parser.add_argument('--quick', action='store_true', help='缩短计时, 用于冒烟检查')
+    parser.add_argument('--only', nargs='+', choices=BENCHMARKS, help='只运行指定基准')
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    failed = []
+    for name in args.only or BENCHMARKS:
+        output = os.path.join(args.output_dir, f"{name}.json")
+        command = [sys.executable, '-m', f'benchmarks.bench_{name}', '--output', output]
+        if args.quick:
+            command.append('--quick')
+        print(f"运行基准 {name} -> {output}", flush=True)
+        # 每个基准在独立进程中运行, 避免 Qt 应用、日志配置等全局状态互相影响
+        if subprocess.run(command, cwd=ROOT_DIR).returncode != 0:
+            failed.append(name)
+    if failed:
+        print(f"以下基准运行失败: {', '.join(failed)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,82 @@
+"""
+多传感器对齐与互分析基准
+
+StreamAligner.push: 多台设备各自按批送入带抖动的采样, 每个采样的对齐开销;
+coherence / cross_correlation: 全部通道对一次批量 FFT 计算, 对照逐通道对调用 scipy.signal.coherence / np.correlate。
+
+运行: python -m benchmarks.bench_alignment [--devices 3 10] [--channels 12 39] [--samples 4096]
+"""
+from benchmarks.common import argument_parser, measure, result, write_report
+
+import logging
+
+import numpy as np
+from scipy.signal import coherence as scipy_coherence
+
+from vibration_monitor.alignment import StreamAligner
+from vibration_monitor.channels import RECORD_KEYS
+from vibration_monitor.cross_channel import coherence, cross_correlation
+
+
+def pairwise_coherence(values, fs, nperseg):
+    k = len(values)
+    return [scipy_coherence(values[i], values[j], fs, nperseg=nperseg) for i in range(k) for j in range(i + 1, k)]
+
+
+def pairwise_correlation(values, max_lag):
+    k, n = values.shape
+    result = []
+    for i in range(k):
+        for j in range(i + 1, k):
+            full = np.correlate(values[j], values[i], 'full')
+            result.append(full[n - 1 - max_lag:n + max_lag])
+    return result
+
+
+def main(argv=None):
+    parser = argument_parser(__doc__.strip().splitlines()[0])
+    parser.add_argument('--devices', type=int, nargs='+', default=[3, 10])
+    parser.add_argument('--channels', type=int, nargs='+', default=[12, 39])
+    parser.add_argument('--samples', type=int, default=4096)
+    args = parser.parse_args(argv)
+    logging.disable(logging.WARNING)
+    min_time = 0.05 if args.quick else 0.3
+    rng = np.random.default_rng(0)
+    fs = 100.0
+
+    results = []
+    for devices in args.devices:
+        names = [f"device_{i}" for i in range(devices)]
+        batch = 5
+        values = rng.normal(size=(batch, len(RECORD_KEYS)))
+        aligner = StreamAligner(names, fs)
+        counter = iter(range(1 << 62))
+        offsets = rng.uniform(0, 1 / fs, devices)
+
+        def step():
+            i = next(counter)
+            device = i % devices
+            t = (i // devices) * batch / fs + np.arange(batch) / fs + offsets[device]
+            aligner.push(names[device], t, values)
+
+        stats = measure(step, min_time)
+        stats["per_sample_us"] = stats["median_us"] / batch
+        results.append(result("align_push", {"devices": devices, "batch": batch}, stats))
+
+    n = 1024 if args.quick else args.samples
+    for channels in args.channels:
+        values = rng.normal(size=(channels, n))
+        params = {"channels": channels, "samples": n, "pairs": channels * (channels - 1) // 2}
+        results.append(result("coherence", {**params, "method": "batched_fft"},
+                              measure(lambda: coherence(values, fs, 256), min_time, repeat=3)))
+        results.append(result("coherence", {**params, "method": "scipy_pairwise"},
+                              measure(lambda: pairwise_coherence(values, fs, 256), min_time, repeat=3)))
+        results.append(result("cross_correlation", {**params, "max_lag": 100, "method": "batched_fft"},
+                              measure(lambda: cross_correlation(values, 100), min_time, repeat=3)))
+        results.append(result("cross_correlation", {**params, "max_lag": 100, "method": "np_correlate_pairwise"},
+                              measure(lambda: pairwise_correlation(values, 100), min_time, repeat=3)))
+    return write_report("alignment", results, args.output)
+
+
+if __name__ == '__main__':
+    main()
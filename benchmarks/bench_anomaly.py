@@ -0,0 +1,46 @@
+"""
+异常评分基准
+
+AnomalyDetector.update 每个采样的耗时 (评分并更新所有设备、通道的 EWMA 基线), 设备数从 1 到数百 (每台 13 个通道),
+以及保存/恢复基线的耗时。
+
+运行: python -m benchmarks.bench_anomaly [--devices 1 100 300]
+"""
+from benchmarks.common import argument_parser, measure, result, write_report
+
+import logging
+import os
+import tempfile
+
+import numpy as np
+
+from vibration_monitor.anomaly import AnomalyDetector
+from vibration_monitor.channels import CHANNEL_NAMES
+
+
+def main(argv=None):
+    parser = argument_parser(__doc__.strip().splitlines()[0])
+    parser.add_argument('--devices', type=int, nargs='+', default=[1, 100, 300])
+    args = parser.parse_args(argv)
+    logging.disable(logging.WARNING)
+    min_time = 0.05 if args.quick else 0.3
+    rng = np.random.default_rng(0)
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for devices in args.devices:
+            detector = AnomalyDetector([f"device_{i}" for i in range(devices)])
+            rows = rng.normal(size=(256, devices, len(CHANNEL_NAMES)))
+            detector.update_batch(rows)  # 越过预热
+            counter = iter(range(1 << 62))
+            params = {"devices": devices, "channels": devices * len(CHANNEL_NAMES)}
+            results.append(result("anomaly_update", params,
+                                  measure(lambda: detector.update(rows[next(counter) % len(rows)]), min_time)))
+            path = os.path.join(directory, f"state_{devices}.npz")
+            results.append(result("anomaly_save", params, measure(lambda: detector.save(path), min_time)))
+            results.append(result("anomaly_load", params, measure(lambda: detector.load(path), min_time)))
+    return write_report("anomaly", results, args.output)
+
+
+if __name__ == '__main__':
+    main()
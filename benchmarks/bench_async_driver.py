@@ -0,0 +1,130 @@
+"""
+线程版 DeviceWTVB01 与 asyncio 版 AsyncDeviceWTVB01 的对比基准
+
+在子进程中为每个设备启动一个本地回环网关 (透传 RTU, 对每个读命令立即应答),
+分别用 "每设备一个线程" 和 "单事件循环" 两种方式采集 N 个设备,
+记录线程数、进程 CPU 时间和帧率。
+
+运行: python -m benchmarks.bench_async_driver --devices 10 100 --duration 3
+"""
+from benchmarks.common import argument_parser, result, write_report
+
+import asyncio
+import multiprocessing
+import threading
+import time
+
+from vibration_monitor.device import wtvb01_protocol as protocol
+from vibration_monitor.device.loopback_gateway import LoopbackGateway, RegisterSlave
+from vibration_monitor.device.device_wtvb01 import DeviceWTVB01
+from vibration_monitor.device.async_device_model import run_devices
+from vibration_monitor.device.async_device_wtvb01 import AsyncDeviceWTVB01
+
+ADDRESS = 0x50
+
+
+def _gateway_main(n_gateways, port_queue):
+    """网关替身进程: 每个设备一个网关端口 (同一网关上的设备会共用一条连接, 对比时应避免)"""
+    slave = RegisterSlave(ADDRESS, list(range(protocol.DATA_REG_COUNT)))
+    gateways = [LoopbackGateway([slave]) for _ in range(n_gateways)]
+
+    async def serve():
+        tasks = [asyncio.ensure_future(gateway.serve()) for gateway in gateways]
+        while not all(gateway.port for gateway in gateways):
+            await asyncio.sleep(0.01)
+        port_queue.put([gateway.port for gateway in gateways])
+        await asyncio.gather(*tasks)
+
+    asyncio.run(serve())
+
+
+class _CountingDevice(DeviceWTVB01):
+    """统计解析帧数的线程版设备"""
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.frames = 0
+
+    def _process_data(self, packet):
+        super()._process_data(packet)
+        self.frames += 1
+
+
+def bench_threaded(gateway_ports, n_devices, duration, poll_interval):
+    devices = []
+    for i in range(n_devices):
+        device = _CountingDevice(f"dev{i}", f"tcp://127.0.0.1:{gateway_ports[i]}", 230400, ADDRESS)
+        device.open_device()
+        device.poll_interval = poll_interval
+        devices.append(device)
+
+    cpu_start = time.process_time()
+    for device in devices:
+        device.start_data_acquisition()
+    time.sleep(duration)
+    threads = threading.active_count()
+    for device in devices:
+        device.loop = False
+    for device in devices:
+        device.read_thread.join()
+    cpu = time.process_time() - cpu_start
+    for device in devices:
+        device.close_device()
+    frames = sum(device.frames for device in devices)
+    return result("acquisition", {"driver": "threaded", "devices": n_devices, "poll_interval": poll_interval},
+                  {"threads": threads, "cpu_seconds": cpu, "frames_per_second": frames / duration,
+                   "cpu_us_per_frame": cpu / frames * 1e6 if frames else None})
+
+
+def bench_asyncio(gateway_ports, n_devices, duration, poll_interval):
+    devices = [AsyncDeviceWTVB01(f"dev{i}", f"tcp://127.0.0.1:{gateway_ports[i]}", 230400, ADDRESS)
+               for i in range(n_devices)]
+    for device in devices:
+        device.poll_interval = poll_interval
+    counter = [0]
+    threads = []
+
+    def on_frame(device, frame):
+        counter[0] += 1
+
+    async def run():
+        task = asyncio.ensure_future(run_devices(devices, on_frame))
+        await asyncio.sleep(duration)
+        threads.append(threading.active_count())
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    cpu_start = time.process_time()
+    asyncio.run(run())
+    cpu = time.process_time() - cpu_start
+    frames = counter[0]
+    return result("acquisition", {"driver": "asyncio", "devices": n_devices, "poll_interval": poll_interval},
+                  {"threads": threads[0], "cpu_seconds": cpu, "frames_per_second": frames / duration,
+                   "cpu_us_per_frame": cpu / frames * 1e6 if frames else None})
+
+
+def main(argv=None):
+    parser = argument_parser(__doc__.strip().splitlines()[0])
+    parser.add_argument('--devices', type=int, nargs='+', default=[10, 100])
+    parser.add_argument('--duration', type=float, default=3.0)
+    parser.add_argument('--poll-interval', type=float, default=0.01,
+                        help='每个设备两次轮询之间的间隔 (秒), 0 表示全速轮询')
+    args = parser.parse_args(argv)
+    duration = 0.5 if args.quick else args.duration
+
+    port_queue = multiprocessing.Queue()
+    gateway = multiprocessing.Process(target=_gateway_main, args=(max(args.devices), port_queue), daemon=True)
+    gateway.start()
+    gateway_ports = port_queue.get(timeout=30)
+    try:
+        results = []
+        for n_devices in args.devices:
+            results.append(bench_threaded(gateway_ports, n_devices, duration, args.poll_interval))
+            results.append(bench_asyncio(gateway_ports, n_devices, duration, args.poll_interval))
+    finally:
+        gateway.terminate()
+
+    return write_report("async_driver", results, args.output)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+批量离线分析扩展性基准
+
+在临时目录生成若干 .npy 记录文件, 分别用 1、2、4 ... 个工作进程运行 batch_analysis.run_batch,
+输出吞吐和相对单进程的加速比 (接近进程数即为线性扩展; 受本机 CPU 核数限制)。
+
+运行: python -m benchmarks.bench_batch_analysis [--files 32] [--samples 60000] [--workers 1 2 4]
+"""
+from benchmarks.common import argument_parser, result, write_report
+
+import logging
+import os
+import tempfile
+
+import numpy as np
+
+from vibration_monitor import data_analysis
+from vibration_monitor.batch_analysis import find_recordings, plan_tasks, run_batch
+from vibration_monitor.channels import RECORD_KEYS
+
+
+def make_recordings(directory, n_files, n_samples, rate=200.0):
+    rng = np.random.default_rng(0)
+    t = np.arange(n_samples) / rate
+    for i in range(n_files):
+        values = rng.normal(size=(n_samples, len(RECORD_KEYS)))
+        values[:, RECORD_KEYS.index("58")] += 5 * np.sin(2 * np.pi * (5 + i) * t)
+        np.save(os.path.join(directory, f"recording_{i:03d}.npy"), np.column_stack([t, values]))
+
+
+def main(argv=None):
+    parser = argument_parser(__doc__.strip().splitlines()[0])
+    parser.add_argument('--files', type=int, default=32)
+    parser.add_argument('--samples', type=int, default=60000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    args = parser.parse_args(argv)
+    logging.disable(logging.INFO)
+    n_files = 8 if args.quick else args.files
+    n_samples = 10000 if args.quick else args.samples
+    options = {
+        'channels': ["58", "59", "60"],
+        'feeding_channel': "60",
+        'target_weight': 100.0,
+        'tolerance': 1.0,
+        'thresholds': dict(data_analysis.DEFAULT_FEEDING_THRESHOLDS),
+        'peaks': 3,
+    }
+    results = []
+    baseline = None
+    with tempfile.TemporaryDirectory() as directory:
+        make_recordings(directory, n_files, n_samples)
+        tasks = plan_tasks(find_recordings([directory]))
+        for workers in args.workers:
+            summary = os.path.join(directory, f"summary_{workers}.jsonl")
+            stats = run_batch(tasks, summary, options, workers=workers, resume=False)
+            seconds = stats['seconds']
+            if workers == 1:
+                baseline = seconds
+            results.append(result("batch_analysis", {"workers": workers, "files": n_files, "samples": n_samples}, {
+                "seconds": seconds,
+                "tasks_per_s": stats['completed'] / seconds,
+                "samples_per_s": stats['completed'] * n_samples / seconds,
+                "speedup": baseline / seconds if baseline else None,
+                "failed": stats['failed'],
+                "cpu_count": os.cpu_count(),
+            }))
+    return write_report("batch_analysis", results, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""
+通道读取基准
+
+界面每次刷新取出 13 个监测通道 (及记录用的 16 个通道) 的开销:
+dict_safe_float 为原先逐个 get_data("52") 再 safe_float 的方式, array_index 为按 CHANNEL_COLUMNS
+一次索引设备的 values 数组; 另测解码一帧: decode_registers 得到数据字典后逐键写入 (原先的方式)
+与 decode_values 直接写入各 ChannelId 列。
+
+运行: python -m benchmarks.bench_channels
+"""
+from benchmarks.common import argument_parser, measure, result, write_report
+
+import numpy as np
+
+from vibration_monitor.channels import CHANNEL_COLUMNS, CHANNEL_KEYS, KEY_COLUMNS, RECORD_KEYS
+from vibration_monitor.device import wtvb01_protocol as protocol
+from vibration_monitor.device.simulator import SimulatedWTVB01
+from vibration_monitor.utils.data_utils import safe_float
+
+
+def dict_tick(data):
+    monitored = [safe_float(data.get(key)) for key in CHANNEL_KEYS]
+    record = [data.get(key) for key in RECORD_KEYS]
+    return monitored, record
+
+
+def array_tick(values):
+    values = values.copy()
+    monitored = values[CHANNEL_COLUMNS]
+    monitored[np.isnan(monitored)] = 0.0
+    values[CHANNEL_COLUMNS] = monitored
+    return monitored.tolist(), values.tolist()
+
+
+def decode_dict(packet, data, values):
+    for key, value in protocol.decode_registers(packet).items():
+        data[key] = value
+        column = KEY_COLUMNS.get(key)
+        if column is not None:
+            values[column] = value
+
+
+def main(argv=None):
+    parser = argument_parser(__doc__.strip().splitlines()[0])
+    args = parser.parse_args(argv)
+    min_time = 0.05 if args.quick else 0.3
+
+    simulator = SimulatedWTVB01(seed=0)
+    data = {key: float(value) for key, value in simulator.sample(0.0).items()}
+    values = np.array([data.get(key, np.nan) for key in RECORD_KEYS])
+    packet = list(simulator.next_frame())
+    decoded = values.copy()
+
+    results = [
+        result("gui_tick", {"method": "dict_safe_float"}, measure(lambda: dict_tick(data), min_time)),
+        result("gui_tick", {"method": "array_index"}, measure(lambda: array_tick(values), min_time)),
+        result("decode_frame", {"method": "dict_set_data"}, measure(lambda: decode_dict(packet, {}, decoded), min_time)),
+        result("decode_frame", {"method": "decode_values"},
+               measure(lambda: protocol.decode_values(packet, decoded), min_time)),
+    ]
+    return write_report("channels", results, args.output)
+
+
+if __name__ == '__main__':
+    main()
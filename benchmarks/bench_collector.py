@@ -0,0 +1,100 @@
+"""
+远程采集服务器负载测试
+
+服务器运行在本进程的后台线程中, 子进程用单个事件循环打开数百个回环连接,
+每个连接发送固定数量的采样批次; 测量全部批次被服务器处理完的时间和吞吐,
+以及各连接的吞吐分布和背压等待时间。
+
+运行: python -m benchmarks.bench_collector [--clients 100 500] [--batches 50] [--batch-size 100]
+"""
+from benchmarks.common import argument_parser, result, write_report
+
+import asyncio
+import logging
+import multiprocessing
+import statistics
+import time
+
+import numpy as np
+
+from vibration_monitor.channels import RECORD_KEYS
+from vibration_monitor.utils.collector_server import CollectorClient, CollectorServer
+
+
+def _clients_main(port, n_clients, n_batches, batch_size, done_queue):
+    """采集端进程: n_clients 个连接并发发送"""
+    values = np.random.default_rng(0).normal(size=(batch_size, len(RECORD_KEYS))).astype(np.float32)
+
+    async def client(i):
+        connection = CollectorClient("127.0.0.1", port, f"remote-{i}")
+        await connection.connect()
+        timestamps = np.arange(batch_size, dtype=float) * 0.001
+        for _ in range(n_batches):
+            await connection.send_batch(timestamps, values)
+            timestamps = timestamps + batch_size * 0.001
+        await connection.close()
+
+    async def run():
+        await asyncio.gather(*(client(i) for i in range(n_clients)))
+
+    start = time.perf_counter()
+    asyncio.run(run())
+    done_queue.put(time.perf_counter() - start)
+
+
+def bench(n_clients, n_batches, batch_size, timeout):
+    received = []
+    server = CollectorServer("127.0.0.1", 0, on_batch=lambda device, t, v: received.append(len(t)),
+                             max_pending_batches=256)
+    port = server.start()
+    expected = n_clients * n_batches * batch_size
+    done_queue = multiprocessing.Queue()
+    clients = multiprocessing.Process(target=_clients_main,
+                                      args=(port, n_clients, n_batches, batch_size, done_queue))
+    cpu_start = time.process_time()
+    start = time.perf_counter()
+    clients.start()
+    deadline = start + timeout
+    while sum(received) < expected and time.perf_counter() < deadline:
+        time.sleep(0.01)
+    elapsed = time.perf_counter() - start
+    cpu = time.process_time() - cpu_start
+    send_seconds = done_queue.get(timeout=timeout)
+    clients.join(timeout=10)
+    server.stop()
+
+    stats = server.stats()
+    per_connection = [s["samples"] / elapsed for s in stats]
+    samples = sum(received)
+    return result("collector_load", {"clients": n_clients, "batches": n_batches, "batch_size": batch_size}, {
+        "samples": samples,
+        "complete": samples == expected,
+        "seconds": elapsed,
+        "client_send_seconds": send_seconds,
+        "samples_per_s": samples / elapsed,
+        "mb_per_s": sum(s["bytes"] for s in stats) / elapsed / 1e6,
+        "server_cpu_us_per_sample": cpu / samples * 1e6 if samples else None,
+        "connection_samples_per_s_min": min(per_connection) if per_connection else 0,
+        "connection_samples_per_s_median": statistics.median(per_connection) if per_connection else 0,
+        "backpressure_seconds_total": sum(s["backpressure_seconds"] for s in stats),
+        "protocol_errors": sum(s["protocol_errors"] for s in stats),
+        "devices": len(server.devices),
+    })
+
+
+def main(argv=None):
+    parser = argument_parser(__doc__.strip().splitlines()[0])
+    parser.add_argument('--clients', type=int, nargs='+', default=[100, 500])
+    parser.add_argument('--batches', type=int, default=50)
+    parser.add_argument('--batch-size', type=int, default=100)
+    parser.add_argument('--timeout', type=float, default=120.0)
+    args = parser.parse_args(argv)
+    logging.disable(logging.INFO)
+    clients = [min(n, 50) for n in args.clients] if args.quick else args.clients
+    batches = 10 if args.quick else args.batches
+    results = [bench(n, batches, args.batch_size, args.timeout) for n in clients]
+    return write_report("collector", results, args.output)
+
+
+if __name__ == '__main__':
+    main()
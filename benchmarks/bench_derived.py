@@ -0,0 +1,49 @@
+"""
+派生通道基准
+
+DerivedChannels.fill: 设备每解码一帧计算一次全部派生通道 (写入同一采样数组的派生通道列) 的开销;
+extend: 一批远程采样按表达式一次数组运算, 对照逐行用 math.sqrt 计算三轴合成值的直接实现。
+
+运行: python -m benchmarks.bench_derived [--samples 10000 100000]
+"""
+from benchmarks.common import argument_parser, measure, result, write_report
+
+import math
+
+import numpy as np
+
+from vibration_monitor.channels import RECORD_KEYS
+from vibration_monitor.device.derived_channels import DEFAULT_DERIVED_CHANNELS, DerivedChannels
+
+
+def per_row_magnitudes(values):
+    groups = [[RECORD_KEYS.index(key) for key in keys]
+              for keys in (("52", "53", "54"), ("58", "59", "60"), ("65", "66", "67"))]
+    return [[math.sqrt(sum(row[i] * row[i] for i in group)) for group in groups] for row in values.tolist()]
+
+
+def main(argv=None):
+    parser = argument_parser(__doc__.strip().splitlines()[0])
+    parser.add_argument('--samples', type=int, nargs='+', default=[10000, 100000])
+    args = parser.parse_args(argv)
+    min_time = 0.05 if args.quick else 0.3
+    sizes = [2000] if args.quick else args.samples
+    rng = np.random.default_rng(0)
+    derived = DerivedChannels()
+
+    results = []
+    frame = derived.extend(rng.normal(size=len(RECORD_KEYS)))
+    results.append(result("fill_frame", {"channels": len(DEFAULT_DERIVED_CHANNELS)},
+                          measure(lambda: derived.fill(frame), min_time)))
+    for n in sizes:
+        values = rng.normal(size=(n, len(RECORD_KEYS)))
+        params = {"samples": n, "channels": len(DEFAULT_DERIVED_CHANNELS)}
+        results.append(result("evaluate_batch", {**params, "method": "extend"},
+                              measure(lambda: derived.extend(values), min_time)))
+        results.append(result("evaluate_batch", {**params, "method": "per_row_python"},
+                              measure(lambda: per_row_magnitudes(values), min_time, repeat=3)))
+    return write_report("derived", results, args.output)
+
+
+if __name__ == '__main__':
+    main()
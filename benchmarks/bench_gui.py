@@ -0,0 +1,108 @@
+"""
+主窗口刷新基准: 历史长度 (data_length) 为 5k / 100k / 1M 时, 每个定时器周期的耗时
+
+在 offscreen 平台上构造 VibrationMonitorWindow (不启动采集线程, 停掉内部定时器),
+预先把历史缓冲填满到 data_length, 然后分别计时:
+    update_data   一个完整周期 (取数、缓冲追加/淘汰、表格、统计、绘图)
+    update_plots  仅 12 条曲线的 setData
+    render        update_plots 之后强制重绘一帧 (grab)
+    open_analysis 打开高级分析窗口 (把历史缓冲交给分析窗口, 不含首次创建窗口)
+
+运行: python -m benchmarks.bench_gui [--lengths 5000 100000 1000000]
+"""
+from benchmarks.common import argument_parser, measure, result, write_report
+
+import logging
+import os
+
+import numpy as np
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt5.QtWidgets import QApplication
+
+from vibration_monitor.channels import record_values
+from vibration_monitor.device.device_model import DeviceModel
+from vibration_monitor.device.simulator import SimulatedWTVB01
+from vibration_monitor.gui.main_window import VibrationMonitorWindow
+from vibration_monitor.history_store import HistoryStore
+
+
+class _StaticDevice(DeviceModel):
+    """只提供最新数据的设备, 数据来自仿真器的一个采样点"""
+
+    def __init__(self):
+        super().__init__("bench", "sim://", 0, 0x50)
+        self.values[:] = record_values(SimulatedWTVB01(seed=0).sample(0.0))
+
+    def open_device(self):
+        self.is_open = True
+
+    def close_device(self):
+        self.is_open = False
+
+    def start_data_acquisition(self):
+        pass
+
+    def stop_data_acquisition(self):
+        pass
+
+    def read_data(self):
+        pass
+
+
+def prefill(window, length):
+    """把历史缓冲填满到 length (与运行了 length 个周期之后的状态相同)"""
+    window.data_length = length
+    window.history = HistoryStore(length, window.history.channels)
+    samples = np.arange(length)
+    window.history.extend(samples * 0.05, np.tile((samples % 100).astype(float), (len(window.history.channels), 1)))
+    window.update_plots()
+
+
+def main(argv=None):
+    parser = argument_parser(__doc__.strip().splitlines()[0])
+    parser.add_argument('--lengths', type=int, nargs='+', default=[5000, 100000, 1000000])
+    args = parser.parse_args(argv)
+    min_time = 0.1 if args.quick else 0.5
+    logging.disable(logging.WARNING)
+
+    app = QApplication.instance() or QApplication([])
+    window = VibrationMonitorWindow(_StaticDevice())
+    window.update_timer.stop()
+    window.device.open_device()  # 设备未打开时 update_data 直接返回
+    window.resize(1600, 900)
+    window.show()
+    app.processEvents()
+
+    results = []
+    for length in args.lengths:
+        prefill(window, length)
+        # 1M 点时单次重绘可达数秒, 每轮只调用一次
+        max_calls = 1 if length >= 1000000 else None
+        repeat = 3 if length >= 100000 else 5
+
+        def render():
+            window.update_plots()
+            window.grab()
+
+        window.open_analysis_window()  # 首次创建分析窗口 (导入 scipy) 不计入
+        window.analysis_window.hide()
+
+        def open_analysis():
+            window.open_analysis_window()
+            window.analysis_window.hide()
+
+        for name, func in (("update_data", window.update_data),
+                           ("update_plots", window.update_plots),
+                           ("render", render),
+                           ("open_analysis", open_analysis)):
+            stats = measure(func, min_time=min_time, repeat=repeat, max_calls=max_calls)
+            stats["ticks_per_s"] = 1e6 / stats["best_us"]
+            results.append(result(name, {"data_length": length}, stats))
+    window.hide()  # close() 会弹出退出确认框
+    return write_report("gui", results, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""
+历史缓冲写入基准
+
+以主窗口原来的历史数据结构 (13 个通道 + 时间戳, 每个一个 list, 满后 pop(0)) 为基线,
+测量缓冲已满时每追加一个采样点的耗时; 同时给出 deque(maxlen)、numpy 环形缓冲和
+主窗口现在使用的 history_store.HistoryStore 作为对照。
+
+运行: python -m benchmarks.bench_ingest [--lengths 5000 100000 1000000]
+"""
+from benchmarks.common import argument_parser, measure, result, write_report
+
+from collections import deque
+
+import numpy as np
+
+from vibration_monitor.history_store import HistoryStore
+
+N_SERIES = 14  # 时间戳 + 13 个通道
+
+
+class ListHistory:
+    """VibrationMonitorWindow.update_data 原来的 list + pop(0) 写法"""
+
+    def __init__(self, length):
+        self.length = length
+        self.series = [[0.0] * length for _ in range(N_SERIES)]
+
+    def append(self, values):
+        for series, value in zip(self.series, values):
+            series.append(value)
+        if len(self.series[0]) > self.length:
+            for series in self.series:
+                series.pop(0)
+
+
+class DequeHistory:
+    def __init__(self, length):
+        self.series = [deque([0.0] * length, maxlen=length) for _ in range(N_SERIES)]
+
+    def append(self, values):
+        for series, value in zip(self.series, values):
+            series.append(value)
+
+
+class RingHistory:
+    def __init__(self, length):
+        self.data = np.zeros((N_SERIES, length))
+        self.index = 0
+
+    def append(self, values):
+        self.data[:, self.index] = values
+        self.index = (self.index + 1) % self.data.shape[1]
+
+
+class StoreHistory:
+    def __init__(self, length):
+        self.store = HistoryStore(length)
+        self.store.extend(np.zeros(length), np.zeros((len(self.store.channels), length)))
+
+    def append(self, values):
+        self.store.append(values[0], values[1:])
+
+
+IMPLEMENTATIONS = {"list_pop0": ListHistory, "deque": DequeHistory, "numpy_ring": RingHistory,
+                   "history_store": StoreHistory}
+
+
+def main(argv=None):
+    parser = argument_parser(__doc__.strip().splitlines()[0])
+    parser.add_argument('--lengths', type=int, nargs='+', default=[5000, 100000, 1000000])
+    args = parser.parse_args(argv)
+    min_time = 0.05 if args.quick else 0.3
+    values = [float(i) for i in range(N_SERIES)]
+
+    results = []
+    for length in args.lengths:
+        for name, implementation in IMPLEMENTATIONS.items():
+            history = implementation(length)
+            stats = measure(lambda: history.append(values), min_time=min_time, repeat=3)
+            stats["samples_per_s"] = 1e6 / stats["best_us"]
+            results.append(result("history_append", {"impl": name, "data_length": length}, stats))
+    return write_report("ingest", results, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+CRC 与拆帧吞吐基准
+
+字节流由 SimulatedWTVB01 生成 (真实帧格式和 CRC), 分别测量:
+CRC 计算、FrameParser 拆帧 (无错误 / 1% CRC 错误 / 0.1% 丢字节)、
+以及 DeviceWTVB01._on_data_received 的完整路径 (拆帧 + 寄存器解析 + 写入 data)。
+
+运行: python -m benchmarks.bench_parsing [--output results/parsing.json]
+"""
+from benchmarks.common import argument_parser, measure, result, write_report
+
+import logging
+
+from vibration_monitor.device import wtvb01_protocol as protocol
+from vibration_monitor.device.device_wtvb01 import DeviceWTVB01
+from vibration_monitor.device.simulator import SimulatedWTVB01
+
+ADDRESS = 0x50
+N_FRAMES = 2000
+
+STREAMS = {
+    "clean": dict(),
+    "crc_error_1pct": dict(crc_error_rate=0.01),
+    "byte_drop_0.1pct": dict(byte_drop_rate=0.001),
+}
+
+
+def bench_crc(min_time):
+    frame = list(SimulatedWTVB01(ADDRESS, seed=0).next_frame())
+    stats = measure(lambda: protocol.get_crc(frame, len(frame) - 2), min_time=min_time)
+    stats["mb_per_s"] = (len(frame) - 2) / stats["best_us"]
+    return result("crc", {"frame_bytes": len(frame)}, stats)
+
+
+def bench_parser(stream_name, options, min_time):
+    stream = SimulatedWTVB01(ADDRESS, seed=0, **options).generate_stream(N_FRAMES)
+    chunk = protocol.read_response_length(protocol.DATA_REG_COUNT)
+
+    def run():
+        parser = protocol.FrameParser(ADDRESS)
+        for i in range(0, len(stream), chunk):
+            parser.feed(stream[i:i + chunk])
+
+    stats = measure(run, min_time=min_time, repeat=3)
+    stats["frames_per_s"] = N_FRAMES / stats["best_us"] * 1e6
+    stats["mb_per_s"] = len(stream) / stats["best_us"]
+    return result("frame_parser", {"stream": stream_name, "frames": N_FRAMES}, stats)
+
+
+def bench_device_receive(min_time):
+    stream = SimulatedWTVB01(ADDRESS, seed=0).generate_stream(N_FRAMES)
+    chunk = protocol.read_response_length(protocol.DATA_REG_COUNT)
+    device = DeviceWTVB01("bench", "sim://", 0, ADDRESS)
+
+    def run():
+        for i in range(0, len(stream), chunk):
+            device._on_data_received(stream[i:i + chunk])
+
+    stats = measure(run, min_time=min_time, repeat=3)
+    stats["frames_per_s"] = N_FRAMES / stats["best_us"] * 1e6
+    return result("device_on_data_received", {"frames": N_FRAMES}, stats)
+
+
+def main(argv=None):
+    args = argument_parser(__doc__.strip().splitlines()[0]).parse_args(argv)
+    logging.disable(logging.WARNING)  # CRC/重同步告警不计入拆帧耗时
+    min_time = 0.05 if args.quick else 0.3
+    results = [bench_crc(min_time)]
+    for name, options in STREAMS.items():
+        results.append(bench_parser(name, options, min_time))
+    results.append(bench_device_receive(min_time))
+    return write_report("parsing", results, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+分析流水线基准
+
+模拟分析窗口的交互: 滤波后改变 FFT 窗函数时, 流水线只重新计算加窗和频谱 (重采样、滤波取缓存),
+对照每次从原始数据重新重采样、滤波、加窗和 FFT 的直接实现; 另测数据和参数都未变化时 (实时刷新) 一次缓存命中的开销。
+
+运行: python -m benchmarks.bench_pipeline [--samples 5000 100000]
+"""
+from benchmarks.common import argument_parser, measure, result, write_report
+
+import itertools
+import logging
+
+import numpy as np
+from scipy.signal import filtfilt, get_window
+
+from vibration_monitor import data_analysis
+from vibration_monitor.analysis_pipeline import default_pipeline
+from vibration_monitor.resampling import to_uniform
+
+WINDOWS = ('boxcar', 'hann', 'hamming', 'flattop')
+
+
+def direct_spectrum(t, x, window):
+    uniform = to_uniform(t, x)
+    b, a = data_analysis.design_filter('低通', 10.0, uniform.fs, 4)
+    values = filtfilt(b, a, uniform.values) * get_window(window, len(uniform.values))
+    return data_analysis.amplitude_spectrum(values, uniform.fs)
+
+
+def main(argv=None):
+    parser = argument_parser(__doc__.strip().splitlines()[0])
+    parser.add_argument('--samples', type=int, nargs='+', default=[5000, 100000])
+    args = parser.parse_args(argv)
+    logging.disable(logging.WARNING)
+    min_time = 0.05 if args.quick else 0.3
+    sizes = [2000] if args.quick else args.samples
+    rng = np.random.default_rng(0)
+
+    results = []
+    for n in sizes:
+        t = np.arange(n) / 50.0 + rng.uniform(-0.002, 0.002, n)  # 带抖动, 需要重采样
+        x = np.sin(2 * np.pi * 5 * t) + rng.normal(size=n)
+        pipeline = default_pipeline()
+        pipeline.set_source('signal', (t, x), key=('bench', n))
+        pipeline.set_params('filter', filter_type='低通', cutoff=10.0, order=4)
+        windows = itertools.cycle(WINDOWS)
+
+        def change_window():
+            pipeline.set_params('filtered_window', window=next(windows))
+            return pipeline.compute('filtered_spectrum')
+
+        def direct():
+            return direct_spectrum(t, x, next(windows))
+
+        params = {"samples": n}
+        # 缓存只保留 3 个结果: 四种窗函数轮换时加窗和频谱每次都要重新计算, 上游 (滤波后去趋势) 的结果命中缓存
+        pipeline.max_entries = 3
+        results.append(result("change_window", {**params, "method": "pipeline"},
+                              measure(change_window, min_time)))
+        results.append(result("change_window", {**params, "method": "recompute_all"},
+                              measure(direct, min_time)))
+        pipeline.max_entries = 64
+        pipeline.compute('filtered_spectrum')
+        results.append(result("unchanged_refresh", params,
+                              measure(lambda: pipeline.compute('filtered_spectrum'), min_time)))
+    return write_report("pipeline", results, args.output)
+
+
+if __name__ == '__main__':
+    main()
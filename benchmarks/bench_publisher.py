@@ -0,0 +1,120 @@
+"""
+实时数据发布基准
+
+测量采集线程一侧的开销 (每个采样调用一次 RemoteDevice.ingest, 与实际设备的单点通知相同):
+无订阅者、一个正常订阅者、以及同时存在一个不读取数据的慢订阅者时, 单次通知耗时应基本不变;
+同时统计正常订阅者收到的采样数和慢订阅者的丢帧数。
+
+运行: python -m benchmarks.bench_publisher [--samples 20000] [--rate 2000]
+"""
+from benchmarks.common import argument_parser, result, write_report
+
+import asyncio
+import logging
+import threading
+import time
+
+import numpy as np
+
+from vibration_monitor.channels import RECORD_KEYS
+from vibration_monitor.device.remote_device import RemoteDevice
+from vibration_monitor.utils.publisher import SamplePublisher, SampleSubscriber
+
+
+class _Consumer(threading.Thread):
+    """在独立事件循环中运行的订阅者, read=False 时连接后不再读取 (模拟卡住的下游)"""
+
+    def __init__(self, address, read=True):
+        super().__init__(daemon=True)
+        self.address = address
+        self.read = read
+        self.samples = 0
+        self.connected = threading.Event()
+        self._stopped = None
+        self._loop = None
+
+    def run(self):
+        self._loop = asyncio.new_event_loop()
+        self._loop.run_until_complete(self._main())
+        self._loop.close()
+
+    async def _main(self):
+        self._stopped = asyncio.Event()
+        subscriber = SampleSubscriber(self.address)
+        await subscriber.connect()
+        self.connected.set()
+        if self.read:
+            reader = asyncio.ensure_future(self._consume(subscriber))
+            await self._stopped.wait()
+            reader.cancel()
+            await asyncio.gather(reader, return_exceptions=True)
+        else:
+            await self._stopped.wait()
+        await subscriber.close()
+
+    async def _consume(self, subscriber):
+        async for _, timestamps, _ in subscriber.frames():
+            self.samples += len(timestamps)
+
+    def stop(self):
+        self._loop.call_soon_threadsafe(self._stopped.set)
+        self.join(timeout=5)
+
+
+def bench(case, n_samples, rate, quick):
+    publisher = SamplePublisher("tcp://127.0.0.1:0", batch_interval=0.02, max_pending_frames=16)
+    device = RemoteDevice("bench")
+    publisher.attach(device)
+    address = publisher.start()
+    consumers = []
+    if case in ("subscriber", "slow_subscriber"):
+        consumers.append(_Consumer(address))
+    if case == "slow_subscriber":
+        consumers.append(_Consumer(address, read=False))
+    for consumer in consumers:
+        consumer.start()
+        consumer.connected.wait(5)
+    time.sleep(0.1)  # 等待订阅请求被服务器处理
+
+    values = np.random.default_rng(0).normal(size=(1, len(RECORD_KEYS)))
+    period = 1.0 / rate
+    durations = np.empty(n_samples)
+    next_time = time.perf_counter()
+    for i in range(n_samples):
+        start = time.perf_counter()
+        device.ingest(np.array([start]), values)
+        durations[i] = time.perf_counter() - start
+        next_time += period
+        wait = next_time - time.perf_counter()
+        if wait > 0 and not quick:
+            time.sleep(wait)
+    time.sleep(0.3)  # 让最后一批发送出去
+
+    stats = publisher.stats()
+    for consumer in consumers:
+        consumer.stop()
+    publisher.stop()
+    durations_us = durations * 1e6
+    return result("publish_notify", {"case": case, "samples": n_samples, "rate": rate}, {
+        "notify_mean_us": float(durations_us.mean()),
+        "notify_p99_us": float(np.percentile(durations_us, 99)),
+        "notify_max_us": float(durations_us.max()),
+        "received_samples": consumers[0].samples if consumers else 0,
+        "dropped_frames": sum(s["frames_dropped"] for s in stats),
+    })
+
+
+def main(argv=None):
+    parser = argument_parser(__doc__.strip().splitlines()[0])
+    parser.add_argument('--samples', type=int, default=20000)
+    parser.add_argument('--rate', type=float, default=2000.0, help='每秒通知次数')
+    args = parser.parse_args(argv)
+    logging.disable(logging.INFO)
+    n_samples = 2000 if args.quick else args.samples
+    results = [bench(case, n_samples, args.rate, args.quick)
+               for case in ("no_subscriber", "subscriber", "slow_subscriber")]
+    return write_report("publisher", results, args.output)
+
+
+if __name__ == '__main__':
+    main()
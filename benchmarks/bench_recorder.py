@@ -0,0 +1,53 @@
+"""
+DataRecorder 写入吞吐基准: 分别测量每种刷新策略下 write_data 的耗时
+
+运行: python -m benchmarks.bench_recorder [--rows 20000]
+"""
+from benchmarks.common import argument_parser, result, write_report
+
+import logging
+import os
+import tempfile
+import time
+
+from vibration_monitor.data_recorder import FLUSH_POLICIES, DataRecorder
+
+
+class _StubDevice:
+    device_name = "bench"
+
+
+def bench_policy(policy, rows, data_dir):
+    recorder = DataRecorder(_StubDevice(), flush_policy=policy, flush_interval=1.0)
+    recorder.data_dir = data_dir
+    recorder.start_recording()
+    values = [0.1 * i for i in range(16)]
+    start = time.perf_counter()
+    for _ in range(rows):
+        recorder.write_data(values)
+    write_elapsed = time.perf_counter() - start
+    recorder.stop_recording()
+    total_elapsed = time.perf_counter() - start
+    size = os.path.getsize(recorder.filename)
+    os.remove(recorder.filename)
+    return result("recorder_write", {"flush_policy": policy, "rows": rows}, {
+        "us_per_row": write_elapsed / rows * 1e6,
+        "rows_per_s": rows / write_elapsed,
+        "total_seconds_incl_close": total_elapsed,
+        "file_bytes": size,
+    })
+
+
+def main(argv=None):
+    parser = argument_parser(__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=20000)
+    args = parser.parse_args(argv)
+    rows = 2000 if args.quick else args.rows
+    logging.disable(logging.INFO)
+    with tempfile.TemporaryDirectory() as data_dir:
+        results = [bench_policy(policy, rows, data_dir) for policy in FLUSH_POLICIES]
+    return write_report("recorder", results, args.output)
+
+
+if __name__ == '__main__':
+    main()
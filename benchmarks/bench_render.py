@@ -0,0 +1,117 @@
+"""
+曲线绘制基准: 多设备看板的帧率与曲线数的关系
+
+每台设备 4 个图、12 条曲线 (同主窗口), 每帧更新全部曲线数据后强制重绘 (grab), 帧率 = 1 / 每帧耗时。
+    grid          全部设备同时显示 (网格)
+    tabs_all      每台设备一个选项卡, 更新所有设备的曲线 (只有当前选项卡会被绘制)
+    tabs_visible  同上, 但只更新显示中的图 (plot_render.is_shown)
+绘制方式为 plot_render.RENDER_MODES; 无法创建 OpenGL 上下文时 (如 offscreen 平台) opengl 退回 fast,
+结果中 opengl 参数记录实际是否使用了 OpenGL。Linux 上可在有 Mesa 的 X 会话中运行
+(QT_QPA_PLATFORM=xcb LIBGL_ALWAYS_SOFTWARE=1) 测量软件 OpenGL。
+
+运行: python -m benchmarks.bench_render [--devices 1 2 4 8] [--points 5000]
+"""
+from benchmarks.common import argument_parser, measure, result, write_report
+
+import logging
+import os
+
+import numpy as np
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import pyqtgraph as pg
+from PyQt5.QtWidgets import QApplication, QGridLayout, QTabWidget, QWidget
+
+from vibration_monitor.gui.plot_render import RENDER_MODES, RenderSettings, is_shown
+
+PLOTS_PER_DEVICE = 4
+CURVES_PER_PLOT = 3
+COLORS = ('r', 'g', 'b')
+
+
+def device_panel(settings):
+    """一台设备的 4 个图 (2 x 2), 返回 (部件, [(图, [曲线...]), ...])"""
+    panel = QWidget()
+    layout = QGridLayout(panel)
+    plots = []
+    for i in range(PLOTS_PER_DEVICE):
+        plot = pg.PlotWidget()
+        plot.setBackground('w')
+        settings.setup_plot(plot)
+        curves = [plot.plot(pen=settings.pen(color)) for color in COLORS[:CURVES_PER_PLOT]]
+        layout.addWidget(plot, i // 2, i % 2)
+        plots.append((plot, curves))
+    return panel, plots
+
+
+def dashboard(settings, devices, tabs):
+    """多设备看板 (网格或选项卡), 返回 (顶层部件, 全部 (图, 曲线) )"""
+    if tabs:
+        root = QTabWidget()
+    else:
+        root = QWidget()
+        layout = QGridLayout(root)
+    columns = int(np.ceil(np.sqrt(devices)))
+    plots = []
+    for d in range(devices):
+        panel, panel_plots = device_panel(settings)
+        if tabs:
+            root.addTab(panel, f"设备{d + 1}")
+        else:
+            layout.addWidget(panel, d // columns, d % columns)
+        plots.extend(panel_plots)
+    root.resize(1600, 900)
+    root.show()
+    return root, plots
+
+
+def main(argv=None):
+    parser = argument_parser(__doc__.strip().splitlines()[0])
+    parser.add_argument('--devices', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--points', type=int, default=5000, help='每条曲线的点数')
+    args = parser.parse_args(argv)
+    min_time = 0.1 if args.quick else 0.5
+    device_counts = [1, 4] if args.quick else args.devices
+    points = 2000 if args.quick else args.points
+    logging.disable(logging.WARNING)
+
+    app = QApplication.instance() or QApplication([])
+    rng = np.random.default_rng(0)
+    timestamps = np.arange(points) * 0.05
+    source = np.sin(np.arange(points + 100) * 0.05) + rng.normal(scale=0.1, size=points + 100)
+
+    results = []
+    for mode in RENDER_MODES:
+        settings = RenderSettings(mode)
+        for devices in device_counts:
+            for layout in ('grid', 'tabs_all', 'tabs_visible'):
+                root, plots = dashboard(settings, devices, tabs=layout != 'grid')
+                app.processEvents()
+                frame = [0]
+                only_visible = layout == 'tabs_visible'
+
+                def render():
+                    offset = frame[0] % 100
+                    frame[0] += 1
+                    series = source[offset:offset + points]
+                    for plot, curves in plots:
+                        if only_visible and not is_shown(plot):
+                            continue
+                        for curve in curves:
+                            curve.setData(timestamps, series)
+                    root.grab()
+
+                stats = measure(render, min_time=min_time, repeat=3)
+                stats["fps"] = 1e6 / stats["median_us"]
+                params = {"mode": mode, "opengl": settings.use_opengl, "layout": layout, "devices": devices,
+                          "curves": devices * PLOTS_PER_DEVICE * CURVES_PER_PLOT, "points": points}
+                results.append(result("frame", params, stats))
+                root.close()
+                root.deleteLater()
+                app.processEvents()
+    return write_report("render", results, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""
+均匀网格重采样基准
+
+resample_uniform 把带抖动和丢帧的采样插值到均匀网格 (插值权重所有通道共用, 同时给出间断标志),
+对照逐通道调用 np.interp 再单独检测间断的直接实现; 另测已均匀数据走 to_uniform 的开销。
+
+运行: python -m benchmarks.bench_resampling [--samples 10000 100000] [--channels 13]
+"""
+from benchmarks.common import argument_parser, measure, result, write_report
+
+import numpy as np
+
+from vibration_monitor.resampling import resample_uniform, sample_rate, to_uniform
+
+
+def make_samples(n, channels, fs=20.0):
+    rng = np.random.default_rng(0)
+    t = np.sort(np.arange(n) / fs + rng.uniform(-0.2, 0.2, n) / fs)
+    keep = np.ones(n, dtype=bool)
+    keep[rng.choice(n, n // 100, replace=False)] = False  # 约 1% 丢帧
+    return t[keep], rng.normal(size=(channels, int(keep.sum())))
+
+
+def direct_resample(t, values):
+    fs = sample_rate(t)
+    grid = t[0] + np.arange(int((t[-1] - t[0]) * fs) + 1) / fs
+    resampled = np.vstack([np.interp(grid, t, row) for row in values])
+    index = np.clip(np.searchsorted(t, grid, side='right'), 1, len(t) - 1)
+    valid = (t[index] - t[index - 1]) <= 2.5 / fs
+    return grid, resampled, valid
+
+
+def main(argv=None):
+    parser = argument_parser(__doc__.strip().splitlines()[0])
+    parser.add_argument('--samples', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--channels', type=int, default=13)
+    args = parser.parse_args(argv)
+    min_time = 0.05 if args.quick else 0.3
+    sizes = [2000] if args.quick else args.samples
+
+    results = []
+    for n in sizes:
+        t, values = make_samples(n, args.channels)
+        params = {"samples": n, "channels": args.channels}
+        results.append(result("resample", {**params, "method": "resample_uniform"},
+                              measure(lambda: resample_uniform(t, values), min_time)))
+        results.append(result("resample", {**params, "method": "interp_per_channel"},
+                              measure(lambda: direct_resample(t, values), min_time)))
+        uniform_t = np.arange(n) / 20.0
+        uniform_values = np.zeros((args.channels, n))
+        results.append(result("to_uniform_passthrough", params,
+                              measure(lambda: to_uniform(uniform_t, uniform_values), min_time)))
+    return write_report("resampling", results, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""
+振动烈度评估基准
+
+SeverityEvaluator.evaluate 每个采样的耗时 (增量更新窗口 RMS 并分区), 设备数从 1 到数百 (每台 3 个速度通道),
+对照每次对整个窗口重新计算 RMS 的直接实现。
+
+运行: python -m benchmarks.bench_severity [--devices 1 100 300] [--window 200]
+"""
+from benchmarks.common import argument_parser, measure, result, write_report
+
+import logging
+
+import numpy as np
+
+from vibration_monitor.channels import CHANNEL_NAMES
+from vibration_monitor.severity import MACHINE_CLASSES, SeverityEvaluator
+
+
+class RecomputeSeverity:
+    """直接实现: 保存窗口内原始数据, 每次重新求 RMS"""
+
+    def __init__(self, devices, window):
+        self.buffer = np.full((window, devices, 3), np.nan)
+        self.position = 0
+        self.limits = np.array(MACHINE_CLASSES['II'])
+        self.columns = [CHANNEL_NAMES.index(name) for name in ('speed_x', 'speed_y', 'speed_z')]
+
+    def evaluate(self, values, timestamp):
+        self.buffer[self.position] = values[:, self.columns]
+        self.position = (self.position + 1) % len(self.buffer)
+        rms = np.sqrt(np.nanmean(self.buffer ** 2, axis=0))
+        return (rms[:, :, None] >= self.limits).sum(axis=2)
+
+
+def main(argv=None):
+    parser = argument_parser(__doc__.strip().splitlines()[0])
+    parser.add_argument('--devices', type=int, nargs='+', default=[1, 100, 300])
+    parser.add_argument('--window', type=int, default=200)
+    args = parser.parse_args(argv)
+    logging.disable(logging.WARNING)
+    min_time = 0.05 if args.quick else 0.3
+    rng = np.random.default_rng(0)
+
+    results = []
+    for devices in args.devices:
+        names = [f"device_{i}" for i in range(devices)]
+        rows = rng.normal(scale=2.0, size=(256, devices, len(CHANNEL_NAMES)))
+        params = {"devices": devices, "channels": devices * 3, "window": args.window}
+        for method, evaluator in (("incremental", SeverityEvaluator(names, window=args.window)),
+                                  ("recompute", RecomputeSeverity(devices, args.window))):
+            counter = iter(range(1 << 62))
+
+            def step():
+                i = next(counter)
+                return evaluator.evaluate(rows[i % len(rows)], float(i))
+
+            results.append(result("severity_evaluate", {**params, "method": method}, measure(step, min_time)))
+    return write_report("severity", results, args.output)
+
+
+if __name__ == '__main__':
+    main()
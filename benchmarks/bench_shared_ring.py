@@ -0,0 +1,63 @@
+"""
+共享内存采样缓冲区基准
+
+对比工作进程获取一个分析窗口的两种方式: 从 SampleRing 取只读视图 (零复制) 与经 pickle 序列化/反序列化
+(multiprocessing.Queue 传数组时的开销下限); 另测写入端每个采样的写入耗时。
+
+运行: python -m benchmarks.bench_shared_ring [--windows 1024 16384]
+"""
+from benchmarks.common import argument_parser, measure, result, write_report
+
+import logging
+import pickle
+
+import numpy as np
+
+from vibration_monitor.channels import RECORD_KEYS
+from vibration_monitor.utils.shared_ring import SampleRing, SampleRingReader
+
+
+def main(argv=None):
+    parser = argument_parser(__doc__.strip().splitlines()[0])
+    parser.add_argument('--windows', type=int, nargs='+', default=[1024, 16384])
+    args = parser.parse_args(argv)
+    logging.disable(logging.INFO)
+    min_time = 0.05 if args.quick else 0.3
+    channels = len(RECORD_KEYS)
+    ring = SampleRing(capacity=65536, channels=channels)
+    reader = SampleRingReader(ring.name)
+    rng = np.random.default_rng(0)
+    ring.write(np.arange(60000, dtype=float), rng.normal(size=(60000, channels)))
+
+    results = []
+    one_ts = np.zeros(1)
+    one_values = rng.normal(size=(1, channels))
+    results.append(result("ring_write", {"batch": 1}, measure(lambda: ring.write(one_ts, one_values), min_time)))
+    batch_ts = np.zeros(100)
+    batch_values = rng.normal(size=(100, channels))
+    results.append(result("ring_write", {"batch": 100}, measure(lambda: ring.write(batch_ts, batch_values), min_time)))
+
+    for window in args.windows:
+        def ring_view():
+            start, segments = reader.latest(window)
+            total = sum(float(values[:, 0].sum()) for _, values in segments)  # 触及数据, 与实际分析相同
+            return reader.valid(start), total
+
+        timestamps, values = reader.latest_array(window)
+
+        def pickled():
+            data = pickle.loads(pickle.dumps((timestamps, values), protocol=pickle.HIGHEST_PROTOCOL))
+            return float(data[1][:, 0].sum())
+
+        results.append(result("window_transfer", {"method": "shared_ring_view", "window": window},
+                              measure(ring_view, min_time)))
+        results.append(result("window_transfer", {"method": "pickle", "window": window},
+                              measure(pickled, min_time)))
+    del timestamps, values
+    reader.close()
+    ring.close()
+    return write_report("shared_ring", results, args.output)
+
+
+if __name__ == '__main__':
+    main()
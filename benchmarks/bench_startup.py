@@ -0,0 +1,108 @@
+"""
+冷启动基准
+
+* import_main:    `python -X importtime -c "import vibration_monitor.main"` 的累计导入耗时,
+                  以及自身耗时最多的模块、是否已加载 scipy / 分析窗口
+* first_window:   从启动解释器到主窗口第一次绘制完成的墙钟时间 (offscreen 平台,
+                  使用未打开的仿真设备, 不计设备连接时间)
+
+每项在新进程中重复运行 --runs 次, 取中位数。
+
+运行: python -m benchmarks.bench_startup [--runs 5]
+"""
+from benchmarks.common import ROOT_DIR, SRC_DIR, argument_parser, result, write_report
+
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+FIRST_WINDOW_SCRIPT = """
+import sys
+from PyQt5.QtWidgets import QApplication
+import vibration_monitor.main
+from vibration_monitor.device.device_wtvb01 import DeviceWTVB01
+from vibration_monitor.gui.main_window import VibrationMonitorWindow
+app = QApplication(sys.argv)
+window = VibrationMonitorWindow(DeviceWTVB01("bench", "sim://", 0, 0x50))
+window.update_timer.stop()
+window.show()
+app.processEvents()
+print("shown", flush=True)
+print(int("scipy" in sys.modules))
+"""
+
+
+def _env():
+    env = dict(os.environ)
+    env["PYTHONPATH"] = SRC_DIR + os.pathsep + env.get("PYTHONPATH", "")
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    return env
+
+
+def parse_importtime(stderr: str):
+    """解析 -X importtime 输出, 返回 {模块: (自身耗时 us, 累计耗时 us)}"""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def bench_import(runs: int, top: int):
+    totals = []
+    modules = {}
+    for _ in range(runs):
+        completed = subprocess.run([sys.executable, "-X", "importtime", "-c", "import vibration_monitor.main"],
+                                   cwd=ROOT_DIR, env=_env(), capture_output=True, text=True, timeout=120)
+        modules = parse_importtime(completed.stderr)
+        totals.append(modules["vibration_monitor.main"][1])
+    slowest = sorted(modules.items(), key=lambda item: item[1][0], reverse=True)[:top]
+    return result("import_main", {}, {
+        "median_ms": statistics.median(totals) / 1000,
+        "best_ms": min(totals) / 1000,
+        "modules": len(modules),
+        "scipy_loaded": any(name == "scipy" or name.startswith("scipy.") for name in modules),
+        "analysis_window_loaded": "vibration_monitor.gui.analysis_window" in modules,
+        "slowest_self_ms": {name: self_us / 1000 for name, (self_us, _) in slowest},
+    })
+
+
+def bench_first_window(runs: int):
+    timings = []
+    scipy_loaded = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        process = subprocess.Popen([sys.executable, "-c", FIRST_WINDOW_SCRIPT], cwd=ROOT_DIR, env=_env(),
+                                   stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+        try:
+            for line in process.stdout:
+                if line.strip() == "shown":
+                    timings.append(time.perf_counter() - start)
+                    scipy_loaded = process.stdout.readline().strip() == "1"
+                    break
+        finally:
+            process.kill()
+            process.wait()
+    return result("first_window", {}, {
+        "median_ms": statistics.median(timings) * 1000 if timings else None,
+        "best_ms": min(timings) * 1000 if timings else None,
+        "scipy_loaded": scipy_loaded,
+    })
+
+
+def main(argv=None):
+    parser = argument_parser(__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10, help='列出自身导入耗时最多的模块数')
+    args = parser.parse_args(argv)
+    runs = 2 if args.quick else args.runs
+    results = [bench_import(runs, args.top), bench_first_window(runs)]
+    return write_report("startup", results, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+长期趋势存储基准
+
+写入: TrendStore.append 每批采样的耗时 (20 Hz 设备每 50 ms 一批, 含三级汇总和追加写文件)。
+查询: 生成 --days 天的趋势 (每 --interval 秒一个采样), 按 max_points 查询整个范围 (选用小时级),
+对照强制读取分钟级, 以及从原始采样文件 (.npy) 读取后按小时重新汇总的直接实现。
+
+运行: python -m benchmarks.bench_trend [--days 365] [--interval 60]
+"""
+from benchmarks.common import argument_parser, measure, result, write_report
+
+import logging
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from vibration_monitor.channels import RECORD_KEYS
+from vibration_monitor.trend_store import TrendStore
+
+START = 1_700_000_000.0
+
+
+def raw_hourly_mean(path, start, end):
+    """直接实现: 读取全部原始采样, 按小时求均值"""
+    data = np.load(path)
+    timestamps, values = data[:, 0], data[:, 1:]
+    selected = (timestamps >= start) & (timestamps < end)
+    timestamps, values = timestamps[selected], values[selected]
+    hours = np.floor(timestamps / 3600).astype(np.int64)
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(hours)) + 1))
+    counts = np.diff(np.append(starts, len(hours)))[:, None]
+    return np.add.reduceat(values, starts) / counts
+
+
+def main(argv=None):
+    parser = argument_parser(__doc__.strip().splitlines()[0])
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--interval', type=float, default=60.0, help='生成历史数据时的采样间隔 (秒)')
+    parser.add_argument('--max-points', type=int, default=2000)
+    args = parser.parse_args(argv)
+    logging.disable(logging.WARNING)
+    min_time = 0.05 if args.quick else 0.3
+    days = 30 if args.quick else args.days
+    rng = np.random.default_rng(0)
+    channels = len(RECORD_KEYS)
+    directory = tempfile.mkdtemp(prefix='bench_trend_')
+    results = []
+    try:
+        # 写入: 20 Hz, 每批 1 个采样 (逐包回调) 或 20 个采样 (1 秒)
+        for batch in (1, 20):
+            store = TrendStore(os.path.join(directory, f'ingest_{batch}'))
+            values = rng.normal(size=(batch, channels))
+            counter = iter(range(1 << 62))
+
+            def step():
+                i = next(counter)
+                store.append('device', START + (i * batch + np.arange(batch)) / 20.0, values)
+
+            results.append(result("trend_append", {"batch": batch},
+                                  measure(step, min_time)))
+            store.close()
+
+        # 查询: 生成长期数据, 每天一批写入
+        store = TrendStore(os.path.join(directory, 'history'), retention={1: 30})
+        per_day = int(86400 / args.interval)
+        raw = []
+        for day in range(days):
+            timestamps = START + (day * per_day + np.arange(per_day)) * args.interval
+            values = rng.normal(size=(per_day, channels))
+            store.append('device', timestamps, values)
+            raw.append(np.column_stack([timestamps, values]))
+        store.close()
+        raw_path = os.path.join(directory, 'raw.npy')
+        np.save(raw_path, np.concatenate(raw))
+        end = START + days * 86400
+        params = {"days": days, "interval_s": args.interval, "max_points": args.max_points}
+        trend = store.query('device', START, end, max_points=args.max_points)
+        results.append(result("trend_query", {**params, "method": f"level_{trend.level}s", "points": len(trend.time)},
+                              measure(lambda: store.query('device', START, end, max_points=args.max_points),
+                                      min_time)))
+        minutes = store.query('device', START, end, resolution=60)
+        results.append(result("trend_query", {**params, "method": f"level_{minutes.level}s",
+                                              "points": len(minutes.time)},
+                              measure(lambda: store.query('device', START, end, resolution=60), min_time, repeat=3)))
+        results.append(result("trend_query", {**params, "method": "raw_npy_reaggregate"},
+                              measure(lambda: raw_hourly_mean(raw_path, START, end), min_time, repeat=3)))
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    return write_report("trend", results, args.output)
+
+
+if __name__ == '__main__':
+    main()
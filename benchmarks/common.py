@@ -0,0 +1,94 @@
+"""
+基准公共工具: 计时、命令行参数和 JSON 结果输出
+
+每个基准输出一个 JSON 文档:
+    {"benchmark": 名称, "meta": {运行环境}, "results": [{"name": ..., "params": {...}, "metrics": {...}}]}
+同名 name + params 的条目可以在不同版本之间直接对比 (见 benchmarks/compare.py)。
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SRC_DIR = os.path.join(ROOT_DIR, 'src')
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+
+def measure(func: Callable[[], object], min_time: float = 0.2, repeat: int = 5,
+            max_calls: Optional[int] = None) -> Dict[str, float]:
+    """
+    多轮计时, 每轮至少运行 min_time 秒
+
+    Returns:
+        dict: calls (每轮调用次数), best_us / median_us (每次调用耗时, 微秒)
+    """
+    func()  # 预热
+    calls = 1
+    while True:  # 估算每轮需要的调用次数
+        start = time.perf_counter()
+        for _ in range(calls):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or (max_calls is not None and calls >= max_calls):
+            break
+        calls = calls * 2 if elapsed <= 0 else max(calls + 1, int(calls * min_time / elapsed * 1.2))
+        if max_calls is not None:
+            calls = min(calls, max_calls)
+    timings = [elapsed / calls]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(calls):
+            func()
+        timings.append((time.perf_counter() - start) / calls)
+    return {"calls": calls, "best_us": min(timings) * 1e6, "median_us": statistics.median(timings) * 1e6}
+
+
+def result(name: str, params: Dict, metrics: Dict) -> Dict:
+    """组装一条结果"""
+    return {"name": name, "params": params, "metrics": metrics}
+
+
+def environment() -> Dict:
+    """运行环境信息, 便于区分不同机器和版本的结果"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR,
+                                capture_output=True, text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "time": datetime.now().isoformat(timespec='seconds'),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def argument_parser(description: str) -> argparse.ArgumentParser:
+    """带公共参数 (--output, --quick) 的命令行解析器"""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('--output', help='结果 JSON 文件, 默认输出到标准输出')
+    parser.add_argument('--quick', action='store_true', help='缩短计时, 用于冒烟检查')
+    return parser
+
+
+def write_report(benchmark: str, results: List[Dict], output: Optional[str] = None) -> Dict:
+    """输出 JSON 结果到文件或标准输出"""
+    report = {"benchmark": benchmark, "meta": environment(), "results": results}
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if output:
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        with open(output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    else:
+        print(text)
+    return report
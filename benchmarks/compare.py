@@ -0,0 +1,86 @@
+"""
+对比两次基准结果, 标出超过阈值的性能回退
+
+按 name + params 匹配条目, 只比较时间类 (*_us, *_seconds, 越小越好) 和
+吞吐类 (*_per_s, *_per_second, 越大越好) 指标。
+
+运行: python -m benchmarks.compare 基线(文件或目录) 新结果(文件或目录) [--threshold 0.1]
+存在回退时退出码为 1, 可直接用于 CI。
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+from typing import Dict, Optional, Tuple
+
+LOWER_IS_BETTER = ('_us', '_seconds')
+HIGHER_IS_BETTER = ('_per_s', '_per_second')
+
+
+def load_results(path: str) -> Dict[Tuple[str, str, str], Dict]:
+    """读取单个 JSON 文件或目录下全部 JSON 文件, 以 (基准, 名称, 参数) 为键"""
+    files = sorted(glob.glob(os.path.join(path, '*.json'))) if os.path.isdir(path) else [path]
+    results = {}
+    for file in files:
+        with open(file, encoding='utf-8') as f:
+            report = json.load(f)
+        for entry in report.get("results", []):
+            key = (report.get("benchmark", ""), entry["name"], json.dumps(entry["params"], sort_keys=True))
+            results[key] = entry["metrics"]
+    return results
+
+
+def relative_change(metric: str, old: float, new: float) -> Optional[float]:
+    """
+    性能变化比例, 正数表示变慢
+
+    Returns:
+        float: 变化比例; 指标不参与比较时返回 None
+    """
+    if not isinstance(old, (int, float)) or not isinstance(new, (int, float)) or old <= 0:
+        return None
+    if metric.endswith(LOWER_IS_BETTER):
+        return (new - old) / old
+    if metric.endswith(HIGHER_IS_BETTER):
+        return (old - new) / old
+    return None
+
+
+def compare(baseline: Dict, current: Dict, threshold: float):
+    """返回 (对比行, 回退条数)"""
+    rows = []
+    regressions = 0
+    for key in sorted(baseline.keys() & current.keys()):
+        for metric, old in baseline[key].items():
+            change = relative_change(metric, old, current[key].get(metric))
+            if change is None:
+                continue
+            regressed = change > threshold
+            regressions += regressed
+            rows.append((key, metric, old, current[key][metric], change, regressed))
+    return rows, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="对比两次基准结果")
+    parser.add_argument('baseline')
+    parser.add_argument('current')
+    parser.add_argument('--threshold', type=float, default=0.1, help='回退阈值 (比例), 默认 0.1 即 10%%')
+    args = parser.parse_args(argv)
+
+    baseline = load_results(args.baseline)
+    current = load_results(args.current)
+    rows, regressions = compare(baseline, current, args.threshold)
+    for (benchmark, name, params), metric, old, new, change, regressed in rows:
+        flag = "  <-- 回退" if regressed else ""
+        print(f"{benchmark}.{name} {params} {metric}: {old:.4g} -> {new:.4g} ({-change:+.1%}){flag}")
+    missing = baseline.keys() - current.keys()
+    if missing:
+        print(f"新结果中缺少 {len(missing)} 个条目")
+    print(f"共比较 {len(rows)} 项, 回退 {regressions} 项 (阈值 {args.threshold:.0%})")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
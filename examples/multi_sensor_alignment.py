@@ -0,0 +1,57 @@
+"""
+多传感器对齐示例
+
+三台模拟的 WTVB01 各自在采集线程中轮询, StreamAligner 把它们的采样对齐到 50 Hz 的公共时间网格;
+采集结束后对三台设备的 X 轴振动速度计算相干函数和时间延迟。
+
+运行: python examples/multi_sensor_alignment.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import numpy as np
+
+from vibration_monitor.alignment import StreamAligner
+from vibration_monitor.cross_channel import coherence, time_delay
+from vibration_monitor.device.device_wtvb01 import DeviceWTVB01
+from vibration_monitor.device.simulator import InMemoryTransport, SimulatedWTVB01
+
+FS = 50.0
+
+
+def main():
+    names = ["传感器1", "传感器2", "传感器3"]
+    devices = [DeviceWTVB01(name, "sim", 230400, 0x50,
+                            transport=InMemoryTransport(SimulatedWTVB01(address=0x50, rate_hz=100, seed=i)))
+               for i, name in enumerate(names)]
+    aligner = StreamAligner(names, FS, max_latency=0.5, channels=["58"])  # X 轴振动速度
+    blocks = []
+    aligner.add_listener(lambda _, block: blocks.append(block))
+    for device in devices:
+        aligner.attach(device)
+        device.open_device()
+        device.start_data_acquisition()
+
+    time.sleep(5)
+    for device in devices:
+        device.stop_data_acquisition()
+        device.close_device()
+    aligner.flush()
+
+    values = np.concatenate([block.values[:, :, 0] for block in blocks], axis=1)
+    valid = np.concatenate([block.valid for block in blocks], axis=1).all(axis=0)
+    values = values[:, valid]
+    print(f"对齐后 {values.shape[1]} 个网格点 ({FS:g} Hz), 迟到采样 {aligner.late_samples}")
+    freqs, coh, phase = coherence(values, FS, nperseg=64)
+    delays, peaks = time_delay(values, FS, max_lag=int(FS))
+    for i in range(len(names)):
+        for j in range(i + 1, len(names)):
+            print(f"{names[i]} - {names[j]}: 平均相干 {coh[i, j].mean():.2f}, "
+                  f"延迟 {delays[i, j] * 1000:.1f} ms (相关系数 {peaks[i, j]:.2f})")
+
+
+if __name__ == '__main__':
+    main()
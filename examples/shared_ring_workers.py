@@ -0,0 +1,87 @@
+"""
+多进程分析示例: 共享内存采样环形缓冲区
+
+主进程从模拟的 WTVB01 采集数据并写入 SampleRing; 每个工作进程按名称只读挂接同一块共享内存,
+各自负责一部分通道, 每 0.5 秒对最近的采样做 FFT, 只把结果 (主频) 通过队列发回主进程。
+
+运行: python examples/shared_ring_workers.py
+"""
+import multiprocessing
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import numpy as np
+
+from vibration_monitor.channels import RECORD_KEYS
+from vibration_monitor.device.device_wtvb01 import DeviceWTVB01
+from vibration_monitor.device.simulator import InMemoryTransport, SimulatedWTVB01
+from vibration_monitor.utils.shared_ring import SampleRing, SampleRingReader
+
+WINDOW = 256  # FFT 窗口采样数
+
+
+def peak_frequencies(reader, columns, keys):
+    """最近 WINDOW 个采样中各通道的主频, 采样不足或计算期间数据被覆盖时返回 None"""
+    start, segments = reader.latest(WINDOW)
+    if sum(len(timestamps) for timestamps, _ in segments) < WINDOW:
+        return None
+    # 只在拼接窗口时复制选中的通道, 共享内存中的其余数据不复制
+    timestamps = np.concatenate([t for t, _ in segments])
+    window = np.concatenate([v[:, columns] for _, v in segments])
+    if not reader.valid(start):
+        return None
+    rate = (len(timestamps) - 1) / (timestamps[-1] - timestamps[0])
+    spectrum = np.abs(np.fft.rfft(window - window.mean(axis=0), axis=0))
+    freqs = np.fft.rfftfreq(len(window), 1.0 / rate)
+    return {key: float(freqs[spectrum[1:, i].argmax() + 1]) for i, key in enumerate(keys)}
+
+
+def fft_worker(ring_name, keys, results, stop):
+    """工作进程: 对指定通道的最近 WINDOW 个采样做 FFT"""
+    reader = SampleRingReader(ring_name)
+    columns = [RECORD_KEYS.index(key) for key in keys]
+    while not stop.is_set():
+        time.sleep(0.5)
+        peaks = peak_frequencies(reader, columns, keys)
+        if peaks is not None:
+            results.put((os.getpid(), peaks))
+    reader.close()
+
+
+def main():
+    simulator = SimulatedWTVB01(address=0x50, rate_hz=200, seed=1)
+    device = DeviceWTVB01("模拟设备", "sim", 230400, 0x50, transport=InMemoryTransport(simulator))
+    ring = SampleRing(capacity=4096)
+    ring.attach(device)
+    device.open_device()
+    device.start_data_acquisition()
+
+    results = multiprocessing.Queue()
+    stop = multiprocessing.Event()
+    groups = [["52", "53", "54"], ["58", "59", "60"]]  # 加速度、振动速度各一个进程
+    workers = [multiprocessing.Process(target=fft_worker, args=(ring.name, keys, results, stop)) for keys in groups]
+    for worker in workers:
+        worker.start()
+
+    end = time.monotonic() + 4
+    while time.monotonic() < end:
+        try:
+            pid, peaks = results.get(timeout=0.5)
+        except Exception:
+            continue
+        print(f"进程 {pid}: " + ", ".join(f"{key} 主频 {freq:.1f} Hz" for key, freq in peaks.items()))
+
+    stop.set()
+    for worker in workers:
+        worker.join()
+    device.stop_data_acquisition()
+    device.close_device()
+    print(f"共写入 {ring.write_index} 个采样")
+    ring.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+"""
+报警引擎
+
+阈值、回差、最短持续时间和变化率限值都按 (设备, 通道) 存放在 numpy 数组中,
+每次评估对所有设备的所有通道做一次向量化比较, 只对状态发生变化的通道生成事件。
+
+规则:
+* 超限: value > high 持续 min_duration 秒后报警; value <= high - hysteresis 时解除 (回差防抖)
+* 变化率: |Δvalue / Δt| > rate_limit 持续 min_duration 秒后报警; 变化率回落到限值以下且未超限时解除
+* 限值为 NaN 表示该规则不启用; 缺失的数据 (NaN) 不改变通道状态
+
+报警的产生和解除写入只追加的报警日志 (AlarmLog)。
+"""
+import csv
+import os
+import threading
+from collections import deque, namedtuple
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from .channels import CHANNEL_NAMES
+from .utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+EVENT_RAISED = "raised"
+EVENT_CLEARED = "cleared"
+REASON_HIGH = "high"
+REASON_RATE = "rate"
+
+DEFAULT_THRESHOLDS = {
+    'accel_x': 2.0, 'accel_y': 2.0, 'accel_z': 2.5,
+    'speed_x': 20.0, 'speed_y': 20.0, 'speed_z': 25.0,
+    'disp_x': 100.0, 'disp_y': 100.0, 'disp_z': 150.0,
+    'freq_x': 55.0, 'freq_y': 55.0, 'freq_z': 65.0,
+    'temperature': 50.0,
+}
+
+AlarmEvent = namedtuple('AlarmEvent', ['time', 'device', 'channel', 'kind', 'reason', 'value', 'limit'])
+
+
+def _last_index(mask: np.ndarray) -> np.ndarray:
+    """沿第 0 维, 每个位置之前 (含) 最近一个 mask 为真的下标, 没有时为 -1"""
+    index = np.where(mask, np.arange(len(mask)).reshape((-1,) + (1,) * (mask.ndim - 1)), -1)
+    return np.maximum.accumulate(index, axis=0)
+
+
+class AlarmLog:
+    """
+    只追加的报警日志 (CSV), 同时在内存中保留最近 max_recent 条事件供界面显示
+
+    path 为 None 时只保留在内存中。
+    """
+
+    HEADER = ['时间', '设备', '通道', '事件', '规则', '数值', '限值']
+
+    def __init__(self, path: Optional[str] = None, max_recent: int = 1000):
+        self.path = path
+        self.recent = deque(maxlen=max_recent)
+        self._lock = threading.Lock()
+        self._file = None
+        self._writer = None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            is_new = not os.path.exists(path) or os.path.getsize(path) == 0
+            self._file = open(path, 'a', newline='', encoding='utf-8-sig')
+            self._writer = csv.writer(self._file)
+            if is_new:
+                self._writer.writerow(self.HEADER)
+                self._file.flush()
+
+    def append(self, events: Iterable[AlarmEvent]):
+        """追加事件; 每批事件写完后立即刷新到磁盘"""
+        with self._lock:
+            wrote = False
+            for event in events:
+                self.recent.append(event)
+                if self._writer is not None:
+                    self._writer.writerow([
+                        datetime.fromtimestamp(event.time).strftime('%Y-%m-%d %H:%M:%S.%f')[:-3],
+                        event.device, event.channel, event.kind, event.reason,
+                        f"{event.value:.4f}", f"{event.limit:.4f}",
+                    ])
+                    wrote = True
+            if wrote:
+                self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = self._writer = None
+
+
+class AlarmEngine:
+    """
+    多设备、多通道报警引擎
+
+    Args:
+        devices: 设备名称列表, 决定状态数组的第 0 维
+        channels: 通道名称列表, 决定状态数组的第 1 维 (默认 channels.CHANNEL_NAMES)
+        log: 报警日志, 为 None 时只保存在内存中
+    """
+
+    def __init__(self, devices: Sequence[str], channels: Sequence[str] = CHANNEL_NAMES,
+                 log: Optional[AlarmLog] = None):
+        self.devices = list(devices)
+        self.channels = list(channels)
+        self.log = log if log is not None else AlarmLog()
+        shape = (len(self.devices), len(self.channels))
+        self._device_index = {name: i for i, name in enumerate(self.devices)}
+        self._channel_index = {name: i for i, name in enumerate(self.channels)}
+        # 规则 (按通道广播到所有设备)
+        self.high = np.full(len(self.channels), np.nan)
+        self.hysteresis = np.zeros(len(self.channels))
+        self.min_duration = np.zeros(len(self.channels))
+        self.rate_limit = np.full(len(self.channels), np.nan)
+        # 状态
+        self.active = np.zeros(shape, dtype=bool)          # 当前是否处于报警
+        self.active_reason = np.zeros(shape, dtype='U4')   # 报警原因 (high / rate)
+        self._pending_since = np.full(shape, np.nan)       # 条件首次满足的时间
+        self._last_value = np.full(shape, np.nan)
+        self._last_time = np.full(shape, np.nan)
+
+    @classmethod
+    def from_config(cls, config, devices: Sequence[str], log: Optional[AlarmLog] = None,
+                    channels: Sequence[str] = CHANNEL_NAMES) -> 'AlarmEngine':
+        """
+        从配置创建引擎
+
+        [Thresholds] 中为各通道上限; [Alarm] 中 hysteresis_ratio (回差占上限的比例)、
+        min_duration (秒) 为全局默认值, 可用 <通道>_hysteresis / <通道>_min_duration /
+        <通道>_rate 按通道覆盖。channels 可包含派生通道 (如 speed_mag), 没有配置上限的通道不报警。
+        """
+        engine = cls(devices, channels, log=log)
+        ratio = config.getfloat('Alarm', 'hysteresis_ratio', fallback=0.05)
+        duration = config.getfloat('Alarm', 'min_duration', fallback=0.0)
+        for name in engine.channels:
+            high = config.getfloat('Thresholds', name, fallback=DEFAULT_THRESHOLDS.get(name, np.nan))
+            engine.set_rule(
+                name, high=high,
+                hysteresis=config.getfloat('Alarm', f'{name}_hysteresis', fallback=abs(high) * ratio),
+                min_duration=config.getfloat('Alarm', f'{name}_min_duration', fallback=duration),
+                rate_limit=config.getfloat('Alarm', f'{name}_rate', fallback=np.nan))
+        return engine
+
+    def set_rule(self, channel: str, high: float = None, hysteresis: float = None,
+                 min_duration: float = None, rate_limit: float = None):
+        """设置单个通道的规则, 未给出的参数保持不变"""
+        i = self._channel_index[channel]
+        if high is not None:
+            self.high[i] = high
+        if hysteresis is not None:
+            self.hysteresis[i] = max(0.0, hysteresis)
+        if min_duration is not None:
+            self.min_duration[i] = max(0.0, min_duration)
+        if rate_limit is not None:
+            self.rate_limit[i] = rate_limit
+
+    @property
+    def thresholds(self) -> Dict[str, float]:
+        """各通道上限"""
+        return {name: float(self.high[i]) for i, name in enumerate(self.channels)}
+
+    def evaluate(self, values, timestamp: float) -> List[AlarmEvent]:
+        """
+        评估一次采样
+
+        Args:
+            values: 形状为 (设备数, 通道数) 的数组; 只有一个设备时也可以传入 (通道数,)
+            timestamp: 采样时间 (秒, time.time())
+
+        Returns:
+            list: 本次产生或解除的报警事件
+        """
+        values = np.asarray(values, dtype=float).reshape(self.active.shape)
+        valid = ~np.isnan(values)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            over = values > self.high
+            below_clear = np.isnan(self.high) | (values <= self.high - self.hysteresis)
+            dt = timestamp - self._last_time
+            rate = np.abs(values - self._last_value) / dt
+            rate_over = (dt > 0) & (rate > self.rate_limit)
+        condition = over | rate_over
+
+        # 最短持续时间: 记录条件首次满足的时间, 条件中断即重新计时
+        starting = condition & np.isnan(self._pending_since)
+        self._pending_since[starting] = timestamp
+        self._pending_since[valid & ~condition] = np.nan
+        held = condition & (timestamp - self._pending_since >= self.min_duration)
+
+        raised = ~self.active & held
+        cleared = self.active & valid & below_clear & ~rate_over
+        events = []
+        if raised.any() or cleared.any():
+            reason = np.where(over, REASON_HIGH, REASON_RATE)
+            self.active_reason[raised] = reason[raised]
+            self.active[raised] = True
+            self.active[cleared] = False
+            events = self._make_events(timestamp, values, raised, cleared)
+            self.log.append(events)
+
+        self._last_value[valid] = values[valid]
+        self._last_time[valid] = timestamp
+        return events
+
+    def evaluate_batch(self, timestamps: Sequence[float], values) -> List[AlarmEvent]:
+        """
+        按时间顺序评估一批采样, values 形状为 (采样数, 设备数, 通道数), 结果与逐个调用 evaluate 相同
+
+        比较、变化率、持续计时和报警状态都对整批数据一次算出: 各通道的状态只取决于最近一次 "满足报警条件并已持续"
+        或 "满足解除条件" 的采样, 用累积最大值向后传递即可; 之后只逐行处理状态发生变化的采样以生成事件。
+        """
+        timestamps = np.asarray(timestamps, dtype=float)
+        values = np.asarray(values, dtype=float).reshape((len(timestamps),) + self.active.shape)
+        if len(timestamps) == 0:
+            return []
+        times = timestamps[:, np.newaxis, np.newaxis]
+        valid = ~np.isnan(values)
+
+        # 每个采样之前最近一个有效采样 (批内没有时取上一批留下的状态)
+        last_valid = _last_index(valid)
+        previous = np.concatenate([np.full((1,) + self.active.shape, -1), last_valid[:-1]])
+        has_previous = previous >= 0
+        previous_value = np.where(has_previous, np.take_along_axis(values, previous.clip(0), axis=0),
+                                  self._last_value)
+        previous_time = np.where(has_previous, timestamps[previous.clip(0)], self._last_time)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            over = values > self.high
+            below_clear = np.isnan(self.high) | (values <= self.high - self.hysteresis)
+            dt = times - previous_time
+            rate = np.abs(values - previous_value) / dt
+            rate_over = (dt > 0) & (rate > self.rate_limit)
+        condition = over | rate_over
+
+        # 最短持续时间: 条件被有效且不满足条件的采样打断, 之后第一个满足条件的采样开始计时
+        interrupted = valid & ~condition
+        last_interrupt = _last_index(interrupted)
+        count = np.cumsum(condition, axis=0)
+        count_at_interrupt = np.where(last_interrupt >= 0,
+                                      np.take_along_axis(count, last_interrupt.clip(0), axis=0), 0)
+        starting = condition & (count - count_at_interrupt == 1) & (
+            (last_interrupt >= 0) | np.isnan(self._pending_since))
+        last_start = _last_index(starting)
+        pending_since = np.where(last_start > last_interrupt, timestamps[last_start.clip(0)],
+                                 np.where(last_interrupt < 0, self._pending_since, np.nan))
+        with np.errstate(invalid='ignore'):
+            held = condition & (times - pending_since >= self.min_duration)
+
+        # 报警状态: 满足报警条件与满足解除条件互斥, 状态由两者中较晚的一个决定
+        clearing = valid & below_clear & ~rate_over
+        last_held, last_clearing = _last_index(held), _last_index(clearing)
+        active = np.where((last_held >= 0) | (last_clearing >= 0), last_held > last_clearing, self.active)
+        was_active = np.concatenate([self.active[np.newaxis], active[:-1]])
+        raised = active & ~was_active
+        cleared = was_active & ~active
+
+        events = []
+        for row in np.flatnonzero((raised | cleared).any(axis=(1, 2))):
+            reason = np.where(over[row], REASON_HIGH, REASON_RATE)
+            self.active_reason[raised[row]] = reason[raised[row]]
+            self.active[:] = active[row]
+            events.extend(self._make_events(timestamps[row], values[row], raised[row], cleared[row]))
+        if events:
+            self.log.append(events)
+
+        self.active[:] = active[-1]
+        self._pending_since[:] = pending_since[-1]
+        seen = last_valid[-1] >= 0
+        self._last_value[seen] = np.take_along_axis(values, last_valid[-1:].clip(0), axis=0)[0][seen]
+        self._last_time[seen] = timestamps[last_valid[-1][seen]]
+        return events
+
+    def _make_events(self, timestamp, values, raised, cleared) -> List[AlarmEvent]:
+        events = []
+        for kind, mask in ((EVENT_RAISED, raised), (EVENT_CLEARED, cleared)):
+            for d, c in zip(*np.nonzero(mask)):
+                reason = str(self.active_reason[d, c])
+                limit = self.rate_limit[c] if reason == REASON_RATE else self.high[c]
+                event = AlarmEvent(timestamp, self.devices[d], self.channels[c], kind, reason,
+                                   float(values[d, c]), float(limit))
+                events.append(event)
+                if kind == EVENT_RAISED:
+                    logger.warning(f"报警: {event.device} {event.channel} {event.value:.3f} (限值 {event.limit})")
+                else:
+                    logger.info(f"报警解除: {event.device} {event.channel} {event.value:.3f}")
+        return events
+
+    def is_active(self, device: str, channel: str) -> bool:
+        return bool(self.active[self._device_index[device], self._channel_index[channel]])
+
+    def device_state(self, device: str) -> np.ndarray:
+        """某设备各通道的报警状态 (布尔数组, 顺序同 channels)"""
+        return self.active[self._device_index[device]]
+
+    def reset(self):
+        """清除所有状态 (不写日志)"""
+        self.active[:] = False
+        self.active_reason[:] = ''
+        self._pending_since[:] = np.nan
+        self._last_value[:] = np.nan
+        self._last_time[:] = np.nan
+
+    def close(self):
+        self.log.close()
@@ -0,0 +1,171 @@
+"""
+多传感器数据对齐
+
+多台设备的采样在各自的采集线程中到达, 时间戳互不对齐。StreamAligner 作为各设备的采样监听器,
+把数据缓存起来并按公共时间网格 (采样率 fs, 网格点为 1/fs 的整数倍) 做归并连接:
+每台设备在网格点上的值由其前后两个采样线性插值得到, 所有设备的数据都越过某个网格点后才输出该点。
+
+延迟有上限: 某台设备停止发送 (断线、卡顿) 时, 只要其他设备的最新采样超出 max_latency,
+网格仍继续推进, 该设备在这些网格点上为 NaN (valid 为 False); 之后迟到的采样只用于后续网格点。
+每台设备只缓存尚未输出的网格点所需的采样, 内存不随运行时间增长。
+"""
+import math
+import threading
+from collections import namedtuple
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from .channels import RECORD_KEYS
+from .utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# time: 形状 (m,) 的网格时间 (秒); values: 形状 (设备数, m, 通道数); valid: 形状 (设备数, m)
+AlignedBlock = namedtuple('AlignedBlock', ['time', 'values', 'valid'])
+
+
+class StreamAligner:
+    """
+    多设备采样的公共时间网格归并
+
+    Args:
+        devices: 设备名称列表, 决定输出数组第 0 维的顺序
+        fs: 公共网格的采样率 (Hz)
+        max_latency: 等待最慢设备的最长时间 (秒, 以所有设备中最新的采样时间计)
+        max_gap: 设备相邻两个采样的间隔超过该值 (秒) 时, 其间的网格点不插值, 记为无效; 默认 2.5 / fs
+        channels: 输出的通道 (设备数据键或派生通道名), 默认 record_keys 全部
+        record_keys: 送来的采样各列的键, 默认 channels.RECORD_KEYS; 设备有派生通道时为 DeviceModel.record_keys
+
+    对齐后的数据通过 add_listener 注册的回调 callback(aligner, block) 输出, 回调在送来数据的采集线程中调用
+    (持有内部锁, 保证各块按时间顺序到达), 不应阻塞。
+    """
+
+    def __init__(self, devices: Sequence[str], fs: float, max_latency: float = 0.5,
+                 max_gap: Optional[float] = None, channels: Optional[Sequence[str]] = None,
+                 record_keys: Sequence[str] = RECORD_KEYS):
+        if fs <= 0:
+            raise ValueError("fs 必须大于 0")
+        self.devices = list(devices)
+        self.fs = float(fs)
+        self.max_latency = max_latency
+        self.max_gap = max_gap if max_gap is not None else 2.5 / self.fs
+        record_keys = list(record_keys)
+        self.channels = list(channels) if channels is not None else record_keys
+        unknown = [key for key in self.channels if key not in record_keys]
+        if unknown:
+            raise ValueError(f"未知的通道: {unknown}")
+        self._device_index = {name: i for i, name in enumerate(self.devices)}
+        self._columns = np.array([record_keys.index(key) for key in self.channels], dtype=np.intp)
+        self._chunks: List[list] = [[] for _ in self.devices]  # 每台设备待合并的 (timestamps, values)
+        self._times = [np.empty(0) for _ in self.devices]
+        self._values = [np.empty((0, len(self.channels))) for _ in self.devices]
+        self._latest = np.full(len(self.devices), -np.inf)  # 各设备最新的采样时间
+        self._next = None  # 下一个待输出的网格点编号 (时间 = 编号 / fs)
+        self._listeners = []
+        self._lock = threading.Lock()
+        self.late_samples = 0  # 到达时对应的网格点已经输出的采样数
+        self.blocks_emitted = 0
+
+    # ---- 输入 ----
+
+    def add_listener(self, callback):
+        if callback not in self._listeners:
+            self._listeners = self._listeners + [callback]
+
+    def remove_listener(self, callback):
+        self._listeners = [c for c in self._listeners if c is not callback]
+
+    def attach(self, device):
+        """接收某设备的采样, 设备名称应在 devices 中"""
+        if device.device_name not in self._device_index:
+            raise ValueError(f"设备 {device.device_name} 不在对齐列表中")
+        device.add_listener(self.on_device_samples)
+
+    def detach(self, device):
+        device.remove_listener(self.on_device_samples)
+
+    def on_device_samples(self, device, timestamps, values):
+        """DeviceModel 采样监听器"""
+        self.push(device.device_name, timestamps, values)
+
+    def push(self, device: str, timestamps, values):
+        """
+        加入某设备的一批采样
+
+        Args:
+            timestamps: 形状 (n,), 秒
+            values: 形状 (n, len(record_keys)), 列顺序同构造时的 record_keys
+        """
+        timestamps = np.asarray(timestamps, dtype=float)
+        if len(timestamps) == 0:
+            return
+        values = np.asarray(values, dtype=float)[:, self._columns]
+        i = self._device_index[device]
+        with self._lock:
+            if self._next is not None:
+                self.late_samples += int(np.count_nonzero(timestamps * self.fs < self._next - 1))
+            self._chunks[i].append((timestamps, values))
+            self._latest[i] = max(self._latest[i], float(timestamps[-1]))
+            if self._next is None:
+                self._next = math.ceil(float(timestamps[0]) * self.fs)
+            newest = self._latest.max()
+            self._emit(max(self._latest.min(), newest - self.max_latency))
+
+    def flush(self):
+        """输出截至所有设备中最新采样的全部网格点 (停止采集时调用)"""
+        with self._lock:
+            if self._next is not None:
+                self._emit(self._latest.max())
+
+    # ---- 对齐 ----
+
+    def _merge_chunks(self, i: int):
+        chunks = self._chunks[i]
+        if not chunks:
+            return
+        times = np.concatenate([self._times[i]] + [t for t, _ in chunks])
+        values = np.concatenate([self._values[i]] + [v for _, v in chunks])
+        if len(times) > 1 and (times[1:] < times[:-1]).any():  # 各批之间可能交错
+            order = np.argsort(times, kind='stable')
+            times, values = times[order], values[order]
+        self._times[i], self._values[i] = times, values
+        self._chunks[i] = []
+
+    def _emit(self, limit: float):
+        last = math.floor(limit * self.fs + 1e-9)
+        if last < self._next:
+            return
+        grid = np.arange(self._next, last + 1) / self.fs
+        values = np.full((len(self.devices), len(grid), len(self.channels)), np.nan)
+        valid = np.zeros((len(self.devices), len(grid)), dtype=bool)
+        for i in range(len(self.devices)):
+            self._merge_chunks(i)
+            times = self._times[i]
+            if len(times) == 0:
+                continue
+            # 每个网格点的前后两个采样 (归并连接), 插值权重对所有通道共用
+            inside = (grid >= times[0]) & (grid <= times[-1])  # 不外推
+            upper = np.clip(np.searchsorted(times, grid, side='right'), 1, max(len(times) - 1, 1))
+            upper = np.minimum(upper, len(times) - 1)
+            lower = np.maximum(upper - 1, 0)
+            span = times[upper] - times[lower]
+            weight = np.divide(grid - times[lower], span, out=np.zeros_like(grid), where=span > 0)
+            np.clip(weight, 0.0, 1.0, out=weight)
+            interpolated = (self._values[i][lower] * (1.0 - weight[:, None])
+                            + self._values[i][upper] * weight[:, None])
+            exact = (grid == times[lower]) | (grid == times[upper])  # 网格点恰好有采样时不受间断影响
+            ok = inside & ((span <= self.max_gap) | exact)
+            values[i, ok] = interpolated[ok]
+            valid[i] = ok & ~np.isnan(interpolated).any(axis=1)
+            # 只保留下一个网格点之前的最后一个采样及之后的采样
+            keep = max(int(np.searchsorted(times, (last + 1) / self.fs, side='right')) - 1, 0)
+            self._times[i], self._values[i] = times[keep:], self._values[i][keep:]
+        self._next = last + 1
+        block = AlignedBlock(grid, values, valid)
+        self.blocks_emitted += 1
+        for callback in self._listeners:
+            try:
+                callback(self, block)
+            except Exception as e:
+                logger.exception(f"对齐数据监听器出错: {e}")
@@ -0,0 +1,297 @@
+"""
+分析流水线: 按依赖关系组织的分析步骤 (有向无环图) 与结果缓存
+
+每个步骤 (Stage) 声明它的输入 (数据源或其他步骤) 和参数, 计算某个步骤时先计算它依赖的步骤。
+步骤结果按键缓存在 LRU 中: 数据源的键为内容哈希 (或调用方给出的版本号), 步骤的键由步骤名、参数和各输入的键
+再哈希得到, 因此只有参数或上游数据变化的步骤及其下游会重新计算, 例如只改变 FFT 的窗函数时,
+重采样、去趋势和滤波的结果直接取缓存; 不同选项卡共用同一个步骤 (如滤波) 的结果。
+
+default_pipeline() 是分析窗口使用的标准流水线:
+
+    signal (数据源: (时间, 数据))
+      ├─ uniform            重采样到均匀网格 (resampling.to_uniform)
+      │    ├─ detrend ─ window ─ spectrum                                 去趋势、加窗后的幅度谱
+      │    └─ filter ─ filtered_detrend ─ filtered_window ─ filtered_spectrum  滤波后的幅度谱
+      ├─ filtered_signal    滤波结果插值回原始时间 (signal, filter)
+      ├─ features           时域特征
+      └─ feeding_states     下料阶段
+
+滤波步骤由滤波选项卡设置参数, FFT 选项卡选择"滤波后"时直接使用它的结果。
+
+不依赖 Qt。
+"""
+import hashlib
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy.signal import detrend as scipy_detrend, filtfilt, get_window
+
+from . import data_analysis
+from .resampling import UniformSeries, to_uniform
+from .utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+DETREND_MODES = ('none', 'constant', 'linear')  # 不去趋势 / 去均值 / 去线性趋势
+
+
+def content_hash(value) -> str:
+    """数组、数值、字符串及其 tuple / list / dict 组合的内容哈希"""
+    digest = hashlib.blake2b(digest_size=16)
+    _update_hash(digest, value)
+    return digest.hexdigest()
+
+
+def _update_hash(digest, value):
+    if isinstance(value, np.ndarray):
+        data = np.ascontiguousarray(value)
+        digest.update(f"ndarray{data.dtype.str}{data.shape}".encode())
+        digest.update(data.view(np.uint8).reshape(-1) if data.size else b'')
+    elif isinstance(value, (tuple, list)):
+        digest.update(f"{type(value).__name__}{len(value)}(".encode())
+        for item in value:
+            _update_hash(digest, item)
+        digest.update(b')')
+    elif isinstance(value, dict):
+        digest.update(f"dict{len(value)}(".encode())
+        for key in sorted(value, key=repr):
+            _update_hash(digest, key)
+            _update_hash(digest, value[key])
+        digest.update(b')')
+    elif value is None or isinstance(value, (bool, int, float, str, bytes, np.generic)):
+        digest.update(f"{type(value).__name__}:{value!r};".encode())
+    else:
+        raise TypeError(f"无法计算哈希: {type(value).__name__}")
+
+
+class Stage:
+    """
+    流水线步骤
+
+    Args:
+        name: 步骤名
+        func: 计算函数, 以 func(*各输入的结果, **params) 调用
+        inputs: 输入 (数据源或步骤名), 顺序即 func 的位置参数顺序
+        params: 参数默认值
+    """
+
+    def __init__(self, name: str, func: Callable, inputs: Sequence[str] = (), params: Optional[Dict] = None):
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.params = dict(params or {})
+
+
+class AnalysisPipeline:
+    """
+    分析步骤的有向无环图及其结果缓存
+
+    步骤只能引用已经添加的数据源和步骤, 因此添加顺序即一种拓扑顺序, 图中不会出现环。
+
+    Args:
+        max_entries: 缓存的步骤结果数上限, 超出时淘汰最久未使用的结果
+    """
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self._stages: Dict[str, Stage] = {}
+        self._sources: Dict[str, Optional[Tuple[str, object]]] = {}  # 数据源名 -> (键, 数据)
+        self._cache: 'OrderedDict[str, object]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # ---- 构建 ----
+
+    def add_source(self, name: str):
+        """添加数据源, 数据由 set_source 给出"""
+        self._check_name(name)
+        self._sources[name] = None
+
+    def add_stage(self, name: str, func: Callable, inputs: Sequence[str] = (), **params) -> Stage:
+        """添加步骤, params 为参数默认值 (之后可用 set_params 修改)"""
+        self._check_name(name)
+        for source in inputs:
+            if source not in self._sources and source not in self._stages:
+                raise ValueError(f"步骤 {name} 的输入 {source} 不存在 (须先添加)")
+        stage = Stage(name, func, inputs, params)
+        self._stages[name] = stage
+        return stage
+
+    def _check_name(self, name: str):
+        if name in self._sources or name in self._stages:
+            raise ValueError(f"名称重复: {name}")
+
+    @property
+    def stages(self) -> List[str]:
+        """全部步骤名 (拓扑顺序)"""
+        return list(self._stages)
+
+    def dependencies(self, name: str) -> List[str]:
+        """计算某步骤需要的全部步骤 (含自身, 拓扑顺序)"""
+        needed = set()
+        pending = [name]
+        while pending:
+            current = pending.pop()
+            if current in needed or current in self._sources:
+                continue
+            if current not in self._stages:
+                raise KeyError(f"未知的步骤: {current}")
+            needed.add(current)
+            pending.extend(self._stages[current].inputs)
+        return [stage for stage in self._stages if stage in needed]
+
+    # ---- 数据和参数 ----
+
+    def set_source(self, name: str, value, key=None):
+        """
+        设置数据源
+
+        Args:
+            value: 数据 (数组或数组的 tuple 等), 之后不应再修改
+            key: 能唯一标识数据内容的值 (如 (通道名, 数据版本号)), 默认按内容计算哈希
+        """
+        if name not in self._sources:
+            raise KeyError(f"未知的数据源: {name}")
+        self._sources[name] = (content_hash(value if key is None else ('key', key)), value)
+
+    def set_params(self, name: str, **params):
+        """修改步骤参数; 只影响该步骤及其下游的缓存键"""
+        stage = self._stages[name]
+        unknown = set(params) - set(stage.params)
+        if unknown:
+            raise ValueError(f"步骤 {name} 没有参数: {', '.join(sorted(unknown))}")
+        stage.params.update(params)
+
+    def params(self, name: str) -> Dict:
+        return dict(self._stages[name].params)
+
+    # ---- 计算 ----
+
+    def compute(self, name: str, callback: Optional[Callable[[str, int, int], None]] = None):
+        """
+        计算步骤结果, 未变化的步骤取缓存
+
+        Args:
+            callback: 每个需要重新计算的步骤开始前以 callback(步骤名, 已完成数, 需计算数) 调用,
+                      可用于报告进度; 抛出异常即中止计算 (已完成的步骤结果保留在缓存中)
+        """
+        keys = {}
+        for stage_name in self.dependencies(name):
+            stage = self._stages[stage_name]
+            keys[stage_name] = content_hash((stage_name, stage.params, [self._key(source, keys)
+                                                                        for source in stage.inputs]))
+        progress = None
+        if callback is not None:
+            progress = [0, sum(1 for key in keys.values() if key not in self._cache), callback]
+        return self._evaluate(name, keys, progress)
+
+    def _key(self, name: str, keys: Dict[str, str]) -> str:
+        if name in keys:
+            return keys[name]
+        source = self._sources[name]
+        if source is None:
+            raise ValueError(f"数据源 {name} 尚未设置")
+        return source[0]
+
+    def _evaluate(self, name: str, keys: Dict[str, str], progress: Optional[list] = None):
+        if name in self._sources:
+            return self._sources[name][1]
+        key = keys[name]
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return self._cache[key]
+        stage = self._stages[name]
+        inputs = [self._evaluate(source, keys, progress) for source in stage.inputs]
+        if progress is not None:
+            done, total, callback = progress
+            callback(name, done, total)
+            progress[0] += 1
+        result = stage.func(*inputs, **stage.params)
+        self.misses += 1
+        logger.debug(f"计算分析步骤 {name}")
+        self._cache[key] = result
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+            self.evictions += 1
+        return result
+
+    def clear_cache(self):
+        self._cache.clear()
+
+    def __len__(self):
+        """缓存的结果数"""
+        return len(self._cache)
+
+
+# ---- 标准步骤 ----
+
+def _uniform(signal) -> UniformSeries:
+    timestamps, series = signal
+    if len(series) < 2:
+        raise ValueError("数据不足")
+    return to_uniform(timestamps, series)
+
+
+def _detrend(uniform: UniformSeries, mode: str = 'none') -> UniformSeries:
+    if mode not in DETREND_MODES:
+        raise ValueError(f"不支持的去趋势方式: {mode}")
+    if mode == 'none':
+        return uniform
+    return uniform._replace(values=scipy_detrend(uniform.values, type=mode))
+
+
+def _filter(uniform: UniformSeries, filter_type: Optional[str] = None, cutoff=None, order: int = 4) -> UniformSeries:
+    """filter_type 为 None 时不滤波"""
+    if filter_type is None:
+        return uniform
+    b, a = data_analysis.design_filter(filter_type, cutoff, uniform.fs, order)
+    return uniform._replace(values=filtfilt(b, a, uniform.values))
+
+
+def _window(uniform: UniformSeries, window: str = 'boxcar') -> UniformSeries:
+    if window == 'boxcar':
+        return uniform
+    return uniform._replace(values=uniform.values * get_window(window, len(uniform.values), fftbins=True))
+
+
+def _spectrum(uniform: UniformSeries) -> Tuple[np.ndarray, np.ndarray]:
+    return data_analysis.amplitude_spectrum(uniform.values, uniform.fs)
+
+
+def _filtered_signal(signal, filtered: UniformSeries) -> np.ndarray:
+    """滤波结果插值回原始时间, 与数据源等长"""
+    timestamps = np.asarray(signal[0], dtype=float)
+    if len(filtered.time) == len(timestamps) and np.array_equal(filtered.time, timestamps):
+        return filtered.values
+    return np.interp(timestamps, filtered.time, filtered.values)
+
+
+def _features(signal) -> Dict[str, float]:
+    return data_analysis.extract_features(signal[1])
+
+
+def _feeding_states(signal, target_weight: float = 0.0, tolerance: float = 0.0,
+                    thresholds: Optional[Dict[str, float]] = None) -> np.ndarray:
+    return data_analysis.detect_feeding_states(signal[1], target_weight, tolerance, thresholds)
+
+
+def default_pipeline(max_entries: int = 64) -> AnalysisPipeline:
+    """分析窗口的标准流水线 (结构见模块说明), 数据源 signal 为 (时间, 数据)"""
+    pipeline = AnalysisPipeline(max_entries)
+    pipeline.add_source('signal')
+    pipeline.add_stage('uniform', _uniform, ['signal'])
+    pipeline.add_stage('detrend', _detrend, ['uniform'], mode='none')
+    pipeline.add_stage('window', _window, ['detrend'], window='boxcar')
+    pipeline.add_stage('spectrum', _spectrum, ['window'])
+    pipeline.add_stage('filter', _filter, ['uniform'], filter_type=None, cutoff=None, order=4)
+    pipeline.add_stage('filtered_detrend', _detrend, ['filter'], mode='none')
+    pipeline.add_stage('filtered_window', _window, ['filtered_detrend'], window='boxcar')
+    pipeline.add_stage('filtered_spectrum', _spectrum, ['filtered_window'])
+    pipeline.add_stage('filtered_signal', _filtered_signal, ['signal', 'filter'])
+    pipeline.add_stage('features', _features, ['signal'])
+    pipeline.add_stage('feeding_states', _feeding_states, ['signal'], target_weight=0.0, tolerance=0.0,
+                       thresholds=None)
+    return pipeline
@@ -0,0 +1,182 @@
+"""
+自适应基线与异常评分
+
+固定阈值不能反映每台设备自身的正常状态。AnomalyDetector 为每个 (设备, 通道) 在线学习基线:
+指数加权 (EWMA) 均值和方差, 每个新采样相对当前基线给出 z 分数 (偏离均值的标准差倍数)。
+
+* 每个通道只保存均值、方差和计数, 内存 O(1); 一次更新对所有设备和通道做数组运算
+* 起始阶段按累计均值/方差学习, 之后过渡到指数加权; 预热后学习时把偏差截断在 clip_z 个标准差以内,
+  单次冲击不会拉偏基线, 持续的变化仍会被缓慢吸收
+* 学习到的基线可保存为 .npz 并在重启后按设备名、通道名恢复, 不必重新预热
+"""
+import os
+import tempfile
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .channels import CHANNEL_NAMES
+from .utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+STATE_VERSION = 1
+
+
+def half_life_alpha(half_life: float) -> float:
+    """半衰期 (采样数) 对应的 EWMA 系数: 经过 half_life 个采样后旧数据的权重减半"""
+    if half_life <= 0:
+        raise ValueError("half_life 必须大于 0")
+    return 1.0 - 0.5 ** (1.0 / half_life)
+
+
+class AnomalyDetector:
+    """
+    多设备、多通道的 EWMA 基线和 z 分数
+
+    Args:
+        devices: 设备名称列表, 决定状态数组的第 0 维
+        channels: 通道名称列表 (默认 channels.CHANNEL_NAMES), update 传入数据的列顺序与此相同
+        half_life: 基线的半衰期 (采样数), 越大基线越稳定、适应越慢
+        warmup: 通道累计这么多个有效采样之前不给出分数
+        z_threshold: |z| 超过该值视为异常
+        clip_z: 学习时偏差截断的标准差倍数
+        min_std: 标准差下限 (通道单位), 避免近似恒定的通道上出现极大的 z 分数
+    """
+
+    def __init__(self, devices: Sequence[str], channels: Sequence[str] = CHANNEL_NAMES,
+                 half_life: float = 2000, warmup: int = 100, z_threshold: float = 4.0,
+                 clip_z: float = 4.0, min_std: float = 1e-3):
+        self.devices = list(devices)
+        self.channels = list(channels)
+        self.alpha = half_life_alpha(half_life)
+        self.warmup = warmup
+        self.z_threshold = z_threshold
+        self.clip_z = clip_z
+        self.min_std = min_std
+        self._device_index = {name: i for i, name in enumerate(self.devices)}
+        shape = (len(self.devices), len(self.channels))
+        self.mean = np.zeros(shape)
+        self.var = np.zeros(shape)
+        self.count = np.zeros(shape, dtype=np.int64)
+        self.z = np.full(shape, np.nan)          # 最近一次的 z 分数
+        self.anomalous = np.zeros(shape, dtype=bool)
+
+    @classmethod
+    def from_config(cls, config, devices: Sequence[str], channels: Sequence[str] = CHANNEL_NAMES) -> 'AnomalyDetector':
+        """从 [Anomaly] 创建: half_life, warmup, z_threshold, clip_z, min_std"""
+        return cls(devices, channels,
+                   half_life=config.getfloat('Anomaly', 'half_life', fallback=2000),
+                   warmup=config.getint('Anomaly', 'warmup', fallback=100),
+                   z_threshold=config.getfloat('Anomaly', 'z_threshold', fallback=4.0),
+                   clip_z=config.getfloat('Anomaly', 'clip_z', fallback=4.0),
+                   min_std=config.getfloat('Anomaly', 'min_std', fallback=1e-3))
+
+    def update(self, values) -> np.ndarray:
+        """
+        对一次采样评分并更新基线
+
+        Args:
+            values: 形状为 (设备数, 通道数) 的数组; 只有一个设备时也可以传入 (通道数,); NaN 表示缺失
+
+        Returns:
+            np.ndarray: 形状 (设备数, 通道数) 的 z 分数, 缺失或仍在预热的通道为 NaN
+        """
+        values = np.asarray(values, dtype=float).reshape(self.mean.shape)
+        valid = values == values  # 非 NaN
+        delta = np.where(valid, values - self.mean, 0.0)
+        std = np.maximum(np.sqrt(self.var), self.min_std)
+        z = delta / std
+        z[~valid | (self.count < self.warmup)] = np.nan
+
+        # 学习: 系数取 max(alpha, 1/n), 前期等价于累计均值和方差 (从第一个采样起无偏), 之后过渡到 EWMA;
+        # 预热结束后才截断偏差
+        self.count += valid
+        alpha = np.maximum(self.alpha, 1.0 / np.maximum(self.count, 1)) * valid
+        limit = np.where(self.count > self.warmup, self.clip_z * std, np.inf)
+        learn = np.clip(delta, -limit, limit)
+        self.mean += alpha * learn
+        self.var = (1 - alpha) * (self.var + alpha * learn * learn)
+
+        with np.errstate(invalid='ignore'):
+            anomalous = np.abs(z) > self.z_threshold
+        entered = anomalous & ~self.anomalous
+        if entered.any():
+            for d, c in zip(*np.nonzero(entered)):
+                logger.warning(f"异常: {self.devices[d]} {self.channels[c]} z={z[d, c]:.1f} "
+                               f"(基线 {self.mean[d, c]:.3f} ± {std[d, c]:.3f})")
+        self.anomalous = anomalous | (self.anomalous & ~valid)  # 缺失的数据不改变状态
+        self.z = z
+        return z
+
+    def update_batch(self, values) -> np.ndarray:
+        """按时间顺序处理一批采样, values 形状为 (采样数, 设备数, 通道数), 返回同形状的 z 分数"""
+        values = np.asarray(values, dtype=float)
+        return np.stack([self.update(row) for row in values]) if len(values) else values.copy()
+
+    def baseline(self, device: str) -> Dict[str, Tuple[float, float]]:
+        """设备各通道的基线 (均值, 标准差), 尚未学到的通道为 None"""
+        i = self._device_index[device]
+        return {name: (float(self.mean[i, c]), float(np.sqrt(self.var[i, c]))) if self.count[i, c] else None
+                for c, name in enumerate(self.channels)}
+
+    def device_score(self, device: str) -> Tuple[float, Optional[str]]:
+        """设备最近一次的异常评分 (各通道 |z| 的最大值) 及对应通道, 没有分数时为 (NaN, None)"""
+        z = np.abs(self.z[self._device_index[device]])
+        if np.isnan(z).all():
+            return float('nan'), None
+        c = int(np.nanargmax(z))
+        return float(z[c]), self.channels[c]
+
+    def reset(self):
+        self.mean[:] = 0.0
+        self.var[:] = 0.0
+        self.count[:] = 0
+        self.z[:] = np.nan
+        self.anomalous[:] = False
+
+    def save(self, path: str):
+        """保存基线 (原子替换, 写入中断不会损坏已有文件)"""
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, version=STATE_VERSION, alpha=self.alpha,
+                         devices=np.array(self.devices, dtype=str), channels=np.array(self.channels, dtype=str),
+                         mean=self.mean, var=self.var, count=self.count)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    def load(self, path: str) -> int:
+        """
+        恢复基线, 按设备名和通道名对应, 文件中没有的设备/通道保持不变
+
+        Returns:
+            int: 恢复的 (设备, 通道) 个数; 文件不存在时为 0
+        """
+        if not os.path.exists(path):
+            return 0
+        with np.load(path, allow_pickle=False) as state:
+            if int(state['version']) != STATE_VERSION:
+                logger.warning(f"异常检测状态版本不符, 忽略: {path}")
+                return 0
+            if not np.isclose(float(state['alpha']), self.alpha):
+                logger.info("异常检测的半衰期已修改, 沿用保存的基线继续学习")
+            rows = [(i, self._device_index[name]) for i, name in enumerate(state['devices'].tolist())
+                    if name in self._device_index]
+            channel_index = {name: c for c, name in enumerate(self.channels)}
+            columns = [(j, channel_index[name]) for j, name in enumerate(state['channels'].tolist())
+                       if name in channel_index]
+            if not rows or not columns:
+                return 0
+            src = np.ix_([i for i, _ in rows], [j for j, _ in columns])
+            dst = np.ix_([d for _, d in rows], [c for _, c in columns])
+            self.mean[dst] = state['mean'][src]
+            self.var[dst] = state['var'][src]
+            self.count[dst] = state['count'][src]
+        restored = len(rows) * len(columns)
+        logger.info(f"已恢复异常检测基线: {restored} 个通道 ({path})")
+        return restored
@@ -0,0 +1,359 @@
+"""
+批量离线分析 (无界面)
+
+把记录文件 (DataRecorder CSV 或 .npy) 按文件或时间段拆成任务, 交给 ProcessPoolExecutor 并行分析;
+每个任务对所选通道计算时域特征和频谱主峰, 并对下料通道做阶段识别 (算法见 data_analysis.py)。
+各任务结果完成一个写一行到汇总文件 (JSON Lines), 汇总文件同时作为检查点: 中断后重新运行,
+任务、分析参数和文件 (修改时间、大小) 都未改变的已完成任务会被跳过 (见 checkpoint_key)。
+
+工作进程自行读取文件, 进程间只传递任务描述和结果摘要, 不传递采样数据。按时间段切分时, 规划阶段在文件中
+二分查找各时间段的起始行 (.npy 为行号, CSV 为字节偏移), 每个任务只读取自己的那一段。
+
+运行: vibration-monitor analyze <文件或目录...> -o summary.jsonl [--workers N] [--chunk-seconds 600]
+"""
+import argparse
+import bisect
+import hashlib
+import json
+import os
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, Iterable, List, Optional, Set
+
+import numpy as np
+
+from . import data_analysis
+from .channels import CHANNELS, KEY_COLUMNS, MONITORED_CHANNELS, ChannelId
+from .data_recorder import load_recording
+from .utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+RECORDING_SUFFIXES = ('.csv', '.npy')
+DEFAULT_CHANNELS = ('速度X', '速度Y', '速度Z')
+
+# start / stop 为相对文件第一个采样的秒数, 均为 None 时表示整个文件;
+# begin / end 为该时间段在文件中的位置 (.npy 为行号, CSV 为字节偏移, 见 chunk_offsets), None 时按 start / stop 筛选
+AnalysisTask = namedtuple('AnalysisTask', ['task_id', 'path', 'start', 'stop', 'begin', 'end'],
+                          defaults=(None, None))
+
+
+def find_recordings(paths: Iterable[str]) -> List[str]:
+    """展开文件和目录 (递归), 返回排序后的记录文件列表"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files.extend(os.path.join(root, name) for name in names if name.endswith(RECORDING_SUFFIXES))
+        elif path.endswith(RECORDING_SUFFIXES):
+            files.append(path)
+        else:
+            raise ValueError(f"不是记录文件: {path}")
+    return sorted(set(files))
+
+
+def recording_duration(path: str) -> float:
+    """记录时长 (秒), 只读取首尾的采样, 不加载整个文件"""
+    if path.endswith('.npy'):
+        records = np.load(path, mmap_mode='r')
+        return float(records[-1, 0] - records[0, 0]) if len(records) else 0.0
+    with open(path, 'rb') as f:
+        f.readline()  # 表头
+        first = f.readline()
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        f.seek(max(0, size - 4096))
+        lines = f.read().splitlines()
+    last = next((line for line in reversed(lines) if line.strip()), b'')
+    if not first or not last:
+        return 0.0
+    start, end = (np.datetime64(line.split(b',', 1)[0].decode('utf-8-sig').replace(' ', 'T'), 'ms')
+                  for line in (first, last))
+    return float((end - start).astype(float) / 1000.0)
+
+
+def _parse_stamp(line: bytes) -> np.datetime64:
+    return np.datetime64(line.split(b',', 1)[0].decode('utf-8-sig').strip().replace(' ', 'T'), 'ms')
+
+
+def chunk_offsets(path: str, starts: List[float]) -> List[int]:
+    """
+    各时间段 (相对第一个采样的秒数, 递增) 第一个采样在文件中的位置: .npy 为行号, CSV 为该数据行起始的字节偏移
+
+    记录按时间递增, 每个位置二分查找得到, 只读取 O(log N) 个采样, 不加载整个文件。
+    """
+    if path.endswith('.npy'):
+        records = np.load(path, mmap_mode='r')
+        if not len(records):
+            return [0] * len(starts)
+        first = float(records[0, 0])
+        return [bisect.bisect_left(records, first + start, key=lambda row: row[0]) for start in starts]
+    with open(path, 'rb') as f:
+        f.readline()  # 表头
+        header_end = f.tell()
+        size = f.seek(0, os.SEEK_END)
+
+        def row_start(position):
+            """position 处或之后第一个数据行的起始偏移"""
+            if position <= header_end:
+                return header_end
+            f.seek(position - 1)
+            f.readline()
+            return f.tell()
+
+        def row_stamp(offset):
+            """offset 处数据行的时间, 文件末尾或无法解析的行 (写了一半的末行) 为 None"""
+            f.seek(offset)
+            line = f.readline()
+            try:
+                stamp = _parse_stamp(line) if line.strip() else None
+            except ValueError:
+                return None
+            return None if stamp is None or np.isnat(stamp) else stamp
+
+        first = row_stamp(header_end)
+        if first is None:
+            return [header_end] * len(starts)
+        offsets = []
+        for start in starts:
+            target = first + np.timedelta64(int(round(start * 1000)), 'ms')
+
+            def at_or_after(position):
+                stamp = row_stamp(row_start(position))
+                return stamp is None or stamp >= target
+
+            position = bisect.bisect_left(range(header_end, size + 1), True, key=at_or_after)
+            offsets.append(row_start(header_end + position))
+        return offsets
+
+
+def plan_tasks(files: Iterable[str], chunk_seconds: float = 0) -> List[AnalysisTask]:
+    """
+    生成分析任务
+
+    Args:
+        chunk_seconds: 大于 0 时把每个文件按时间切成该长度的时间段 (并定位各段在文件中的位置), 否则每个文件一个任务
+    """
+    tasks = []
+    for path in files:
+        if chunk_seconds <= 0:
+            tasks.append(AnalysisTask(path, path, None, None))
+            continue
+        duration = recording_duration(path)
+        n_chunks = max(1, int(np.ceil(duration / chunk_seconds)))
+        starts = [i * chunk_seconds for i in range(n_chunks)]
+        offsets = chunk_offsets(path, starts) + [None]  # 最后一段包含文件末尾
+        for i, start in enumerate(starts):
+            stop = None if i == n_chunks - 1 else starts[i + 1]
+            tasks.append(AnalysisTask(f"{path}#{start:g}", path, start, stop, offsets[i], offsets[i + 1]))
+    return tasks
+
+
+def checkpoint_key(task: AnalysisTask, options: Dict, stat: Optional[os.stat_result] = None) -> str:
+    """
+    汇总文件中标识已完成任务的键: 任务 (文件和时间段)、分析参数的哈希、文件的修改时间和大小
+
+    修改参数或文件被改写/追加后, 以前的结果不再匹配, 任务会重新分析。
+    """
+    stat = stat or os.stat(task.path)
+    digest = hashlib.sha1(json.dumps(options, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()[:12]
+    return f"{task.task_id}:{task.stop}|{digest}|{stat.st_mtime_ns}:{stat.st_size}"
+
+
+def resolve_channels(names: Iterable[str]) -> List:
+    """把通道名称、中文标签或设备数据键 (如 'speed_x', '速度X', '58') 解析为 CHANNELS 中的 Channel"""
+    resolved = []
+    for name in names:
+        try:
+            channel = ChannelId.parse(name)
+        except KeyError:
+            channel = None
+        if channel not in MONITORED_CHANNELS:
+            raise ValueError(f"未知的通道: {name}")
+        resolved.append(CHANNELS[MONITORED_CHANNELS.index(channel)])
+    return resolved
+
+
+def analyze_task(task: AnalysisTask, options: Dict) -> Dict:
+    """
+    分析一个任务 (在工作进程中运行)
+
+    Args:
+        options: channels (设备数据键列表), feeding_channel (设备数据键或 None), target_weight,
+                 tolerance, thresholds, peaks (每个通道保留的频谱峰数)
+
+    Returns:
+        dict: 可 JSON 序列化的结果摘要
+    """
+    started = time.perf_counter()
+    if task.begin is not None:
+        times, values = load_recording(task.path, task.begin, task.end)  # 只读取本时间段
+    else:
+        times, values = load_recording(task.path)
+    if task.begin is None and task.start is not None and len(times):
+        relative = times - times[0]
+        mask = relative >= task.start
+        if task.stop is not None:
+            mask &= relative < task.stop
+        times, values = times[mask], values[mask]
+    record = {
+        'task_id': task.task_id,
+        'file': task.path,
+        'start': task.start,
+        'stop': task.stop,
+        'samples': int(len(times)),
+        'time_range': [float(times[0]), float(times[-1])] if len(times) else None,
+        'channels': {},
+    }
+    if len(times) < 2:
+        record['elapsed'] = time.perf_counter() - started
+        return record
+    record['sample_rate'] = data_analysis.sample_rate(times)
+    for key in options['channels']:
+        series = values[:, KEY_COLUMNS[key]]
+        valid = ~np.isnan(series)
+        if valid.sum() < 2:
+            record['channels'][key] = None
+            continue
+        freqs, amplitude = data_analysis.compute_spectrum(times[valid], series[valid])
+        record['channels'][key] = {
+            'features': data_analysis.extract_features(series[valid]),
+            'spectrum_peaks': data_analysis.spectrum_peaks(freqs, amplitude, options['peaks']),
+        }
+    feeding_key = options.get('feeding_channel')
+    if feeding_key:
+        series = values[:, KEY_COLUMNS[feeding_key]]
+        valid = ~np.isnan(series)
+        states = data_analysis.detect_feeding_states(series[valid], options['target_weight'],
+                                                     options['tolerance'], options.get('thresholds'))
+        record['feeding'] = {
+            'channel': feeding_key,
+            'final_state': data_analysis.FEEDING_STATES[states[-1]] if len(states) else None,
+            'phases': data_analysis.feeding_phases(times[valid], states),
+        }
+    record['elapsed'] = time.perf_counter() - started
+    return record
+
+
+def completed_tasks(summary_path: str) -> Set[str]:
+    """
+    读取汇总文件中已成功完成的任务 (checkpoint_key); 中断时写了一半的末行会被截掉
+    """
+    done = set()
+    if not os.path.exists(summary_path):
+        return done
+    valid_bytes = 0
+    with open(summary_path, 'rb') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break
+            valid_bytes += len(line)
+            if 'error' not in record and 'key' in record:
+                done.add(record['key'])
+    if valid_bytes != os.path.getsize(summary_path):
+        with open(summary_path, 'r+b') as f:
+            f.truncate(valid_bytes)
+        logger.warning(f"汇总文件末尾有不完整的记录, 已截断: {summary_path}")
+    return done
+
+
+def run_batch(tasks: List[AnalysisTask], summary_path: str, options: Dict, workers: Optional[int] = None,
+              resume: bool = True, max_in_flight: Optional[int] = None) -> Dict:
+    """
+    并行执行任务, 结果逐条追加到汇总文件
+
+    Args:
+        resume: True 时跳过汇总文件中已完成且任务、参数和文件都未改变的任务, False 时清空汇总文件重新分析
+        max_in_flight: 同时提交的任务数上限 (默认 workers 的 4 倍), 避免一次提交数万个任务
+
+    Returns:
+        dict: 统计 (总任务数、跳过、完成、失败、耗时)
+    """
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or workers * 4
+    done = completed_tasks(summary_path) if resume else set()
+    stats_by_path = {path: os.stat(path) for path in {task.path for task in tasks}}
+    keys = {task.task_id: checkpoint_key(task, options, stats_by_path[task.path]) for task in tasks}
+    pending = [task for task in tasks if keys[task.task_id] not in done]
+    stats = {'tasks': len(tasks), 'skipped': len(tasks) - len(pending), 'completed': 0, 'failed': 0}
+    logger.info(f"批量分析: {len(tasks)} 个任务, 已完成 {stats['skipped']} 个, 使用 {workers} 个进程")
+    started = time.perf_counter()
+    os.makedirs(os.path.dirname(os.path.abspath(summary_path)), exist_ok=True)
+    with open(summary_path, 'a' if resume else 'w', encoding='utf-8') as summary, \
+            ProcessPoolExecutor(max_workers=workers) as executor:
+        queue = iter(pending)
+        running = {}
+        while True:
+            for task in queue:
+                running[executor.submit(analyze_task, task, options)] = task
+                if len(running) >= max_in_flight:
+                    break
+            if not running:
+                break
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                task = running.pop(future)
+                try:
+                    record = future.result()
+                    stats['completed'] += 1
+                except Exception as e:
+                    logger.error(f"分析失败 {task.task_id}: {e}")
+                    record = {'task_id': task.task_id, 'file': task.path, 'error': str(e)}
+                    stats['failed'] += 1
+                record['key'] = keys[task.task_id]
+                summary.write(json.dumps(record, ensure_ascii=False) + '\n')
+                summary.flush()  # 每条结果落盘后才算完成, 作为中断后的检查点
+            logger.debug(f"批量分析进度: {stats['completed'] + stats['failed']}/{len(pending)}")
+    stats['seconds'] = time.perf_counter() - started
+    logger.info(f"批量分析结束: 完成 {stats['completed']}, 失败 {stats['failed']}, "
+                f"跳过 {stats['skipped']}, 耗时 {stats['seconds']:.1f} 秒")
+    return stats
+
+
+def main(argv=None) -> int:
+    """vibration-monitor analyze 子命令入口"""
+    parser = argparse.ArgumentParser(prog='vibration-monitor analyze', description='批量离线分析记录文件')
+    parser.add_argument('paths', nargs='+', help='记录文件或目录 (递归查找 .csv / .npy)')
+    parser.add_argument('-o', '--output', default='analysis_summary.jsonl', help='汇总文件 (JSON Lines)')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='工作进程数, 默认 CPU 核数')
+    parser.add_argument('--chunk-seconds', type=float, default=0,
+                        help='按时间段切分文件 (秒), 0 表示每个文件一个任务')
+    parser.add_argument('--channels', nargs='+', default=list(DEFAULT_CHANNELS),
+                        help='分析的通道 (名称、中文标签或数据键)')
+    parser.add_argument('--feeding-channel', default='速度Z', help='下料阶段识别使用的通道, none 表示不识别')
+    parser.add_argument('--target-weight', type=float, default=100.0, help='下料目标重量 (g)')
+    parser.add_argument('--tolerance', type=float, default=1.0, help='下料允许误差')
+    parser.add_argument('--peaks', type=int, default=3, help='每个通道保留的频谱峰数')
+    parser.add_argument('--restart', action='store_true', help='忽略已有汇总文件, 全部重新分析')
+    args = parser.parse_args(argv)
+
+    try:
+        files = find_recordings(args.paths)
+        channels = resolve_channels(args.channels)
+        feeding = None if args.feeding_channel.lower() == 'none' else resolve_channels([args.feeding_channel])[0]
+    except ValueError as e:
+        parser.error(str(e))
+    if not files:
+        print("没有找到记录文件")
+        return 1
+    options = {
+        'channels': [channel.key for channel in channels],
+        'feeding_channel': feeding.key if feeding else None,
+        'target_weight': args.target_weight,
+        'tolerance': args.tolerance,
+        'thresholds': dict(data_analysis.DEFAULT_FEEDING_THRESHOLDS),
+        'peaks': args.peaks,
+    }
+    tasks = plan_tasks(files, args.chunk_seconds)
+    stats = run_batch(tasks, args.output, options, workers=args.workers, resume=not args.restart)
+    print(f"{len(files)} 个文件, {stats['tasks']} 个任务: 完成 {stats['completed']}, 失败 {stats['failed']}, "
+          f"跳过 {stats['skipped']}, 耗时 {stats['seconds']:.1f} 秒 -> {args.output}")
+    return 1 if stats['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,131 @@
+"""
+监测通道定义
+
+界面表格、报警引擎和记录等模块共用同一份通道顺序, 避免各处各自维护一份键名列表。
+
+ChannelId 是唯一的通道登记表: 枚举值即采样数组 (DeviceModel.values、采样监听器、DataRecorder CSV) 中的列号,
+并给出寄存器地址 (register)、设备数据键 (key, 如 "52")、config.ini 中的名称 (config_name, 如 accel_x)、显示名和单位。
+驱动把寄存器直接解码到对应的列, 热路径按枚举值索引数组; 字符串只在配置、显示和兼容旧接口 (DeviceModel.get_data) 时使用。
+
+CHANNELS 为界面、报警和历史数据使用的 13 个监测通道 (不含角速度),
+name 同 config.ini [Thresholds] 中的键, key 为 DeviceModel.get_data 的键。
+"""
+from collections import namedtuple
+from enum import IntEnum
+from typing import Union
+
+import numpy as np
+
+
+class ChannelId(IntEnum):
+    """设备记录的通道, 值为采样数组中的列号 (顺序同 RECORD_KEYS)"""
+
+    ACCEL_X = 0
+    ACCEL_Y = 1
+    ACCEL_Z = 2
+    GYRO_X = 3
+    GYRO_Y = 4
+    GYRO_Z = 5
+    SPEED_X = 6
+    SPEED_Y = 7
+    SPEED_Z = 8
+    DISP_X = 9
+    DISP_Y = 10
+    DISP_Z = 11
+    FREQ_X = 12
+    FREQ_Y = 13
+    FREQ_Z = 14
+    TEMPERATURE = 15
+
+    @property
+    def key(self) -> str:
+        """设备数据键 (寄存器地址的十进制, DeviceModel.get_data 的键)"""
+        return _CHANNEL_INFO[self][0]
+
+    @property
+    def register(self) -> int:
+        """WTVB01 中该通道的寄存器地址 (设备数据键即其十进制)"""
+        return int(_CHANNEL_INFO[self][0])
+
+    @property
+    def label(self) -> str:
+        return _CHANNEL_INFO[self][1]
+
+    @property
+    def unit(self) -> str:
+        return _CHANNEL_INFO[self][2]
+
+    @property
+    def config_name(self) -> str:
+        """config.ini 和派生通道表达式中使用的名称, 如 accel_x"""
+        return self.name.lower()
+
+    @classmethod
+    def parse(cls, text: Union[str, int]) -> 'ChannelId':
+        """
+        由列号、config 名称 (大小写不限, 即枚举名)、设备数据键或显示名查找通道
+
+        Raises:
+            KeyError: 没有对应的通道
+        """
+        if isinstance(text, int):
+            return cls(text)
+        try:
+            return _CHANNEL_LOOKUP[text.strip().lower()]
+        except KeyError:
+            raise KeyError(f"未知的通道: {text}") from None
+
+
+# ChannelId -> (设备数据键, 显示名, 单位)
+_CHANNEL_INFO = {
+    ChannelId.ACCEL_X: ("52", '加速度X', 'g'),
+    ChannelId.ACCEL_Y: ("53", '加速度Y', 'g'),
+    ChannelId.ACCEL_Z: ("54", '加速度Z', 'g'),
+    ChannelId.GYRO_X: ("55", '角速度X', '°/s'),
+    ChannelId.GYRO_Y: ("56", '角速度Y', '°/s'),
+    ChannelId.GYRO_Z: ("57", '角速度Z', '°/s'),
+    ChannelId.SPEED_X: ("58", '速度X', 'mm/s'),
+    ChannelId.SPEED_Y: ("59", '速度Y', 'mm/s'),
+    ChannelId.SPEED_Z: ("60", '速度Z', 'mm/s'),
+    ChannelId.DISP_X: ("65", '位移X', 'μm'),
+    ChannelId.DISP_Y: ("66", '位移Y', 'μm'),
+    ChannelId.DISP_Z: ("67", '位移Z', 'μm'),
+    ChannelId.FREQ_X: ("68", '频率X', 'Hz'),
+    ChannelId.FREQ_Y: ("69", '频率Y', 'Hz'),
+    ChannelId.FREQ_Z: ("70", '频率Z', 'Hz'),
+    ChannelId.TEMPERATURE: ("64", '温度', '°C'),
+}
+
+_CHANNEL_LOOKUP = {}
+for _channel in ChannelId:
+    for _text in (_channel.key, _channel.config_name, _channel.label.lower()):
+        _CHANNEL_LOOKUP[_text] = _channel
+
+# DataRecorder CSV 数据列对应的设备数据键 (加速度、角速度、振动速度、位移、频率、温度);
+# 回放文件和远程采集批次的通道顺序与此相同
+RECORD_KEYS = tuple(channel.key for channel in ChannelId)
+KEY_COLUMNS = {channel.key: channel for channel in ChannelId}  # 设备数据键 -> ChannelId
+
+Channel = namedtuple('Channel', ['name', 'key', 'label', 'unit'])
+
+MONITORED_CHANNELS = (
+    ChannelId.ACCEL_X, ChannelId.ACCEL_Y, ChannelId.ACCEL_Z,
+    ChannelId.SPEED_X, ChannelId.SPEED_Y, ChannelId.SPEED_Z,
+    ChannelId.DISP_X, ChannelId.DISP_Y, ChannelId.DISP_Z,
+    ChannelId.FREQ_X, ChannelId.FREQ_Y, ChannelId.FREQ_Z,
+    ChannelId.TEMPERATURE,
+)
+CHANNELS = tuple(Channel(channel.config_name, channel.key, channel.label, channel.unit)
+                 for channel in MONITORED_CHANNELS)
+
+CHANNEL_NAMES = tuple(channel.name for channel in CHANNELS)
+CHANNEL_KEYS = tuple(channel.key for channel in CHANNELS)
+CHANNEL_INDEX = {channel.name: i for i, channel in enumerate(CHANNELS)}
+# CHANNELS 各通道在采样数组中的列号: 采样数组[..., CHANNEL_COLUMNS] 即按 CHANNELS 顺序排列的数据
+CHANNEL_COLUMNS = np.array(MONITORED_CHANNELS, dtype=np.intp)
+
+
+def record_values(data) -> np.ndarray:
+    """以设备数据键为键的字典 (如模拟设备的采样) 转为采样数组 (形状 (len(RECORD_KEYS),)), 缺失的通道为 NaN"""
+    return np.array([data.get(key, np.nan) for key in RECORD_KEYS], dtype=float)
+
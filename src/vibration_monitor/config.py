@@ -1,5 +1,6 @@
 import configparser
 import os
+import threading
 
 class Config:
     """配置管理类"""
@@ -42,3 +43,22 @@ class Config:
         config_path = os.path.join(current_dir, '..', '..', config_file) #项目根目录
         with open(config_path, 'w', encoding='utf-8') as f:
             self.config.write(f)
+
+
+_shared_config = None
+_shared_lock = threading.Lock()
+
+
+def get_config() -> Config:
+    """
+    获取进程内共享的配置实例
+
+    首次调用时解析 config.ini, 之后直接返回同一个对象, 避免各模块重复读取配置文件。
+    需要独立修改并保存配置时仍可直接构造 Config()。
+    """
+    global _shared_config
+    if _shared_config is None:
+        with _shared_lock:
+            if _shared_config is None:
+                _shared_config = Config()
+    return _shared_config
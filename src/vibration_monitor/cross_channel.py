@@ -0,0 +1,141 @@
+"""
+多通道互分析: 互相关、互谱、相干函数和相位
+
+输入为同一时间网格上的多个通道 (例如 alignment.StreamAligner 输出的多台设备数据),
+形状 (通道数, n)。所有通道一起分段、加窗、做一次批量 FFT, 各通道对的互谱由频谱逐元素相乘得到,
+FFT 的次数只与通道数和数据长度有关, 不随通道对数增长; 通道很多时可以用 pairs 只计算需要的通道对。
+
+约定与 scipy.signal.csd / coherence 一致: S[i, j] = conj(X_i) * X_j, 相位为 j 相对 i 的超前量 (弧度)。
+NaN 在去均值后按 0 处理。不依赖 Qt。
+"""
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+from scipy.fft import irfft, next_fast_len, rfft, rfftfreq
+from scipy.signal import get_window
+
+Pairs = Optional[Sequence[Tuple[int, int]]]
+
+
+def _prepare(values) -> np.ndarray:
+    data = np.atleast_2d(np.asarray(values, dtype=float))
+    if data.shape[-1] < 2:
+        raise ValueError("数据不足")
+    means = np.nanmean(data, axis=-1, keepdims=True) if not np.isnan(data).all() else 0.0
+    return np.nan_to_num(data - means)
+
+
+def _pair_index(pairs: Sequence[Tuple[int, int]]) -> Tuple[np.ndarray, np.ndarray]:
+    index = np.array(pairs, dtype=int).reshape(-1, 2)
+    return index[:, 0], index[:, 1]
+
+
+def _pair_products(x: np.ndarray, y: np.ndarray, pairs: Pairs) -> np.ndarray:
+    """conj(x_i) * y_j: pairs 为 None 时形状 (通道数, 通道数, ...), 否则 (通道对数, ...)"""
+    if pairs is None:
+        return np.conj(x)[:, None] * y[None, :]
+    first, second = _pair_index(pairs)
+    return np.conj(x[first]) * y[second]
+
+
+def segment_spectra(values, fs: float, nperseg: int = 256, overlap: float = 0.5,
+                    window: str = 'hann') -> Tuple[np.ndarray, np.ndarray, float]:
+    """
+    分段加窗后的批量 FFT
+
+    Returns:
+        tuple: (频率 Hz, 频谱 形状 (通道数, 段数, 频率数), 功率谱密度的比例系数)
+    """
+    data = _prepare(values)
+    n = data.shape[-1]
+    nperseg = min(nperseg, n)
+    step = max(1, nperseg - int(nperseg * overlap))
+    segments = np.lib.stride_tricks.sliding_window_view(data, nperseg, axis=-1)[:, ::step]
+    segments = segments - segments.mean(axis=-1, keepdims=True)  # 每段去均值 (detrend='constant')
+    taper = get_window(window, nperseg)
+    spectra = rfft(segments * taper, axis=-1)
+    scale = 1.0 / (fs * np.sum(taper ** 2))
+    return rfftfreq(nperseg, 1.0 / fs), spectra, scale
+
+
+def cross_spectral_matrix(values, fs: float, nperseg: int = 256, overlap: float = 0.5,
+                          window: str = 'hann', pairs: Pairs = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    互功率谱密度 (Welch 法)
+
+    Returns:
+        tuple: (频率 Hz, S); S 形状 (通道数, 通道数, 频率数), 给出 pairs 时为 (通道对数, 频率数)
+    """
+    freqs, spectra, scale = segment_spectra(values, fs, nperseg, overlap, window)
+    matrix = _pair_products(spectra, spectra, pairs).mean(axis=-2) * scale
+    # 单边谱: 除直流和奈奎斯特频率 (段长为偶数时才有) 外乘 2
+    matrix[..., 1:-1 if np.isclose(freqs[-1], 0.5 * fs) else None] *= 2
+    return freqs, matrix
+
+
+def coherence(values, fs: float, nperseg: int = 256, overlap: float = 0.5, window: str = 'hann',
+              pairs: Pairs = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    幅度平方相干函数与相位
+
+    Returns:
+        tuple: (频率 Hz, 相干函数 [0, 1], 相位 (弧度)), 形状同 cross_spectral_matrix
+    """
+    freqs, spectra, _ = segment_spectra(values, fs, nperseg, overlap, window)
+    cross = _pair_products(spectra, spectra, pairs).mean(axis=-2)
+    auto = (np.abs(spectra) ** 2).mean(axis=-2)
+    if pairs is None:
+        power = auto[:, None] * auto[None, :]
+    else:
+        first, second = _pair_index(pairs)
+        power = auto[first] * auto[second]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        result = np.abs(cross) ** 2 / power
+    return freqs, np.nan_to_num(result), np.angle(cross)
+
+
+def cross_correlation(values, max_lag: Optional[int] = None, normalize: bool = True,
+                      pairs: Pairs = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    互相关 R[i, j](k) = sum_t x_i(t) * x_j(t + k), 补零后由 FFT 计算 (非循环)
+
+    Args:
+        max_lag: 最大滞后 (采样数), 默认 n - 1
+        normalize: 除以 sqrt(sum x_i^2 * sum x_j^2), 结果在 [-1, 1]
+
+    Returns:
+        tuple: (滞后 形状 (2 * max_lag + 1,), R 形状 (通道数, 通道数, 滞后数) 或 (通道对数, 滞后数))
+    """
+    data = _prepare(values)
+    n = data.shape[-1]
+    max_lag = n - 1 if max_lag is None else min(int(max_lag), n - 1)
+    size = next_fast_len(2 * n - 1, real=True)
+    spectra = rfft(data, size, axis=-1)
+    circular = irfft(_pair_products(spectra, spectra, pairs), size, axis=-1)
+    result = np.concatenate([circular[..., size - max_lag:], circular[..., :max_lag + 1]], axis=-1)
+    if normalize:
+        energy = np.sum(data * data, axis=-1)
+        norm = _pair_products(np.sqrt(energy), np.sqrt(energy), pairs).real
+        with np.errstate(invalid='ignore', divide='ignore'):
+            result = np.nan_to_num(result / norm[..., None])
+    return np.arange(-max_lag, max_lag + 1), result
+
+
+def time_delay(values, fs: float, max_lag: Optional[int] = None,
+               pairs: Pairs = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    由互相关峰值估计各通道对的时间延迟 (抛物线插值到采样间隔以下)
+
+    Returns:
+        tuple: (延迟 秒, 正值表示 j 滞后于 i; 峰值处的归一化互相关系数)
+    """
+    lags, correlation = cross_correlation(values, max_lag, True, pairs)
+    peak = np.argmax(correlation, axis=-1)
+    inner = np.clip(peak, 1, len(lags) - 2)
+    left, center, right = (np.take_along_axis(correlation, (inner + d)[..., None], axis=-1)[..., 0]
+                           for d in (-1, 0, 1))
+    denominator = left - 2 * center + right
+    with np.errstate(invalid='ignore', divide='ignore'):
+        offset = np.where((peak == inner) & (denominator < 0), 0.5 * (left - right) / denominator, 0.0)
+    value = np.take_along_axis(correlation, peak[..., None], axis=-1)[..., 0]
+    return (lags[peak] + offset) / fs, value
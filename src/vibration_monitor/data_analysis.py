@@ -0,0 +1,216 @@
+"""
+离线数据分析算法
+
+特征提取、频谱、滤波和下料阶段识别的纯函数实现, 不依赖 Qt。
+界面 (gui/analysis_window.py) 与批量分析 (batch_analysis.py) 共用这里的实现, 保证两处结果一致。
+"""
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy.fft import rfft, rfftfreq
+from scipy.signal import butter, filtfilt, find_peaks, iirnotch
+
+from .resampling import sample_rate, to_uniform  # sample_rate 原在本模块定义, 保留导入供原有调用方使用
+
+# 下料阶段, 数值用于绘图和统计
+FEEDING_STATES = ("Initial", "FastFeeding", "SlowFeeding", "StopFeeding", "Stable", "Dithering")
+FEEDING_STATE_INDEX = {state: i for i, state in enumerate(FEEDING_STATES)}
+
+DEFAULT_FEEDING_THRESHOLDS = {
+    'threshold1': 20,    # 初始 -> 快速下料 (振动幅度)
+    'threshold2': 10,    # 初始 -> 快速下料 (振动速度)
+    'threshold3': 5,     # 快速下料 - > 慢速下料
+    'threshold4': -2,    # 快速下料 -> 慢速下料 (振动速度变化率)
+    'threshold5': 50,    # 慢速下料 -> 停止 (估计剩余重量)
+    'threshold6': 2,     # 停止下料 -> 稳定 (振动幅度)
+    'threshold7': 1,     # 停止下料 -> 稳定  (振动幅度)
+    'threshold8': 5,     # 补料判断
+    'threshold9': 2,     # 补料判断
+}
+
+FEEDING_WINDOW = 10  # 下料特征的滑动窗口大小
+
+FILTER_TYPES = ('低通', '高通', '带通', '带阻')
+
+
+def extract_features(series: Sequence[float]) -> Dict[str, float]:
+    """
+    时域特征: 均值、方差、均方根、峰值、峭度、偏度、峰值数量等
+
+    Raises:
+        ValueError: 没有数据
+    """
+    data = np.asarray(series, dtype=float)
+    if data.size == 0:
+        raise ValueError("没有可用数据")
+    features = {}
+    features['均值'] = float(np.mean(data))
+    features['方差'] = float(np.var(data))
+    features['标准差'] = float(np.std(data))
+    features['均方根'] = float(np.sqrt(np.mean(np.square(data))))
+    features['峰值'] = float(np.max(np.abs(data)))  # 峰值 (绝对值的最大值)
+    features['峰峰值'] = float(np.max(data) - np.min(data))
+    centered = data - features['均值']
+    std = features['标准差']
+    features['峭度'] = float(np.mean(centered ** 4) / std ** 4) if std > 0 else float('nan')
+    features['偏度'] = float(np.mean(centered ** 3) / std ** 3) if std > 0 else float('nan')
+
+    # 查找峰值 (使用 scipy.signal.find_peaks)
+    peaks, _ = find_peaks(np.abs(data))
+    features['峰值数量'] = int(len(peaks))
+    features['平均峰值间距'] = float(np.mean(np.diff(peaks))) if len(peaks) > 1 else 0.0
+    return features
+
+
+def compute_spectrum(timestamps: Sequence[float], series: Sequence[float]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    单边幅度谱; 采样间隔不均匀时先重采样到均匀网格 (见 resampling.to_uniform)
+
+    Returns:
+        tuple: (频率 Hz, 幅度), 只包含正频率
+    """
+    if len(series) < 2:
+        raise ValueError("数据不足")
+    uniform = to_uniform(timestamps, series)
+    return amplitude_spectrum(uniform.values, uniform.fs)
+
+
+def amplitude_spectrum(values: np.ndarray, fs: float) -> Tuple[np.ndarray, np.ndarray]:
+    """等间隔序列 (采样率 fs) 的单边幅度谱, 只包含 [0, fs/2) 的频率"""
+    n = len(values)
+    amplitude = np.abs(rfft(values))
+    freqs = rfftfreq(n, 1.0 / fs)
+    keep = n // 2  # 与界面原有显示一致: 只取 [0, fs/2) 的频率
+    return freqs[:keep], amplitude[:keep]
+
+
+def spectrum_peaks(freqs: np.ndarray, amplitude: np.ndarray, count: int = 3) -> List[Dict[str, float]]:
+    """频谱中幅度最大的 count 个峰 (不含直流分量), 按幅度降序"""
+    if len(amplitude) < 3:
+        return []
+    peaks, _ = find_peaks(amplitude[1:])
+    peaks = peaks + 1
+    top = peaks[np.argsort(amplitude[peaks])[::-1][:count]]
+    return [{'频率': float(freqs[i]), '幅度': float(amplitude[i])} for i in top]
+
+
+def apply_filter(timestamps: Sequence[float], series: Sequence[float], filter_type: str,
+                 cutoff, order: int = 4) -> np.ndarray:
+    """
+    零相位滤波
+
+    Args:
+        filter_type: FILTER_TYPES 之一
+        cutoff: 截止频率 (Hz); 带通/带阻为 [f1, f2], 带阻的中心频率取 f1, 带宽为 f2 - f1
+        order: 巴特沃斯滤波器阶数 (带阻滤波器使用 iirnotch, 不使用阶数)
+
+    采样间隔不均匀时在均匀网格上滤波, 再插值回原始时间, 返回值与 series 等长。
+    """
+    t = np.asarray(timestamps, dtype=float)
+    uniform = to_uniform(t, series)
+    b, a = design_filter(filter_type, cutoff, uniform.fs, order)
+    filtered = filtfilt(b, a, uniform.values)
+    if uniform.time is t:
+        return filtered
+    return np.interp(t, uniform.time, filtered)
+
+
+def design_filter(filter_type: str, cutoff, fs: float, order: int = 4) -> Tuple[np.ndarray, np.ndarray]:
+    """设计滤波器 (参数同 apply_filter, fs 为采样率), 返回传递函数系数 (b, a)"""
+    if filter_type not in FILTER_TYPES:
+        raise ValueError(f"不支持的滤波器类型: {filter_type}")
+    nyquist = 0.5 * fs
+    if filter_type == '带阻':
+        w0 = cutoff[0] / nyquist  # 中心频率
+        bw = (cutoff[1] - cutoff[0]) / nyquist  # 带宽
+        return iirnotch(w0, w0 / bw)  # 品质因数 = 中心/带宽
+    btype = {'低通': 'low', '高通': 'high', '带通': 'band'}[filter_type]
+    normalized = [f / nyquist for f in cutoff] if filter_type == '带通' else cutoff / nyquist
+    return butter(order, normalized, btype=btype, analog=False)
+
+
+def feeding_features(series: Sequence[float], target_weight: float,
+                     window: int = FEEDING_WINDOW) -> Dict[str, np.ndarray]:
+    """
+    下料分析所需的逐点特征 (向量化), 每个特征是与 series 等长的数组
+
+    振动幅度为滑动窗口内绝对值均值, 振动速度和变化率为窗口内一阶、二阶差分的均值;
+    估计剩余重量按数据位置线性递减 (简化模型, 实际需要经验公式)。
+    """
+    data = np.asarray(series, dtype=float)
+    n = len(data)
+    index = np.arange(n)
+    start = np.maximum(index - window + 1, 0)
+    length = index - start + 1
+    cumsum = np.concatenate(([0.0], np.cumsum(np.abs(data))))
+    amplitude = (cumsum[index + 1] - cumsum[start]) / length
+    # 差分均值只与窗口首尾有关: mean(diff(w)) = (w[-1] - w[0]) / (len - 1)
+    speed = np.zeros(n)
+    multi = length > 1
+    speed[multi] = (data[index[multi]] - data[start[multi]]) / (length[multi] - 1)
+    diff = np.concatenate(([0.0], np.diff(data)))  # diff[i] = data[i] - data[i-1]
+    acceleration = np.zeros(n)
+    multi = length > 2
+    acceleration[multi] = (diff[index[multi]] - diff[start[multi] + 1]) / (length[multi] - 2)
+    remaining = (1 - index / n) * target_weight if n else np.zeros(0)
+    return {
+        '振动幅度': amplitude,
+        '振动速度': speed,
+        '振动速度变化率': acceleration,
+        '估计剩余重量': remaining,
+        '与目标重量偏差': remaining - target_weight,
+    }
+
+
+def detect_feeding_states(series: Sequence[float], target_weight: float, tolerance: float,
+                          thresholds: Optional[Dict[str, float]] = None) -> np.ndarray:
+    """
+    下料阶段识别状态机
+
+    Returns:
+        np.ndarray: 每个数据点的阶段编号 (FEEDING_STATES 中的下标)
+    """
+    thresholds = {**DEFAULT_FEEDING_THRESHOLDS, **(thresholds or {})}
+    features = feeding_features(series, target_weight)
+    amplitude = features['振动幅度'].tolist()
+    speed = features['振动速度'].tolist()
+    acceleration = features['振动速度变化率'].tolist()
+    remaining = features['估计剩余重量'].tolist()
+    deviation = features['与目标重量偏差'].tolist()
+    t1, t2, t3, t4, t5, t6, t7, t8, t9 = (thresholds[f'threshold{i}'] for i in range(1, 10))
+
+    state = "Initial"
+    states = np.empty(len(amplitude), dtype=np.int8)
+    for i in range(len(amplitude)):
+        if state == "Initial":
+            if amplitude[i] > t1 and speed[i] > t2:
+                state = "FastFeeding"
+        elif state == "FastFeeding":
+            if amplitude[i] < t3 or acceleration[i] < t4:
+                state = "SlowFeeding"
+        elif state == "SlowFeeding":
+            if remaining[i] < t5:
+                state = "StopFeeding"
+        elif state == "StopFeeding":
+            if amplitude[i] < t6 and speed[i] < t7:
+                state = "Stable"
+        elif state == "Stable":
+            if deviation[i] < -tolerance:
+                state = "Dithering"
+        elif state == "Dithering":
+            if amplitude[i] < t8 and speed[i] < t9:
+                state = "Stable"
+        states[i] = FEEDING_STATE_INDEX[state]
+    return states
+
+
+def feeding_phases(timestamps: Sequence[float], states: np.ndarray) -> List[Dict]:
+    """把逐点阶段序列合并成阶段区间列表 [{'阶段', '开始', '结束', '点数'}]"""
+    t = np.asarray(timestamps, dtype=float)
+    if len(states) == 0:
+        return []
+    changes = np.flatnonzero(np.diff(states)) + 1
+    starts = np.concatenate(([0], changes))
+    ends = np.concatenate((changes, [len(states)]))
+    return [{'阶段': FEEDING_STATES[states[s]], '开始': float(t[s]), '结束': float(t[e - 1]), '点数': int(e - s)}
+            for s, e in zip(starts, ends)]
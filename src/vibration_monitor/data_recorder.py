@@ -1,21 +1,105 @@
 import csv
+import io
 import os  # 导入 os 模块
+import time
 from datetime import datetime
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from .channels import RECORD_KEYS
 from .device.device_model import DeviceModel
 from .utils.logger import setup_logger
+from .utils.metrics import metrics
 
 logger = setup_logger(__name__)
 
+FLUSH_ROW = "row"            # 每写一行立即 flush (最安全, 最慢)
+FLUSH_INTERVAL = "interval"  # 距上次 flush 超过 flush_interval 秒时 flush
+FLUSH_ON_CLOSE = "close"     # 只依赖文件缓冲, 停止记录时 flush
+FLUSH_POLICIES = (FLUSH_ROW, FLUSH_INTERVAL, FLUSH_ON_CLOSE)
+
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S.%f'  # CSV '记录时间' 列格式 (毫秒)
+
+
+def load_recording(path: str, begin: Optional[int] = None, end: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    读取记录文件
+
+    支持 DataRecorder 生成的 CSV (温度之后的派生通道列忽略, 可由 DerivedChannels 重新计算), 以及 (N, 17) 的 .npy 二进制文件 (第 0 列为时间 秒, 其余 16 列顺序同 CSV 数据列)。
+
+    Args:
+        begin, end: 只读取文件的一段 (默认整个文件): .npy 为行号, CSV 为数据行起始处的字节偏移 (end 为 None 时到文件末尾),
+                    见 batch_analysis.chunk_offsets
+
+    Returns:
+        tuple: (时间戳, 数据矩阵); CSV 的时间戳为 Unix 时间 (秒), 数据矩阵形状 (N, 16), 通道顺序同 channels.RECORD_KEYS,
+               空值为 NaN
+    """
+    if path.endswith(".npy"):
+        records = np.load(path, mmap_mode='r')[begin:end]
+        return np.asarray(records[:, 0], dtype=float), np.asarray(records[:, 1:], dtype=float)
+    if begin is None:
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            next(f, None)  # 表头
+            return _parse_csv_rows(csv.reader(f))
+    with open(path, 'rb') as f:
+        f.seek(begin)
+        text = f.read(-1 if end is None else end - begin).decode('utf-8')
+    return _parse_csv_rows(csv.reader(io.StringIO(text, newline="")))
+
+
+def derived_headers(derived) -> List[str]:
+    """派生通道 (derived_channels.DerivedChannels, 可为 None) 在记录文件中的列名, 依次排在温度之后"""
+    if derived is None:
+        return []
+    return [f"{channel.label}({channel.unit})" for channel in derived.channels]
+
+
+def _parse_csv_rows(reader) -> Tuple[np.ndarray, np.ndarray]:
+    stamps = []
+    rows = []
+    width = 2 + len(RECORD_KEYS)
+    for record in reader:
+        if len(record) < width:
+            continue
+        stamps.append(record[0])
+        rows.append(record[2:width])
+    if not rows:
+        return np.empty(0), np.empty((0, len(RECORD_KEYS)))
+    # 整列转换: 时间按 datetime64 计算相对首行的偏移, 空值按 NaN 处理
+    offsets = (np.array([stamp.replace(' ', 'T') for stamp in stamps], dtype='datetime64[ms]')
+               - np.datetime64(stamps[0].replace(' ', 'T'), 'ms')).astype(float) / 1000.0
+    times = datetime.strptime(stamps[0], TIME_FORMAT).timestamp() + offsets
+    cells = np.array(rows)
+    values = np.where(cells == '', 'nan', cells).astype(float)
+    return times, values
+
 
 class DataRecorder:
     """数据记录器类"""
 
-    def __init__(self, device: DeviceModel):
+    def __init__(self, device: DeviceModel, flush_policy: str = FLUSH_ROW, flush_interval: float = 1.0):
+        """
+        Args:
+            device: 被记录的设备
+            flush_policy (str): 刷新策略, FLUSH_POLICIES 之一
+            flush_interval (float): FLUSH_INTERVAL 策略下的刷新间隔 (秒)
+        """
+        if flush_policy not in FLUSH_POLICIES:
+            raise ValueError(f"不支持的刷新策略: {flush_policy}, 可选 {FLUSH_POLICIES}")
         self.device = device
         self.filename = None
         self.file = None
         self.writer = None
         self.is_recording = False
+        self.flush_policy = flush_policy
+        self.flush_interval = flush_interval
+        self._last_flush = 0.0
+        self._pending_rows = 0  # 上次 flush 之后写入的行数
+        self._m_write_ns = metrics.histogram("recorder.write_ns")
+        self._m_rows = metrics.counter("recorder.rows")
+        self._m_pending_rows = metrics.gauge("recorder.pending_rows")
         self.data_dir = os.path.join(os.path.dirname(__file__), "data_record")  # 数据文件夹路径
 
     def start_recording(self):
@@ -46,34 +130,55 @@ class DataRecorder:
               'X轴振动位移(um)', 'Y轴振动位移(um)', 'Z轴振动位移(um)',
               'X轴振动频率(Hz)', 'Y轴振动频率(Hz)', 'Z轴振动频率(Hz)',
               '温度(°C)'
-            ])
+            ] + self._derived_headers())
             self.is_recording = True
+            self._last_flush = time.monotonic()
             logger.info(f"开始记录数据到文件: {self.filename}")
             return True
         except Exception as e:
             logger.exception(f"创建CSV文件失败: {e}")
             return False
 
+    def _derived_headers(self):
+        """派生通道的列名, 排在温度之后; write_data 的数据按同样顺序追加派生通道的值"""
+        return derived_headers(getattr(self.device, 'derived', None))
+
     def stop_recording(self):
         """停止记录"""
         if self.is_recording:
             self.is_recording = False
             if self.file:
                 self.file.close()
+            self._pending_rows = 0
+            self._m_pending_rows.set(0)
             self.writer = None
             logger.info(f"数据已保存到文件: {self.filename}")
         else:
             logger.warning("数据记录未在进行中")
-    def write_data(self, data_values):
-      """写入数据"""
+    def write_data(self, data_values, sample_time=None):
+      """写入数据; sample_time 为采样时间戳 (秒, 见 device_model.sample_clock), 默认为当前时间"""
       if self.is_recording and self.writer:
-          timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
+          start = time.perf_counter_ns()
+          moment = datetime.now() if sample_time is None else datetime.fromtimestamp(sample_time)
+          timestamp = moment.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
           data_row = [
                 timestamp,
                 self.device.device_name
-          ] + [str(v) if v is not None else "" for v in data_values]
+          ] + ["" if v is None or v != v else str(v) for v in data_values]  # None / NaN 记为空
           try:
               self.writer.writerow(data_row)
-              self.file.flush()  # 立即写入
+              self._pending_rows += 1
+              if self.flush_policy == FLUSH_ROW:
+                  self.file.flush()  # 立即写入
+                  self._pending_rows = 0
+              elif self.flush_policy == FLUSH_INTERVAL:
+                  now = time.monotonic()
+                  if now - self._last_flush >= self.flush_interval:
+                      self.file.flush()
+                      self._last_flush = now
+                      self._pending_rows = 0
           except Exception as e:
               logger.exception(f"写入数据失败: {e}")
+          self._m_rows.inc()
+          self._m_pending_rows.set(self._pending_rows)
+          self._m_write_ns.record(time.perf_counter_ns() - start)
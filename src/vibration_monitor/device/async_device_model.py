@@ -0,0 +1,87 @@
+import asyncio
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, Callable, Dict, Iterable
+
+import numpy as np
+
+from ..channels import RECORD_KEYS
+from ..utils.logger import setup_logger
+
+logger = setup_logger(__name__) #日志
+
+
+class AsyncDeviceModel(ABC):
+    """
+    asyncio 设备模型抽象基类
+
+    与 DeviceModel 不同, 异步设备不占用独立线程: 多个设备的 read_frames()
+    由同一个事件循环驱动, 适合通过网关接入大量传感器的场景。
+    """
+
+    def __init__(self, device_name, port, address):
+        """
+        初始化异步设备模型
+
+        Args:
+            device_name (str): 设备名称
+            port (str): 连接地址 (串口号或 tcp://host:port)
+            address (int): 设备地址
+        """
+        self.device_name = device_name
+        self.port = port
+        self.address = address
+        self.is_open = False
+        self.data = {}  # 最新一帧的设备数据 (由 values 生成, 键同 record_keys), 即 read_frames 产出的数据帧
+        # 最新一帧的通道值, 按 channels.ChannelId 排列, 设置了派生通道时之后依次为各派生通道 (同 DerivedChannels.record_keys)
+        self.values = np.full(len(RECORD_KEYS), np.nan)
+        self.derived = None  # 派生通道 (derived_channels.DerivedChannels), 每帧解码后计算一次, 存入 values 和数据帧
+
+    @property
+    def record_keys(self) -> tuple:
+        """values 各列的键: channels.RECORD_KEYS, 之后依次为各派生通道名"""
+        return self.derived.record_keys if self.derived is not None else RECORD_KEYS
+        logger.info(f"初始化异步设备模型: {device_name} ({port}, {address})")
+
+    @abstractmethod
+    async def open(self):
+        """打开设备连接"""
+        pass
+
+    @abstractmethod
+    def read_frames(self) -> AsyncIterator[Dict[str, float]]:
+        """异步迭代设备数据帧, 每次产出一帧解析后的数据"""
+        pass
+
+    @abstractmethod
+    async def close(self):
+        """关闭设备连接"""
+        pass
+
+    def get_data(self, key):
+        """获取最新一帧中的设备数据, 键不存在时返回 None"""
+        return self.data.get(key)
+
+    async def run(self, on_frame: Callable[["AsyncDeviceModel", Dict[str, float]], None]):
+        """
+        打开设备并持续采集, 每收到一帧调用一次 on_frame, 任务取消或连接断开时关闭设备
+
+        Args:
+            on_frame: 回调函数, 参数为 (设备, 数据帧), 在事件循环线程中调用, 不应阻塞
+        """
+        await self.open()
+        try:
+            async for frame in self.read_frames():
+                on_frame(self, frame)
+        finally:
+            await self.close()
+
+
+async def run_devices(devices: Iterable[AsyncDeviceModel],
+                      on_frame: Callable[[AsyncDeviceModel, Dict[str, float]], None]):
+    """在当前事件循环中同时采集多个设备, 单个设备出错不影响其他设备"""
+    devices = list(devices)
+    results = await asyncio.gather(*(device.run(on_frame) for device in devices),
+                                   return_exceptions=True)
+    for device, result in zip(devices, results):
+        if isinstance(result, Exception):
+            logger.error(f"设备 {device.device_name} 采集异常退出: {result}")
@@ -0,0 +1,117 @@
+import asyncio
+from typing import AsyncIterator, Dict, Optional
+
+import numpy as np
+
+from .async_device_model import AsyncDeviceModel  # 导入基类
+from . import wtvb01_protocol as protocol  # 帧组装/校验/解析
+from ..channels import RECORD_KEYS
+from ..exceptions import DeviceConnectionError, DataAcquisitionError
+from ..utils.logger import setup_logger
+
+try:  # 串口直连需要可选依赖 pyserial-asyncio, 走 TCP 网关时不需要
+    import serial_asyncio
+except ImportError:  # pragma: no cover - 取决于运行环境
+    serial_asyncio = None
+
+logger = setup_logger(__name__)
+
+TCP_SCHEME = "tcp://"
+
+
+class AsyncDeviceWTVB01(AsyncDeviceModel):
+    """
+    WTVB01 的 asyncio 实现
+
+    port 为 "tcp://host:port" 时通过串口服务器 (透传 RTU) 连接,
+    否则视为串口号, 使用 pyserial-asyncio 打开。帧格式与线程版 DeviceWTVB01 完全相同。
+    """
+
+    def __init__(self, device_name: str, port: str, baudrate: int, address: int):
+        super().__init__(device_name, port, address)
+        self.baudrate = baudrate
+        self.reg_count: int = protocol.DATA_REG_COUNT  # 每次轮询读取的寄存器数量
+        self.read_timeout: float = 0.1  # 等待一帧应答的超时时间 (秒)
+        self.poll_interval: float = 0.0  # 两次轮询之间的额外间隔 (秒)
+        self.parser = protocol.FrameParser(address)
+        self.timeouts = 0  # 应答超时次数
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+
+    async def open(self):
+        """打开设备连接"""
+        if self.is_open:
+            logger.warning("设备已打开，无需重复打开")
+            return
+        try:
+            if self.port.startswith(TCP_SCHEME):
+                host, _, tcp_port = self.port[len(TCP_SCHEME):].rpartition(":")
+                self._reader, self._writer = await asyncio.open_connection(host, int(tcp_port))
+            else:
+                if serial_asyncio is None:
+                    raise DeviceConnectionError("串口直连需要安装 pyserial-asyncio")
+                self._reader, self._writer = await serial_asyncio.open_serial_connection(
+                    url=self.port, baudrate=self.baudrate)
+        except DeviceConnectionError:
+            raise
+        except (OSError, ValueError) as e:
+            raise DeviceConnectionError(f"打开设备失败 ({self.port}): {e}") from e
+        self.parser.reset()
+        self.is_open = True
+        logger.info(f"设备连接成功: {self.device_name}")
+
+    async def close(self):
+        """关闭设备连接"""
+        self.is_open = False
+        if self._writer is not None:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except OSError as e:
+                logger.warning(f"关闭连接时发生错误: {e}")
+            self._reader = None
+            self._writer = None
+            logger.info(f"设备已关闭: {self.device_name}")
+
+    async def read_frames(self) -> AsyncIterator[Dict[str, float]]:
+        """轮询设备, 每收到一帧完整应答产出一次解析后的数据"""
+        command = protocol.build_read_command(self.address, protocol.DATA_START_REG, self.reg_count)
+        expected = protocol.read_response_length(self.reg_count)
+
+        while self.is_open:
+            self._writer.write(command)
+            # 不使用 wait_for: 读取恰好完成时它可能吞掉外部的取消请求
+            read_task = asyncio.ensure_future(self._read_packet(expected))
+            try:
+                done, _ = await asyncio.wait((read_task,), timeout=self.read_timeout)
+            finally:
+                if not read_task.done():
+                    read_task.cancel()
+            if not done:
+                self.timeouts += 1
+                continue
+            values = np.full(len(RECORD_KEYS), np.nan)
+            try:
+                protocol.decode_values(read_task.result(), values, protocol.DATA_START_REG)
+            except ValueError as e:
+                raise DataAcquisitionError("解析数据时发生错误") from e
+            if self.derived is not None:  # 派生通道按数组计算一次
+                values = self.derived.extend(values)
+            self.values = values
+            frame = dict(zip(self.record_keys, values.tolist()))
+            self.data = frame
+            yield frame
+            if self.poll_interval > 0:
+                await asyncio.sleep(self.poll_interval)
+
+    async def _read_packet(self, expected: int):
+        """读取直到拆出一个完整数据包 (内部方法)"""
+        while True:
+            missing = expected - len(self.parser.buffer)
+            chunk = await self._reader.read(missing if missing > 0 else expected)
+            if not chunk:
+                self.is_open = False
+                raise DeviceConnectionError(f"连接已断开: {self.port}")
+            packets = self.parser.feed(chunk)
+            if packets:
+                return packets[-1]  # 只保留最新的一帧
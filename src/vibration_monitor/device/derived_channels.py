@@ -0,0 +1,196 @@
+"""
+派生通道
+
+由已解码的通道按表达式计算的通道, 例如三轴合成值 norm(speed_x, speed_y, speed_z) = √(x² + y² + z²)。
+设备每解码一帧后计算一次 (一批远程采样也只算一次), 结果作为额外的列与原始通道存放在同一个采样数组中:
+DeviceModel.values 和采样监听器收到的数组按 record_keys 排列, 即 channels.RECORD_KEYS 之后依次为各派生通道。
+界面、报警、记录、发布、共享内存和趋势等使用方按列号直接读取, 不各自重复计算。
+
+表达式中可以使用 channels.CHANNELS 的通道名、角速度 gyro_x / gyro_y / gyro_z、之前定义的派生通道,
+数字、+ - * / ** % 和 FUNCTIONS 中的函数; 所有运算都是 numpy 逐元素运算,
+同一个表达式既可以算单帧 (标量), 也可以一次算整批采样 (数组)。
+
+config.ini [DerivedChannels] 每行格式: 名称 = 标签, 单位, 表达式; 与内置通道同名时覆盖, 值为空时删除该内置通道
+(enabled 除外, 见 main.py)。
+"""
+import ast
+from collections import namedtuple
+from typing import Dict, List, Mapping, Sequence
+
+import numpy as np
+
+from ..channels import RECORD_KEYS, Channel, ChannelId
+from ..utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+DerivedChannel = namedtuple('DerivedChannel', ['name', 'label', 'unit', 'expression'])
+
+DEFAULT_DERIVED_CHANNELS = (
+    DerivedChannel('accel_mag', '加速度合成', 'g', 'norm(accel_x, accel_y, accel_z)'),
+    DerivedChannel('speed_mag', '速度合成', 'mm/s', 'norm(speed_x, speed_y, speed_z)'),
+    DerivedChannel('disp_mag', '位移合成', 'μm', 'norm(disp_x, disp_y, disp_z)'),
+)
+
+
+def _norm(*components):
+    """各分量的平方和开方 (向量的模)"""
+    total = components[0] * components[0]
+    for component in components[1:]:
+        total = total + component * component
+    return np.sqrt(total)
+
+
+FUNCTIONS = {
+    'norm': _norm,
+    'sqrt': np.sqrt,
+    'abs': np.abs,
+    'hypot': np.hypot,
+    'max': np.maximum,
+    'min': np.minimum,
+    'exp': np.exp,
+    'log10': np.log10,
+}
+
+# 表达式变量 (channels.ChannelId 的 config 名称) -> 设备数据键
+SOURCE_KEYS = {channel.config_name: channel.key for channel in ChannelId}
+
+_ALLOWED_NODES = (ast.Expression, ast.BinOp, ast.UnaryOp, ast.Call, ast.Name, ast.Load, ast.Constant,
+                  ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Pow, ast.Mod, ast.USub, ast.UAdd)
+
+
+def compile_expression(expression: str, variables: Sequence[str]):
+    """
+    检查并编译表达式, 只允许算术运算、数字、已知变量和 FUNCTIONS 中的函数
+
+    Returns:
+        tuple: (代码对象, 用到的变量名列表)
+
+    Raises:
+        ValueError: 语法错误或使用了不允许的内容
+    """
+    try:
+        tree = ast.parse(expression.strip(), mode='eval')
+    except SyntaxError as e:
+        raise ValueError(f"表达式语法错误: {expression}") from e
+    used = []
+    for node in ast.walk(tree):
+        if not isinstance(node, _ALLOWED_NODES):
+            raise ValueError(f"表达式中不允许 {type(node).__name__}: {expression}")
+        if isinstance(node, ast.Constant) and not isinstance(node.value, (int, float)):
+            raise ValueError(f"表达式中只允许数字常量: {expression}")
+        if isinstance(node, ast.Call):
+            if not isinstance(node.func, ast.Name) or node.func.id not in FUNCTIONS or node.keywords:
+                raise ValueError(f"不支持的函数调用: {expression}, 可用 {', '.join(FUNCTIONS)}")
+        elif isinstance(node, ast.Name) and node.id not in FUNCTIONS:
+            if node.id not in variables:
+                raise ValueError(f"未知的通道 {node.id}: {expression}")
+            if node.id not in used:
+                used.append(node.id)
+    return compile(tree, f'<{expression}>', 'eval'), used
+
+
+class DerivedChannels:
+    """
+    一组派生通道, 按定义顺序计算 (后面的通道可以引用前面的)
+
+    Args:
+        channels: DerivedChannel 列表, 默认 DEFAULT_DERIVED_CHANNELS
+    """
+
+    def __init__(self, channels: Sequence[DerivedChannel] = DEFAULT_DERIVED_CHANNELS):
+        self.channels = list(channels)
+        variables = list(SOURCE_KEYS)
+        self._compiled = []
+        used = set()
+        for channel in self.channels:
+            if channel.name in variables or channel.name in FUNCTIONS:
+                raise ValueError(f"派生通道名与已有通道或函数重名: {channel.name}")
+            code, names = compile_expression(channel.expression, variables)
+            self._compiled.append(code)
+            used.update(names)
+            variables.append(channel.name)
+        # 计算所需的原始通道 (变量名 -> 设备数据键)
+        self._sources = {name: key for name, key in SOURCE_KEYS.items() if name in used}
+        self._record_columns = {name: ChannelId.parse(name) for name in self._sources}
+
+    @classmethod
+    def from_config(cls, config) -> 'DerivedChannels':
+        """内置通道 + [DerivedChannels] 中的定义 (名称 = 标签, 单位, 表达式), 无效的定义跳过并记日志"""
+        channels = {channel.name: channel for channel in DEFAULT_DERIVED_CHANNELS}
+        if config is not None and config.config.has_section('DerivedChannels'):
+            for name, text in config.config.items('DerivedChannels'):
+                if name == 'enabled':
+                    continue
+                if not text.strip():
+                    channels.pop(name, None)
+                    continue
+                fields = [field.strip() for field in text.split(',', 2)]
+                if len(fields) != 3:
+                    logger.warning(f"忽略无效的派生通道 {name} = {text}: 需要 标签, 单位, 表达式")
+                    continue
+                channels[name] = DerivedChannel(name, *fields)
+        valid = []
+        for channel in channels.values():
+            try:
+                cls(valid + [channel])
+            except ValueError as e:
+                logger.warning(f"忽略无效的派生通道 {channel.name}: {e}")
+                continue
+            valid.append(channel)
+        return cls(valid)
+
+    def __len__(self):
+        return len(self.channels)
+
+    @property
+    def names(self) -> List[str]:
+        """派生通道名, 也是它们在 record_keys 中的键"""
+        return [channel.name for channel in self.channels]
+
+    @property
+    def record_keys(self) -> tuple:
+        """采样数组各列的键: channels.RECORD_KEYS 之后依次为各派生通道名"""
+        return RECORD_KEYS + tuple(self.names)
+
+    @property
+    def columns(self) -> np.ndarray:
+        """各派生通道在采样数组中的列号 (顺序同 channels)"""
+        return np.arange(len(RECORD_KEYS), len(RECORD_KEYS) + len(self.channels))
+
+    def as_channels(self) -> tuple:
+        """channels.Channel 形式的定义 (key 同 name), 可与 CHANNELS 拼接后用于 HistoryStore 等"""
+        return tuple(Channel(channel.name, channel.name, channel.label, channel.unit) for channel in self.channels)
+
+    def evaluate(self, sources: Mapping[str, object]) -> Dict[str, object]:
+        """
+        按变量名给出原始通道 (标量或等长数组), 返回各派生通道的值
+
+        缺失的变量按 NaN 计算。
+        """
+        namespace = {'__builtins__': {}}
+        namespace.update(FUNCTIONS)
+        namespace.update({name: sources.get(name, np.nan) for name in self._sources})
+        result = {}
+        with np.errstate(invalid='ignore', divide='ignore'):
+            for channel, code in zip(self.channels, self._compiled):
+                result[channel.name] = namespace[channel.name] = eval(code, namespace)
+        return result
+
+    def fill(self, values: np.ndarray) -> np.ndarray:
+        """
+        由采样数组的原始通道列计算派生通道, 写入同一数组的派生通道列 (columns), 返回 values
+
+        values 形状 (len(record_keys),) 为一帧, (n, len(record_keys)) 为一批采样; 每个表达式只做一次数组运算。
+        """
+        result = self.evaluate({name: values[..., column] for name, column in self._record_columns.items()})
+        for column, name in zip(self.columns, self.names):
+            values[..., column] = result[name]
+        return values
+
+    def extend(self, values: np.ndarray) -> np.ndarray:
+        """只含原始通道的采样 (形状 (..., len(RECORD_KEYS))) 加上派生通道列, 返回新数组 (..., len(record_keys))"""
+        values = np.asarray(values, dtype=float)
+        result = np.empty(values.shape[:-1] + (len(RECORD_KEYS) + len(self.channels),))
+        result[..., :len(RECORD_KEYS)] = values[..., :len(RECORD_KEYS)]
+        return self.fill(result)
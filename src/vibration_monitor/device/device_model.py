@@ -1,8 +1,23 @@
+import time
 from abc import ABC, abstractmethod
+
+import numpy as np
+
+from ..channels import RECORD_KEYS
 from ..utils.logger import setup_logger
 
 logger = setup_logger(__name__) #日志
 
+# 采样时间戳: 单调时钟加上启动时的系统时间偏移, 数值与 time.time() 相当 (可直接转换为日期),
+# 但不受系统校时 (NTP) 跳变影响, 相邻采样的间隔始终为实际经过的时间
+_CLOCK_OFFSET = time.time() - time.monotonic()
+
+
+def sample_clock() -> float:
+    """当前的采样时间戳 (秒)"""
+    return time.monotonic() + _CLOCK_OFFSET
+
+
 class DeviceModel(ABC):
     """设备模型抽象基类"""
 
@@ -21,7 +36,13 @@ class DeviceModel(ABC):
         self.baudrate = baudrate
         self.address = address
         self.is_open = False
-        self.data = {}  # 设备数据字典用于存储设备数据
+        # 最新一帧的通道值, 按 record_keys 排列 (原始通道按 channels.ChannelId, 之后是派生通道);
+        # 驱动把解码结果直接写入对应的列, 热路径按列号读取
+        self.values = np.full(len(RECORD_KEYS), np.nan)
+        self._listeners = []  # 采样监听器, 见 add_listener
+        self.sample_time = None  # 最近一个采样的时间戳 (sample_clock), 尚无采样时为 None
+        self._derived = None
+        self._key_columns = {key: i for i, key in enumerate(RECORD_KEYS)}  # get_data 的键 -> values 中的列号
         logger.info(f"初始化设备模型: {device_name} ({port}, {baudrate}, {address})")
 
     @abstractmethod
@@ -47,20 +68,76 @@ class DeviceModel(ABC):
         """读取设备数据"""
         pass
 
+    @property
+    def derived(self):
+        """派生通道 (derived_channels.DerivedChannels), 每帧解码后计算一次, 存入 values 的派生通道列"""
+        return self._derived
+
+    @derived.setter
+    def derived(self, derived):
+        """设置派生通道, values 随之加宽 (应在开始采集和注册监听器之前设置)"""
+        self._derived = derived
+        self.values = np.full(len(self.record_keys), np.nan)
+        self._key_columns = {key: i for i, key in enumerate(self.record_keys)}
+
+    @property
+    def record_keys(self) -> tuple:
+        """values 和采样监听器数组各列的键: channels.RECORD_KEYS, 之后依次为各派生通道名"""
+        return self._derived.record_keys if self._derived is not None else RECORD_KEYS
+
     def get_data(self, key):
         """
-        获取设备数据
+        获取设备数据 (按键查找列号, 用于兼容和非热路径; 热路径直接按 channels.ChannelId 索引 values)
 
         Args:
-            key (str): 数据的键
+            key (str): 数据的键 (record_keys 中的设备数据键或派生通道名)
 
         Returns:
-            any: 数据值，如果键不存在则返回 None
+            any: 数据值，如果键不存在或尚无数据则返回 None
+        """
+        column = self._key_columns.get(key)
+        if column is None:
+            return None
+        value = self.values[column]
+        return None if np.isnan(value) else float(value)
+
+    def add_listener(self, callback):
+        """
+        注册采样监听器
+
+        每收到一个 (或一批) 完整采样时在采集线程中调用 callback(device, timestamps, values),
+        timestamps 形状 (n,), values 形状 (n, len(record_keys)), 列顺序同 record_keys (派生通道已算好)。
+        回调不应阻塞, 耗时操作应放入队列交给其他线程处理。
         """
-        return self.data.get(key)
+        if callback not in self._listeners:
+            self._listeners = self._listeners + [callback]  # 复制后替换, 采集线程遍历时无需加锁
+
+    def remove_listener(self, callback):
+        """注销采样监听器"""
+        if callback in self._listeners:
+            self._listeners = [c for c in self._listeners if c is not callback]
 
-    def _set_data(self, key, value):
+    def _emit_sample(self, timestamp=None):
         """
-        设置设备数据 (内部方法)
+        驱动把一帧解码到 values 之后调用: 以当前的 values 数组构造一个采样点并通知监听器 (内部方法)
+
+        timestamp 为采样到达的时刻 (sample_clock), 默认取当前时刻; 没有监听器时只更新 sample_time。
+        派生通道在此计算一次并写入 values, 监听器收到的数组已包含派生通道列。
         """
-        self.data[key] = value
+        if self._derived is not None:
+            self._derived.fill(self.values)
+        self.sample_time = sample_clock() if timestamp is None else timestamp
+        listeners = self._listeners
+        if not listeners:
+            return
+        values = self.values[np.newaxis].copy()
+        timestamps = np.array([self.sample_time])
+        self._emit_batch(timestamps, values, listeners)
+
+    def _emit_batch(self, timestamps, values, listeners=None):
+        """通知监听器一批采样 (内部方法), values 的列顺序同 record_keys"""
+        for callback in listeners if listeners is not None else self._listeners:
+            try:
+                callback(self, timestamps, values)
+            except Exception as e:
+                logger.exception(f"采样监听器出错: {e}")
@@ -1,81 +1,59 @@
 import threading
 import time
-import serial
-import threading
-from .device_model import DeviceModel  # 导入基类
-from ..exceptions import DeviceConnectionError, DataAcquisitionError
+from .device_model import DeviceModel, sample_clock  # 导入基类
+from . import wtvb01_protocol as protocol  # 帧组装/校验/解析
+from .transport import Transport, create_transport  # 传输层 (串口 / TCP 网关)
+from ..exceptions import DeviceConnectionError, DataAcquisitionError, TransportError
 from ..utils.logger import setup_logger  # 导入日志记录器
+from ..utils.metrics import metrics  # 运行指标
+
+from typing import List, Optional
 
-from typing import List
-
-# 计算CRC校验的表 (通常放在一个单独的模块中，这里为了演示)
-# region   计算CRC
-auchCRCHi = [
-    0x00, 0xC1, 0x81, 0x40, 0x01, 0xC0, 0x80, 0x41, 0x01, 0xC0, 0x80, 0x41, 0x00, 0xC1, 0x81,
-    0x40, 0x01, 0xC0, 0x80, 0x41, 0x00, 0xC1, 0x81, 0x40, 0x00, 0xC1, 0x81, 0x40, 0x01, 0xC0,
-    0x80, 0x41, 0x01, 0xC0, 0x80, 0x41, 0x00, 0xC1, 0x81, 0x40, 0x00, 0xC1, 0x81, 0x40, 0x01,
-    0xC0, 0x80, 0x41, 0x00, 0xC1, 0x81, 0x40, 0x01, 0xC0, 0x80, 0x41, 0x01, 0xC0, 0x80, 0x41,
-    0x00, 0xC1, 0x81, 0x40, 0x01, 0xC0, 0x80, 0x41, 0x00, 0xC1, 0x81, 0x40, 0x00, 0xC1, 0x81,
-    0x40, 0x01, 0xC0, 0x80, 0x41, 0x00, 0xC1, 0x81, 0x40, 0x01, 0xC0, 0x80, 0x41, 0x01, 0xC0,
-    0x80, 0x41, 0x00, 0xC1, 0x81, 0x40, 0x00, 0xC1, 0x81, 0x40, 0x01, 0xC0, 0x80, 0x41, 0x01,
-    0xC0, 0x80, 0x41, 0x00, 0xC1, 0x81, 0x40, 0x01, 0xC0, 0x80, 0x41, 0x00, 0xC1, 0x81, 0x40,
-    0x00, 0xC1, 0x81, 0x40, 0x01, 0xC0, 0x80, 0x41, 0x01, 0xC0, 0x80, 0x41, 0x00, 0xC1, 0x81,
-    0x40, 0x00, 0xC1, 0x81, 0x40, 0x01, 0xC0, 0x80, 0x41, 0x00, 0xC1, 0x81, 0x40, 0x01, 0xC0,
-    0x80, 0x41, 0x01, 0xC0, 0x80, 0x41, 0x00, 0xC1, 0x81, 0x40, 0x00, 0xC1, 0x81, 0x40, 0x01,
-    0xC0, 0x80, 0x41, 0x01, 0xC0, 0x80, 0x41, 0x00, 0xC1, 0x81, 0x40, 0x01, 0xC0, 0x80, 0x41,
-    0x00, 0xC1, 0x81, 0x40, 0x00, 0xC1, 0x81, 0x40, 0x01, 0xC0, 0x80, 0x41, 0x00, 0xC1, 0x81,
-    0x40, 0x01, 0xC0, 0x80, 0x41, 0x01, 0xC0, 0x80, 0x41, 0x00, 0xC1, 0x81, 0x40, 0x01, 0xC0,
-    0x80, 0x41, 0x00, 0xC1, 0x81, 0x40, 0x00, 0xC1, 0x81, 0x40, 0x01, 0xC0, 0x80, 0x41, 0x01,
-    0xC0, 0x80, 0x41, 0x00, 0xC1, 0x81, 0x40, 0x00, 0xC1, 0x81, 0x40, 0x01, 0xC0, 0x80, 0x41,
-    0x00, 0xC1, 0x81, 0x40, 0x01, 0xC0, 0x80, 0x41, 0x01, 0xC0, 0x80, 0x41, 0x00, 0xC1, 0x81,
-    0x40]
-
-auchCRCLo = [
-    0x00, 0xC0, 0xC1, 0x01, 0xC3, 0x03, 0x02, 0xC2, 0xC6, 0x06, 0x07, 0xC7, 0x05, 0xC5, 0xC4,
-    0x04, 0xCC, 0x0C, 0x0D, 0xCD, 0x0F, 0xCF, 0xCE, 0x0E, 0x0A, 0xCA, 0xCB, 0x0B, 0xC9, 0x09,
-    0x08, 0xC8, 0xD8, 0x18, 0x19, 0xD9, 0x1B, 0xDB, 0xDA, 0x1A, 0x1E, 0xDE, 0xDF, 0x1F, 0xDD,
-    0x1D, 0x1C, 0xDC, 0x14, 0xD4, 0xD5, 0x15, 0xD7, 0x17, 0x16, 0xD6, 0xD2, 0x12, 0x13, 0xD3,
-    0x11, 0xD1, 0xD0, 0x10, 0xF0, 0x30, 0x31, 0xF1, 0x33, 0xF3, 0xF2, 0x32, 0x36, 0xF6, 0xF7,
-    0x37, 0xF5, 0x35, 0x34, 0xF4, 0x3C, 0xFC, 0xFD, 0x3D, 0xFF, 0x3F, 0x3E, 0xFE, 0xFA, 0x3A,
-    0x3B, 0xFB, 0x39, 0xF9, 0xF8, 0x38, 0x28, 0xE8, 0xE9, 0x29, 0xEB, 0x2B, 0x2A, 0xEA, 0xEE,
-    0x2E, 0x2F, 0xEF, 0x2D, 0xED, 0xEC, 0x2C, 0xE4, 0x24, 0x25, 0xE5, 0x27, 0xE7, 0xE6, 0x26,
-    0x22, 0xE2, 0xE3, 0x23, 0xE1, 0x21, 0x20, 0xE0, 0xA0, 0x60, 0x61, 0xA1, 0x63, 0xA3, 0xA2,
-    0x62, 0x66, 0xA6, 0xA7, 0x67, 0xA5, 0x65, 0x64, 0xA4, 0x6C, 0xAC, 0xAD, 0x6D, 0xAF, 0x6F,
-    0x6E, 0xAE, 0xAA, 0x6A, 0x6B, 0xAB, 0x69, 0xA9, 0xA8, 0x68, 0x78, 0xB8, 0xB9, 0x79, 0xBB,
-    0x7B, 0x7A, 0xBA, 0xBE, 0x7E, 0x7F, 0xBF, 0x7D, 0xBD, 0xBC, 0x7C, 0xB4, 0x74, 0x75, 0xB5,
-    0x77, 0xB7, 0xB6, 0x76, 0x72, 0xB2, 0xB3, 0x73, 0xB1, 0x71, 0x70, 0xB0, 0x50, 0x90, 0x91,
-    0x51, 0x93, 0x53, 0x52, 0x92, 0x96, 0x56, 0x57, 0x97, 0x55, 0x95, 0x94, 0x54, 0x9C, 0x5C,
-    0x5D, 0x9D, 0x5F, 0x9F, 0x9E, 0x5E, 0x5A, 0x9A, 0x9B, 0x5B, 0x99, 0x59, 0x58, 0x98, 0x88,
-    0x48, 0x49, 0x89, 0x4B, 0x8B, 0x8A, 0x4A, 0x4E, 0x8E, 0x8F, 0x4F, 0x8D, 0x4D, 0x4C, 0x8C,
-    0x44, 0x84, 0x85, 0x45, 0x87, 0x47, 0x46, 0x86, 0x82, 0x42, 0x43, 0x83, 0x41, 0x81, 0x80,
-    0x40]
-
-# endregion  计算CRC
 
 logger = setup_logger(__name__)  # 创建一个 logger 实例
 
 
 class DeviceWTVB01(DeviceModel):
-    """WTVB01型号设备的具体实现"""
+    """
+    WTVB01型号设备的具体实现
+
+    port 可以是串口号 (COM5, /dev/ttyUSB0), tcp://host:port (串口服务器透传 RTU)
+    或 modbus-tcp://host[:port]; 也可以直接传入 transport 使用自定义传输层。
+    """
 
-    def __init__(self, device_name: str, port: str, baudrate: int, address: int):
+    def __init__(self, device_name: str, port: str, baudrate: int, address: int,
+                 transport: Transport = None):
         super().__init__(device_name, port, baudrate, address)
-        self.serial_port: serial.Serial = None   # type: ignore
+        self.transport: Transport = transport  # type: ignore
         self.read_thread: threading.Thread = None   # type: ignore
         self.loop: bool = False
         self.temp_bytes: List[int] = []
         self.stat_reg: int = None   # type: ignore #起始寄存器
-        self.receive_buffer: bytearray = bytearray() # 新增：接收缓冲区
+        self.parser = protocol.FrameParser(address)  # 拆帧器
+        self.receive_buffer: bytearray = self.parser.buffer  # 接收缓冲区 (与拆帧器共用)
+        self.reg_count: int = protocol.DATA_REG_COUNT  # 每次轮询读取的寄存器数量 (0x34 ~ 0x46)
+        self.read_timeout: float = 0.1  # 等待一帧应答的超时时间 (秒)
+        self.inter_byte_timeout: float = 0.005  # 字节间超时,帧内出现间隙即返回 (秒)
+        self.poll_interval: float = 0.0  # 两次轮询之间的额外间隔 (秒), 0 表示收到应答后立即下发下一次请求
+        # 运行指标 (所有设备共用同名指标)
+        self._m_poll_ns = metrics.histogram("device.poll_ns")
+        self._m_parse_ns = metrics.histogram("device.parse_ns")
+        self._m_frames = metrics.counter("device.frames")
+        self._m_timeouts = metrics.counter("device.timeouts")
+        self._m_crc_errors = metrics.counter("device.crc_errors")
+        self._m_resync_bytes = metrics.counter("device.resync_bytes")
+        self._m_buffer_bytes = metrics.gauge("device.buffer_bytes")
+        self._crc_errors_seen = 0
+        self._resync_bytes_seen = 0
+
+    @property
+    def expected_frame_length(self) -> int:
+        """一次读寄存器应答帧的字节数: 地址 + 功能码 + 字节数 + 数据 + CRC"""
+        return protocol.read_response_length(self.reg_count)
 
     def get_crc(self, data: List[int], data_len: int) -> int:
         """计算 CRC 校验"""
-        tempH = 0xff
-        tempL = 0xff
-        for i in range(data_len):
-            temp_index = (tempH ^ data[i]) & 0xff
-            tempH = (tempL ^ auchCRCHi[temp_index]) & 0xff
-            tempL = auchCRCLo[temp_index]
-        return (tempH << 8) | tempL
+        return protocol.get_crc(data, data_len)
 
     def open_device(self):
         """打开设备连接"""
@@ -86,23 +64,18 @@ class DeviceWTVB01(DeviceModel):
         max_retries = 3
         for attempt in range(max_retries):
             try:
-                self.serial_port = serial.Serial(
-                    port=self.port,
-                    baudrate=self.baudrate,
-                    timeout=1.0,
-                    write_timeout=1.0,
-                    exclusive = True
-                )
-                if not self.serial_port.is_open:
-                    self.serial_port.open()
-
+                if self.transport is None:
+                    self.transport = create_transport(self.port, self.baudrate,
+                                                      self.read_timeout, self.inter_byte_timeout)
+                if not self.transport.is_open:
+                    self.transport.open()
 
                 self.is_open = True
                 logger.info(f"设备连接成功: {self.device_name}")
                 return #成功连接,直接返回
 
-            except serial.SerialException as e:
-                error_msg = f"串口连接失败 (尝试 {attempt + 1}/{max_retries}): {e}"
+            except TransportError as e:
+                error_msg = f"设备连接失败 (尝试 {attempt + 1}/{max_retries}): {e}"
                 logger.error(error_msg)
                 if attempt == max_retries - 1:  # 最后一次尝试
                     raise DeviceConnectionError(error_msg) from e
@@ -117,31 +90,28 @@ class DeviceWTVB01(DeviceModel):
         关闭设备连接
 
         此方法用于关闭设备的连接，在关闭连接前会先停止数据采集，
-        然后尝试关闭串口连接，并在操作完成后将设备状态标记为已关闭。
+        然后尝试关闭传输层连接，并在操作完成后将设备状态标记为已关闭。
         """
         # 记录日志，表明正在尝试关闭设备
         logger.info(f"正在关闭设备: {self.device_name}")
         # 调用停止数据采集的方法，确保在关闭设备前停止数据采集
         self.stop_data_acquisition()  #先停数据采集
-        # 检查串口对象是否存在
-        if self.serial_port:
+        # 检查传输层对象是否存在
+        if self.transport:
             try:
-                # 检查串口是否处于打开状态
-                if self.serial_port.is_open:
+                # 检查连接是否处于打开状态
+                if self.transport.is_open:
                     # 清空输入缓冲区，确保没有残留数据
-                    self.serial_port.reset_input_buffer()
+                    self.transport.reset_input_buffer()
                     # 清空输出缓冲区，确保没有待发送的数据
-                    self.serial_port.reset_output_buffer()
-                    # 关闭串口连接
-                    self.serial_port.close()
-                    # 记录日志，表明串口已成功关闭
-                    logger.info("串口已关闭")
+                    self.transport.reset_output_buffer()
+                    # 关闭连接 (外部传入的传输层保留对象, 以便再次打开)
+                    self.transport.close()
+                    # 记录日志，表明连接已成功关闭
+                    logger.info("连接已关闭")
             except Exception as e:
-                # 记录异常信息，表明关闭串口时出现错误
-                 logger.exception(f"关闭串口失败: {e}")
-            finally:
-                # 无论关闭操作是否成功，都将串口对象设置为 None
-               self.serial_port = None  # 确保 serial_port 被设置为 None
+                # 记录异常信息，表明关闭连接时出现错误
+                 logger.exception(f"关闭连接失败: {e}")
         # 将设备的打开状态标记为 False，表示设备已关闭
         self.is_open = False
         # 记录日志，表明设备已成功关闭
@@ -157,11 +127,17 @@ class DeviceWTVB01(DeviceModel):
             logger.warning("设备未打开,无法启动数据采集")
             raise DeviceConnectionError("尝试开始采集数据时设备未打开")  # 使用自定义异常
 
+        self.receive_buffer.clear()
+        try:
+            self.transport.reset_input_buffer()  # 丢弃上一次采集残留的应答
+        except TransportError as e:
+            logger.warning(f"清空输入缓冲区失败: {e}")
+
         self.loop = True
+        # 读取线程启动后会立即下发第一次读取命令
         self.read_thread = threading.Thread(target=self._read_data_loop, daemon=True)
         self.read_thread.start()
         logger.info("数据采集已启动")
-        self.read_data()  # 立即发送读取数据的命令
 
     def stop_data_acquisition(self):
       """停止数据采集"""
@@ -184,20 +160,21 @@ class DeviceWTVB01(DeviceModel):
         while self.loop:
             # print("Debug: _read_data_loop is running")  # 调试输出
             try:
-                if not self.is_open or not self.serial_port or not self.serial_port.is_open:
-                    logger.error("设备未连接或串口未打开")
-                    raise DeviceConnectionError("设备未连接或串口未打开")
-
-                # 从串口读取数据
-                if self.serial_port.in_waiting > 0:
-                    received_data = self.serial_port.read(self.serial_port.in_waiting)
-                    self._on_data_received(received_data) #直接处理
-
-                # 周期性发送读取命令(重要！！！)
-                self.read_data()
+                if not self.is_open or not self.transport or not self.transport.is_open:
+                    logger.error("设备未连接或连接未打开")
+                    raise DeviceConnectionError("设备未连接或连接未打开")
+
+                # 发送读取命令(重要！！！), 然后阻塞等待完整应答帧;
+                # 同一网关连接上的设备共用一把锁, 保证请求与应答一一对应
+                poll_start = time.perf_counter_ns()
+                with self.transport.lock:
+                    self.read_data()
+                    self._read_frame()
+                self._m_poll_ns.record(time.perf_counter_ns() - poll_start)
 
                 consecutive_errors = 0  # 重置连续错误计数
-                time.sleep(0.05) # 这个延时是必要的,防止发送过于频繁
+                if self.poll_interval > 0:
+                    time.sleep(self.poll_interval)
 
             except DataAcquisitionError as e:
                 consecutive_errors += 1
@@ -210,11 +187,11 @@ class DeviceWTVB01(DeviceModel):
                 self.close_device()
                 break
 
-            except serial.SerialException as e:
+            except TransportError as e:
               consecutive_errors += 1
-              logger.error(f"串口读取错误 ({consecutive_errors}/{max_consecutive_errors}): {e}")
+              logger.error(f"读取错误 ({consecutive_errors}/{max_consecutive_errors}): {e}")
               if consecutive_errors >= max_consecutive_errors:
-                logger.critical("连续串口读取错误次数过多，停止采集")
+                logger.critical("连续读取错误次数过多，停止采集")
                 self.stop_data_acquisition()
                 break
             except Exception as e:
@@ -227,10 +204,38 @@ class DeviceWTVB01(DeviceModel):
 
         logger.debug("数据读取线程已停止")
 
+    def _read_frame(self):
+        """
+        阻塞读取一帧应答 (内部方法)
+
+        按应答帧的预期长度读取, 凑齐一帧后 read() 立即返回, 无需轮询 in_waiting;
+        设备无应答时由 read_timeout 限定等待时间, 帧内出现间隙时由 inter_byte_timeout 提前返回。
+        若只收到半帧, 在超时时间内继续补齐剩余字节。
+
+        请求已经发出, 因此即使采集在此期间被停止 (self.loop 为 False) 也要读完这一帧应答:
+        否则应答留在共用的网关连接上, 会被下一个设备当作自己的数据解析。等待时间仍由 read_timeout 限定。
+        """
+        expected = self.expected_frame_length
+        deadline = time.monotonic() + self.read_timeout
+        while True:
+            missing = expected - len(self.receive_buffer)
+            received_data = self.transport.read(missing if missing > 0 else expected)
+            if not received_data:
+                self._m_timeouts.inc()
+                break  # 超时, 设备无应答
+            if self._on_data_received(received_data):
+                return  # 已解析出完整帧, 立即进入下一次轮询
+            if time.monotonic() >= deadline:
+                break
+        if not self.loop and self.receive_buffer:
+            # 采集已停止而应答仍不完整: 丢弃残余字节, 不留给共用连接上的下一个设备
+            self.receive_buffer.clear()
+            self.transport.reset_input_buffer()
+
     def read_data(self):
         """读取设备数据"""
        # 从0x34(加速度)开始读取到0x46(振动频率)，总共19个寄存器
-        self._read_reg(0x34, 19)
+        self._read_reg(protocol.DATA_START_REG, self.reg_count)
 
 
     def _read_reg(self, reg_addr, reg_count):
@@ -248,43 +253,21 @@ class DeviceWTVB01(DeviceModel):
         time.sleep(0.1) #延迟
         self._save() #保存
 
-        # 发送读取指令封装
     def _get_read_bytes(self, devid: int, reg_addr: int, reg_count: int) -> bytes:
         """获取读取寄存器的命令字节 (内部方法)"""
-        temp_bytes = [0] * 8  # 使用列表存储整数
-        temp_bytes[0] = devid
-        temp_bytes[1] = 0x03
-        temp_bytes[2] = reg_addr >> 8
-        temp_bytes[3] = reg_addr & 0xff
-        temp_bytes[4] = reg_count >> 8
-        temp_bytes[5] = reg_count & 0xff
-        temp_crc = self.get_crc(temp_bytes, len(temp_bytes) - 2)
-        temp_bytes[6] = temp_crc >> 8
-        temp_bytes[7] = temp_crc & 0xff
-        return bytes(temp_bytes)  # 转换为 bytes
-
-
-      # 发送写入指令封装
-    def _get_write_bytes(self, devid, reg_addr, s_value):
-        temp_bytes = [None] * 8
-        temp_bytes[0] = devid
-        temp_bytes[1] = 0x06
-        temp_bytes[2] = reg_addr >> 8
-        temp_bytes[3] = reg_addr & 0xff
-        temp_bytes[4] = s_value >> 8
-        temp_bytes[5] = s_value & 0xff
-        temp_crc = self.get_crc(temp_bytes, len(temp_bytes) - 2)
-        temp_bytes[6] = temp_crc >> 8
-        temp_bytes[7] = temp_crc & 0xff
-        return temp_bytes
+        return protocol.build_read_command(devid, reg_addr, reg_count)
+
+    def _get_write_bytes(self, devid: int, reg_addr: int, s_value: int) -> bytes:
+        """获取写入寄存器的命令字节 (内部方法)"""
+        return protocol.build_write_command(devid, reg_addr, s_value)
 
     def _send_data(self, data: bytes):
         """发送数据 (内部方法,已修改)"""
-        if not self.serial_port or not self.serial_port.is_open:
-            raise DeviceConnectionError("尝试发送数据时串口未打开")
+        if not self.transport or not self.transport.is_open:
+            raise DeviceConnectionError("尝试发送数据时连接未打开")
         try:
-            self.serial_port.write(data) #直接传入bytes
-        except serial.SerialException as e:
+            self.transport.write(data) #直接传入bytes
+        except TransportError as e:
             raise DataAcquisitionError(f"发送数据失败: {e}") from e
 
     def _on_data_received(self, data: bytes):
@@ -292,116 +275,50 @@ class DeviceWTVB01(DeviceModel):
         处理接收到的数据 (内部方法)
 
         此方法模拟了 vibration_monitor_gui.py 中 revData 函数的逻辑。
-        """
-        # print(f"Debug: _on_data_received called, data: {data}") 
-        self.receive_buffer.extend(data)  # 将接收到的数据添加到缓冲区
-        # print(f"Debug: receive_buffer: {self.receive_buffer}")
-
-        while len(self.receive_buffer) >= 8:  # 至少有8个字节才能进行处理 (最小数据包长度)
-            if self.receive_buffer[0] != self.address:  # 地址不匹配
-                logger.warning(f"接收到地址不匹配的数据包: {self.receive_buffer[0]}, 预期地址: {self.address}")
-                del self.receive_buffer[0]
-                continue
-
-            if self.receive_buffer[1] != 0x03:  # 功能码不匹配
-                 logger.warning(f"接收到功能码不匹配的数据包: {self.receive_buffer[1]}, 预期功能码: 0x03")
-                 del self.receive_buffer[0]
-                 continue
-
-            data_length = self.receive_buffer[2]
-            if len(self.receive_buffer) < data_length + 5:  # 数据长度不足
-                break  # 等待更多数据
-
-            # 提取完整数据包
-            packet = list(self.receive_buffer[:data_length + 5])  # 转换为整数列表
-            del self.receive_buffer[:data_length + 5] #删除
-
-            # CRC 校验
-            received_crc = packet[-2] << 8 | packet[-1]
-            calculated_crc = self.get_crc(packet, len(packet) - 2)
-
-            if received_crc != calculated_crc:
-                logger.warning(f"CRC 校验失败: 收到 CRC = {received_crc:04X}, 计算 CRC = {calculated_crc:04X}")
-                continue  # 丢弃数据包
 
+        Returns:
+            int: 本次解析出的完整数据包数量
+        """
+        start = time.perf_counter_ns()
+        arrival = sample_clock()  # 采样时间戳取应答到达的时刻, 不受解析和界面刷新的延迟影响
+        frame_count = 0
+        for packet in self.parser.feed(data):
             # 数据校验成功，处理数据
             try:
-                self._process_data(packet)
+                self._process_data(packet, arrival)
+                frame_count += 1
             except Exception as e:
                 logger.exception(f"处理数据包时发生错误: {e}")
                 # 可以选择清空缓冲区或保留剩余数据,这里选择保留
-
-    def _process_data(self, packet: List[int]):
-        """解析数据 (内部方法)"""
-        # print(f"Debug: _process_data called, packet: {packet}")
+        self._update_parse_metrics(start, frame_count)
+        return frame_count
+
+    def _update_parse_metrics(self, start: int, frame_count: int):
+        """更新拆帧相关指标 (内部方法)"""
+        self._m_parse_ns.record(time.perf_counter_ns() - start)
+        self._m_frames.inc(frame_count)
+        parser = self.parser
+        if parser.crc_errors != self._crc_errors_seen:
+            self._m_crc_errors.inc(parser.crc_errors - self._crc_errors_seen)
+            self._crc_errors_seen = parser.crc_errors
+        if parser.resync_bytes != self._resync_bytes_seen:
+            self._m_resync_bytes.inc(parser.resync_bytes - self._resync_bytes_seen)
+            self._resync_bytes_seen = parser.resync_bytes
+        self._m_buffer_bytes.set(len(parser.buffer))
+
+    def _process_data(self, packet: List[int], arrival: Optional[float] = None):
+        """解析数据 (内部方法), arrival 为应答到达的时刻 (sample_clock)"""
         data_length = packet[2]
         if data_length % 2 != 0:
             logger.error(f"数据长度错误: {data_length}，应为偶数")
             return
 
-        start_reg = 0x34 #默认起始寄存器
         try:
-            for i in range(int(data_length/2)):
-                value = packet[2 * i + 3] << 8 | packet[2*i + 4]
-                value = self._change(value) #有符号
-
-                #根据寄存器地址进行解析
-                if start_reg == 0x34:
-                  key = "52" # "accel_x"
-                elif start_reg == 0x35:
-                  key = "53"  # accel_y
-                elif start_reg == 0x36:
-                  key = "54"  # accel_z
-                elif start_reg == 0x37:
-                    key = "55" # gyro_x
-                elif start_reg == 0x38:
-                    key = "56" # gyro_y
-                elif start_reg == 0x39:
-                   key = "57" # gyro_z
-                elif start_reg == 0x3A:
-                    key = "58" # "vib_x"
-                elif start_reg == 0x3B:
-                    key = "59"  # vib_y
-                elif start_reg == 0x3C:
-                    key = "60"  # vib_z
-                elif start_reg ==0x3D:
-                    key ="61" #angle_x
-                elif start_reg == 0x3E:
-                   key ="62"  #angle_y
-                elif start_reg == 0x3F:
-                   key ="63"  #angle_z
-                elif start_reg == 0x40:
-                   key = "64"  # temp
-                elif start_reg == 0x41:
-                    key = "65"  # disp_x
-                elif start_reg == 0x42:
-                    key = "66"  # disp_y
-                elif start_reg == 0x43:
-                    key = "67"  # disp_z
-                elif start_reg == 0x44:
-                    key = "68"  # freq_x
-                elif start_reg == 0x45:
-                    key = "69"  # freq_y
-                elif start_reg == 0x46:
-                    key = "70"  # freq_z
-                else:
-                  key = str(start_reg)  # 未知寄存器，直接使用寄存器地址作为键
-
-                if 0x34 <= start_reg <= 0x36:  # 加速度
-                  value = value / 32768 * 16
-                elif 0x37 <= start_reg <= 0x39:  # 角速度
-                    value = value / 32768 * 2000
-                elif 0x3D <= start_reg <= 0x3F:  # 振动角度
-                    value = value / 32768 * 180
-                elif start_reg == 0x40:  # 温度
-                    value = value / 100
-
-                self._set_data(key, value)
-                start_reg += 1
-                # print(f"Debug: self.data in _process_data: {self.data}")
+            protocol.decode_values(packet, self.values, protocol.DATA_START_REG)  # 直接写入各通道的列
         except Exception as e:
             logger.exception(f"解析数据时发生错误: {e}")
             raise DataAcquisitionError("解析数据时发生错误") from e
+        self._emit_sample(arrival)
 
      # 解锁
     def _unlock(self):
@@ -427,6 +344,4 @@ class DeviceWTVB01(DeviceModel):
         
     @staticmethod
     def _change(data: int) -> int:
-        if data > 32768:
-            data = data - 65535;
-        return data
+        return protocol.to_signed(data)
@@ -0,0 +1,138 @@
+"""
+本地回环网关替身
+
+在 127.0.0.1 上模拟一个串口服务器: 按 RTU over TCP 或 Modbus TCP 接收请求,
+转发给挂在 "总线" 上的从站对象, 再把从站的 RTU 应答按相同协议回送。
+用于在没有硬件和真实网关的情况下测试传输层、驱动和基准。
+"""
+import asyncio
+import threading
+from typing import Dict, Iterable, Optional, Sequence
+
+from . import wtvb01_protocol as protocol
+from .transport import MBAP_HEADER
+from ..utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+MODE_RTU = "rtu"
+MODE_MODBUS_TCP = "modbus_tcp"
+REQUEST_LENGTH = 8  # 0x03 / 0x06 请求帧均为 8 字节
+
+
+class RegisterSlave:
+    """
+    寄存器表从站: 对读寄存器请求返回当前寄存器值, 对写寄存器请求回显
+
+    任何提供 address 属性和 handle_request(request) -> Optional[bytes] 方法的对象
+    都可以挂到 LoopbackGateway 上。
+    """
+
+    def __init__(self, address: int, raw_values: Sequence[int] = None,
+                 start_reg: int = protocol.DATA_START_REG):
+        self.address = address
+        values = raw_values if raw_values is not None else [0] * protocol.DATA_REG_COUNT
+        self.registers: Dict[int, int] = {start_reg + i: v & 0xffff for i, v in enumerate(values)}
+
+    def handle_request(self, request: bytes) -> Optional[bytes]:
+        """处理一帧 RTU 请求, 返回 RTU 应答; 地址不符或校验失败时返回 None (不应答)"""
+        if len(request) < REQUEST_LENGTH or request[0] != self.address:
+            return None
+        if protocol.get_crc(request, len(request) - 2) != (request[-2] << 8 | request[-1]):
+            return None
+        function = request[1]
+        reg_addr = request[2] << 8 | request[3]
+        argument = request[4] << 8 | request[5]
+        if function == protocol.READ_FUNCTION:
+            raw_values = [self.registers.get(reg_addr + i, 0) for i in range(argument)]
+            return protocol.build_read_response(self.address, raw_values)
+        if function == protocol.WRITE_FUNCTION:
+            self.registers[reg_addr] = argument
+            return bytes(request)
+        return None
+
+
+class LoopbackGateway:
+    """本地回环网关, 可在后台线程中运行 (start/stop), 也可在已有事件循环中 await serve()"""
+
+    def __init__(self, slaves: Iterable, mode: str = MODE_RTU, host: str = "127.0.0.1", port: int = 0):
+        if mode not in (MODE_RTU, MODE_MODBUS_TCP):
+            raise ValueError(f"不支持的网关模式: {mode}")
+        self.slaves = {slave.address: slave for slave in slaves}
+        self.mode = mode
+        self.host = host
+        self.port = port  # 0 表示由系统分配, serve() 启动后更新为实际端口
+        self.requests = 0  # 已处理的请求数
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+
+    @property
+    def url(self) -> str:
+        """供 DeviceWTVB01 使用的连接地址"""
+        scheme = "tcp://" if self.mode == MODE_RTU else "modbus-tcp://"
+        return f"{scheme}{self.host}:{self.port}"
+
+    async def serve(self):
+        """启动监听并一直运行, 直到任务被取消"""
+        self._server = await asyncio.start_server(self._handle_client, self.host, self.port, backlog=1024)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._ready.set()
+        logger.info(f"回环网关已启动: {self.url}")
+        async with self._server:
+            await self._server.serve_forever()
+
+    def start(self) -> int:
+        """在后台线程中启动网关, 返回监听端口"""
+        self._thread = threading.Thread(target=self._run_in_thread, daemon=True)
+        self._thread.start()
+        if not self._ready.wait(timeout=5):
+            raise RuntimeError("回环网关启动超时")
+        return self.port
+
+    def stop(self):
+        """停止后台线程中的网关"""
+        if self._loop is not None and self._server is not None:
+            self._loop.call_soon_threadsafe(self._server.close)
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    def _run_in_thread(self):
+        self._loop = asyncio.new_event_loop()
+        try:
+            self._loop.run_until_complete(self.serve())
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._loop.close()
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                if self.mode == MODE_RTU:
+                    request = await reader.readexactly(REQUEST_LENGTH)
+                    response = self._dispatch(request)
+                else:
+                    header = await reader.readexactly(MBAP_HEADER.size)
+                    transaction_id, _, length, unit_id = MBAP_HEADER.unpack(header)
+                    pdu = await reader.readexactly(length - 1)
+                    frame = [unit_id] + list(pdu)
+                    crc = protocol.get_crc(frame, len(frame))
+                    response = self._dispatch(bytes(frame + [crc >> 8, crc & 0xff]))
+                    if response is not None:
+                        body = response[1:-2]  # 去掉地址和 CRC
+                        response = MBAP_HEADER.pack(transaction_id, 0, len(body) + 1, unit_id) + body
+                if response is not None:
+                    writer.write(response)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    def _dispatch(self, request: bytes) -> Optional[bytes]:
+        """把 RTU 请求交给对应地址的从站 (内部方法)"""
+        self.requests += 1
+        slave = self.slaves.get(request[0])
+        return slave.handle_request(request) if slave is not None else None
@@ -0,0 +1,69 @@
+"""
+远程设备: 数据由采集服务器 (utils/collector_server.CollectorServer) 从网络接收后写入
+
+与本地设备一样通过 values (get_data()) 提供最新值, 并通知采样监听器, 主窗口、记录器等无需区分数据来源。
+"""
+import threading
+from typing import Optional
+
+import numpy as np
+
+from .device_model import DeviceModel
+from ..utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class RemoteDevice(DeviceModel):
+    """由远程采集端推送数据的设备, 批次中通道顺序同 channels.RECORD_KEYS (派生通道在本端计算)"""
+
+    def __init__(self, device_name: str, source: str = "remote"):
+        super().__init__(device_name, source, 0, 0)
+        self.accepting = True  # stop_data_acquisition 后丢弃收到的数据
+        self.samples_received = 0
+        self.last_timestamp: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def open_device(self):
+        """远程设备无需建立连接, 数据到达即可用"""
+        self.is_open = True
+
+    def close_device(self):
+        self.accepting = False
+        self.is_open = False
+
+    def start_data_acquisition(self):
+        self.accepting = True
+
+    def stop_data_acquisition(self):
+        self.accepting = False
+
+    def read_data(self):
+        """远程设备由采集服务器推送数据, 无需主动读取"""
+        pass
+
+    def ingest(self, timestamps: np.ndarray, values: np.ndarray) -> bool:
+        """
+        写入一批采样, values 中保留最后一个采样点
+
+        派生通道对整批采样一次计算, 监听器收到的数组已包含派生通道列 (同 DeviceModel.record_keys)。
+
+        Args:
+            timestamps: 形状 (n,) 的采样时间 (秒)
+            values: 形状 (n, 通道数) 的采样值
+
+        Returns:
+            bool: 是否接收 (停止采集或批次为空时返回 False)
+        """
+        if not self.accepting or len(timestamps) == 0:
+            return False
+        if self.derived is not None:
+            values = self.derived.extend(values)
+        width = min(values.shape[1], len(self.values))
+        with self._lock:
+            self.values[:width] = values[-1, :width]
+            self.samples_received += len(timestamps)
+            self.last_timestamp = self.sample_time = float(timestamps[-1])
+        if self._listeners:
+            self._emit_batch(timestamps, values)
+        return True
@@ -0,0 +1,374 @@
+"""
+软件模拟设备, 用于无硬件的开发、基准和压力测试
+
+* SimulatedWTVB01   —— 模拟 WTVB01 从站: 按真实协议应答读寄存器请求 (含真实 CRC),
+                       可配置帧率、噪声、CRC 错误率和丢字节率
+* InMemoryTransport —— 进程内传输层, DeviceWTVB01 直接与 SimulatedWTVB01 对话
+* PtyLink           —— Linux 伪终端对, DeviceWTVB01 通过串口路径 (/dev/pts/N) 访问模拟设备
+* ReplayDevice      —— 按 1 倍或 N 倍速度回放 DataRecorder 记录的 CSV 或二进制 (.npy) 文件
+"""
+import math
+import os
+import random
+import threading
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from . import wtvb01_protocol as protocol
+from .device_model import DeviceModel, sample_clock
+from ..channels import RECORD_KEYS
+from ..data_recorder import load_recording
+from .transport import Transport
+from ..exceptions import DeviceConnectionError, TransportError
+from ..utils.logger import setup_logger
+from ..utils.metrics import metrics
+
+logger = setup_logger(__name__)
+
+# 模拟信号: 数据键 -> (基线, 波动幅度, 波动频率 Hz)
+DEFAULT_SIGNALS = {
+    "52": (0.02, 0.3, 1.3),     # 加速度X (g)
+    "53": (0.01, 0.3, 1.1),     # 加速度Y (g)
+    "54": (1.0, 0.4, 0.9),      # 加速度Z (g)
+    "55": (0.0, 5.0, 0.5),      # 角速度X (°/s)
+    "56": (0.0, 5.0, 0.6),      # 角速度Y (°/s)
+    "57": (0.0, 5.0, 0.7),      # 角速度Z (°/s)
+    "58": (6.0, 4.0, 0.2),      # 振动速度X (mm/s)
+    "59": (6.0, 4.0, 0.25),     # 振动速度Y (mm/s)
+    "60": (8.0, 5.0, 0.3),      # 振动速度Z (mm/s)
+    "61": (0.0, 2.0, 0.05),     # 振动角度X (°)
+    "62": (0.0, 2.0, 0.05),     # 振动角度Y (°)
+    "63": (0.0, 2.0, 0.05),     # 振动角度Z (°)
+    "64": (32.0, 1.0, 0.01),    # 温度 (°C)
+    "65": (40.0, 25.0, 0.2),    # 振动位移X (um)
+    "66": (40.0, 25.0, 0.25),   # 振动位移Y (um)
+    "67": (60.0, 30.0, 0.3),    # 振动位移Z (um)
+    "68": (50.0, 3.0, 0.1),     # 振动频率X (Hz)
+    "69": (50.0, 3.0, 0.1),     # 振动频率Y (Hz)
+    "70": (60.0, 3.0, 0.1),     # 振动频率Z (Hz)
+}
+
+
+class SimulatedWTVB01:
+    """
+    WTVB01 从站模拟器
+
+    信号为 "基线 + 正弦波动 + 高斯噪声", 随模拟时间连续变化; 应答帧按真实协议组装,
+    再按配置的概率注入 CRC 错误和丢字节, 用于验证拆帧的重新同步逻辑。
+    """
+
+    def __init__(self, address: int = 0x50, rate_hz: float = 100.0, noise: float = 0.02,
+                 crc_error_rate: float = 0.0, byte_drop_rate: float = 0.0,
+                 signals: Dict[str, tuple] = None, seed: Optional[int] = None):
+        """
+        Args:
+            address (int): 从站地址
+            rate_hz (float): 应答帧率上限 (帧/秒), 0 表示不限速
+            noise (float): 噪声标准差, 相对各通道波动幅度的比例
+            crc_error_rate (float): 应答帧 CRC 被破坏的概率
+            byte_drop_rate (float): 应答帧中每个字节被丢弃的概率
+            signals (dict): 数据键 -> (基线, 波动幅度, 波动频率 Hz), 默认 DEFAULT_SIGNALS
+            seed (int): 随机种子, 便于复现
+        """
+        self.address = address
+        self.rate_hz = rate_hz
+        self.noise = noise
+        self.crc_error_rate = crc_error_rate
+        self.byte_drop_rate = byte_drop_rate
+        self.signals = dict(signals or DEFAULT_SIGNALS)
+        self.frames_sent = 0  # 已生成的应答帧数
+        self.frames_corrupted = 0  # 注入 CRC 错误的帧数
+        self.bytes_dropped = 0  # 丢弃的字节数
+        self._random = random.Random(seed)
+        self._sim_time = 0.0  # 模拟时间 (秒)
+
+    @property
+    def frame_interval(self) -> float:
+        """两帧应答之间的最小间隔 (秒)"""
+        return 1.0 / self.rate_hz if self.rate_hz > 0 else 0.0
+
+    def sample(self, t: float) -> Dict[str, float]:
+        """生成模拟时间 t 时刻的一组物理量"""
+        gauss = self._random.gauss
+        values = {}
+        for key, (baseline, amplitude, freq) in self.signals.items():
+            value = baseline + amplitude * math.sin(2 * math.pi * freq * t)
+            if self.noise:
+                value += gauss(0.0, self.noise * amplitude)
+            values[key] = value
+        return values
+
+    def encode_sample(self, values: Dict[str, float], start_reg: int = protocol.DATA_START_REG,
+                      reg_count: int = protocol.DATA_REG_COUNT) -> List[int]:
+        """把物理量编码为原始寄存器值"""
+        raw_values = []
+        for reg_addr in range(start_reg, start_reg + reg_count):
+            key = protocol.REGISTER_KEYS.get(reg_addr, str(reg_addr))
+            raw_values.append(protocol.unscale_register(reg_addr, values.get(key, 0.0)))
+        return raw_values
+
+    def next_frame(self, start_reg: int = protocol.DATA_START_REG,
+                   reg_count: int = protocol.DATA_REG_COUNT) -> bytes:
+        """生成下一帧读寄存器应答 (按帧率推进模拟时间), 已注入错误"""
+        values = self.sample(self._sim_time)
+        self._sim_time += self.frame_interval or 0.001
+        frame = protocol.build_read_response(self.address, self.encode_sample(values, start_reg, reg_count))
+        self.frames_sent += 1
+        return self._corrupt(frame)
+
+    def generate_stream(self, n_frames: int) -> bytes:
+        """连续生成 n_frames 帧应答拼接成的字节流 (用于拆帧吞吐基准)"""
+        return b"".join(self.next_frame() for _ in range(n_frames))
+
+    def handle_request(self, request: bytes) -> Optional[bytes]:
+        """处理一帧 RTU 请求, 返回 RTU 应答; 地址不符或请求 CRC 错误时不应答"""
+        if len(request) < 8 or request[0] != self.address:
+            return None
+        if protocol.get_crc(request, len(request) - 2) != (request[-2] << 8 | request[-1]):
+            return None
+        function = request[1]
+        if function == protocol.READ_FUNCTION:
+            reg_addr = request[2] << 8 | request[3]
+            reg_count = request[4] << 8 | request[5]
+            return self.next_frame(reg_addr, reg_count)
+        if function == protocol.WRITE_FUNCTION:
+            return bytes(request)  # 写寄存器按协议回显
+        return None
+
+    def _corrupt(self, frame: bytes) -> bytes:
+        """按配置的概率注入 CRC 错误和丢字节 (内部方法)"""
+        rand = self._random.random
+        if self.crc_error_rate and rand() < self.crc_error_rate:
+            frame = frame[:-1] + bytes([frame[-1] ^ 0xff])
+            self.frames_corrupted += 1
+        if self.byte_drop_rate:
+            kept = bytes(b for b in frame if rand() >= self.byte_drop_rate)
+            self.bytes_dropped += len(frame) - len(kept)
+            frame = kept
+        return frame
+
+
+class InMemoryTransport(Transport):
+    """
+    进程内传输层: write() 把请求交给模拟从站, read() 在应答 "到达" 后返回
+
+    应答到达时间按从站的帧率排布, 因此 DeviceWTVB01 看到的节奏与真实串口一致;
+    帧率低于 1 / timeout 时 read() 会先超时, 驱动重发的请求在上一帧应答被读走之前不排入新应答。
+    """
+
+    def __init__(self, simulator: SimulatedWTVB01, timeout: float = 0.1, inter_byte_timeout: float = 0.005):
+        super().__init__(timeout, inter_byte_timeout)
+        self.simulator = simulator
+        self._open = False
+        self._buffer = bytearray()
+        self._ready_at = 0.0  # 缓冲区中的应答可被读取的时刻 (time.monotonic)
+        self._next_slot = 0.0  # 下一帧应答最早的发送时刻
+
+    @property
+    def is_open(self) -> bool:
+        return self._open
+
+    def open(self):
+        self._open = True
+
+    def close(self):
+        self._open = False
+        self._buffer.clear()
+
+    def write(self, data: bytes):
+        if not self._open:
+            raise TransportError("模拟传输层未打开")
+        if self._buffer:
+            # 上一帧应答还未被读走 (驱动读超时后重发请求): 与忙碌的从站一样不处理新请求,
+            # 否则低帧率时每次重试都会再排入一帧, 缓冲区中的应答越积越多
+            return
+        response = self.simulator.handle_request(bytes(data))
+        if response:
+            now = time.monotonic()
+            self._ready_at = max(now, self._next_slot)
+            self._next_slot = self._ready_at + self.simulator.frame_interval
+            self._buffer.extend(response)
+
+    def read(self, size: int) -> bytes:
+        if not self._open:
+            raise TransportError("模拟传输层未打开")
+        wait = self._ready_at - time.monotonic()
+        if not self._buffer or wait > self.timeout:
+            time.sleep(self.timeout)  # 与串口一致: 无应答时等待超时
+            if not self._buffer or self._ready_at > time.monotonic():
+                return b""
+        elif wait > 0:
+            time.sleep(wait)
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+    def reset_input_buffer(self):
+        self._buffer.clear()
+
+
+class PtyLink:
+    """
+    伪终端对 (仅 Linux/macOS): 模拟设备在 master 端应答, DeviceWTVB01 打开 slave 端路径
+
+    用法:
+        link = PtyLink(SimulatedWTVB01())
+        link.start()
+        device = DeviceWTVB01("sim", link.port, 230400, 0x50)
+    """
+
+    def __init__(self, simulator: SimulatedWTVB01):
+        self.simulator = simulator
+        self.port: Optional[str] = None  # slave 端路径, start() 后可用
+        self._master_fd: Optional[int] = None
+        self._slave_fd: Optional[int] = None
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+    def start(self) -> str:
+        """创建伪终端对并启动应答线程, 返回 slave 端路径"""
+        import pty
+        import tty
+        self._master_fd, self._slave_fd = pty.openpty()
+        tty.setraw(self._slave_fd)  # 关闭行缓冲和回显, 按原始字节传输
+        self.port = os.ttyname(self._slave_fd)
+        self._running = True
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+        logger.info(f"模拟设备伪终端已创建: {self.port}")
+        return self.port
+
+    def stop(self):
+        """停止应答线程并关闭伪终端"""
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+        for fd in (self._master_fd, self._slave_fd):
+            if fd is not None:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+        self._master_fd = self._slave_fd = None
+
+    def _serve(self):
+        """读取请求并按帧率回送应答 (内部方法)"""
+        import select
+        request = bytearray()
+        next_slot = 0.0
+        while self._running:
+            readable, _, _ = select.select([self._master_fd], [], [], 0.1)
+            if not readable:
+                continue
+            try:
+                request.extend(os.read(self._master_fd, 256))
+            except OSError:
+                break
+            while len(request) >= 8:
+                response = self.simulator.handle_request(bytes(request[:8]))
+                del request[:8]
+                if not response:
+                    continue
+                wait = next_slot - time.monotonic()
+                if wait > 0:
+                    time.sleep(wait)
+                next_slot = time.monotonic() + self.simulator.frame_interval
+                os.write(self._master_fd, response)
+
+
+class ReplayDevice(DeviceModel):
+    """
+    回放设备: 按记录时间回放 DataRecorder 生成的 CSV, 或 (N, 17) 的 .npy 二进制文件
+    (第 0 列为相对时间 秒, 其余 16 列顺序同 CSV 数据列)
+
+    speed 为回放倍速, 1 为实时, 0 表示不等待、尽可能快地回放。采样时间戳按记录中的时间间隔给出,
+    与回放倍速无关, 下游看到的采样率与记录时相同。
+    """
+
+    def __init__(self, device_name: str, path: str, speed: float = 1.0, repeat: bool = False):
+        super().__init__(device_name, path, 0, 0)
+        self.path = path
+        self.speed = speed
+        self.repeat = repeat  # 回放到末尾后是否从头开始
+        self.samples_replayed = 0
+        self._times: Optional[np.ndarray] = None
+        self._values: Optional[np.ndarray] = None
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+    def open_device(self):
+        """加载回放文件"""
+        if self.is_open:
+            logger.warning("设备已打开，无需重复打开")
+            return
+        try:
+            self._times, self._values = load_recording(self.path)
+        except (OSError, ValueError, IndexError) as e:
+            raise DeviceConnectionError(f"加载回放文件失败 ({self.path}): {e}") from e
+        if len(self._times) == 0:
+            raise DeviceConnectionError(f"回放文件中没有数据: {self.path}")
+        self.is_open = True
+        logger.info(f"回放文件已加载: {self.path}, {len(self._times)} 条记录")
+
+    def close_device(self):
+        """关闭回放设备"""
+        self.stop_data_acquisition()
+        self.is_open = False
+        self._times = self._values = None
+
+    def start_data_acquisition(self):
+        """开始回放"""
+        if self._running:
+            logger.warning("数据采集已在进行中，无需重复启动")
+            return
+        if not self.is_open:
+            raise DeviceConnectionError("尝试开始采集数据时设备未打开")
+        self._running = True
+        self._thread = threading.Thread(target=self._replay_loop, daemon=True)
+        self._thread.start()
+        logger.info(f"开始回放: {self.path} (x{self.speed})")
+
+    def stop_data_acquisition(self):
+        """停止回放"""
+        if self._running:
+            self._running = False
+            if self._thread is not None:
+                self._thread.join(timeout=2)
+            logger.info("回放已停止")
+
+    def read_data(self):
+        """回放设备由回放线程推送数据, 无需主动读取"""
+        pass
+
+    def _replay_loop(self):
+        """按记录时间间隔推送数据 (内部方法)"""
+        width = min(self._values.shape[1], len(RECORD_KEYS))
+        frames = metrics.counter("device.frames")
+        n = len(self._times)
+        step = (self._times[-1] - self._times[0]) / (n - 1) if n > 1 else 0.0  # 平均采样间隔
+        while self._running:
+            start = time.monotonic()
+            # 采样时间戳 = 本轮起点 + 记录中的相对时间, 保持记录的采样间隔;
+            # 倍速回放时时间戳会超前于当前时刻, 重复回放的下一轮接在上一轮最后一个采样之后, 不倒退
+            origin = sample_clock()
+            if self.sample_time is not None:
+                origin = max(origin, self.sample_time + step)
+            t0 = self._times[0]
+            for t, row in zip(self._times, self._values):
+                if not self._running:
+                    return
+                if self.speed > 0:
+                    wait = (t - t0) / self.speed - (time.monotonic() - start)
+                    if wait > 0:
+                        time.sleep(wait)
+                self.values[:width] = row[:width]
+                self._emit_sample(origin + (t - t0))
+                self.samples_replayed += 1
+                frames.inc()
+            if not self.repeat:
+                break
+        self._running = False
+        logger.info(f"回放结束: {self.path}")
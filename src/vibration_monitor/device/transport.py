@@ -0,0 +1,420 @@
+"""
+设备传输层
+
+DeviceWTVB01 只通过 Transport 接口收发 RTU 帧, 不关心底层是串口还是网络:
+
+* SerialTransport     —— RTU over 串口 (pyserial)
+* TcpRtuTransport     —— RTU over TCP (串口服务器透传模式)
+* ModbusTcpTransport  —— Modbus TCP (MBAP 报文头), 在传输层内与 RTU 帧互相转换,
+                         上层的拆帧和解析代码保持不变
+
+同一网关地址 (host, port) 上的多个设备共用一条 TCP 连接 (连接池),
+连接开启 TCP keep-alive, 出错后在下一次读写时自动重连。
+"""
+import socket
+import struct
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, Tuple
+
+import serial
+
+from . import wtvb01_protocol as protocol
+from ..exceptions import TransportError
+from ..utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+TCP_RTU_SCHEME = "tcp://"
+MODBUS_TCP_SCHEME = "modbus-tcp://"
+SIMULATOR_SCHEME = "sim://"
+MBAP_HEADER = struct.Struct(">HHHB")  # 事务标识, 协议标识, 长度, 单元标识
+
+
+class Transport(ABC):
+    """传输层抽象基类, 读写的都是完整的 RTU 字节流"""
+
+    def __init__(self, timeout: float, inter_byte_timeout: float):
+        """
+        Args:
+            timeout (float): read() 等待第一个字节的超时时间 (秒)
+            inter_byte_timeout (float): 收到数据后字节间的超时时间 (秒)
+        """
+        self.timeout = timeout
+        self.inter_byte_timeout = inter_byte_timeout
+        # 一次 "发送请求 + 读取应答" 期间持有的锁; 共用连接的设备共用同一把锁
+        self.lock = threading.RLock()
+
+    @property
+    @abstractmethod
+    def is_open(self) -> bool:
+        """连接是否已打开"""
+        pass
+
+    @abstractmethod
+    def open(self):
+        """打开连接"""
+        pass
+
+    @abstractmethod
+    def close(self):
+        """关闭连接"""
+        pass
+
+    @abstractmethod
+    def write(self, data: bytes):
+        """发送一帧 RTU 数据"""
+        pass
+
+    @abstractmethod
+    def read(self, size: int) -> bytes:
+        """读取最多 size 个字节, 凑齐 size 个字节或超时后返回"""
+        pass
+
+    def reset_input_buffer(self):
+        """丢弃尚未读取的接收数据"""
+        pass
+
+    def reset_output_buffer(self):
+        """丢弃尚未发送的数据"""
+        pass
+
+
+class SerialTransport(Transport):
+    """RTU over 串口"""
+
+    def __init__(self, port: str, baudrate: int, timeout: float = 0.1, inter_byte_timeout: float = 0.005):
+        super().__init__(timeout, inter_byte_timeout)
+        self.port = port
+        self.baudrate = baudrate
+        self._serial: serial.Serial = None  # type: ignore
+
+    @property
+    def is_open(self) -> bool:
+        return self._serial is not None and self._serial.is_open
+
+    def open(self):
+        try:
+            self._serial = serial.Serial(
+                port=self.port,
+                baudrate=self.baudrate,
+                timeout=self.timeout,
+                inter_byte_timeout=self.inter_byte_timeout,
+                write_timeout=1.0,
+                exclusive=True
+            )
+            if not self._serial.is_open:
+                self._serial.open()
+        except serial.SerialException as e:
+            raise TransportError(f"打开串口失败 ({self.port}): {e}") from e
+
+    def close(self):
+        if self._serial is not None:
+            try:
+                self._serial.close()
+            finally:
+                self._serial = None
+
+    def write(self, data: bytes):
+        try:
+            self._serial.write(data)
+        except serial.SerialException as e:
+            raise TransportError(f"串口发送失败: {e}") from e
+
+    def read(self, size: int) -> bytes:
+        try:
+            return self._serial.read(size)
+        except serial.SerialException as e:
+            raise TransportError(f"串口读取失败: {e}") from e
+
+    def reset_input_buffer(self):
+        try:
+            self._serial.reset_input_buffer()
+        except serial.SerialException as e:
+            raise TransportError(f"清空输入缓冲区失败: {e}") from e
+
+    def reset_output_buffer(self):
+        try:
+            self._serial.reset_output_buffer()
+        except serial.SerialException as e:
+            raise TransportError(f"清空输出缓冲区失败: {e}") from e
+
+
+class PooledConnection:
+    """连接池中的一条 TCP 连接, 由同一网关上的多个设备共用"""
+
+    def __init__(self, host: str, port: int, connect_timeout: float = 3.0):
+        self.host = host
+        self.port = port
+        self.connect_timeout = connect_timeout
+        self.lock = threading.RLock()
+        self.users = 0  # 引用计数
+        self.transaction_id = 0  # 最近一次 Modbus TCP 请求的事务标识, 按连接递增 (共用连接的设备不会重复)
+        self._sock: socket.socket = None  # type: ignore
+
+    @property
+    def connected(self) -> bool:
+        return self._sock is not None
+
+    def get_socket(self) -> socket.socket:
+        """返回已连接的 socket, 断开时自动重连"""
+        if self._sock is None:
+            try:
+                sock = socket.create_connection((self.host, self.port), timeout=self.connect_timeout)
+            except OSError as e:
+                raise TransportError(f"连接网关失败 ({self.host}:{self.port}): {e}") from e
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._enable_keepalive(sock)
+            self._sock = sock
+            logger.info(f"已连接网关: {self.host}:{self.port}")
+        return self._sock
+
+    def next_transaction_id(self) -> int:
+        """分配下一个 Modbus TCP 事务标识 (调用方持有 lock)"""
+        self.transaction_id = (self.transaction_id + 1) & 0xffff
+        return self.transaction_id
+
+    def close(self):
+        """关闭连接"""
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+            self._sock = None
+
+    def invalidate(self):
+        """连接出错: 关闭连接, 下一次读写时重连"""
+        if self._sock is not None:
+            self.close()
+            logger.warning(f"网关连接已断开: {self.host}:{self.port}")
+
+    def discard_input(self):
+        """丢弃 socket 中尚未读取的数据"""
+        if self._sock is None:
+            return
+        self._sock.setblocking(False)
+        try:
+            while self._sock.recv(4096):
+                pass
+        except (BlockingIOError, InterruptedError):
+            pass
+        except OSError:
+            self.invalidate()
+            return
+        finally:
+            if self._sock is not None:
+                self._sock.setblocking(True)
+
+    @staticmethod
+    def _enable_keepalive(sock: socket.socket, idle: int = 10, interval: int = 5, count: int = 3):
+        """开启 TCP keep-alive, 及时发现网关掉线"""
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        for name, value in (("TCP_KEEPIDLE", idle), ("TCP_KEEPINTVL", interval), ("TCP_KEEPCNT", count)):
+            if hasattr(socket, name):  # Windows/macOS 上部分选项不可用
+                sock.setsockopt(socket.IPPROTO_TCP, getattr(socket, name), value)
+
+
+class ConnectionPool:
+    """按 (host, port) 复用 TCP 连接"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._connections: Dict[Tuple[str, int], PooledConnection] = {}
+
+    def acquire(self, host: str, port: int) -> PooledConnection:
+        with self._lock:
+            connection = self._connections.get((host, port))
+            if connection is None:
+                connection = PooledConnection(host, port)
+                self._connections[(host, port)] = connection
+            connection.users += 1
+            return connection
+
+    def release(self, connection: PooledConnection):
+        with self._lock:
+            connection.users -= 1
+            if connection.users <= 0:
+                self._connections.pop((connection.host, connection.port), None)
+                with connection.lock:
+                    connection.close()
+
+
+connection_pool = ConnectionPool()  # 全局连接池
+
+
+class TcpRtuTransport(Transport):
+    """RTU over TCP: 串口服务器透传, TCP 上传输的就是原始 RTU 帧"""
+
+    def __init__(self, host: str, port: int, timeout: float = 0.1, inter_byte_timeout: float = 0.005,
+                 pool: ConnectionPool = None):
+        super().__init__(timeout, inter_byte_timeout)
+        self.host = host
+        self.port = port
+        self._pool = pool or connection_pool
+        self._connection: PooledConnection = None  # type: ignore
+
+    @property
+    def is_open(self) -> bool:
+        return self._connection is not None
+
+    def open(self):
+        self._connection = self._pool.acquire(self.host, self.port)
+        self.lock = self._connection.lock  # 同一连接上的请求/应答互斥
+        try:
+            with self.lock:
+                self._connection.get_socket()
+        except TransportError:
+            self.close()
+            raise
+
+    def close(self):
+        if self._connection is not None:
+            self._pool.release(self._connection)
+            self._connection = None
+
+    def write(self, data: bytes):
+        with self.lock:
+            try:
+                self._connection.get_socket().sendall(data)
+            except OSError as e:
+                self._connection.invalidate()
+                raise TransportError(f"发送失败 ({self.host}:{self.port}): {e}") from e
+
+    def read(self, size: int) -> bytes:
+        with self.lock:
+            return self._recv(size)
+
+    def _recv(self, size: int) -> bytes:
+        """按串口语义读取: 首字节等待 timeout, 之后字节间等待 inter_byte_timeout"""
+        sock = self._connection.get_socket()
+        received = bytearray()
+        deadline = time.monotonic() + self.timeout
+        try:
+            while len(received) < size:
+                if received:
+                    wait = self.inter_byte_timeout
+                else:
+                    wait = deadline - time.monotonic()
+                    if wait <= 0:
+                        break
+                sock.settimeout(wait)
+                try:
+                    chunk = sock.recv(size - len(received))
+                except socket.timeout:
+                    break
+                if not chunk:
+                    raise ConnectionResetError("网关关闭了连接")
+                received.extend(chunk)
+        except OSError as e:
+            self._connection.invalidate()
+            raise TransportError(f"读取失败 ({self.host}:{self.port}): {e}") from e
+        return bytes(received)
+
+    def reset_input_buffer(self):
+        with self.lock:
+            self._connection.discard_input()
+
+
+class ModbusTcpTransport(TcpRtuTransport):
+    """
+    Modbus TCP
+
+    write() 把 RTU 帧去掉 CRC、加上 MBAP 报文头发送;
+    read() 把收到的 MBAP 应答还原为带 CRC 的 RTU 帧, 上层拆帧逻辑无需区分。
+    """
+
+    def __init__(self, host: str, port: int = 502, timeout: float = 0.1, inter_byte_timeout: float = 0.005,
+                 pool: ConnectionPool = None):
+        super().__init__(host, port, timeout, inter_byte_timeout, pool)
+        self._rtu_buffer = bytearray()  # 已还原但尚未被读取的 RTU 字节
+
+    def write(self, data: bytes):
+        if len(data) < 4:
+            raise TransportError(f"RTU 帧长度错误: {len(data)}")
+        unit_id, pdu = data[0], data[1:-2]  # 去掉地址和 CRC
+        with self.lock:
+            # 事务标识由连接分配: 同一 socket 上各设备的请求编号唯一, 迟到的应答不会被误认
+            header = MBAP_HEADER.pack(self._connection.next_transaction_id(), 0, len(pdu) + 1, unit_id)
+            super().write(header + pdu)
+
+    def read(self, size: int) -> bytes:
+        with self.lock:
+            deadline = time.monotonic() + self.timeout
+            while len(self._rtu_buffer) < size and time.monotonic() < deadline:
+                if not self._read_adu(deadline):
+                    break
+            data = bytes(self._rtu_buffer[:size])
+            del self._rtu_buffer[:size]
+            return data
+
+    def _read_adu(self, deadline: float) -> bool:
+        """读取一个 MBAP 报文并还原为 RTU 帧, 超时返回 False (内部方法)"""
+        saved_timeout = self.timeout
+        self.timeout = max(deadline - time.monotonic(), 0.0)
+        try:
+            header = self._recv(MBAP_HEADER.size)
+            if not header:
+                return False
+            if len(header) < MBAP_HEADER.size:
+                pdu, length = b"", 1
+            else:
+                transaction_id, protocol_id, length, unit_id = MBAP_HEADER.unpack(header)
+                self.timeout = max(deadline - time.monotonic(), self.inter_byte_timeout)
+                pdu = self._recv(length - 1)
+        finally:
+            self.timeout = saved_timeout
+        if len(header) < MBAP_HEADER.size or len(pdu) < length - 1:
+            # 报文边界已无法确定, 断开重连以重新对齐
+            self._connection.invalidate()
+            raise TransportError("Modbus TCP 报文不完整")
+        if protocol_id != 0:
+            logger.warning(f"收到非 Modbus 协议的报文: protocol_id={protocol_id}")
+            return True
+        if transaction_id != self._connection.transaction_id:
+            logger.warning(f"丢弃过期的 Modbus TCP 应答: 事务 {transaction_id}, 当前 {self._connection.transaction_id}")
+            return True
+        frame = [unit_id] + list(pdu)
+        crc = protocol.get_crc(frame, len(frame))
+        self._rtu_buffer.extend(frame)
+        self._rtu_buffer.extend((crc >> 8, crc & 0xff))
+        return True
+
+    def reset_input_buffer(self):
+        with self.lock:
+            self._rtu_buffer.clear()
+            super().reset_input_buffer()
+
+
+def create_transport(port: str, baudrate: int, timeout: float = 0.1, inter_byte_timeout: float = 0.005) -> Transport:
+    """
+    根据 port 字符串创建传输层
+
+    Args:
+        port (str): 串口号 (如 COM5, /dev/ttyUSB0), tcp://host:port, modbus-tcp://host[:port],
+            或 sim://[帧率] (进程内模拟设备, 如 sim://1000)
+        baudrate (int): 波特率, 仅串口使用
+    """
+    if port.startswith(SIMULATOR_SCHEME):
+        from .simulator import InMemoryTransport, SimulatedWTVB01  # 模拟器依赖本模块, 延迟导入
+        rate = port[len(SIMULATOR_SCHEME):]
+        simulator = SimulatedWTVB01(rate_hz=float(rate) if rate else 100.0)
+        return InMemoryTransport(simulator, timeout, inter_byte_timeout)
+    if port.startswith(TCP_RTU_SCHEME):
+        host, tcp_port = _split_address(port[len(TCP_RTU_SCHEME):], None)
+        return TcpRtuTransport(host, tcp_port, timeout, inter_byte_timeout)
+    if port.startswith(MODBUS_TCP_SCHEME):
+        host, tcp_port = _split_address(port[len(MODBUS_TCP_SCHEME):], 502)
+        return ModbusTcpTransport(host, tcp_port, timeout, inter_byte_timeout)
+    return SerialTransport(port, baudrate, timeout, inter_byte_timeout)
+
+
+def _split_address(address: str, default_port):
+    """解析 host:port (内部方法)"""
+    host, sep, tcp_port = address.rpartition(":")
+    if not sep:
+        host, tcp_port = address, default_port
+    if tcp_port is None or not host:
+        raise ValueError(f"网关地址格式错误: {address}, 应为 host:port")
+    return host, int(tcp_port)
@@ -0,0 +1,270 @@
+"""
+WTVB01 Modbus RTU 协议 (帧组装、CRC 校验、拆帧与寄存器解析)
+
+线程版 DeviceWTVB01 与 asyncio 版 AsyncDeviceWTVB01 共用本模块,
+保证两种驱动的帧格式和数据换算完全一致。
+"""
+from functools import lru_cache
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from ..channels import ChannelId
+from ..utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+READ_FUNCTION = 0x03  # 读保持寄存器
+WRITE_FUNCTION = 0x06  # 写单个寄存器
+DATA_START_REG = 0x34  # 加速度X 寄存器
+DATA_REG_COUNT = 19  # 0x34(加速度) ~ 0x46(振动频率)
+MIN_FRAME_LENGTH = 8  # 最小数据包长度
+
+# 寄存器地址 -> 通道 / 数据键 (与 DeviceModel.get_data 的键一致), 由通道登记表 channels.ChannelId 给出;
+# 振动角度 (0x3D~0x3F) 不是监测通道, 不在其中, decode_registers 以寄存器地址的十进制作为键
+REGISTER_CHANNELS = {channel.register: channel for channel in sorted(ChannelId, key=lambda c: c.register)}
+REGISTER_KEYS = {register: channel.key for register, channel in REGISTER_CHANNELS.items()}
+
+# region   计算CRC
+auchCRCHi = [
+    0x00, 0xC1, 0x81, 0x40, 0x01, 0xC0, 0x80, 0x41, 0x01, 0xC0, 0x80, 0x41, 0x00, 0xC1, 0x81,
+    0x40, 0x01, 0xC0, 0x80, 0x41, 0x00, 0xC1, 0x81, 0x40, 0x00, 0xC1, 0x81, 0x40, 0x01, 0xC0,
+    0x80, 0x41, 0x01, 0xC0, 0x80, 0x41, 0x00, 0xC1, 0x81, 0x40, 0x00, 0xC1, 0x81, 0x40, 0x01,
+    0xC0, 0x80, 0x41, 0x00, 0xC1, 0x81, 0x40, 0x01, 0xC0, 0x80, 0x41, 0x01, 0xC0, 0x80, 0x41,
+    0x00, 0xC1, 0x81, 0x40, 0x01, 0xC0, 0x80, 0x41, 0x00, 0xC1, 0x81, 0x40, 0x00, 0xC1, 0x81,
+    0x40, 0x01, 0xC0, 0x80, 0x41, 0x00, 0xC1, 0x81, 0x40, 0x01, 0xC0, 0x80, 0x41, 0x01, 0xC0,
+    0x80, 0x41, 0x00, 0xC1, 0x81, 0x40, 0x00, 0xC1, 0x81, 0x40, 0x01, 0xC0, 0x80, 0x41, 0x01,
+    0xC0, 0x80, 0x41, 0x00, 0xC1, 0x81, 0x40, 0x01, 0xC0, 0x80, 0x41, 0x00, 0xC1, 0x81, 0x40,
+    0x00, 0xC1, 0x81, 0x40, 0x01, 0xC0, 0x80, 0x41, 0x01, 0xC0, 0x80, 0x41, 0x00, 0xC1, 0x81,
+    0x40, 0x00, 0xC1, 0x81, 0x40, 0x01, 0xC0, 0x80, 0x41, 0x00, 0xC1, 0x81, 0x40, 0x01, 0xC0,
+    0x80, 0x41, 0x01, 0xC0, 0x80, 0x41, 0x00, 0xC1, 0x81, 0x40, 0x00, 0xC1, 0x81, 0x40, 0x01,
+    0xC0, 0x80, 0x41, 0x01, 0xC0, 0x80, 0x41, 0x00, 0xC1, 0x81, 0x40, 0x01, 0xC0, 0x80, 0x41,
+    0x00, 0xC1, 0x81, 0x40, 0x00, 0xC1, 0x81, 0x40, 0x01, 0xC0, 0x80, 0x41, 0x00, 0xC1, 0x81,
+    0x40, 0x01, 0xC0, 0x80, 0x41, 0x01, 0xC0, 0x80, 0x41, 0x00, 0xC1, 0x81, 0x40, 0x01, 0xC0,
+    0x80, 0x41, 0x00, 0xC1, 0x81, 0x40, 0x00, 0xC1, 0x81, 0x40, 0x01, 0xC0, 0x80, 0x41, 0x01,
+    0xC0, 0x80, 0x41, 0x00, 0xC1, 0x81, 0x40, 0x00, 0xC1, 0x81, 0x40, 0x01, 0xC0, 0x80, 0x41,
+    0x00, 0xC1, 0x81, 0x40, 0x01, 0xC0, 0x80, 0x41, 0x01, 0xC0, 0x80, 0x41, 0x00, 0xC1, 0x81,
+    0x40]
+
+auchCRCLo = [
+    0x00, 0xC0, 0xC1, 0x01, 0xC3, 0x03, 0x02, 0xC2, 0xC6, 0x06, 0x07, 0xC7, 0x05, 0xC5, 0xC4,
+    0x04, 0xCC, 0x0C, 0x0D, 0xCD, 0x0F, 0xCF, 0xCE, 0x0E, 0x0A, 0xCA, 0xCB, 0x0B, 0xC9, 0x09,
+    0x08, 0xC8, 0xD8, 0x18, 0x19, 0xD9, 0x1B, 0xDB, 0xDA, 0x1A, 0x1E, 0xDE, 0xDF, 0x1F, 0xDD,
+    0x1D, 0x1C, 0xDC, 0x14, 0xD4, 0xD5, 0x15, 0xD7, 0x17, 0x16, 0xD6, 0xD2, 0x12, 0x13, 0xD3,
+    0x11, 0xD1, 0xD0, 0x10, 0xF0, 0x30, 0x31, 0xF1, 0x33, 0xF3, 0xF2, 0x32, 0x36, 0xF6, 0xF7,
+    0x37, 0xF5, 0x35, 0x34, 0xF4, 0x3C, 0xFC, 0xFD, 0x3D, 0xFF, 0x3F, 0x3E, 0xFE, 0xFA, 0x3A,
+    0x3B, 0xFB, 0x39, 0xF9, 0xF8, 0x38, 0x28, 0xE8, 0xE9, 0x29, 0xEB, 0x2B, 0x2A, 0xEA, 0xEE,
+    0x2E, 0x2F, 0xEF, 0x2D, 0xED, 0xEC, 0x2C, 0xE4, 0x24, 0x25, 0xE5, 0x27, 0xE7, 0xE6, 0x26,
+    0x22, 0xE2, 0xE3, 0x23, 0xE1, 0x21, 0x20, 0xE0, 0xA0, 0x60, 0x61, 0xA1, 0x63, 0xA3, 0xA2,
+    0x62, 0x66, 0xA6, 0xA7, 0x67, 0xA5, 0x65, 0x64, 0xA4, 0x6C, 0xAC, 0xAD, 0x6D, 0xAF, 0x6F,
+    0x6E, 0xAE, 0xAA, 0x6A, 0x6B, 0xAB, 0x69, 0xA9, 0xA8, 0x68, 0x78, 0xB8, 0xB9, 0x79, 0xBB,
+    0x7B, 0x7A, 0xBA, 0xBE, 0x7E, 0x7F, 0xBF, 0x7D, 0xBD, 0xBC, 0x7C, 0xB4, 0x74, 0x75, 0xB5,
+    0x77, 0xB7, 0xB6, 0x76, 0x72, 0xB2, 0xB3, 0x73, 0xB1, 0x71, 0x70, 0xB0, 0x50, 0x90, 0x91,
+    0x51, 0x93, 0x53, 0x52, 0x92, 0x96, 0x56, 0x57, 0x97, 0x55, 0x95, 0x94, 0x54, 0x9C, 0x5C,
+    0x5D, 0x9D, 0x5F, 0x9F, 0x9E, 0x5E, 0x5A, 0x9A, 0x9B, 0x5B, 0x99, 0x59, 0x58, 0x98, 0x88,
+    0x48, 0x49, 0x89, 0x4B, 0x8B, 0x8A, 0x4A, 0x4E, 0x8E, 0x8F, 0x4F, 0x8D, 0x4D, 0x4C, 0x8C,
+    0x44, 0x84, 0x85, 0x45, 0x87, 0x47, 0x46, 0x86, 0x82, 0x42, 0x43, 0x83, 0x41, 0x81, 0x80,
+    0x40]
+
+# endregion  计算CRC
+
+
+def get_crc(data: Sequence[int], data_len: int) -> int:
+    """计算 CRC 校验"""
+    tempH = 0xff
+    tempL = 0xff
+    for i in range(data_len):
+        temp_index = (tempH ^ data[i]) & 0xff
+        tempH = (tempL ^ auchCRCHi[temp_index]) & 0xff
+        tempL = auchCRCLo[temp_index]
+    return (tempH << 8) | tempL
+
+
+def _with_crc(temp_bytes: List[int]) -> bytes:
+    """在帧末尾追加 CRC (高字节在前)"""
+    temp_crc = get_crc(temp_bytes, len(temp_bytes))
+    return bytes(temp_bytes + [temp_crc >> 8, temp_crc & 0xff])
+
+
+def build_read_command(devid: int, reg_addr: int, reg_count: int) -> bytes:
+    """组装读寄存器命令"""
+    return _with_crc([
+        devid, READ_FUNCTION,
+        reg_addr >> 8, reg_addr & 0xff,
+        reg_count >> 8, reg_count & 0xff,
+    ])
+
+
+def build_write_command(devid: int, reg_addr: int, value: int) -> bytes:
+    """组装写单个寄存器命令"""
+    return _with_crc([
+        devid, WRITE_FUNCTION,
+        reg_addr >> 8, reg_addr & 0xff,
+        value >> 8, value & 0xff,
+    ])
+
+
+def build_read_response(devid: int, raw_values: Sequence[int]) -> bytes:
+    """组装读寄存器应答帧 (用于模拟设备和网关), raw_values 为 16 位原始寄存器值"""
+    temp_bytes = [devid, READ_FUNCTION, 2 * len(raw_values)]
+    for raw in raw_values:
+        raw &= 0xffff
+        temp_bytes.append(raw >> 8)
+        temp_bytes.append(raw & 0xff)
+    return _with_crc(temp_bytes)
+
+
+def read_response_length(reg_count: int) -> int:
+    """读寄存器应答帧的字节数: 地址 + 功能码 + 字节数 + 数据 + CRC"""
+    return 3 + 2 * reg_count + 2
+
+
+def to_signed(data: int) -> int:
+    """
+    16 位原始值转为有符号数 (二进制补码)
+
+    原先的换算为 data > 32768 时减 65535: 0x8000 被当作 +32768, 所有负值偏大 1 个 LSB (0xFFFF 得到 0 而不是 -1)。
+    """
+    if data >= 32768:
+        data = data - 65536
+    return data
+
+
+def _register_scale(reg_addr: int) -> Tuple[int, int]:
+    """寄存器的换算系数 (除数, 乘数): 物理量 = 有符号原始值 / 除数 * 乘数"""
+    if 0x34 <= reg_addr <= 0x36:  # 加速度
+        return 32768, 16
+    if 0x37 <= reg_addr <= 0x39:  # 角速度
+        return 32768, 2000
+    if 0x3D <= reg_addr <= 0x3F:  # 振动角度
+        return 32768, 180
+    if reg_addr == 0x40:  # 温度
+        return 100, 1
+    return 1, 1
+
+
+def unscale_register(reg_addr: int, value: float) -> int:
+    """scale_register 的逆运算: 物理量换算回 16 位原始寄存器值 (用于模拟设备)"""
+    divisor, multiplier = _register_scale(reg_addr)
+    raw = value / multiplier * divisor
+    return max(-32768, min(32767, int(round(raw)))) & 0xffff
+
+
+def scale_register(reg_addr: int, value: int) -> float:
+    """按寄存器类型把有符号原始值换算为物理量"""
+    divisor, multiplier = _register_scale(reg_addr)
+    return value / divisor * multiplier
+
+
+def decode_registers(packet: Sequence[int], start_reg: int = DATA_START_REG) -> Dict[str, float]:
+    """
+    解析读寄存器应答帧中的全部寄存器 (含不在通道登记表中的振动角度), 用于调试和工具; 设备采集用 decode_values
+
+    Args:
+        packet: 已通过 CRC 校验的完整数据包
+        start_reg: 数据包第一个寄存器的地址
+
+    Returns:
+        dict: 数据键 -> 换算后的物理量
+    """
+    data_length = packet[2]
+    if data_length % 2 != 0:
+        raise ValueError(f"数据长度错误: {data_length}，应为偶数")
+    values = {}
+    for i in range(data_length // 2):
+        reg_addr = start_reg + i
+        value = to_signed(packet[2 * i + 3] << 8 | packet[2 * i + 4])
+        key = REGISTER_KEYS.get(reg_addr, str(reg_addr))  # 未知寄存器直接使用寄存器地址作为键
+        values[key] = scale_register(reg_addr, value)
+    return values
+
+
+@lru_cache(maxsize=None)
+def _decode_table(start_reg: int, reg_count: int):
+    """
+    一段寄存器的解码表: (寄存器序号, channels.ChannelId 列号, 除数, 乘数), 只含通道登记表中的寄存器
+    """
+    registers = [(i, REGISTER_CHANNELS[start_reg + i]) for i in range(reg_count) if start_reg + i in REGISTER_CHANNELS]
+    scales = np.array([_register_scale(start_reg + i) for i, _ in registers], dtype=float).reshape(-1, 2)
+    return (np.array([i for i, _ in registers], dtype=np.intp), np.array([c for _, c in registers], dtype=np.intp),
+            scales[:, 0], scales[:, 1])
+
+
+def decode_values(packet: Sequence[int], out: np.ndarray, start_reg: int = DATA_START_REG) -> None:
+    """
+    把读寄存器应答帧中的寄存器换算后直接写入 out 中对应的 channels.ChannelId 列
+
+    整帧按大端有符号 16 位一次转换和换算, 不经过数据键; 不在通道登记表中的寄存器 (振动角度) 跳过,
+    out 中不在本帧内的列保持原值。
+
+    Args:
+        packet: 已通过 CRC 校验的完整数据包
+        out: 按 ChannelId 排列的数组 (如 DeviceModel.values, 可以更宽)
+        start_reg: 数据包第一个寄存器的地址
+
+    Raises:
+        ValueError: 数据长度不是偶数
+    """
+    data_length = packet[2]
+    if data_length % 2 != 0:
+        raise ValueError(f"数据长度错误: {data_length}，应为偶数")
+    offsets, columns, divisors, multipliers = _decode_table(start_reg, data_length // 2)
+    raw = np.frombuffer(bytes(packet[3:3 + data_length]), dtype='>i2')
+    out[columns] = raw[offsets] / divisors * multipliers
+
+
+class FrameParser:
+    """
+    读寄存器应答帧的拆帧器
+
+    按地址 + 功能码 + 字节数定位帧边界, 校验 CRC 后返回完整数据包;
+    遇到不匹配的字节逐字节滑动重新同步。
+    """
+
+    def __init__(self, address: int):
+        self.address = address
+        self.buffer = bytearray()  # 接收缓冲区
+        self.crc_errors = 0  # CRC 校验失败的帧数
+        self.resync_bytes = 0  # 为重新同步丢弃的字节数
+
+    def feed(self, data: bytes) -> List[List[int]]:
+        """追加接收到的数据, 返回其中所有通过 CRC 校验的完整数据包"""
+        buffer = self.buffer
+        buffer.extend(data)
+        packets = []
+
+        while len(buffer) >= MIN_FRAME_LENGTH:  # 至少有8个字节才能进行处理
+            if buffer[0] != self.address:  # 地址不匹配
+                logger.warning(f"接收到地址不匹配的数据包: {buffer[0]}, 预期地址: {self.address}")
+                del buffer[0]
+                self.resync_bytes += 1
+                continue
+
+            if buffer[1] != READ_FUNCTION:  # 功能码不匹配
+                logger.warning(f"接收到功能码不匹配的数据包: {buffer[1]}, 预期功能码: 0x03")
+                del buffer[0]
+                self.resync_bytes += 1
+                continue
+
+            frame_length = buffer[2] + 5
+            if len(buffer) < frame_length:  # 数据长度不足
+                break  # 等待更多数据
+
+            # 提取完整数据包
+            packet = list(buffer[:frame_length])  # 转换为整数列表
+            del buffer[:frame_length]
+
+            # CRC 校验
+            received_crc = packet[-2] << 8 | packet[-1]
+            calculated_crc = get_crc(packet, len(packet) - 2)
+            if received_crc != calculated_crc:
+                self.crc_errors += 1
+                logger.warning(f"CRC 校验失败: 收到 CRC = {received_crc:04X}, 计算 CRC = {calculated_crc:04X}")
+                continue  # 丢弃数据包
+
+            packets.append(packet)
+        return packets
+
+    def reset(self):
+        """清空接收缓冲区"""
+        self.buffer.clear()
@@ -0,0 +1,272 @@
+"""
+旋转设备诊断分析
+
+* 包络谱 (解调): 带通 -> Hilbert 变换取包络 -> 包络的幅度谱, 用于发现轴承等冲击类故障的调制频率
+* 阶次跟踪: 按转速把信号从等时间间隔重采样到等转角间隔, 频谱横轴为阶次 (转频的倍数), 转速变化时谱线不模糊
+* 轴承故障特征频率: 由轴承几何参数计算 BPFO / BPFI / BSF / FTF, 用于在谱图上标注
+
+DiagnosticAnalyzer 一次处理同一物理量的全部轴 (values 形状 (轴数, n)), 所有计算沿最后一维向量化。
+带通在频域完成 (只保留频带内的正频率分量并乘 2, 逆变换直接得到解析信号), 原始信号的 FFT 只计算一次,
+扫描不同频带或转速参数时复用; 包络和阶次重采样结果按参数缓存。频带扫描只需要包络的统计量,
+把频带内的分量移到零频附近做短的逆变换 (包络的幅值不受频移影响), 得到降采样的包络。不依赖 Qt。
+"""
+from collections import OrderedDict, namedtuple
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from scipy.fft import ifft, next_fast_len, rfft, rfftfreq
+
+from .resampling import to_uniform
+from .utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# 滚动体个数, 滚动体直径、节圆直径 (同一单位即可), 接触角 (度)
+BearingGeometry = namedtuple('BearingGeometry', ['name', 'balls', 'ball_diameter', 'pitch_diameter', 'contact_angle'])
+
+# 内置的常用深沟球轴承, 其它型号在 config.ini 的 [Bearings] 中添加
+DEFAULT_BEARINGS = {
+    '6203': BearingGeometry('6203', 8, 6.7462, 28.4988, 0.0),
+    '6205': BearingGeometry('6205', 9, 7.9400, 39.0398, 0.0),
+}
+
+DEFECT_NAMES = ('BPFO', 'BPFI', 'BSF', 'FTF')  # 外圈、内圈、滚动体、保持架
+
+# 限制包络、阶次缓存的条目数, 每个条目与原始数据同量级
+CACHE_SIZE = 8
+
+ShaftSpeed = Union[float, Sequence[float], np.ndarray]
+
+
+def bearing_table(config=None) -> Dict[str, BearingGeometry]:
+    """
+    轴承几何参数表: 内置型号 + config.ini [Bearings] 中的型号
+
+    [Bearings] 每行格式: 型号 = 滚动体个数, 滚动体直径, 节圆直径[, 接触角(度)], 型号按大写显示
+    """
+    table = dict(DEFAULT_BEARINGS)
+    if config is None or not config.config.has_section('Bearings'):
+        return table
+    for name, text in config.config.items('Bearings'):
+        name = name.upper()  # configparser 会把键转为小写, 型号统一用大写
+        try:
+            fields = [float(field) for field in text.split(',')]
+            if len(fields) not in (3, 4) or fields[0] < 1 or fields[1] <= 0 or fields[2] <= fields[1]:
+                raise ValueError("需要 滚动体个数, 滚动体直径, 节圆直径[, 接触角]")
+            table[name] = BearingGeometry(name, int(fields[0]), fields[1], fields[2],
+                                          fields[3] if len(fields) == 4 else 0.0)
+        except ValueError as e:
+            logger.warning(f"忽略无效的轴承参数 {name} = {text}: {e}")
+    return table
+
+
+def defect_orders(bearing: BearingGeometry) -> Dict[str, float]:
+    """轴承故障特征频率相对转频的倍数 (外圈固定、内圈随轴转动)"""
+    ratio = bearing.ball_diameter / bearing.pitch_diameter * np.cos(np.radians(bearing.contact_angle))
+    return {
+        'BPFO': bearing.balls / 2 * (1 - ratio),
+        'BPFI': bearing.balls / 2 * (1 + ratio),
+        'BSF': bearing.pitch_diameter / (2 * bearing.ball_diameter) * (1 - ratio ** 2),
+        'FTF': 0.5 * (1 - ratio),
+    }
+
+
+def defect_frequencies(bearing: BearingGeometry, shaft_hz: float) -> Dict[str, float]:
+    """轴承故障特征频率 (Hz)"""
+    return {name: order * shaft_hz for name, order in defect_orders(bearing).items()}
+
+
+def defect_markers(bearing: BearingGeometry, shaft_hz: float = 1.0,
+                   harmonics: int = 3) -> List[Tuple[str, float]]:
+    """
+    谱图标注位置 [(标签, 位置)], 包含各特征频率的 1..harmonics 次谐波
+
+    shaft_hz 为 1 时位置即阶次, 用于阶次谱。
+    """
+    markers = []
+    for name, frequency in defect_frequencies(bearing, shaft_hz).items():
+        for k in range(1, harmonics + 1):
+            markers.append((name if k == 1 else f"{k}×{name}", k * frequency))
+    return markers
+
+
+def kurtosis(data: np.ndarray) -> np.ndarray:
+    """沿最后一维的峭度 (正态分布为 3), 用于衡量包络的冲击性"""
+    centered = data - data.mean(axis=-1, keepdims=True)
+    variance = np.mean(centered ** 2, axis=-1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.mean(centered ** 4, axis=-1) / variance ** 2
+
+
+class DiagnosticAnalyzer:
+    """
+    一组同步采集的多轴数据的诊断分析, 中间结果在对象内缓存
+
+    数据变化后应新建对象; 同一对象上改变频带、转速等参数只重算受影响的部分。
+    采样间隔不均匀时先重采样到均匀网格 (resampling.to_uniform), timestamps / n 为网格的时间和点数,
+    原始时间保留在 source_timestamps。
+
+    Args:
+        timestamps: 形状 (n,), 单位秒
+        values: 形状 (轴数, n) 或 (n,); NaN 按 0 处理 (去均值之后)
+    """
+
+    def __init__(self, timestamps: Sequence[float], values: np.ndarray):
+        self.source_timestamps = np.asarray(timestamps, dtype=float)
+        data = np.atleast_2d(np.asarray(values, dtype=float))
+        if data.shape[-1] != len(self.source_timestamps):
+            raise ValueError("时间与数据长度不一致")
+        if len(self.source_timestamps) < 4:
+            raise ValueError("数据不足")
+        uniform = to_uniform(self.source_timestamps, data)
+        self.timestamps, data, self.fs = uniform.time, uniform.values, uniform.fs
+        self.gaps = int(np.count_nonzero(~uniform.valid))  # 间断或缺失的网格点数
+        self.n = len(self.timestamps)
+        means = np.nanmean(data, axis=-1, keepdims=True) if not np.isnan(data).all() else 0.0
+        self.data = np.nan_to_num(data - means)  # 去均值, 避免直流分量淹没低频
+        self.freqs = rfftfreq(self.n, 1.0 / self.fs)
+        self._spectrum = None
+        self._envelopes = OrderedDict()
+        self._resampled = OrderedDict()
+
+    @property
+    def axes(self) -> int:
+        return self.data.shape[0]
+
+    @property
+    def nyquist(self) -> float:
+        return 0.5 * self.fs
+
+    def _cached(self, cache: OrderedDict, key, compute):
+        if key in cache:
+            cache.move_to_end(key)
+            return cache[key]
+        value = cache[key] = compute()
+        if len(cache) > CACHE_SIZE:
+            cache.popitem(last=False)
+        return value
+
+    def spectrum(self) -> np.ndarray:
+        """原始信号的单边复数频谱 (全部轴), 只计算一次"""
+        if self._spectrum is None:
+            self._spectrum = rfft(self.data, axis=-1)
+        return self._spectrum
+
+    def amplitude_spectrum(self) -> Tuple[np.ndarray, np.ndarray]:
+        """单边幅度谱 (频率, 形状 (轴数, m) 的幅度)"""
+        return self.freqs, np.abs(self.spectrum()) * (2.0 / self.n)
+
+    def _band_bins(self, band: Tuple[float, float]) -> slice:
+        """频带在单边频谱中的下标范围, 不含直流分量"""
+        low, high = band
+        if not 0 <= low < high:
+            raise ValueError(f"无效的频带: {band}")
+        if low >= self.nyquist:
+            raise ValueError(f"频带下限 {low:g} Hz 超过奈奎斯特频率 {self.nyquist:g} Hz")
+        start = max(int(np.searchsorted(self.freqs, low)), 1)
+        stop = max(int(np.searchsorted(self.freqs, high, side='right')), start)
+        return slice(start, stop)
+
+    def _compute_envelope(self, band: Tuple[float, float], decimate: bool = False) -> np.ndarray:
+        """
+        带通后解析信号的幅值
+
+        decimate 为 True 时只对频带宽度 2 倍的点数做逆变换, 返回降采样的包络 (幅值与全长包络一致)。
+        """
+        bins = self._band_bins(band)
+        width = bins.stop - bins.start
+        size = min(next_fast_len(max(2 * width, 16)), self.n) if decimate else self.n
+        analytic = np.zeros((self.axes, size), dtype=complex)
+        analytic[:, :width] = self.spectrum()[:, bins] * 2.0  # 只保留正频率 (乘 2)
+        if not decimate:
+            analytic = np.roll(analytic, bins.start, axis=-1)  # 放回原频率位置
+        return np.abs(ifft(analytic, axis=-1)) * (size / self.n)
+
+    def envelope(self, band: Tuple[float, float]) -> np.ndarray:
+        """频带 [low, high] Hz 内信号的包络, 形状 (轴数, n)"""
+        band = (float(band[0]), float(band[1]))
+        return self._cached(self._envelopes, band, lambda: self._compute_envelope(band))
+
+    def envelope_spectrum(self, band: Tuple[float, float]) -> Tuple[np.ndarray, np.ndarray]:
+        """包络谱 (频率, 形状 (轴数, m) 的幅度), 包络去均值后计算"""
+        envelope = self.envelope(band)
+        envelope = envelope - envelope.mean(axis=-1, keepdims=True)
+        return self.freqs, np.abs(rfft(envelope, axis=-1)) * (2.0 / self.n)
+
+    def band_sweep(self, bands: Sequence[Tuple[float, float]]) -> np.ndarray:
+        """
+        各频带包络的峭度, 形状 (轴数, 频带数); 峭度越大冲击成分越明显, 可用于选择解调频带
+
+        复用原始频谱, 每个频带只做一次降采样的逆变换; 扫描结果不进入包络缓存。
+        """
+        result = np.empty((self.axes, len(bands)))
+        for i, band in enumerate(bands):
+            result[:, i] = kurtosis(self._compute_envelope(band, decimate=True))
+        return result
+
+    def best_band(self, bandwidth: float, step: Optional[float] = None,
+                  low: float = 0.0) -> Tuple[Tuple[float, float], np.ndarray]:
+        """
+        按 bandwidth 宽、step 步进扫描 [low, 奈奎斯特频率), 返回全部轴峭度之和最大的频带
+
+        Returns:
+            tuple: (频带, 各轴在该频带的峭度)
+        """
+        step = step or bandwidth / 2
+        starts = np.arange(low, self.nyquist - bandwidth + 1e-9, step)
+        if len(starts) == 0:
+            raise ValueError(f"带宽 {bandwidth:g} Hz 超过奈奎斯特频率 {self.nyquist:g} Hz")
+        bands = [(float(start), float(start + bandwidth)) for start in starts]
+        scores = self.band_sweep(bands)
+        best = int(np.nanargmax(np.nansum(scores, axis=0)))
+        return bands[best], scores[:, best]
+
+    def shaft_revolutions(self, shaft_hz: ShaftSpeed) -> np.ndarray:
+        """各采样时刻轴已转过的圈数; shaft_hz 为常数或与采样 (网格或原始时间) 等长的转速序列 (Hz)"""
+        speed = np.asarray(shaft_hz, dtype=float)
+        t = self.timestamps - self.timestamps[0]
+        if speed.ndim == 0:
+            if speed <= 0:
+                raise ValueError("转速必须大于 0")
+            return speed * t
+        if speed.shape != t.shape and speed.shape == self.source_timestamps.shape:
+            speed = np.interp(self.timestamps, self.source_timestamps, speed)
+        if speed.shape != t.shape:
+            raise ValueError("转速序列与采样长度不一致")
+        speed = np.clip(np.nan_to_num(speed), 0.0, None)
+        # 梯形积分
+        return np.concatenate(([0.0], np.cumsum((speed[1:] + speed[:-1]) * 0.5 * np.diff(t))))
+
+    def _resample(self, shaft_hz: ShaftSpeed, samples_per_rev: int) -> np.ndarray:
+        revolutions = self.shaft_revolutions(shaft_hz)
+        total = revolutions[-1]
+        if total * samples_per_rev < 4:
+            raise ValueError(f"数据只覆盖 {total:.2f} 转, 无法做阶次分析")
+        grid = np.arange(int(total * samples_per_rev)) / samples_per_rev
+        # 线性插值, 权重对所有轴共用 (np.interp 不支持二维)
+        right = np.clip(np.searchsorted(revolutions, grid, side='right'), 1, self.n - 1)
+        left = right - 1
+        span = revolutions[right] - revolutions[left]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            weight = np.where(span > 0, (grid - revolutions[left]) / span, 0.0)
+        weight = np.clip(weight, 0.0, 1.0)
+        return self.data[:, left] * (1 - weight) + self.data[:, right] * weight
+
+    def resampled(self, shaft_hz: ShaftSpeed, samples_per_rev: int = 32) -> np.ndarray:
+        """等转角重采样后的信号, 形状 (轴数, 圈数 x samples_per_rev)"""
+        speed = np.asarray(shaft_hz, dtype=float)
+        key = (speed.shape, float(speed) if speed.ndim == 0 else hash(speed.tobytes()), int(samples_per_rev))
+        return self._cached(self._resampled, key, lambda: self._resample(speed, int(samples_per_rev)))
+
+    def order_spectrum(self, shaft_hz: ShaftSpeed, samples_per_rev: int = 32) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        阶次谱 (阶次, 形状 (轴数, m) 的幅度)
+
+        可分析的最高阶次为 samples_per_rev / 2; 等转角采样间隔不应明显小于原始采样间隔,
+        即 samples_per_rev x 最高转速 不宜超过采样率。
+        """
+        signal = self.resampled(shaft_hz, samples_per_rev)
+        m = signal.shape[-1]
+        size = next_fast_len(m, real=True)  # 圈数任意, 补零到快速 FFT 长度
+        amplitude = np.abs(rfft(signal, n=size, axis=-1)) * (2.0 / m)
+        return rfftfreq(size, 1.0 / samples_per_rev), amplitude
@@ -9,5 +9,12 @@ class DeviceConnectionError(VibrationMonitorError):
 class DataAcquisitionError(VibrationMonitorError):
     """数据采集错误"""
     pass
-# 可以根据需要添加更多自定义异常
 
+class TransportError(VibrationMonitorError):
+    """传输层 (串口/TCP) 读写错误"""
+    pass
+
+class ProtocolError(VibrationMonitorError):
+    """远程采集报文格式错误"""
+    pass
+# 可以根据需要添加更多自定义异常
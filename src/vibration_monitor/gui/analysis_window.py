@@ -1,17 +1,43 @@
 from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                           QLabel, QTabWidget, QComboBox, QPushButton,
                           QMessageBox, QDoubleSpinBox, QFormLayout, QLineEdit,
-                          QTableWidget, QTableWidgetItem, QDialog, QDialogButtonBox)
+                          QTableWidget, QTableWidgetItem, QDialog, QDialogButtonBox,
+                          QCheckBox, QProgressBar)
+from PyQt5.QtCore import Qt, QTimer
 import pyqtgraph as pg
 import numpy as np
-from scipy.fft import fft, fftfreq
-from scipy.signal import find_peaks, butter, filtfilt, iirnotch
-from typing import Dict, List, Optional, Union
+from typing import Dict, List, Optional, Tuple, Union
+from .. import analysis_pipeline, data_analysis, diagnostics
+from ..channels import KEY_COLUMNS, MONITORED_CHANNELS, ChannelId
+from ..config import get_config
+from ..history_store import HistoryStore
 from ..utils.logger import setup_logger
+from .task_runner import TaskRunner
 
 
 logger = setup_logger(__name__)
 
+# FFT 选项卡的去趋势方式和窗函数 (显示名 -> 流水线参数)
+DETREND_OPTIONS = {'不去趋势': 'none', '去均值': 'constant', '去线性趋势': 'linear'}
+WINDOW_OPTIONS = {'矩形窗': 'boxcar', '汉宁窗': 'hann', '汉明窗': 'hamming', '平顶窗': 'flattop'}
+
+# 滤波和下料分析不包括温度
+VIBRATION_CHANNELS = tuple(channel for channel in MONITORED_CHANNELS if channel is not ChannelId.TEMPERATURE)
+# 诊断分析的物理量 (显示名取自 X 轴通道) 及其 X/Y/Z 三个轴
+DIAGNOSTIC_AXES = ((ChannelId.ACCEL_X, ChannelId.ACCEL_Y, ChannelId.ACCEL_Z),
+                   (ChannelId.SPEED_X, ChannelId.SPEED_Y, ChannelId.SPEED_Z),
+                   (ChannelId.DISP_X, ChannelId.DISP_Y, ChannelId.DISP_Z))
+# 可作为转频估计的频率通道
+SPEED_CHANNELS = (ChannelId.FREQ_X, ChannelId.FREQ_Y, ChannelId.FREQ_Z)
+
+
+def channel_combo(channels=MONITORED_CHANNELS) -> QComboBox:
+    """通道选择框: 显示名取自通道登记表, 选项数据为 ChannelId (派生通道为其名称)"""
+    combo = QComboBox()
+    for channel in channels:
+        combo.addItem(channel.label, channel)
+    return combo
+
 
 class ThresholdDialog(QDialog):
     """阈值设置对话框"""
@@ -51,19 +77,29 @@ class AnalysisWindow(QMainWindow):
         super().__init__(parent)
         self.setWindowTitle("高级数据分析")
         self.setGeometry(200, 200, 1200, 800)  # 调整窗口大小
-        self.main_data_cache: Dict[str, Union[List[float], List[int]]] = {}  # 用于接收主窗口数据, 明确类型
-        self.thresholds = {
-                'threshold1': 20,    # 初始 -> 快速下料 (振动幅度)
-                'threshold2': 10,    # 初始 -> 快速下料 (振动速度)
-                'threshold3': 5,     # 快速下料 - > 慢速下料
-                'threshold4': -2,   #快速下料 -> 慢速下料 (振动速度变化率)
-                "threshold5" : 50,   # 慢速下料 -> 停止 (估计剩余重量)
-                'threshold6': 2,     # 停止下料 -> 稳定 (振动幅度)
-                'threshold7': 1,      # 停止下料 -> 稳定  (振动幅度)
-                'threshold8': 5,   #补料判断
-                'threshold9': 2, #补料判断
-            }
+        self.history: Optional[HistoryStore] = None  # 主窗口的历史缓冲 (共享, 不复制)
+        self.main_data_cache: Dict[str, np.ndarray] = {}  # 未使用历史缓冲时, 由 receive_data_from_main 传入的数据
+        self._refreshing = False  # 实时刷新中: 数据不足等提示只记日志, 不弹窗
+        self._refreshed_version = None
+        self.thresholds = dict(data_analysis.DEFAULT_FEEDING_THRESHOLDS)
+        self.bearings = diagnostics.bearing_table(get_config())
+        # 诊断分析的中间结果按 (物理量, 数据版本) 缓存, 只改变频带、转速等参数时不重新计算 FFT
+        self._diagnostic_analyzer: Optional[diagnostics.DiagnosticAnalyzer] = None
+        self._diagnostic_key = None
+        self._diagnostic_markers = []
+        # FFT / 特征 / 滤波 / 下料分析共用一条流水线: 各步骤结果按数据和参数缓存, 选项卡之间共享 (如滤波结果)
+        self.pipeline = analysis_pipeline.default_pipeline()
+        # 上述分析在后台线程中计算, 界面不会卡住; 同一选项卡只保留最新的请求
+        self.task_runner = TaskRunner(self)
         self.init_ui()
+        self.task_runner.progress.connect(self._on_task_progress)
+        self.task_runner.busy_changed.connect(self._on_task_busy)
+        self._cancel_on_change('fft', [self.param_combo, self.detrend_combo, self.window_combo,
+                                       self.fft_filtered_check])
+        self._cancel_on_change('features', [self.feature_param_combo])
+        self._cancel_on_change('filter', [self.filter_param_combo, self.filter_type_combo, self.cutoff_freq_edit,
+                                          self.cutoff_freq2_edit, self.filter_order_edit])
+        self._cancel_on_change('feeding', [self.feeding_param_combo, self.target_weight_edit, self.tolerance_edit])
 
 
     def init_ui(self):
@@ -72,6 +108,27 @@ class AnalysisWindow(QMainWindow):
         self.setCentralWidget(central_widget)
         main_layout = QVBoxLayout(central_widget)
 
+        # 实时刷新: 历史数据有更新时重新执行当前选项卡的分析
+        refresh_layout = QHBoxLayout()
+        self.live_refresh_check = QCheckBox("实时刷新")
+        self.live_refresh_check.toggled.connect(self.set_live_refresh)
+        refresh_layout.addWidget(self.live_refresh_check)
+        refresh_layout.addStretch()
+        # 后台计算进度
+        self.task_label = QLabel("")
+        refresh_layout.addWidget(self.task_label)
+        self.task_progress = QProgressBar()
+        self.task_progress.setFixedWidth(160)
+        self.task_progress.setVisible(False)
+        refresh_layout.addWidget(self.task_progress)
+        self.cancel_task_button = QPushButton("取消计算")
+        self.cancel_task_button.setVisible(False)
+        self.cancel_task_button.clicked.connect(lambda: self.task_runner.cancel())
+        refresh_layout.addWidget(self.cancel_task_button)
+        main_layout.addLayout(refresh_layout)
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.timeout.connect(self.refresh_current_tab)
+
         self.tab_widget = QTabWidget()
         main_layout.addWidget(self.tab_widget)
 
@@ -100,6 +157,11 @@ class AnalysisWindow(QMainWindow):
         self.tab_widget.addTab(self.feeding_tab, "下料分析")
         self.setup_feeding_tab()
 
+        # 诊断分析选项卡 (包络谱 / 阶次谱)
+        self.diagnostic_tab = QWidget()
+        self.tab_widget.addTab(self.diagnostic_tab, "诊断分析")
+        self.setup_diagnostic_tab()
+
 
 
     def setup_fft_tab(self):
@@ -111,17 +173,21 @@ class AnalysisWindow(QMainWindow):
 
         param_layout = QFormLayout()  # 使用 QFormLayout
         param_label = QLabel("选择参数:")
-        self.param_combo = QComboBox()
-        self.param_combo.addItems([
-            '加速度X', '加速度Y', '加速度Z',
-            '速度X', '速度Y', '速度Z',
-            '位移X', '位移Y', '位移Z',
-            '频率X', '频率Y', '频率Z',
-            '温度'
-        ])
+        self.param_combo = channel_combo()
         param_layout.addRow(param_label, self.param_combo)
         control_layout.addLayout(param_layout)
 
+        spectrum_layout = QFormLayout()
+        self.detrend_combo = QComboBox()
+        self.detrend_combo.addItems(list(DETREND_OPTIONS))
+        spectrum_layout.addRow(QLabel("去趋势:"), self.detrend_combo)
+        self.window_combo = QComboBox()
+        self.window_combo.addItems(list(WINDOW_OPTIONS))
+        spectrum_layout.addRow(QLabel("窗函数:"), self.window_combo)
+        self.fft_filtered_check = QCheckBox("使用滤波结果")  # 滤波选项卡中最近一次应用的滤波器
+        spectrum_layout.addRow(self.fft_filtered_check)
+        control_layout.addLayout(spectrum_layout)
+
         fft_layout.addLayout(control_layout)  # 将控制布局添加到主布局
 
         # FFT 图表
@@ -148,14 +214,7 @@ class AnalysisWindow(QMainWindow):
 
         param_layout = QFormLayout()
         param_label = QLabel("选择参数:")
-        self.feature_param_combo = QComboBox()  # 用于特征提取的参数选择
-        self.feature_param_combo.addItems([
-            '加速度X', '加速度Y', '加速度Z',
-            '速度X', '速度Y', '速度Z',
-            '位移X', '位移Y', '位移Z',
-            '频率X', '频率Y', '频率Z',
-            '温度'  # 如果需要，也可以对温度进行特征提取
-        ])
+        self.feature_param_combo = channel_combo()  # 用于特征提取的参数选择
         param_layout.addRow(param_label, self.feature_param_combo)
         control_layout.addLayout(param_layout)
 
@@ -181,14 +240,7 @@ class AnalysisWindow(QMainWindow):
 
         param_layout = QFormLayout()
         param_label = QLabel("选择参数:")
-        self.filter_param_combo = QComboBox()  # 用于滤波的参数选择
-        self.filter_param_combo.addItems([
-            '加速度X', '加速度Y', '加速度Z',
-            '速度X', '速度Y', '速度Z',
-            '位移X', '位移Y', '位移Z',
-            '频率X', '频率Y', '频率Z',
-            # '温度'  # 温度通常不需要滤波
-        ])
+        self.filter_param_combo = channel_combo(VIBRATION_CHANNELS)  # 用于滤波的参数选择
         param_layout.addRow(param_label, self.filter_param_combo)
 
         filter_type_label = QLabel("滤波器类型:")
@@ -254,14 +306,7 @@ class AnalysisWindow(QMainWindow):
 
         param_layout = QFormLayout()
         param_label = QLabel("选择参数:")
-        self.feeding_param_combo = QComboBox()
-        self.feeding_param_combo.addItems([
-            '加速度X', '加速度Y', '加速度Z',
-            '速度X', '速度Y', '速度Z',
-            '位移X', '位移Y', '位移Z',
-            '频率X', '频率Y', '频率Z',
-            # '温度' # 如果需要，也可以分析温度
-        ])
+        self.feeding_param_combo = channel_combo(VIBRATION_CHANNELS)
         param_layout.addRow(param_label, self.feeding_param_combo)
 
         # 目标重量
@@ -311,6 +356,88 @@ class AnalysisWindow(QMainWindow):
         feeding_layout.addWidget(analyze_button)
 
 
+    def setup_diagnostic_tab(self):
+        """设置诊断分析选项卡的布局"""
+        diagnostic_layout = QVBoxLayout(self.diagnostic_tab)
+
+        control_layout = QHBoxLayout()
+
+        param_layout = QFormLayout()
+        self.diag_quantity_combo = QComboBox()  # 同时分析 X/Y/Z 三个轴
+        for axes in DIAGNOSTIC_AXES:
+            self.diag_quantity_combo.addItem(axes[0].label[:-1], axes)
+        param_layout.addRow(QLabel("物理量:"), self.diag_quantity_combo)
+
+        self.diag_mode_combo = QComboBox()
+        self.diag_mode_combo.addItems(['包络谱', '阶次谱'])
+        param_layout.addRow(QLabel("分析类型:"), self.diag_mode_combo)
+
+        self.bearing_combo = QComboBox()
+        self.bearing_combo.addItems(sorted(self.bearings))
+        param_layout.addRow(QLabel("轴承型号:"), self.bearing_combo)
+        control_layout.addLayout(param_layout)
+
+        # 解调频带
+        band_layout = QFormLayout()
+        self.band_low_edit = QDoubleSpinBox()
+        self.band_low_edit.setDecimals(1)
+        self.band_low_edit.setRange(0, 100000)
+        self.band_low_edit.setValue(5)
+        band_layout.addRow(QLabel("频带下限 (Hz):"), self.band_low_edit)
+
+        self.band_high_edit = QDoubleSpinBox()
+        self.band_high_edit.setDecimals(1)
+        self.band_high_edit.setRange(0.1, 100000)
+        self.band_high_edit.setValue(50)
+        band_layout.addRow(QLabel("频带上限 (Hz):"), self.band_high_edit)
+        control_layout.addLayout(band_layout)
+
+        # 转速
+        speed_layout = QFormLayout()
+        self.speed_source_combo = QComboBox()  # 频率通道可作为转频的估计
+        self.speed_source_combo.addItem('固定转速', None)
+        for channel in SPEED_CHANNELS:
+            self.speed_source_combo.addItem(channel.label, channel)
+        speed_layout.addRow(QLabel("转速来源:"), self.speed_source_combo)
+
+        self.rpm_edit = QDoubleSpinBox()
+        self.rpm_edit.setDecimals(0)
+        self.rpm_edit.setRange(1, 100000)
+        self.rpm_edit.setValue(1500)
+        speed_layout.addRow(QLabel("转速 (rpm):"), self.rpm_edit)
+
+        self.samples_per_rev_edit = QDoubleSpinBox()
+        self.samples_per_rev_edit.setDecimals(0)
+        self.samples_per_rev_edit.setRange(4, 1024)
+        self.samples_per_rev_edit.setValue(32)
+        speed_layout.addRow(QLabel("每转采样点:"), self.samples_per_rev_edit)
+        control_layout.addLayout(speed_layout)
+
+        diagnostic_layout.addLayout(control_layout)
+
+        # 三轴频谱图, 轴承故障特征频率用竖线标注
+        self.diagnostic_plot = pg.PlotWidget()
+        self.diagnostic_plot.setBackground('w')
+        self.diagnostic_plot.showGrid(x=True, y=True, alpha=0.3)
+        self.diagnostic_plot.setLabel('left', "幅度")
+        self.diagnostic_plot.setLabel('bottom', "频率", units='Hz')
+        self.diagnostic_plot.addLegend()
+        self.diagnostic_curves = [self.diagnostic_plot.plot(pen=pg.mkPen(color, width=2), name=axis)
+                                  for color, axis in zip(('r', 'g', 'b'), ('X', 'Y', 'Z'))]
+        diagnostic_layout.addWidget(self.diagnostic_plot)
+
+        self.diagnostic_info_label = QLabel("故障特征频率:  -")
+        diagnostic_layout.addWidget(self.diagnostic_info_label)
+
+        button_layout = QHBoxLayout()
+        analyze_button = QPushButton("诊断分析")
+        analyze_button.clicked.connect(self.perform_diagnostics)
+        button_layout.addWidget(analyze_button)
+        auto_band_button = QPushButton("自动选择频带")  # 按包络峭度扫描解调频带
+        auto_band_button.clicked.connect(self.auto_select_band)
+        button_layout.addWidget(auto_band_button)
+        diagnostic_layout.addLayout(button_layout)
+
     def update_filter_ui(self):
         """根据选择的滤波器类型更新界面"""
         filter_type = self.filter_type_combo.currentText()
@@ -327,158 +454,156 @@ class AnalysisWindow(QMainWindow):
             self.cutoff_freq_label.setText("截止频率 (Hz):")
 
     def apply_filter(self):
-      """应用滤波器"""
-      selected_param = self.filter_param_combo.currentText()
-      filter_type = self.filter_type_combo.currentText()
-      order = int(self.filter_order_edit.value())
-      if filter_type in ('带通','带阻'):
-          cutoff_freq = [self.cutoff_freq_edit.value(),self.cutoff_freq2_edit.value()]
-      else:
-          cutoff_freq = self.cutoff_freq_edit.value()  # 获取截止频率
-
-      time_data = self.main_data_cache.get('timestamps')
-      series_data = self.main_data_cache.get(selected_param)
-
-      if (not time_data or not series_data) :
-          QMessageBox.warning(self, "警告", "数据不足，无法滤波")
-          return
-
-      # 计算采样率
-      fs = 1 / (time_data[1] - time_data[0])  # 假设时间戳是等间距的
-      if (len(time_data) != len(series_data)):
-          QMessageBox.warning(self,"警告","时间数据与信号数据长度不一致")
-           # 可以截断较长的列表，或者填充较短的列表，这里选择截断
-          min_len = min(len(time_data),len(series_data))
-          time_data = time_data[:min_len]
-          series_data = series_data[:min_len]
-          logger.warning("时间数据与选择的信号数据长度不一致,已自动截断")
-
-      # 归一化频率
-      if isinstance(cutoff_freq,list): #带通，带阻
-          nyquist = 0.5 * fs
-          normalized_cutoff = [f / nyquist for f in cutoff_freq]
-      else: #低通，高通
-          normalized_cutoff = cutoff_freq / (0.5 * fs)
-
-      try:
-          # 设计滤波器
-        if filter_type == '低通':
-            b, a = butter(order, normalized_cutoff, btype='low', analog=False)
-        elif filter_type == '高通':
-            b, a = butter(order, normalized_cutoff, btype='high', analog=False)
-        elif filter_type == '带通':
-            b, a = butter(order, normalized_cutoff, btype='band', analog=False)
-        elif filter_type == '带阻':
-              # 带阻滤波器使用 iirnotch
-              w0 = cutoff_freq / (0.5 * fs)  # 中心频率
-              if isinstance(w0,list):
-                  w0 = w0[0] #取第一个中心频率
-              bw = (cutoff_freq[1]-cutoff_freq[0])/(0.5*fs)  # 带宽
-              Q = w0 / bw  # 品质因数.  中心/带宽
-              b, a = iirnotch(w0, Q)
-
-          # 应用滤波器
-        filtered_data = filtfilt(b, a, series_data)
-
-          # 更新绘图
-        self.original_curve.setData(time_data, series_data)
-        self.filtered_curve.setData(time_data, filtered_data)
-        self.original_curve.getViewBox().autoRange()
-        self.filtered_curve.getViewBox().autoRange()
-
-      except Exception as e:
-          logger.exception(f"滤波时发生错误: {e}")
-          QMessageBox.critical(self, "错误", f"滤波失败: {e}")
-    def extract_features(self):
-        """提取特征"""
-        selected_param = self.feature_param_combo.currentText()
-        series_data = self.main_data_cache.get(selected_param)
+        """应用滤波器 (后台计算)"""
+        selected_param = self.filter_param_combo.currentData()
+        filter_type = self.filter_type_combo.currentText()
+        order = int(self.filter_order_edit.value())
+        if filter_type in ('带通', '带阻'):
+            cutoff_freq = [self.cutoff_freq_edit.value(), self.cutoff_freq2_edit.value()]
+        else:
+            cutoff_freq = self.cutoff_freq_edit.value()  # 获取截止频率
 
-        if not series_data:
-            QMessageBox.warning(self, "警告", "没有数据可供分析")
+        signal, key = self._signal(selected_param)
+        time_data, series_data = signal
+        if len(series_data) < 2:
+            self._warn("数据不足，无法滤波")
             return
-        if len(series_data) == 0:
-            QMessageBox.warning(self, "警告", "没有可用数据")
+
+        def show(filtered_data):
+            # 更新绘图
+            self.original_curve.setData(time_data, series_data)
+            self.filtered_curve.setData(time_data, filtered_data)
+            self.original_curve.getViewBox().autoRange()
+            self.filtered_curve.getViewBox().autoRange()
+
+        # 设计并应用滤波器 (流水线 filter 步骤, FFT 选项卡可直接使用其结果)
+        self._run_analysis('filter', "滤波", signal, key, 'filtered_signal', show,
+                           {'filter': dict(filter_type=filter_type, cutoff=cutoff_freq, order=order)})
+
+    def extract_features(self):
+        """提取特征 (后台计算)"""
+        selected_param = self.feature_param_combo.currentData()
+        signal, key = self._signal(selected_param)
+
+        if len(signal[1]) == 0:
+            self._warn("没有数据可供分析")
             return
-        try:
-            # 特征提取
-            features = {}
-            features['均值'] = np.mean(series_data)
-            features['方差'] = np.var(series_data)
-            features['标准差'] = np.std(series_data)
-            features['均方根'] = np.sqrt(np.mean(np.square(series_data)))
-            features['峰值'] = np.max(np.abs(series_data))  # 峰值 (绝对值的最大值)
-            features['峰峰值'] = np.max(series_data) - np.min(series_data)
-            features['峭度'] = (
-                np.sum((series_data - features['均值']) ** 4) / len(series_data)
-            ) / (features['标准差'] ** 4)
-            features['偏度'] = (
-                np.sum((series_data - features['均值']) ** 3) / len(series_data)
-            ) / (features['标准差'] ** 3)
-
-
-            # 查找峰值 (使用 scipy.signal.find_peaks)
-            peaks, _ = find_peaks(np.abs(series_data))  # 只在正值中查找峰值
-            if(len(peaks) > 0):
-                features['峰值数量'] = len(peaks)
-                features['平均峰值间距'] = np.mean(np.diff(peaks)) if len(peaks) > 1 else 0 #平均峰值间距
-            else:
-                 features['峰值数量'] = 0
-                 features['平均峰值间距'] = 0
 
+        def show(features):
             # 更新表格
             self.feature_table.setRowCount(len(features))
             for row, (feature_name, feature_value) in enumerate(features.items()):
                 self.feature_table.setItem(row, 0, QTableWidgetItem(feature_name))
                 self.feature_table.setItem(row, 1, QTableWidgetItem(f"{feature_value:.4f}"))
 
-        except Exception as e:
-            logger.exception(f"特征提取时发生错误: {e}")
-            QMessageBox.critical(self, "错误", f"特征提取失败: {e}")
+        self._run_analysis('features', "特征提取", signal, key, 'features', show)
 
     def perform_fft(self):
-        """执行 FFT 分析"""
-        selected_param = self.param_combo.currentText()
-        logger.debug(f"执行FFT,当前选择: {selected_param}")
-        # 检查是否有所需数据
-        if selected_param not in self.main_data_cache:
-            QMessageBox.warning(self, "警告", "没有选择数据！")
-            return
-
-        time_data = self.main_data_cache.get("timestamps")
-        series_data = self.main_data_cache.get(selected_param)
-
-        if not time_data or not series_data:
-            QMessageBox.warning(self, "警告", "数据不足！")
+        """执行 FFT 分析 (后台计算)"""
+        selected_param = self.param_combo.currentData()
+        logger.debug(f"执行FFT,当前选择: {self.param_combo.currentText()}")
+        signal, key = self._signal(selected_param)
+        if len(signal[1]) < 2:
+            self._warn("数据不足！")
             return
 
-        # 进行FFT
-        N = len(series_data)
-        if N == 0:
-             QMessageBox.warning(self, "警告", "没有可用数据")
-             return
-        if(len(time_data) != len(series_data)):
-             QMessageBox.warning(self,"警告","时间数据与信号数据长度不一致")
-              # 可以截断较长的列表，或者填充较短的列表，这里选择截断
-             min_len = min(len(time_data),len(series_data))
-             time_data = time_data[:min_len]
-             series_data = series_data[:min_len]
-             logger.warning("时间数据与选择的信号数据长度不一致,已自动截断")
-        try:
-            yf = fft(series_data)
-            xf = fftfreq(N, time_data[1] - time_data[0])  
-
-            # 只取正频率
-            xf_pos = xf[:N // 2]
-            yf_pos = np.abs(yf[0:N // 2])
+        def show(spectrum):
+            xf_pos, yf_pos = spectrum
             self.fft_curve.setData(xf_pos, yf_pos)
             #自动缩放,调整坐标轴
             self.fft_curve.getViewBox().autoRange()
 
+        # 只取正频率; 只改变窗函数等参数时重采样、滤波等上游步骤取缓存
+        prefix = 'filtered_' if self.fft_filtered_check.isChecked() else ''
+        params = {prefix + 'detrend': dict(mode=DETREND_OPTIONS[self.detrend_combo.currentText()]),
+                  prefix + 'window': dict(window=WINDOW_OPTIONS[self.window_combo.currentText()])}
+        self._run_analysis('fft', "FFT 计算", signal, key, prefix + 'spectrum', show, params)
+
+
+    def get_diagnostic_analyzer(self) -> diagnostics.DiagnosticAnalyzer:
+        """当前物理量三个轴的诊断分析器, 数据未变化时复用 (包括已缓存的频谱和包络)"""
+        axes = self.diag_quantity_combo.currentData()
+        version = self.history.version if self.history is not None else id(self.main_data_cache)
+        key = (axes, version)
+        if self._diagnostic_key != key:
+            time_data = self.get_series(axes[0])[0]
+            values = np.vstack([self.get_series(channel)[1] for channel in axes])
+            self._diagnostic_analyzer = diagnostics.DiagnosticAnalyzer(time_data, values)
+            self._diagnostic_key = key
+        return self._diagnostic_analyzer
+
+    def _shaft_speed(self, analyzer: diagnostics.DiagnosticAnalyzer):
+        """转频 (Hz): 固定转速时为常数, 否则为所选频率通道的序列"""
+        source = self.speed_source_combo.currentData()
+        if source is None:
+            return self.rpm_edit.value() / 60.0
+        speed = self.get_series(source)[1]
+        if len(speed) != len(analyzer.source_timestamps):
+            raise ValueError(f"{source.label} 与振动数据长度不一致")
+        return np.asarray(speed, dtype=float)
+
+    def perform_diagnostics(self):
+        """执行包络谱或阶次谱分析, 并标注所选轴承的故障特征频率"""
+        try:
+            analyzer = self.get_diagnostic_analyzer()
+        except ValueError as e:
+            self._warn(f"无法进行诊断分析: {e}")
+            return
+        try:
+            bearing = self.bearings[self.bearing_combo.currentText()]
+            speed = self._shaft_speed(analyzer)
+            shaft_hz = float(np.nanmean(speed))
+            if self.diag_mode_combo.currentText() == '包络谱':
+                band = (self.band_low_edit.value(), self.band_high_edit.value())
+                x, amplitude = analyzer.envelope_spectrum(band)
+                markers = diagnostics.defect_markers(bearing, shaft_hz)
+                self.diagnostic_plot.setLabel('bottom', "频率", units='Hz')
+            else:
+                x, amplitude = analyzer.order_spectrum(speed, int(self.samples_per_rev_edit.value()))
+                markers = diagnostics.defect_markers(bearing)  # 阶次谱上的位置即阶次
+                self.diagnostic_plot.setLabel('bottom', "阶次", units='')
+            for curve, row in zip(self.diagnostic_curves, amplitude):
+                curve.setData(x, row)
+            self._set_diagnostic_markers(markers)
+            self.diagnostic_plot.getViewBox().autoRange()
+            frequencies = diagnostics.defect_frequencies(bearing, shaft_hz)
+            info = f"采样率 {analyzer.fs:.1f} Hz  转频 {shaft_hz:.2f} Hz  " + "  ".join(
+                f"{name} {value:.2f} Hz" for name, value in frequencies.items())
+            if analyzer.gaps:
+                info += f"  (数据间断 {analyzer.gaps} 点, 已插值)"
+            self.diagnostic_info_label.setText(info)
         except Exception as e:
-            logger.exception(f"FFT计算错误: {e}")
-            QMessageBox.critical(self, "错误", "FFT 计算失败！")
+            self._error("诊断分析失败", e)
 
+    def auto_select_band(self):
+        """以当前频带宽度扫描全部频带, 选择包络峭度最大的频带后做包络谱分析"""
+        try:
+            analyzer = self.get_diagnostic_analyzer()
+            bandwidth = self.band_high_edit.value() - self.band_low_edit.value()
+            if bandwidth <= 0:
+                self._warn("频带上限必须大于下限")
+                return
+            (low, high), scores = analyzer.best_band(bandwidth)
+        except ValueError as e:
+            self._warn(f"无法选择频带: {e}")
+            return
+        logger.debug(f"自动选择频带 {low:g}-{high:g} Hz, 峭度 {scores}")
+        self.band_low_edit.setValue(low)
+        self.band_high_edit.setValue(high)
+        self.diag_mode_combo.setCurrentText('包络谱')
+        self.perform_diagnostics()
+
+    def _set_diagnostic_markers(self, markers: List[Tuple[str, float]]):
+        for line in self._diagnostic_markers:
+            self.diagnostic_plot.removeItem(line)
+        colors = {'BPFO': 'm', 'BPFI': 'c', 'BSF': (255, 140, 0), 'FTF': 'k'}
+        self._diagnostic_markers = []
+        for label, position in markers:
+            color = colors[label.split('×')[-1]]
+            line = pg.InfiniteLine(pos=position, angle=90, pen=pg.mkPen(color, style=Qt.DashLine),
+                                   label=label, labelOpts={'position': 0.9, 'color': color})
+            self.diagnostic_plot.addItem(line, ignoreBounds=True)
+            self._diagnostic_markers.append(line)
 
     def open_threshold_dialog(self):
         """打开阈值设置对话框"""
@@ -492,105 +617,194 @@ class AnalysisWindow(QMainWindow):
 
 
     def perform_feeding_analysis(self):
-        """执行下料分析"""
-        selected_param = self.feeding_param_combo.currentText()
+        """执行下料分析 (后台计算)"""
+        selected_param = self.feeding_param_combo.currentData()
         target_weight = self.target_weight_edit.value()
         tolerance = self.tolerance_edit.value()
-        time_data = self.main_data_cache.get('timestamps')
-        series_data = self.main_data_cache.get(selected_param)
+        signal, key = self._signal(selected_param)
+        time_data, series_data = signal
         # 检查数据是否足够
-        if not time_data or not series_data:
-            QMessageBox.warning(self, "警告", "数据不足")
+        if len(series_data) == 0:
+            self._warn("没有可用数据")
             return
-        if len(time_data) == 0 or len(series_data) == 0:
-             QMessageBox.warning(self, "警告", "没有可用数据")
-             return
-
-        # 初始化状态机和阈值
-        state = "Initial"
-        # 存储状态序列，用于绘图
-        state_sequence = []
-
-        # 模拟实时数据处理（这里假设数据已经全部加载）
-        for i in range(len(time_data)):
-            # 提取当前数据点的特征
-            current_features = self.extract_feeding_features(series_data, i)
-
-            # 状态机逻辑
-            if state == "Initial":
-                if (current_features['振动幅度'] > self.thresholds['threshold1'] and
-                        current_features['振动速度'] > self.thresholds['threshold2']):
-                    state = "FastFeeding"
-            elif state == "FastFeeding":
-                if (current_features['振动幅度'] < self.thresholds['threshold3'] or
-                        current_features["振动速度变化率"] < self.thresholds['threshold4']):
-                    state = "SlowFeeding"
-            elif state == "SlowFeeding":
-              if current_features['估计剩余重量'] <  self.thresholds['threshold5']:
-                    state = "StopFeeding"
-            elif state == "StopFeeding":
-                if (current_features['振动幅度'] < self.thresholds['threshold6'] and
-                        current_features['振动速度'] < self.thresholds['threshold7']):
-                    state = "Stable"
-            elif state == "Stable":
-                if current_features['与目标重量偏差'] < -tolerance:
-                    state = "Dithering"
-            elif state == "Dithering":
-               if (current_features['振动幅度'] < self.thresholds['threshold8'] and
-                        current_features['振动速度'] < self.thresholds['threshold9']):
-                    state = "Stable"
-
-            state_sequence.append(self.state_to_number(state))  # 将状态转换为数字，方便绘图
+
+        def show(state_sequence):
+            state = data_analysis.FEEDING_STATES[state_sequence[-1]]
             self.state_label.setText(f"当前状态: {state}")  # 更新状态显示
 
-            #实时绘制波形
-            self.feeding_curve.setData(time_data[:i+1],series_data[:i+1])
-            self.feeding_state_curve.setData(time_data[:i+1],state_sequence)
+            self.feeding_curve.setData(time_data, series_data)
+            self.feeding_state_curve.setData(time_data, state_sequence)
              #自动缩放,调整坐标轴
             self.feeding_curve.getViewBox().autoRange()
             self.feeding_state_curve.getViewBox().autoRange()
 
+        # 状态机 (流水线 feeding_states 步骤), 数据已全部加载, 一次算出全部状态再绘图
+        self._run_analysis('feeding', "下料分析", signal, key, 'feeding_states', show,
+                           {'feeding_states': dict(target_weight=target_weight, tolerance=tolerance,
+                                                   thresholds=dict(self.thresholds))})
 
-    def extract_feeding_features(self, data, index):
-      """提取下料分析所需的特征 (单个数据点)
-          index: 当前数据点
-      """
-      # 这里只是一个示例，你需要根据实际情况实现特征提取
-      window_size = 10  # 滑动窗口大小,根据实际情况调整.
-
-      # 提取历史数据段
-      if index < window_size:
-          window_data = data[:index+1]
-      else:
-          window_data = data[index - window_size + 1:index+1]
-
-      features = {}
-      features['振动幅度'] = np.mean(np.abs(window_data))
-      features['振动速度'] = np.mean(np.diff(window_data)) if len(window_data) > 1 else 0  # 差分近似速度
-      features['振动速度变化率'] = np.mean(np.diff(np.diff(window_data))) if len(window_data) > 2 else 0
-
-      # 估计剩余重量 (非常简化的模型,实际需要一个经验公式)
-      features['估计剩余重量'] = (1 - (index / len(data))) *  self.target_weight_edit.value()  # 线性递减
-      # 与目标重量偏差
-      features["与目标重量偏差"] = features['估计剩余重量'] - self.target_weight_edit.value()
+    def state_to_number(self, state):
+        """将状态字符串转换为数字"""
+        return data_analysis.FEEDING_STATE_INDEX.get(state, -1)  # 如果状态未知，返回 -1
+
+
+    def set_history(self, history: HistoryStore):
+        """使用主窗口的历史缓冲作为数据源 (只读视图, 打开窗口不复制数据)"""
+        self.history = history
+        self.main_data_cache = {}
+        # 派生通道 (如速度合成) 与原始通道一样可供选择
+        for channel in history.channels:
+            if channel.key in KEY_COLUMNS:
+                continue
+            for combo in (self.param_combo, self.feature_param_combo, self.filter_param_combo,
+                          self.feeding_param_combo):
+                if combo.findData(channel.name) < 0:
+                    combo.addItem(channel.label, channel.name)
+        logger.debug(f"分析窗口使用共享历史缓冲: {len(history)} 个采样")
 
+    def receive_data_from_main(self, data_cache: Dict[str, List[float]]):
+        """
+        接收一份数据 ({'timestamps': [...], '加速度X': [...], ...}), 之后不再跟随历史缓冲
+
+        登记表中的通道 (标签、名称或数据键均可) 以 ChannelId 为键保存, 其余键 (如派生通道名称) 原样保存。
+        """
+        self.history = None
+        self.main_data_cache = {self._channel_key(key): np.asarray(values, dtype=float)
+                                for key, values in data_cache.items()}
+        logger.debug(f"接收到来自主窗口的数据: {len(data_cache)} 个键")
 
-      return features
+    @staticmethod
+    def _channel_key(key: str) -> Union[ChannelId, str]:
+        if key == 'timestamps':
+            return key
+        try:
+            return ChannelId.parse(key)
+        except KeyError:
+            return key
+
+    def get_series(self, channel: Union[ChannelId, str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        取某通道的 (时间, 数据), channel 为 ChannelId 或派生通道名称
+
+        使用历史缓冲时返回只读视图, 只在当前事件处理中使用 (主窗口下次写入后可能变化)。
+        """
+        if self.history is not None:
+            return self.history.timestamps(), self.history.series(channel)
+        time_data = self.main_data_cache.get('timestamps', np.empty(0))
+        series_data = self.main_data_cache.get(channel, np.empty(0))
+        if len(time_data) != len(series_data):
+            logger.warning("时间数据与选择的信号数据长度不一致,已自动截断")
+            n = min(len(time_data), len(series_data))
+            time_data, series_data = time_data[:n], series_data[:n]
+        return time_data, series_data
+
+    def _signal(self, channel: Union[ChannelId, str]) -> Tuple[Tuple[np.ndarray, np.ndarray], object]:
+        """
+        某通道数据的副本 (时间, 数据) 及其缓存键
+
+        复制后交给后台线程, 不受主窗口继续写入历史缓冲的影响; 历史缓冲以数据版本作为缓存键, 不必计算内容哈希。
+        """
+        time_data, series_data = self.get_series(channel)
+        signal = (np.array(time_data, dtype=float), np.array(series_data, dtype=float))
+        key = (id(self.history), self.history.version, channel) if self.history is not None else None
+        return signal, key
+
+    def _run_analysis(self, slot: str, title: str, signal, key, target: str, show, params=None):
+        """
+        在后台线程中计算流水线步骤 target, 完成后在界面线程中调用 show(结果)
+
+        流水线只在任务线程中访问 (数据源和参数也在任务中设置); 同一选项卡的新请求取代未完成的旧请求,
+        每个需要重新计算的步骤开始前检查是否已被取消。
+        """
+        quiet = self._refreshing
+        params = params or {}
+
+        def compute(token):
+            self.pipeline.set_source('signal', signal, key)
+            for stage, values in params.items():
+                self.pipeline.set_params(stage, **values)
+
+            def step(stage, done, total):
+                token.check()
+                token.report(f"{title}: {stage}", done / total if total else None)
+            return self.pipeline.compute(target, step)
+
+        def done(result):
+            try:
+                show(result)
+            except Exception as e:
+                self._error(f"{title}失败", e, quiet)
+
+        self.task_runner.submit(slot, compute, done, lambda e: self._error(f"{title}失败", e, quiet))
+
+    def _cancel_on_change(self, slot: str, widgets):
+        """参数控件变化时取消该选项卡未完成的计算 (结果已过时)"""
+        for widget in widgets:
+            if isinstance(widget, QComboBox):
+                widget.currentIndexChanged.connect(lambda *_: self.task_runner.cancel(slot))
+            elif isinstance(widget, QDoubleSpinBox):
+                widget.valueChanged.connect(lambda *_: self.task_runner.cancel(slot))
+            elif isinstance(widget, QCheckBox):
+                widget.toggled.connect(lambda *_: self.task_runner.cancel(slot))
+
+    def _on_task_progress(self, slot: str, text: str, fraction: float):
+        self.task_label.setText(text)
+        if fraction < 0:
+            self.task_progress.setRange(0, 0)  # 进度未知
+        else:
+            self.task_progress.setRange(0, 100)
+            self.task_progress.setValue(int(fraction * 100))
+
+    def _on_task_busy(self, busy: bool):
+        self.task_progress.setVisible(busy)
+        self.cancel_task_button.setVisible(busy)
+        if not busy:
+            self.task_label.setText("")
+        else:
+            self.task_progress.setRange(0, 0)
+
+    def closeEvent(self, event):
+        """关闭窗口时取消未完成的后台计算 (排队中的不再执行, 正在执行的在下一个检查点结束)"""
+        self.task_runner.shutdown()
+        super().closeEvent(event)
+
+    def set_live_refresh(self, enabled: bool, interval_ms: int = 500):
+        """开启/关闭实时刷新"""
+        if enabled:
+            self._refreshed_version = None
+            self.refresh_timer.start(interval_ms)
+        else:
+            self.refresh_timer.stop()
 
-    def state_to_number(self, state):
-        """将状态字符串转换为数字"""
-        state_mapping = {
-            "Initial": 0,
-            "FastFeeding": 1,
-            "SlowFeeding": 2,
-            "StopFeeding": 3,
-            "Stable": 4,
-            "Dithering": 5
+    def refresh_current_tab(self):
+        """历史数据有更新时重新执行当前选项卡的分析"""
+        if self.history is None or not self.isVisible() or self.history.version == self._refreshed_version:
+            return
+        self._refreshed_version = self.history.version
+        actions = {
+            self.fft_tab: self.perform_fft,
+            self.feature_tab: self.extract_features,
+            self.filter_tab: self.apply_filter,
+            self.feeding_tab: self.perform_feeding_analysis,
+            self.diagnostic_tab: self.perform_diagnostics,
         }
-        return state_mapping.get(state, -1)  # 如果状态未知，返回 -1
+        action = actions.get(self.tab_widget.currentWidget())
+        if action is None:
+            return
+        self._refreshing = True
+        try:
+            action()
+        finally:
+            self._refreshing = False
 
+    def _warn(self, message: str):
+        if self._refreshing:
+            logger.debug(f"实时刷新跳过: {message}")
+        else:
+            QMessageBox.warning(self, "警告", message)
 
-    def receive_data_from_main(self, data_cache: Dict[str, List[float]]):
-        """接收来自主窗口的数据"""
-        self.main_data_cache = data_cache
-        logger.debug(f"接收到来自主窗口的数据: {len(data_cache)} 个键")
+    def _error(self, title: str, error: Exception, quiet: Optional[bool] = None):
+        """记录并提示错误; quiet 默认取是否在实时刷新中 (后台任务按提交时的状态)"""
+        logger.error(f"{title}: {error}", exc_info=error)
+        if not (self._refreshing if quiet is None else quiet):
+            QMessageBox.critical(self, "错误", f"{title}: {error}")
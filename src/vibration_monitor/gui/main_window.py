@@ -1,26 +1,51 @@
 from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                              QLabel, QGridLayout, QGroupBox, QTableWidget,
-                             QTableWidgetItem, QPushButton, QMessageBox, QFileDialog)  # 添加 QFileDialog
-from PyQt5.QtCore import QTimer, Qt, QEvent
-from PyQt5.QtGui import QBrush, QColor
+                             QTableWidgetItem, QPushButton, QMessageBox, QFileDialog,  # 添加 QFileDialog
+                             QShortcut)
+from PyQt5.QtCore import QTimer, Qt, QEvent, QThread, pyqtSignal
+from PyQt5.QtGui import QBrush, QColor, QKeySequence
 import pyqtgraph as pg
 import numpy as np
 from datetime import datetime
 import csv  # 添加 csv 模块导入
-from ..device.device_model import DeviceModel  # 导入 DeviceModel 基类
-from ..data_recorder import DataRecorder #导入数据记录
-from ..utils.data_utils import safe_float
-from ..utils.signal import Signal
-from .analysis_window import AnalysisWindow #导入分析窗口
-from ..config import Config
+import os
+import threading
+import time
+from ..device.device_model import DeviceModel, sample_clock  # 导入 DeviceModel 基类
+from ..data_recorder import DataRecorder, derived_headers #导入数据记录
+from ..alarm_engine import AlarmEngine, AlarmLog  # 报警引擎
+from ..anomaly import AnomalyDetector
+from ..channels import CHANNEL_COLUMNS, CHANNELS, RECORD_KEYS
+from ..history_store import HistoryStore
+from ..severity import ZONE_UNKNOWN, SeverityEvaluator, zone_name
+from ..utils.metrics import metrics
+from .metrics_overlay import MetricsOverlay
+from .plot_render import RenderSettings, is_shown
+from ..config import get_config
 from ..utils.logger import setup_logger
 # 创建一个 logger 实例
 logger = setup_logger(__name__)
 
+class DeviceOpener(QThread):
+    """在后台线程中打开设备并启动采集, 避免串口/网络连接阻塞窗口绘制"""
+    failed = pyqtSignal(str)
+
+    def __init__(self, device: DeviceModel, parent=None):
+        super().__init__(parent)
+        self.device = device
+
+    def run(self):
+        try:
+            if not self.device.is_open:
+                self.device.open_device()
+            self.device.start_data_acquisition()
+        except Exception as e:
+            logger.exception(f"打开设备失败: {e}")
+            self.failed.emit(str(e))
+
+
 class VibrationMonitorWindow(QMainWindow):
     """主窗口类"""
-     # 自定义信号,用于向分析窗口传递数据
-    data_to_analysis = Signal(dict)
     def __init__(self, device: DeviceModel):
         """
         初始化主窗口
@@ -30,30 +55,26 @@ class VibrationMonitorWindow(QMainWindow):
         """
         super().__init__()
         self.device = device
-        self.config = Config()  # 加载配置
-
-        # 从配置文件读取阈值
-        self.thresholds = {
-            'accel_x': self.config.getfloat('Thresholds', 'accel_x', fallback=2.0),
-            'accel_y': self.config.getfloat('Thresholds', 'accel_y', fallback=2.0),
-            'accel_z': self.config.getfloat('Thresholds', 'accel_z', fallback=2.5),
-            'speed_x': self.config.getfloat('Thresholds', 'speed_x', fallback=20.0),
-            'speed_y': self.config.getfloat('Thresholds', 'speed_y', fallback=20.0),
-            'speed_z': self.config.getfloat('Thresholds', 'speed_z', fallback=25.0),
-            'disp_x': self.config.getfloat('Thresholds', 'disp_x', fallback=100.0),
-            'disp_y': self.config.getfloat('Thresholds', 'disp_y', fallback=100.0),
-            'disp_z': self.config.getfloat('Thresholds', 'disp_z', fallback=150.0),
-            'freq_x': self.config.getfloat('Thresholds', 'freq_x', fallback=55.0),
-            'freq_y': self.config.getfloat('Thresholds', 'freq_y', fallback=55.0),
-            'freq_z': self.config.getfloat('Thresholds', 'freq_z', fallback=65.0),
-            'temperature': self.config.getfloat('Thresholds', 'temperature', fallback=50.0)
-        }
+        self.config = get_config()  # 共享配置
 
         self.record_start_time = None  # 添加记录开始时间属性
         self.record_time_label = None  # 添加记录时间显示标签
         self.record_timer = QTimer()  # 添加计时器
         self.record_timer.timeout.connect(self.update_record_time)
         self.is_data_acquisition_active = True  # 数据采集状态标志
+        # 派生通道 (如三轴合成值) 由设备在解码时计算, 界面、报警和历史数据中与原始通道同等对待
+        self.derived = getattr(device, 'derived', None)
+        self.derived_channels = self.derived.as_channels() if self.derived is not None else ()
+        self.channels = CHANNELS + self.derived_channels
+        # self.channels 各通道在设备采样数组 (DeviceModel.record_keys) 中的列号, 派生通道已由设备算好
+        self.channel_columns = CHANNEL_COLUMNS if self.derived is None else \
+            np.concatenate([CHANNEL_COLUMNS, self.derived.columns])
+        channel_names = [channel.name for channel in self.channels]
+        # 运行指标
+        self._m_update_ns = metrics.histogram("gui.update_data_ns")
+        self._m_plots_ns = metrics.histogram("gui.update_plots_ns")
+        # 曲线绘制方式 ([Plot] render_mode, 见 plot_render.py)
+        self.render_settings = RenderSettings.from_config(self.config)
         self.init_ui() #界面
          # 数据更新定时器
         self.update_timer = QTimer()
@@ -62,34 +83,44 @@ class VibrationMonitorWindow(QMainWindow):
         self.update_timer.start(update_interval)
         # print(f"Debug: update_timer started: {self.update_timer.isActive()}")
         # 记录器
-        self.recorder = DataRecorder(self.device)
-        # 数据缓存
+        self.recorder = DataRecorder(
+            self.device,
+            flush_policy=self.config.get('Recording', 'flush_policy', fallback='row'),
+            flush_interval=self.config.getfloat('Recording', 'flush_interval', fallback=1.0))
+        # 报警引擎 (阈值来自 [Thresholds], 回差/持续时间/变化率来自 [Alarm]), 界面只显示其状态
+        alarm_log_file = self.config.get('Alarm', 'log_file', fallback='').strip() \
+            or os.path.join(self.recorder.data_dir, 'alarm_log.csv')
+        self.alarm_engine = AlarmEngine.from_config(self.config, [self.device.device_name],
+                                                    log=AlarmLog(alarm_log_file), channels=channel_names)
+        self.thresholds = self.alarm_engine.thresholds
+        # 振动烈度 (ISO 10816 滑动窗口 RMS 分区, 参数来自 [Severity])
+        self.severity = SeverityEvaluator.from_config(self.config, [self.device.device_name],
+                                                      source_channels=channel_names)
+        # 自适应基线异常评分 ([Anomaly]), 学到的基线定期保存, 重启后恢复
+        self.anomaly_detector = AnomalyDetector.from_config(self.config, [self.device.device_name],
+                                                            channels=channel_names)
+        self.anomaly_state_file = self.config.get('Anomaly', 'state_file', fallback='').strip() \
+            or os.path.join(self.recorder.data_dir, 'anomaly_state.npz')
+        self.anomaly_save_interval = self.config.getfloat('Anomaly', 'save_interval', fallback=60.0)
+        self._anomaly_saved_at = time.monotonic()
+        try:
+            self.anomaly_detector.load(self.anomaly_state_file)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"无法恢复异常检测基线 {self.anomaly_state_file}: {e}")
+        # 报警等评估在采集线程中逐个采样进行 (on_device_samples), 不受界面刷新间隔影响, 每个采样只评估一次;
+        # 界面清空、保存状态时持有同一把锁
+        self._evaluation_lock = threading.Lock()
+        self.device.add_listener(self.on_device_samples)
+        # 数据缓存: 13 个通道 (顺序同 channels.CHANNELS) 及派生通道的历史数据, 曲线、统计表和分析窗口共用
         self.data_length = self.config.getint('Data', 'data_length', fallback=500)
-        self.timestamps = []
-        # 加速度数据
-        self.accel_x = []
-        self.accel_y = []
-        self.accel_z = []
-        # 振动速度数据
-        self.vib_speed_x = []
-        self.vib_speed_y = []
-        self.vib_speed_z = []
-        # 振动位移数据
-        self.vib_disp_x = []
-        self.vib_disp_y = []
-        self.vib_disp_z = []
-        # 振动频率数据
-        self.vib_freq_x = []
-        self.vib_freq_y = []
-        self.vib_freq_z = []
-         # 温度数据
-        self.temperature_data = []
-        # 上次更新时间
-        self.last_timestamp = 0
-
-           # 创建高级分析窗口的实例
-        self.analysis_window = AnalysisWindow()
-        self.data_to_analysis.connect(self.analysis_window.receive_data_from_main)
+        self.history = HistoryStore(self.data_length, self.channels)
+        # 历史数据时间零点 (sample_clock), 以及上次刷新时设备的采样时间戳
+        self.time_origin = None
+        self.last_sample_time = None
+
+        # 高级分析窗口在首次打开时创建 (连同 scipy 一起延迟导入, 加快启动)
+        self.analysis_window = None
+        self._device_opener = None
 
     def init_ui(self):
         """初始化用户界面"""
@@ -151,9 +182,9 @@ class VibrationMonitorWindow(QMainWindow):
         disp_group = QGroupBox("振动位移")
         disp_layout = QVBoxLayout()
         self.disp_plot = self.create_plot_widget('', '位移', 'μm')
-        self.disp_x_curve = self.disp_plot.plot(pen=pg.mkPen('r', width=2), name='X轴')
-        self.disp_y_curve = self.disp_plot.plot(pen=pg.mkPen('g', width=2), name='Y轴')
-        self.disp_z_curve = self.disp_plot.plot(pen=pg.mkPen('b', width=2), name='Z轴')
+        self.disp_x_curve = self.disp_plot.plot(pen=self.render_settings.pen('r'), name='X轴')
+        self.disp_y_curve = self.disp_plot.plot(pen=self.render_settings.pen('g'), name='Y轴')
+        self.disp_z_curve = self.disp_plot.plot(pen=self.render_settings.pen('b'), name='Z轴')
         disp_layout.addWidget(self.disp_plot)
         disp_group.setLayout(disp_layout)
         grid_layout.addWidget(disp_group, 0, 0)
@@ -162,9 +193,9 @@ class VibrationMonitorWindow(QMainWindow):
         speed_group = QGroupBox("振动速度")
         speed_layout = QVBoxLayout()
         self.speed_plot = self.create_plot_widget('', '速度', 'mm/s')
-        self.speed_x_curve = self.speed_plot.plot(pen=pg.mkPen('r', width=2), name='X轴')
-        self.speed_y_curve = self.speed_plot.plot(pen=pg.mkPen('g', width=2), name='Y轴')
-        self.speed_z_curve = self.speed_plot.plot(pen=pg.mkPen('b', width=2), name='Z轴')
+        self.speed_x_curve = self.speed_plot.plot(pen=self.render_settings.pen('r'), name='X轴')
+        self.speed_y_curve = self.speed_plot.plot(pen=self.render_settings.pen('g'), name='Y轴')
+        self.speed_z_curve = self.speed_plot.plot(pen=self.render_settings.pen('b'), name='Z轴')
         speed_layout.addWidget(self.speed_plot)
         speed_group.setLayout(speed_layout)
         grid_layout.addWidget(speed_group, 0, 1)#
@@ -173,9 +204,9 @@ class VibrationMonitorWindow(QMainWindow):
         accel_group = QGroupBox("加速度")
         accel_layout = QVBoxLayout()
         self.accel_plot = self.create_plot_widget('', '加速度', 'g')  # 使用 'g' 作为单位
-        self.accel_x_curve = self.accel_plot.plot(pen=pg.mkPen('r', width=2), name='X轴')
-        self.accel_y_curve = self.accel_plot.plot(pen=pg.mkPen('g', width=2), name='Y轴')
-        self.accel_z_curve = self.accel_plot.plot(pen=pg.mkPen('b', width=2), name='Z轴')
+        self.accel_x_curve = self.accel_plot.plot(pen=self.render_settings.pen('r'), name='X轴')
+        self.accel_y_curve = self.accel_plot.plot(pen=self.render_settings.pen('g'), name='Y轴')
+        self.accel_z_curve = self.accel_plot.plot(pen=self.render_settings.pen('b'), name='Z轴')
         accel_layout.addWidget(self.accel_plot)
         accel_group.setLayout(accel_layout)
         grid_layout.addWidget(accel_group, 1, 0)  # 放置在原来的角度图位置
@@ -184,12 +215,28 @@ class VibrationMonitorWindow(QMainWindow):
         freq_group = QGroupBox("振动频率")
         freq_layout = QVBoxLayout()
         self.freq_plot = self.create_plot_widget('', '频率', 'Hz')
-        self.freq_x_curve = self.freq_plot.plot(pen=pg.mkPen('r', width=2), name='X轴')
-        self.freq_y_curve = self.freq_plot.plot(pen=pg.mkPen('g', width=2), name='Y轴')
-        self.freq_z_curve = self.freq_plot.plot(pen=pg.mkPen('b', width=2), name='Z轴')
+        self.freq_x_curve = self.freq_plot.plot(pen=self.render_settings.pen('r'), name='X轴')
+        self.freq_y_curve = self.freq_plot.plot(pen=self.render_settings.pen('g'), name='Y轴')
+        self.freq_z_curve = self.freq_plot.plot(pen=self.render_settings.pen('b'), name='Z轴')
         freq_layout.addWidget(self.freq_plot)
+        # 派生通道画在单位相同的图中 (虚线), 没有对应图的只在表格中显示
+        unit_plots = {'g': self.accel_plot, 'mm/s': self.speed_plot, 'μm': self.disp_plot, 'Hz': self.freq_plot}
+        self.derived_curves = []
+        for channel in self.derived_channels:
+            plot = unit_plots.get(channel.unit)
+            self.derived_curves.append(None if plot is None else plot.plot(
+                pen=self.render_settings.pen('k', Qt.DashLine), name=channel.label))
         freq_group.setLayout(freq_layout)
         grid_layout.addWidget(freq_group, 1, 1)
+        # 各图的曲线及其在历史数据中的行号 (顺序同 self.channels), 刷新时只更新显示中的图
+        plots = (self.accel_plot, self.speed_plot, self.disp_plot, self.freq_plot)  # 同 CHANNELS 的分组顺序
+        self._plot_curves = {plot: [] for plot in plots}
+        for row, curve in enumerate(self._channel_curves()):
+            self._plot_curves[plots[row // 3]].append((curve, row))
+        for i, (channel, curve) in enumerate(zip(self.derived_channels, self.derived_curves)):
+            if curve is not None:
+                self._plot_curves[unit_plots[channel.unit]].append((curve, len(CHANNELS) + i))
+        self._stale_plots = set()  # 未显示而跳过更新的图, 重新显示时补上
 
         # 添加到主布局
         main_layout.addLayout(grid_layout)
@@ -205,7 +252,7 @@ class VibrationMonitorWindow(QMainWindow):
         self.data_table.setMinimumWidth(1100)
         self.data_table.setColumnCount(7)
         self.data_table.setHorizontalHeaderLabels(['参数', 'X轴', 'Y轴', 'Z轴', '单位', '状态', '报警阈值'])
-        self.data_table.setRowCount(5)  # 5行数据: 加速度、速度、位移、频率、温度
+        self.data_table.setRowCount(5 + len(self.derived_channels))  # 加速度、速度、位移、频率、温度, 之后每个派生通道一行
         self.data_table.setItem(0, 0, QTableWidgetItem('加速度'))
         self.data_table.setItem(1, 0, QTableWidgetItem('振动速度'))
         self.data_table.setItem(2, 0, QTableWidgetItem('振动位移'))
@@ -216,6 +263,9 @@ class VibrationMonitorWindow(QMainWindow):
         self.data_table.setItem(2, 4, QTableWidgetItem('μm'))
         self.data_table.setItem(3, 4, QTableWidgetItem('Hz'))
         self.data_table.setItem(4, 4, QTableWidgetItem('°C'))
+        for i, channel in enumerate(self.derived_channels):
+            self.data_table.setItem(5 + i, 0, QTableWidgetItem(channel.label))
+            self.data_table.setItem(5 + i, 4, QTableWidgetItem(channel.unit))
         # 设置列宽
         self.data_table.setColumnWidth(0, 90)
         self.data_table.setColumnWidth(1, 70)
@@ -231,14 +281,8 @@ class VibrationMonitorWindow(QMainWindow):
         self.stats_table = QTableWidget()
         self.stats_table.setColumnCount(4)
         self.stats_table.setHorizontalHeaderLabels(['参数', '最大值', '最小值', '平均值'])
-        self.stats_table.setRowCount(15)  # 5个参数 * 3个轴 = 15
-        stats_params = [
-            '加速度X', '加速度Y', '加速度Z',
-            '速度X', '速度Y', '速度Z',
-            '位移X', '位移Y', '位移Z',
-            '频率X', '频率Y', '频率Z',
-            '温度','',''       # 温度只有一个值，所以这里填充两个空字符串
-        ]
+        stats_params = [channel.label for channel in self.channels]  # 4个参数 * 3个轴 + 温度 + 派生通道
+        self.stats_table.setRowCount(len(stats_params))
         for i, param in enumerate(stats_params):
             self.stats_table.setItem(i, 0, QTableWidgetItem(param))
 
@@ -259,6 +303,14 @@ class VibrationMonitorWindow(QMainWindow):
         self.record_time_label = QLabel("记录时间: 00:00:00")
         self.record_time_label.setStyleSheet("font-size: 14pt; color: #333333;")
         button_layout.addWidget(self.record_time_label)
+        # 振动烈度区域 (ISO 10816)
+        self.severity_label = QLabel("振动烈度: -")
+        self.severity_label.setStyleSheet("font-size: 14pt; color: #333333;")
+        button_layout.addWidget(self.severity_label)
+        # 异常评分 (相对自适应基线的最大 |z|)
+        self.anomaly_label = QLabel("异常评分: -")
+        self.anomaly_label.setStyleSheet("font-size: 14pt; color: #333333;")
+        button_layout.addWidget(self.anomaly_label)
         
         # 添加数据采集开始/停止按钮
         self.acquisition_button = QPushButton("停止采集")
@@ -317,6 +369,11 @@ class VibrationMonitorWindow(QMainWindow):
 
         # 将表格和按钮的布局添加到主布局
         main_layout.addLayout(table_button_layout)
+
+        # 运行指标面板 (F12 切换显示)
+        self.metrics_overlay = MetricsOverlay(central_widget)
+        self.metrics_overlay.setVisible(self.config.getboolean('Metrics', 'overlay', fallback=False))
+        QShortcut(QKeySequence(Qt.Key_F12), self, activated=self.metrics_overlay.toggle)
     
     def create_plot_widget(self, title, y_label, y_units):
         """创建绘图部件"""
@@ -333,6 +390,7 @@ class VibrationMonitorWindow(QMainWindow):
         # 设置坐标轴标签颜色
         plot.getAxis('bottom').setTextPen('k')
         plot.getAxis('left').setTextPen('k')
+        self.render_settings.setup_plot(plot)
         return plot
     
     def update_record_time(self):
@@ -349,92 +407,67 @@ class VibrationMonitorWindow(QMainWindow):
         # print("Debug: update_data called") 
         try:
             # 如果数据采集未激活，则跳过数据获取
-            if not self.is_data_acquisition_active:
+            if not self.is_data_acquisition_active or not self.device.is_open:
                 return
-                
-            # 获取数据
-            accel_x = safe_float(self.device.get_data("52"))
-            # print(f"Debug: accel_x = {accel_x}")
-            accel_y = safe_float(self.device.get_data("53"))
-            accel_z = safe_float(self.device.get_data("54"))
-            vib_x = safe_float(self.device.get_data("58"))
-            vib_y = safe_float(self.device.get_data("59"))
-            vib_z = safe_float(self.device.get_data("60"))
-            disp_x = safe_float(self.device.get_data("65"))
-            disp_y = safe_float(self.device.get_data("66"))
-            disp_z = safe_float(self.device.get_data("67"))
-            freq_x = safe_float(self.device.get_data("68"))
-            freq_y = safe_float(self.device.get_data("69"))
-            freq_z = safe_float(self.device.get_data("70"))
-            temp = safe_float(self.device.get_data("64"))
-
-            # 更新时间戳
-            current_time = datetime.now().timestamp()
-            if self.timestamps:
-                time_diff = current_time - self.last_timestamp
-                self.timestamps.append(self.timestamps[-1] + time_diff)
-            else:
-                self.timestamps.append(0)
-            self.last_timestamp = current_time
+            # 采样时间戳由设备在应答到达时给出; 自上次刷新以来没有新采样时不重复记录
+            sample_time = self.device.sample_time
+            if sample_time is not None and sample_time == self.last_sample_time:
+                return
+            tick_start = time.perf_counter_ns()
+
+            # 获取数据: 设备的最新值是按 record_keys 排列的数组 (含设备已算好的派生通道),
+            # 一次索引取出全部监测通道和派生通道 (缺失值按 0 显示和记录)
+            values = self.device.values.copy()
+            monitored = values[self.channel_columns]
+            monitored[np.isnan(monitored)] = 0.0
+
+            # 更新时间戳 (相对第一个采样的秒数); 设备不提供采样时间时取当前时刻
+            current_time = sample_clock() if sample_time is None else sample_time
+            self.last_sample_time = sample_time
+            if self.time_origin is None:  # 第一个采样, 或清空/导入数据之后接着已有数据的末尾
+                self.time_origin = current_time - (self.history.timestamps()[-1] if len(self.history) else 0.0)
+            relative_time = current_time - self.time_origin
 
             # 记录数据 (如果正在记录)
             if self.recorder.is_recording:
-              record_data = [
-                  accel_x, accel_y, accel_z,  # 加速度
-                  self.device.get_data("55"), self.device.get_data("56"), self.device.get_data("57"),  # 角速度
-                  vib_x, vib_y, vib_z,  # 振动速度
-                  disp_x, disp_y, disp_z,  # 振动位移
-                  freq_x, freq_y, freq_z,  # 振动频率
-                  temp  # 温度
-              ]
-              self.recorder.write_data(record_data)
-
-            # 更新数据列表
-            self.accel_x.append(accel_x)
-            self.accel_y.append(accel_y)
-            self.accel_z.append(accel_z)
-            self.vib_speed_x.append(vib_x)
-            self.vib_speed_y.append(vib_y)
-            self.vib_speed_z.append(vib_z)
-            self.vib_disp_x.append(disp_x)
-            self.vib_disp_y.append(disp_y)
-            self.vib_disp_z.append(disp_z)
-            self.vib_freq_x.append(freq_x)
-            self.vib_freq_y.append(freq_y)
-            self.vib_freq_z.append(freq_z)
-            self.temperature_data.append(temp)
-
-            # 限制数据长度
-            if len(self.timestamps) > self.data_length:
-                self.timestamps.pop(0)
-                self.accel_x.pop(0)
-                self.accel_y.pop(0)
-                self.accel_z.pop(0)
-                self.vib_speed_x.pop(0)
-                self.vib_speed_y.pop(0)
-                self.vib_speed_z.pop(0)
-                self.vib_disp_x.pop(0)
-                self.vib_disp_y.pop(0)
-                self.vib_disp_z.pop(0)
-                self.vib_freq_x.pop(0)
-                self.vib_freq_y.pop(0)
-                self.vib_freq_z.pop(0)
-                self.temperature_data.pop(0)  # 温度也pop
+              values[self.channel_columns] = monitored  # 角速度保持原值, 缺失时记录为空
+              self.recorder.write_data(values.tolist(), current_time)  # 通道顺序同 RECORD_KEYS, 之后是派生通道
+
+            # 更新历史数据 (超过 data_length 的旧数据自动丢弃)
+            channel_values = monitored.tolist()
+            self.history.append(relative_time, channel_values)
+
+            # 报警、振动烈度和异常评分由采集线程完成 (on_device_samples), 这里只显示状态并定期保存基线
+            if time.monotonic() - self._anomaly_saved_at >= self.anomaly_save_interval:
+                self.save_anomaly_state()
 
             # 更新表格
-            self.update_data_table(accel_x, accel_y, accel_z, vib_x, vib_y, vib_z,
-                                  disp_x, disp_y, disp_z, freq_x, freq_y, freq_z, temp)
+            self.update_data_table(*channel_values)
             self.update_stats_table()
 
             # 更新绘图
             self.update_plots()
+            self._m_update_ns.record(time.perf_counter_ns() - tick_start)
 
         except Exception as e:
                 logger.exception(f"更新数据时发生错误: {e}")
 
+    def on_device_samples(self, device, timestamps, values):
+        """
+        DeviceModel 采样监听器 (在采集线程中调用): 按采样时间评估报警、振动烈度和异常评分
+
+        values 按设备的 record_keys 排列 (派生通道已由设备算好), 按列号取出监测通道和派生通道, 列顺序同 self.channels;
+        缺失的数据保持 NaN, 不改变报警状态, 也不计入烈度窗口和异常基线。
+        """
+        channel_values = values[:, np.newaxis, self.channel_columns]  # (采样数, 设备数 1, 通道数)
+        with self._evaluation_lock:
+            self.alarm_engine.evaluate_batch(timestamps, channel_values)
+            self.severity.evaluate_batch(timestamps, channel_values)
+            self.anomaly_detector.update_batch(channel_values)
+
     def update_data_table(self, accel_x, accel_y, accel_z, vib_x, vib_y, vib_z,
-                          disp_x, disp_y, disp_z, freq_x, freq_y, freq_z, temp):
-        """更新实时数据表格"""
+                          disp_x, disp_y, disp_z, freq_x, freq_y, freq_z, temp, *derived):
+        """更新实时数据表格, derived 为各派生通道的值 (顺序同 self.derived_channels)"""
         # 设置加速度数据
         self.data_table.setItem(0, 1, QTableWidgetItem(f"{accel_x:.2f}"))
         self.data_table.setItem(0, 2, QTableWidgetItem(f"{accel_y:.2f}"))
@@ -451,80 +484,103 @@ class VibrationMonitorWindow(QMainWindow):
         self.data_table.setItem(3, 2, QTableWidgetItem(f"{freq_y:.2f}"))
         self.data_table.setItem(3, 3, QTableWidgetItem(f"{freq_z:.2f}"))
         self.data_table.setItem(4, 1, QTableWidgetItem(f"{temp:.2f}"))  # 温度
-
-        # 报警逻辑
-        data = [
-          ('accel_x', accel_x), ('accel_y', accel_y), ('accel_z', accel_z),
-          ('speed_x', vib_x), ('speed_y', vib_y), ('speed_z', vib_z),
-          ('disp_x', disp_x), ('disp_y', disp_y), ('disp_z', disp_z),
-          ('freq_x', freq_x), ('freq_y', freq_y), ('freq_z', freq_z),
-          ('temperature',temp) #温度
-        ]
-
-        for row_index in range(5):  # 循环所有行
-          if row_index == 4:
-            threshold = self.thresholds.get('temperature')
-            status_item = QTableWidgetItem()
-          # 温度单独处理,只有一列数据
-            if threshold is not None and temp > threshold:
-                status_item.setText('报警')
-                status_item.setBackground(QBrush(QColor(255,0,0)))
-            else:
-              status_item.setText('正常')
-              status_item.setBackground(QBrush(QColor(255,255,255)))
-            self.data_table.setItem(4,5,status_item)
-            self.data_table.setItem(row_index,6,QTableWidgetItem(str(threshold)if threshold is not None else '-'))
-            continue
-          for col_index in range(1, 4):
-              data_key, data_value = data[(row_index * 3) + (col_index -1)] #通过计算偏移量来确定当前读取的元祖
-              threshold = self.thresholds.get(data_key)
-
-              status_item = QTableWidgetItem()
-              if threshold is not None and data_value > threshold:
-                  status_item.setText("报警")
-                  status_item.setBackground(QBrush(QColor(255, 0, 0))) #红色
-              else:
-                  status_item.setText("正常")
-                  status_item.setBackground(QBrush(QColor(255,255,255)))#白色
-              self.data_table.setItem(row_index, 5, status_item)
-              self.data_table.setItem(row_index, 6, QTableWidgetItem(str(threshold) if threshold is not None else "-"))
+        for i, value in enumerate(derived):
+            self.data_table.setItem(5 + i, 1, QTableWidgetItem(f"{value:.2f}"))
+
+        # 报警状态 (由报警引擎评估, 这里只负责显示)
+        state = self.alarm_engine.device_state(self.device.device_name)
+        rows = [slice(i * 3, i * 3 + 3) for i in range(4)] + [slice(12, 13)]  # 温度行只有一个通道
+        rows += [slice(i, i + 1) for i in range(len(CHANNELS), len(self.channels))]  # 派生通道各一行
+        for row_index, row in enumerate(rows):
+            alarm = bool(state[row].any())
+            status_item = QTableWidgetItem('报警' if alarm else '正常')
+            status_item.setBackground(QBrush(QColor(255, 0, 0) if alarm else QColor(255, 255, 255)))
+            self.data_table.setItem(row_index, 5, status_item)
+            limits = sorted(set(self.alarm_engine.high[row].tolist()))
+            self.data_table.setItem(row_index, 6, QTableWidgetItem('/'.join(f"{v:g}" for v in limits)))
+        self.update_severity_label()
+        self.update_anomaly_label()
+
+    def update_anomaly_label(self):
+        """显示异常评分 (各通道相对基线的最大 |z|) 及对应通道"""
+        score, channel = self.anomaly_detector.device_score(self.device.device_name)
+        if channel is None:
+            self.anomaly_label.setText("异常评分: 学习中")
+            return
+        color = '#c62828' if score > self.anomaly_detector.z_threshold else '#333333'
+        self.anomaly_label.setText(f"异常评分: {score:.1f} ({channel})")
+        self.anomaly_label.setStyleSheet(f"font-size: 14pt; color: {color};")
+
+    def save_anomaly_state(self):
+        """保存异常检测基线"""
+        self._anomaly_saved_at = time.monotonic()
+        try:
+            with self._evaluation_lock:
+                self.anomaly_detector.save(self.anomaly_state_file)
+        except OSError as e:
+            logger.error(f"保存异常检测基线失败: {e}")
+
+    def update_severity_label(self):
+        """显示振动烈度区域 (各轴中最差的) 和对应的窗口 RMS"""
+        device_name = self.device.device_name
+        zone = self.severity.device_zone(device_name)
+        if zone == ZONE_UNKNOWN:
+            self.severity_label.setText("振动烈度: -")
+            self.severity_label.setStyleSheet("font-size: 14pt; color: #333333;")
+            return
+        rms = max(value for value in self.severity.device_summary(device_name).values() if value is not None)
+        colors = ('#2e7d32', '#9e9d24', '#ef6c00', '#c62828')  # A 绿 / B 黄绿 / C 橙 / D 红
+        self.severity_label.setText(f"振动烈度: 区域 {zone_name(zone)} ({rms:.2f} mm/s)")
+        self.severity_label.setStyleSheet(f"font-size: 14pt; color: white; background-color: {colors[zone]};")
 
     def update_stats_table(self):
         """更新统计数据表格"""
-        data_series = [
-            self.accel_x, self.accel_y, self.accel_z,
-            self.vib_speed_x, self.vib_speed_y, self.vib_speed_z,
-            self.vib_disp_x, self.vib_disp_y, self.vib_disp_z,
-            self.vib_freq_x, self.vib_freq_y, self.vib_freq_z,
-            self.temperature_data
-        ]
-        for i, series in enumerate(data_series):
-            if series:
-                max_val = max(series)
-                min_val = min(series)
-                avg_val = sum(series) / len(series)
-                self.stats_table.setItem(i, 1, QTableWidgetItem(f"{max_val:.2f}"))
-                self.stats_table.setItem(i, 2, QTableWidgetItem(f"{min_val:.2f}"))
-                self.stats_table.setItem(i, 3, QTableWidgetItem(f"{avg_val:.2f}"))
-            else:
+        if len(self.history) == 0:
+            for i in range(len(self.channels)):
                 self.stats_table.setItem(i, 1, QTableWidgetItem("-"))
                 self.stats_table.setItem(i, 2, QTableWidgetItem("-"))
                 self.stats_table.setItem(i, 3, QTableWidgetItem("-"))
+            return
+        values = self.history.values()  # (通道数, n) 只读视图
+        max_vals = values.max(axis=1)
+        min_vals = values.min(axis=1)
+        avg_vals = values.mean(axis=1)
+        for i in range(len(self.channels)):
+            self.stats_table.setItem(i, 1, QTableWidgetItem(f"{max_vals[i]:.2f}"))
+            self.stats_table.setItem(i, 2, QTableWidgetItem(f"{min_vals[i]:.2f}"))
+            self.stats_table.setItem(i, 3, QTableWidgetItem(f"{avg_vals[i]:.2f}"))
 
     def update_plots(self):
-        """更新绘图"""
-        self.accel_x_curve.setData(self.timestamps, self.accel_x)
-        self.accel_y_curve.setData(self.timestamps, self.accel_y)
-        self.accel_z_curve.setData(self.timestamps, self.accel_z)
-        self.speed_x_curve.setData(self.timestamps, self.vib_speed_x)
-        self.speed_y_curve.setData(self.timestamps, self.vib_speed_y)
-        self.speed_z_curve.setData(self.timestamps, self.vib_speed_z)
-        self.disp_x_curve.setData(self.timestamps, self.vib_disp_x)
-        self.disp_y_curve.setData(self.timestamps, self.vib_disp_y)
-        self.disp_z_curve.setData(self.timestamps, self.vib_disp_z)
-        self.freq_x_curve.setData(self.timestamps, self.vib_freq_x)
-        self.freq_y_curve.setData(self.timestamps, self.vib_freq_y)
-        self.freq_z_curve.setData(self.timestamps, self.vib_freq_z)
+        """更新绘图; 未显示的图 (如窗口最小化时) 跳过, 重新显示时再更新"""
+        start = time.perf_counter_ns()
+        timestamps = self.history.timestamps()
+        values = self.history.values()
+        for plot, curves in self._plot_curves.items():
+            if not is_shown(plot):
+                self._stale_plots.add(plot)
+                continue
+            self._stale_plots.discard(plot)
+            for curve, row in curves:
+                curve.setData(timestamps, values[row])
+        self._m_plots_ns.record(time.perf_counter_ns() - start)
+
+    def changeEvent(self, event):
+        super().changeEvent(event)
+        # 从最小化恢复时补上跳过的曲线更新 (停止采集时不会再有定时刷新)
+        if event.type() == QEvent.WindowStateChange and self._stale_plots and not self.isMinimized():
+            self.update_plots()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self._stale_plots:
+            self.update_plots()
+
+    def _channel_curves(self):
+        """各通道的曲线, 顺序同 channels.CHANNELS (温度没有曲线)"""
+        return (self.accel_x_curve, self.accel_y_curve, self.accel_z_curve,
+                self.speed_x_curve, self.speed_y_curve, self.speed_z_curve,
+                self.disp_x_curve, self.disp_y_curve, self.disp_z_curve,
+                self.freq_x_curve, self.freq_y_curve, self.freq_z_curve)
 
     def toggle_data_acquisition(self):
         """切换数据采集状态"""
@@ -584,21 +640,11 @@ class VibrationMonitorWindow(QMainWindow):
                                    QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
         if reply == QMessageBox.Yes:
             try:
-                # 清空数据列表
-                self.timestamps.clear()
-                self.accel_x.clear()
-                self.accel_y.clear()
-                self.accel_z.clear()
-                self.vib_speed_x.clear()
-                self.vib_speed_y.clear()
-                self.vib_speed_z.clear()
-                self.vib_disp_x.clear()
-                self.vib_disp_y.clear()
-                self.vib_disp_z.clear()
-                self.vib_freq_x.clear()
-                self.vib_freq_y.clear()
-                self.vib_freq_z.clear()
-                self.temperature_data.clear()
+                # 清空历史数据
+                self.history.clear()
+                self.time_origin = None
+                with self._evaluation_lock:
+                    self.severity.reset()
                 
                 # 清空图表
                 self.accel_x_curve.setData([], [])
@@ -613,6 +659,9 @@ class VibrationMonitorWindow(QMainWindow):
                 self.freq_x_curve.setData([], [])
                 self.freq_y_curve.setData([], [])
                 self.freq_z_curve.setData([], [])
+                for curve in self.derived_curves:
+                    if curve is not None:
+                        curve.setData([], [])
                 
                 # 清空实时数据表格
                 for row in range(self.data_table.rowCount()):
@@ -652,27 +701,21 @@ class VibrationMonitorWindow(QMainWindow):
                 self.record_start_time = datetime.now()  # 设置开始时间
                 self.record_timer.start(1000)  # 启动计时器，每秒更新一次
 
+    def open_device_in_background(self):
+        """窗口显示后在后台打开设备并启动采集, 失败时弹出提示"""
+        self._device_opener = DeviceOpener(self.device, self)
+        self._device_opener.failed.connect(self._on_device_open_failed)
+        self._device_opener.start()
+
+    def _on_device_open_failed(self, message):
+        QMessageBox.critical(self, "设备连接失败", f"无法打开设备 {self.device.device_name}:\n{message}")
+
     def open_analysis_window(self):
-      """打开高级分析窗口"""
-
-      data_cache = {
-            'timestamps': self.timestamps.copy(),
-            '加速度X': self.accel_x.copy(),
-            '加速度Y': self.accel_y.copy(),
-            '加速度Z': self.accel_z.copy(),
-            '速度X': self.vib_speed_x.copy(),
-            '速度Y': self.vib_speed_y.copy(),
-            '速度Z': self.vib_speed_z.copy(),
-            '位移X': self.vib_disp_x.copy(),
-            '位移Y': self.vib_disp_y.copy(),
-            '位移Z': self.vib_disp_z.copy(),
-            '频率X': self.vib_freq_x.copy(),
-            '频率Y': self.vib_freq_y.copy(),
-            '频率Z': self.vib_freq_z.copy(),
-            '温度':self.temperature_data.copy()
-
-        }
-      self.data_to_analysis.emit(data_cache) #发送数据
+      """打开高级分析窗口 (传递历史缓冲本身, 不复制数据)"""
+      if self.analysis_window is None:
+          from .analysis_window import AnalysisWindow  # 导入分析窗口 (首次打开时才加载 scipy)
+          self.analysis_window = AnalysisWindow()
+      self.analysis_window.set_history(self.history)
       self.analysis_window.show()
 
     def closeEvent(self, event):
@@ -682,10 +725,16 @@ class VibrationMonitorWindow(QMainWindow):
                                      QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
         if reply == QMessageBox.Yes:
             self.update_timer.stop()
+            if self._device_opener is not None:
+                self._device_opener.wait(10000)  # 等待后台打开设备的线程结束
             self.device.stop_data_acquisition()
+            self.device.remove_listener(self.on_device_samples)
             self.device.close_device()
             self.recorder.stop_recording() #确保停止
-            self.analysis_window.close() # 关闭分析窗口
+            self.alarm_engine.close()  # 关闭报警日志
+            self.save_anomaly_state()
+            if self.analysis_window is not None:
+                self.analysis_window.close() # 关闭分析窗口
             logger.info("应用程序已关闭")
             event.accept()
         else:
@@ -714,51 +763,27 @@ class VibrationMonitorWindow(QMainWindow):
                     if '记录时间' not in df.columns or len(df.columns) < 17:
                         raise ValueError("CSV文件格式不正确")
                     
-                    # 清空现有数据
-                    self.timestamps.clear()
-                    self.accel_x.clear()
-                    self.accel_y.clear()
-                    self.accel_z.clear()
-                    self.vib_speed_x.clear()
-                    self.vib_speed_y.clear()
-                    self.vib_speed_z.clear()
-                    self.vib_disp_x.clear()
-                    self.vib_disp_y.clear()
-                    self.vib_disp_z.clear()
-                    self.vib_freq_x.clear()
-                    self.vib_freq_y.clear()
-                    self.vib_freq_z.clear()
-                    self.temperature_data.clear()
-                    
                     # 转换时间戳
                     base_time = pd.to_datetime(df['记录时间'].iloc[0])
                     timestamps = pd.to_datetime(df['记录时间'])
                     time_diffs = (timestamps - base_time).dt.total_seconds()
-                    
-                    # 添加数据
-                    self.timestamps.extend(time_diffs.tolist())
-                    self.accel_x.extend(df['加速度X(g)'].tolist())
-                    self.accel_y.extend(df['加速度Y(g)'].tolist())
-                    self.accel_z.extend(df['加速度Z(g)'].tolist())
-                    self.vib_speed_x.extend(df['X轴振动速度(mm/s)'].tolist())
-                    self.vib_speed_y.extend(df['Y轴振动速度(mm/s)'].tolist())
-                    self.vib_speed_z.extend(df['Z轴振动速度(mm/s)'].tolist())
-                    self.vib_disp_x.extend(df['X轴振动位移(um)'].tolist())
-                    self.vib_disp_y.extend(df['Y轴振动位移(um)'].tolist())
-                    self.vib_disp_z.extend(df['Z轴振动位移(um)'].tolist())
-                    self.vib_freq_x.extend(df['X轴振动频率(Hz)'].tolist())
-                    self.vib_freq_y.extend(df['Y轴振动频率(Hz)'].tolist())
-                    self.vib_freq_z.extend(df['Z轴振动频率(Hz)'].tolist())
-                    self.temperature_data.extend(df['温度(°C)'].tolist())
-                    
+
+                    # 替换现有数据: 数据列顺序同 RECORD_KEYS, 记录时已写入的派生通道列直接读取;
+                    # 记录中没有 (旧文件或配置有变化) 时按当前配置对整个文件计算一次
+                    records = df.iloc[:, 2:2 + len(RECORD_KEYS)].to_numpy(dtype=float)
+                    if self.derived is not None:
+                        headers = derived_headers(self.derived)
+                        if all(header in df.columns for header in headers):
+                            records = np.hstack([records, df[headers].to_numpy(dtype=float)])
+                        else:
+                            records = self.derived.extend(records)
+                    values = records[:, self.channel_columns].T
+                    self.history.clear()
+                    self.history.extend(time_diffs.to_numpy(), values)
+                    self.time_origin = None
+
                     # 更新显示
-                    self.update_data_table(
-                        self.accel_x[-1], self.accel_y[-1], self.accel_z[-1],
-                        self.vib_speed_x[-1], self.vib_speed_y[-1], self.vib_speed_z[-1],
-                        self.vib_disp_x[-1], self.vib_disp_y[-1], self.vib_disp_z[-1],
-                        self.vib_freq_x[-1], self.vib_freq_y[-1], self.vib_freq_z[-1],
-                        self.temperature_data[-1]
-                    )
+                    self.update_data_table(*self.history.latest())
                     self.update_stats_table()
                     self.update_plots()
                     
@@ -0,0 +1,98 @@
+from PyQt5.QtWidgets import QLabel, QWidget
+from PyQt5.QtCore import Qt, QTimer, QEvent
+import time
+
+from ..utils.metrics import metrics, MetricsRegistry
+from ..utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class MetricsOverlay(QLabel):
+    """
+    浮在父部件右上角的运行指标面板
+
+    每 interval_ms 毫秒刷新一次: 采集帧率、界面刷新率和单帧耗时、解析错误、缓冲/待写队列深度。
+    速率和平均耗时按两次刷新之间的增量计算, p99 为启动以来的累计值。
+    """
+
+    def __init__(self, parent: QWidget, interval_ms: int = 1000, registry: MetricsRegistry = None):
+        super().__init__(parent)
+        self.registry = registry or metrics
+        self.setAttribute(Qt.WA_TransparentForMouseEvents)
+        self.setStyleSheet("""
+            QLabel {
+                background-color: rgba(0, 0, 0, 160);
+                color: #00ff66;
+                font-family: Consolas, monospace;
+                font-size: 9pt;
+                padding: 6px;
+                border-radius: 4px;
+            }
+        """)
+        self._last = None  # 上一次刷新时的 (时间, 帧数, 界面刷新次数, 界面总耗时)
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.setInterval(interval_ms)
+        parent.installEventFilter(self)
+        self.hide()
+
+    def setVisible(self, visible: bool):
+        """显示时启动刷新定时器, 隐藏时停止, 隐藏状态下没有任何开销"""
+        super().setVisible(visible)
+        if visible:
+            self._last = None
+            self.refresh()
+            self.timer.start()
+            self.raise_()
+        else:
+            self.timer.stop()
+
+    def toggle(self):
+        self.setVisible(not self.isVisible())
+
+    def eventFilter(self, obj, event):
+        if obj is self.parent() and event.type() == QEvent.Resize:
+            self._reposition()
+        return super().eventFilter(obj, event)
+
+    def _reposition(self):
+        self.adjustSize()
+        parent = self.parentWidget()
+        self.move(parent.width() - self.width() - 10, 10)
+
+    def _value(self, name: str):
+        metric = self.registry.get(name)
+        return metric.value if metric is not None else 0
+
+    def refresh(self):
+        """刷新显示内容"""
+        now = time.monotonic()
+        frames = self._value("device.frames")
+        update_ns = self.registry.histogram("gui.update_data_ns")
+        plots_ns = self.registry.histogram("gui.update_plots_ns")
+        current = (now, frames, update_ns.count, update_ns.total)
+
+        if self._last is not None and now > self._last[0]:
+            elapsed = now - self._last[0]
+            frame_hz = (frames - self._last[1]) / elapsed
+            ticks = update_ns.count - self._last[2]
+            tick_hz = ticks / elapsed
+            tick_ms = (update_ns.total - self._last[3]) / ticks / 1e6 if ticks else 0.0
+        else:
+            frame_hz = tick_hz = 0.0
+            tick_ms = update_ns.mean / 1e6
+        self._last = current
+
+        lines = [
+            f"采集帧率   {frame_hz:8.1f} Hz",
+            f"界面刷新   {tick_hz:8.1f} Hz",
+            f"单帧耗时   {tick_ms:8.2f} ms (p99 {update_ns.percentile(99) / 1e6:.2f})",
+            f"绘图耗时   {plots_ns.mean / 1e6:8.2f} ms (p99 {plots_ns.percentile(99) / 1e6:.2f})",
+            f"CRC 错误   {self._value('device.crc_errors'):8d}",
+            f"应答超时   {self._value('device.timeouts'):8d}",
+            f"接收缓冲   {self._value('device.buffer_bytes'):8d} B",
+            f"待写行数   {self._value('recorder.pending_rows'):8d}",
+        ]
+        self.setText("\n".join(lines))
+        self._reposition()
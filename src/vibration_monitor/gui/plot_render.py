@@ -0,0 +1,117 @@
+"""
+曲线绘制方式
+
+pyqtgraph 默认用 Qt 的光栅引擎绘制, 宽度大于 1 的画笔要逐段描边并处理线段连接, 曲线多、点数多时是界面刷新的
+主要开销。[Plot] render_mode 选择绘制方式:
+
+    default  2 像素画笔 (原有外观)
+    fast     1 像素画笔、关闭抗锯齿, 只绘制视图范围内的点, 点数超过像素宽度时按峰值降采样
+    opengl   在 fast 基础上由 OpenGL 绘制曲线 (pyqtgraph 使用 Qt 自带的 OpenGL 函数, 不需要 PyOpenGL)。
+             Linux 上没有显卡驱动时可使用 Mesa 软件渲染 (llvmpipe, 必要时设置 LIBGL_ALWAYS_SOFTWARE=1);
+             无法创建 OpenGL 上下文 (如 offscreen 平台、远程桌面) 时退回 fast 并记日志, 不抛出异常
+
+不显示的图 (窗口最小化、父部件隐藏、未选中的选项卡) 不必更新曲线数据, 用 is_shown 判断, 重新显示时再补上。
+"""
+from typing import Optional
+
+import pyqtgraph as pg
+from PyQt5.QtCore import Qt
+
+from ..utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+RENDER_MODES = ('default', 'fast', 'opengl')
+
+
+def opengl_available() -> bool:
+    """
+    能否用 OpenGL 绘制曲线 (须在创建 QApplication 之后调用)
+
+    除创建上下文外还检查 pyqtgraph 能否取得所需的 OpenGL 函数 (PyQt5 的 _QOpenGLFunctions_* 模块)。
+    """
+    from PyQt5.QtGui import QOffscreenSurface, QOpenGLContext
+    context = QOpenGLContext()
+    if not context.create():
+        return False
+    surface = QOffscreenSurface()
+    surface.create()
+    if not surface.isValid() or not context.makeCurrent(surface):
+        return False
+    try:
+        from pyqtgraph.Qt import OpenGLHelpers
+        OpenGLHelpers.getFunctions(context)
+    except Exception as e:
+        logger.debug(f"无法取得 OpenGL 函数: {e}")
+        return False
+    finally:
+        context.doneCurrent()
+    return True
+
+
+def is_shown(widget) -> bool:
+    """部件当前是否显示 (父部件隐藏、未选中的选项卡、窗口最小化时为 False)"""
+    return widget.isVisible() and not widget.window().isMinimized()
+
+
+class RenderSettings:
+    """
+    绘图部件的绘制方式
+
+    Args:
+        mode: RENDER_MODES 之一
+    """
+
+    def __init__(self, mode: str = 'default'):
+        if mode not in RENDER_MODES:
+            raise ValueError(f"不支持的绘制方式: {mode}, 可选 {RENDER_MODES}")
+        self.mode = mode  # opengl 不可用时改为 fast
+        self._opengl: Optional[bool] = None  # OpenGL 是否可用, 首次创建画笔或绘图部件时检查
+
+    @classmethod
+    def from_config(cls, config) -> 'RenderSettings':
+        """读取 [Plot] render_mode, 无效的值按 default 处理并记日志"""
+        mode = config.get('Plot', 'render_mode', fallback='default').strip().lower() or 'default'
+        if mode not in RENDER_MODES:
+            logger.warning(f"不支持的绘制方式 {mode}, 可选 {RENDER_MODES}, 使用 default")
+            mode = 'default'
+        return cls(mode)
+
+    def _check_opengl(self):
+        """opengl 模式首次使用时检查上下文 (须已创建 QApplication), 不可用时退回 fast (同样的画笔和降采样, 只是不用 OpenGL)"""
+        if self.mode != 'opengl' or self._opengl is not None:
+            return
+        try:
+            self._opengl = opengl_available()
+        except Exception as e:
+            logger.debug(f"检查 OpenGL 时出错: {e}")
+            self._opengl = False
+        if not self._opengl:
+            logger.warning("无法创建 OpenGL 上下文, 曲线改用 fast 方式绘制")
+            self.mode = 'fast'
+
+    @property
+    def pen_width(self) -> int:
+        self._check_opengl()
+        return 2 if self.mode == 'default' else 1
+
+    @property
+    def use_opengl(self) -> bool:
+        """实际是否使用 OpenGL (opengl 模式且上下文可用)"""
+        self._check_opengl()
+        return self.mode == 'opengl'
+
+    def pen(self, color, style=Qt.SolidLine):
+        """曲线画笔 (宽度由绘制方式决定)"""
+        return pg.mkPen(color, width=self.pen_width, style=style)
+
+    def setup_plot(self, plot: pg.PlotWidget):
+        """按绘制方式设置新建的绘图部件"""
+        self._check_opengl()
+        if self.mode == 'default':
+            return
+        plot.setAntialiasing(False)
+        plot.setClipToView(True)
+        plot.setDownsampling(auto=True, mode='peak')
+        if self.mode == 'opengl':
+            plot.useOpenGL(True)
@@ -0,0 +1,140 @@
+"""
+界面的后台计算
+
+耗时的分析放到工作线程中执行, 界面线程只负责收集参数和显示结果。每个任务属于一个槽位 (如某个选项卡),
+同一槽位提交新任务时取消旧任务 (尚未开始的直接从队列中取消, 正在计算的通过 CancelToken 在下一个检查点停止,
+结果即使算完也丢弃), 只有最新的任务会回调。完成回调通过 Qt 信号回到界面线程执行, 可以直接更新控件。
+
+使用线程池而不是进程池: numpy / scipy 的计算释放 GIL, 界面保持响应, 且分析流水线的缓存留在本进程中。
+默认只有一个工作线程, 任务按提交顺序执行, 不需要对流水线等共享对象加锁。工作线程在执行器的整个生命周期内保持不变
+(shutdown 只取消任务, 不换新的线程), 否则被取消但尚未到达检查点的旧任务会和新线程中的任务同时访问流水线。
+"""
+import threading
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from ..utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class TaskCancelled(Exception):
+    """任务已被取消 (由 CancelToken.check 抛出)"""
+
+
+class CancelToken:
+    """
+    任务的取消标志和进度报告, 作为参数传给任务函数
+
+    任务函数应在较长的计算之间调用 check(), 取消后抛出 TaskCancelled 结束任务。
+    """
+
+    def __init__(self, runner: 'TaskRunner', slot: str):
+        self.slot = slot
+        self._runner = runner
+        self._event = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self):
+        self._event.set()
+
+    def check(self):
+        if self._event.is_set():
+            raise TaskCancelled(self.slot)
+
+    def report(self, text: str, fraction: Optional[float] = None):
+        """报告进度 (可在工作线程中调用); fraction 为 0~1, None 表示进度未知"""
+        if not self.cancelled:
+            self._runner.progress.emit(self.slot, text, -1.0 if fraction is None else float(fraction))
+
+
+class TaskRunner(QObject):
+    """
+    后台任务执行器 (同一槽位最新的任务有效)
+
+    信号:
+        progress(slot, text, fraction): 任务进度, fraction < 0 表示进度未知
+        busy_changed(bool): 是否有未完成的任务
+    """
+
+    progress = pyqtSignal(str, str, float)
+    busy_changed = pyqtSignal(bool)
+    _done = pyqtSignal(object)  # 工作线程 -> 界面线程
+
+    def __init__(self, parent=None, max_workers: int = 1):
+        super().__init__(parent)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='analysis')
+        self._tasks: Dict[str, tuple] = {}  # 槽位 -> (token, future, on_done, on_error)
+        self._done.connect(self._on_done)
+
+    def submit(self, slot: str, func: Callable[[CancelToken], object], on_done: Callable[[object], None],
+               on_error: Optional[Callable[[Exception], None]] = None) -> CancelToken:
+        """
+        提交任务, 同一槽位的旧任务被取消
+
+        Args:
+            func: 在工作线程中以 func(token) 调用
+            on_done: 在界面线程中以 on_done(结果) 调用 (任务未被取代时)
+            on_error: 在界面线程中以 on_error(异常) 调用, 默认只记日志
+        """
+        self.cancel(slot)
+        token = CancelToken(self, slot)
+        future = self._executor.submit(self._call, func, token)
+        self._tasks[slot] = (token, future, on_done, on_error)
+        future.add_done_callback(lambda f: self._done.emit((token, f)))
+        self.busy_changed.emit(True)
+        return token
+
+    @staticmethod
+    def _call(func, token: CancelToken):
+        token.check()
+        return func(token)
+
+    def cancel(self, slot: Optional[str] = None):
+        """取消某槽位 (默认全部) 的任务, 已取消的任务不再回调; 还在排队的任务不会再执行"""
+        slots = [slot] if slot is not None else list(self._tasks)
+        for name in slots:
+            task = self._tasks.pop(name, None)
+            if task is not None:
+                task[0].cancel()
+                task[1].cancel()
+                logger.debug(f"取消后台任务: {name}")
+        if slots and not self._tasks:
+            self.busy_changed.emit(False)
+
+    def is_busy(self, slot: Optional[str] = None) -> bool:
+        return bool(self._tasks) if slot is None else slot in self._tasks
+
+    def _on_done(self, item):
+        token, future = item
+        task = self._tasks.get(token.slot)
+        if task is None or task[0] is not token:  # 已被取消或取代
+            return
+        del self._tasks[token.slot]
+        _, _, on_done, on_error = task
+        try:
+            result = future.result()
+        except (TaskCancelled, CancelledError):
+            pass
+        except Exception as e:
+            if on_error is not None:
+                on_error(e)
+            else:
+                logger.error(f"后台任务 {token.slot} 失败: {e}")
+        else:
+            on_done(result)
+        if not self._tasks:
+            self.busy_changed.emit(False)
+
+    def shutdown(self):
+        """
+        取消全部任务 (关闭窗口时调用): 排队中的任务不再执行, 正在执行的计算在下一个检查点结束
+
+        工作线程保留, 之后仍可提交任务; 新任务在旧任务结束后才开始, 不会与它同时访问流水线。
+        """
+        self.cancel()
@@ -0,0 +1,127 @@
+"""
+界面历史数据缓冲
+
+主窗口曲线、统计表和分析窗口共用同一份历史数据。数据按通道连续存放在 numpy 数组中,
+读取接口返回最近 length 个采样的只读视图 (不复制), 打开分析窗口或刷新曲线的开销与历史长度无关。
+
+实现为比 capacity 多 25% 余量的线性缓冲: 新采样总是写在已有数据之后, 写满时把最近 capacity - 1 个采样搬回开头
+(均摊到每次写入为 O(通道数))。因此已取得的视图在下一次搬移之前内容不变; 每次写入或清空都会递增 version,
+需要长期持有数据的使用者应比较 version 后重新获取视图。
+"""
+from collections import namedtuple
+from typing import Sequence, Union
+
+import numpy as np
+
+from .channels import CHANNELS, KEY_COLUMNS, ChannelId
+
+# version: 取快照时的数据版本; timestamps: (n,) 视图; values: (通道数, n) 视图
+HistorySnapshot = namedtuple('HistorySnapshot', ['version', 'timestamps', 'values'])
+
+
+class HistoryStore:
+    """
+    固定容量的多通道历史缓冲, 只应在一个线程 (界面线程) 中写入
+
+    Args:
+        capacity: 保留的采样数
+        channels: 通道定义, 默认 channels.CHANNELS (顺序即 values 的行顺序)
+    """
+
+    def __init__(self, capacity: int, channels=CHANNELS):
+        if capacity < 1:
+            raise ValueError("capacity 必须大于 0")
+        self.capacity = capacity
+        self.channels = tuple(channels)
+        self._index = {channel.name: i for i, channel in enumerate(self.channels)}
+        self._index.update({channel.label: i for i, channel in enumerate(self.channels)})
+        self._index.update({KEY_COLUMNS[channel.key]: i for i, channel in enumerate(self.channels)
+                            if channel.key in KEY_COLUMNS})
+        size = capacity + max(capacity // 4, 1)  # 余量越大搬移越少, 内存也越多
+        self._times = np.zeros(size)
+        self._values = np.zeros((len(self.channels), size))
+        self._start = 0  # 最旧采样的位置
+        self._end = 0    # 下一个采样的写入位置
+        self.version = 0
+
+    def __len__(self):
+        return self._end - self._start
+
+    def append(self, timestamp: float, values: Sequence[float]):
+        """追加一个采样, values 顺序同 channels"""
+        if self._end == len(self._times):
+            self._compact()
+        self._times[self._end] = timestamp
+        self._values[:, self._end] = values
+        self._end += 1
+        if self._end - self._start > self.capacity:
+            self._start += 1
+        self.version += 1
+
+    def extend(self, timestamps: Sequence[float], values: np.ndarray):
+        """
+        追加一批采样
+
+        Args:
+            timestamps: 形状 (n,)
+            values: 形状 (通道数, n)
+        """
+        timestamps = np.asarray(timestamps, dtype=float)[-self.capacity:]
+        values = np.asarray(values, dtype=float)[:, -self.capacity:]
+        n = len(timestamps)
+        if n == 0:
+            return
+        if self._end + n > len(self._times):
+            self._compact(keep=self.capacity - n)
+        self._times[self._end:self._end + n] = timestamps
+        self._values[:, self._end:self._end + n] = values
+        self._end += n
+        self._start = max(self._start, self._end - self.capacity)
+        self.version += 1
+
+    def clear(self):
+        self._start = self._end = 0
+        self.version += 1
+
+    def _compact(self, keep: int = None):
+        """把最近 keep 个采样 (默认 capacity - 1) 搬回缓冲区开头 (内部方法)"""
+        keep = min(len(self), self.capacity - 1 if keep is None else keep)
+        source = slice(self._end - keep, self._end)
+        self._times[:keep] = self._times[source]
+        self._values[:, :keep] = self._values[:, source]
+        self._start, self._end = 0, keep
+
+    @staticmethod
+    def _readonly(array: np.ndarray) -> np.ndarray:
+        view = array.view()
+        view.flags.writeable = False
+        return view
+
+    def timestamps(self) -> np.ndarray:
+        """全部采样时间的只读视图"""
+        return self._readonly(self._times[self._start:self._end])
+
+    def values(self) -> np.ndarray:
+        """全部通道的只读视图, 形状 (通道数, n)"""
+        return self._readonly(self._values[:, self._start:self._end])
+
+    def series(self, channel: Union[ChannelId, int, str]) -> np.ndarray:
+        """
+        单个通道的只读视图
+
+        Args:
+            channel: ChannelId、通道下标、名称 (如 'speed_x') 或中文标签 (如 '速度X')。
+                ChannelId 按登记表查找所在行, 不作为下标使用
+        """
+        index = self._index[channel] if isinstance(channel, (ChannelId, str)) else channel
+        return self._readonly(self._values[index, self._start:self._end])
+
+    def latest(self) -> np.ndarray:
+        """最近一个采样的各通道值 (复制), 没有数据时返回 None"""
+        if self._end == self._start:
+            return None
+        return self._values[:, self._end - 1].copy()
+
+    def snapshot(self) -> HistorySnapshot:
+        return HistorySnapshot(self.version, self.timestamps(), self.values())
+
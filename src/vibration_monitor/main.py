@@ -2,16 +2,24 @@ import sys
 from PyQt5.QtWidgets import QApplication
 from .gui.main_window import VibrationMonitorWindow  # 从 gui 模块导入
 from .device.device_wtvb01 import DeviceWTVB01 # 导入具体设备
-from .config import Config  # 导入 Config
+from .device.derived_channels import DerivedChannels  # 派生通道
+from .config import get_config  # 共享配置
 from .utils.logger import setup_logger  #导入日志
+from .utils.metrics import MetricsDumper  # 运行指标定期输出
 
 logger = setup_logger(__name__) #日志
 
+REPLAY_SCHEME = "replay://"  # port = replay://<csv 或 npy 文件路径>
+COLLECTOR_SCHEME = "collector://"  # port = collector://<监听地址>:<端口>, 接收远程采集端推送的数据
+
 def main():
-    """程序主入口"""
+    """程序主入口; vibration-monitor analyze ... 为无界面的批量分析 (见 batch_analysis.py)"""
+    if len(sys.argv) > 1 and sys.argv[1] == 'analyze':
+        from .batch_analysis import main as analyze_main
+        sys.exit(analyze_main(sys.argv[2:]))
     try:
         # 加载配置
-        config = Config()
+        config = get_config()
 
         # 从配置文件读取设备参数
         device_name = config.get('Device', 'device_name', fallback="未知设备")
@@ -20,17 +28,59 @@ def main():
         address = config.getint('Device', 'address', fallback=0x50)
 
         logger.info(f"使用配置: 设备名称={device_name}, 端口={port}, 波特率={baudrate}, 地址={address}")
+        # 运行指标定期写入文件 (dump_file 为空时不输出)
+        metrics_file = config.get('Metrics', 'dump_file', fallback='').strip()
+        if metrics_file:
+            dumper = MetricsDumper(metrics_file, config.getfloat('Metrics', 'dump_interval', fallback=10.0))
+            dumper.start()
         # 初始化设备
         # device = device_model.DeviceModel("测试设备", "COM5", 230400, 0x50)
-        device = DeviceWTVB01(device_name, port, baudrate, address) #具体设备
-        device.open_device()
-        device.start_data_acquisition()
+        if port.startswith(REPLAY_SCHEME):  # 回放记录文件, 无需硬件
+            from .device.simulator import ReplayDevice
+            device = ReplayDevice(device_name, port[len(REPLAY_SCHEME):],
+                                  speed=config.getfloat('Device', 'replay_speed', fallback=1.0))
+        elif port.startswith(COLLECTOR_SCHEME):  # 远程采集端通过网络推送数据
+            from .device.remote_device import RemoteDevice
+            from .utils.collector_server import CollectorServer
+            host, _, listen_port = port[len(COLLECTOR_SCHEME):].rpartition(':')
+            device = RemoteDevice(device_name, port)
+            collector = CollectorServer(host or '0.0.0.0', int(listen_port), devices={device_name: device})
+            collector.start()
+        else:
+            device = DeviceWTVB01(device_name, port, baudrate, address) #具体设备
+        # 派生通道 (三轴合成值等, [DerivedChannels]): 设备每解码一帧计算一次, 作为采样数组的额外列
+        # (device.record_keys) 交给界面、报警、记录、发布、共享内存和趋势, 各处直接读取
+        if config.getboolean('DerivedChannels', 'enabled', fallback=True):
+            device.derived = DerivedChannels.from_config(config)
+        # 实时数据发布 (address 为空时不启动)
+        publish_address = config.get('Publisher', 'address', fallback='').strip()
+        if publish_address:
+            from .utils.publisher import SamplePublisher
+            publisher = SamplePublisher(publish_address,
+                                        batch_interval=config.getfloat('Publisher', 'batch_interval', fallback=0.05),
+                                        max_pending_frames=config.getint('Publisher', 'queue_size', fallback=64),
+                                        record_keys=device.record_keys)
+            publisher.attach(device)
+            publisher.start()
+        # 共享内存采样缓冲区, 供独立的分析进程只读挂接 (name 为空时不创建)
+        ring_name = config.get('SharedMemory', 'name', fallback='').strip()
+        if ring_name:
+            from .utils.shared_ring import SampleRing
+            ring = SampleRing(ring_name, capacity=config.getint('SharedMemory', 'capacity', fallback=65536),
+                              channels=len(device.record_keys))
+            ring.attach(device)
+        # 长期趋势: 采样连续汇总为 1 秒 / 1 分钟 / 1 小时的统计量, 追加写入 [Trend] directory
+        if config.getboolean('Trend', 'enabled', fallback=False):
+            from .trend_store import TrendStore
+            trend = TrendStore.from_config(config, channels=device.record_keys)
+            trend.attach(device)
 
          # 创建 Qt 应用程序
         app = QApplication(sys.argv)
-        # 创建主窗口
+        # 创建主窗口; 先显示窗口, 设备在后台线程中打开并启动采集
         window = VibrationMonitorWindow(device)
         window.show()
+        window.open_device_in_background()
          # 运行应用程序
         sys.exit(app.exec_())
     except Exception as e:
@@ -41,5 +91,15 @@ def main():
       if 'device' in locals() and device.is_open:
           device.stop_data_acquisition()
           device.close_device()
+      if 'collector' in locals():
+          collector.stop()
+      if 'publisher' in locals():
+          publisher.stop()
+      if 'ring' in locals():
+          ring.close()
+      if 'trend' in locals():
+          trend.close()
+      if 'dumper' in locals():
+          dumper.stop()
 if __name__ == "__main__":
     main()
@@ -0,0 +1,99 @@
+"""
+不等间隔采样到均匀时间网格的重采样
+
+设备按轮询应答到达的时刻打时间戳, 间隔随串口/网络延迟抖动, 偶尔还会丢帧;
+FFT、滤波和包络分析都假定等间隔采样。这里把采样线性插值到采样率已知的均匀网格上,
+并为每个网格点给出有效标志: 所在的原始采样间隔超过 max_gap (丢帧、暂停采集) 或端点缺失 (NaN) 时为 False,
+该处的值仍按插值给出, 由分析算法决定是否使用。
+
+已经足够均匀的数据 (相邻间隔与中位数相差不超过 tolerance) 直接使用, 不复制、不插值。
+"""
+from collections import namedtuple
+from typing import Optional, Sequence
+
+import numpy as np
+
+# time: 形状 (m,) 的均匀网格 (秒); values: 形状 (m,) 或 (通道数, m); fs: 采样率 (Hz);
+# valid: 形状 (m,) 的有效标志 (二维数据时任一通道无效即为 False)
+UniformSeries = namedtuple('UniformSeries', ['time', 'values', 'fs', 'valid'])
+
+DEFAULT_TOLERANCE = 0.01  # 判定为均匀采样时相邻间隔允许的相对偏差
+DEFAULT_GAP_FACTOR = 2.5  # 默认 max_gap = 2.5 个采样间隔: 单个丢帧仍插值, 连续丢两帧以上标记为间断
+
+
+def sample_rate(timestamps: Sequence[float]) -> float:
+    """由时间戳估计采样率 (Hz), 使用相邻间隔的中位数, 对个别丢点不敏感"""
+    t = np.asarray(timestamps, dtype=float)
+    if t.size < 2:
+        raise ValueError("数据不足, 无法估计采样率")
+    interval = float(np.median(np.diff(t)))
+    if interval <= 0:
+        raise ValueError("时间戳不是递增的")
+    return 1.0 / interval
+
+
+def is_uniform(timestamps: Sequence[float], tolerance: float = DEFAULT_TOLERANCE) -> bool:
+    """相邻间隔是否都在中位数的 (1 ± tolerance) 以内"""
+    t = np.asarray(timestamps, dtype=float)
+    if t.size < 3:
+        return True
+    intervals = np.diff(t)
+    nominal = np.median(intervals)
+    return bool(nominal > 0 and np.abs(intervals - nominal).max() <= tolerance * nominal)
+
+
+def resample_uniform(timestamps: Sequence[float], values, fs: Optional[float] = None,
+                     max_gap: Optional[float] = None) -> UniformSeries:
+    """
+    线性插值到均匀网格
+
+    Args:
+        timestamps: 形状 (n,), 秒; 允许重复和小幅回退 (按到达顺序处理)
+        values: 形状 (n,) 或 (通道数, n), NaN 表示缺失
+        fs: 目标采样率 (Hz), 默认为 sample_rate(timestamps)
+        max_gap: 原始采样间隔超过该值 (秒) 的区间内的网格点标记为无效, 默认 2.5 / fs
+
+    Returns:
+        UniformSeries: 网格从第一个采样开始, 到最后一个采样为止
+    """
+    t = np.maximum.accumulate(np.asarray(timestamps, dtype=float))
+    data = np.asarray(values, dtype=float)
+    if data.shape[-1] != len(t):
+        raise ValueError("时间与数据长度不一致")
+    fs = float(fs) if fs else sample_rate(t)
+    max_gap = max_gap if max_gap is not None else DEFAULT_GAP_FACTOR / fs
+    grid = t[0] + np.arange(int(np.floor((t[-1] - t[0]) * fs + 1e-9)) + 1) / fs
+
+    # 各网格点所在的原始区间 [t[i], t[i + 1]] 和插值权重, 所有通道共用
+    upper = np.clip(np.searchsorted(t, grid, side='right'), 1, len(t) - 1)
+    lower = upper - 1
+    span = t[upper] - t[lower]
+    weight = np.divide(grid - t[lower], span, out=np.zeros_like(grid), where=span > 0)
+    np.clip(weight, 0.0, 1.0, out=weight)
+    resampled = data[..., lower] * (1.0 - weight) + data[..., upper] * weight
+
+    valid = span <= max_gap
+    missing = np.isnan(resampled)
+    if missing.any():
+        # 端点之一缺失时改用另一个端点, 都缺失则保持 NaN; 均标记为无效
+        nearest = np.where(weight < 0.5, lower, upper)
+        other = np.where(weight < 0.5, upper, lower)
+        fallback = np.where(np.isnan(data[..., nearest]), data[..., other], data[..., nearest])
+        resampled = np.where(missing, fallback, resampled)
+        valid &= ~(missing.any(axis=0) if missing.ndim > 1 else missing)
+    return UniformSeries(grid, resampled, fs, valid)
+
+
+def to_uniform(timestamps: Sequence[float], values, tolerance: float = DEFAULT_TOLERANCE,
+               max_gap: Optional[float] = None) -> UniformSeries:
+    """
+    分析算法的统一入口: 已经均匀的数据原样返回 (fs 取间隔中位数), 否则 resample_uniform
+
+    原样返回时 valid 只标记 NaN, 不复制数据。
+    """
+    t = np.asarray(timestamps, dtype=float)
+    data = np.asarray(values, dtype=float)
+    if is_uniform(t, tolerance):
+        nan = np.isnan(data)
+        return UniformSeries(t, data, sample_rate(t), ~(nan.any(axis=0) if nan.ndim > 1 else nan))
+    return resample_uniform(t, data, max_gap=max_gap)
@@ -0,0 +1,207 @@
+"""
+振动烈度评估 (ISO 10816 / ISO 20816)
+
+按标准, 机器状态由一段时间内振动速度的均方根值 (mm/s RMS) 评价, 并按机器类别划分为四个区域:
+A 新机状态, B 可长期运行, C 不宜长期运行, D 可能造成损坏。
+
+SeverityEvaluator 为每个 (设备, 通道) 维护最近 window 个采样平方值的环形缓冲区和累加和,
+每个采样只做一次加减即可更新 RMS (与窗口长度无关), 所有设备和通道在一次数组运算中完成。
+设备各自计数: 某设备本次没有数据 (整行 NaN) 时它的窗口不前进, 单个通道的 NaN 不计入该通道的 RMS。
+"""
+from collections import namedtuple
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .channels import CHANNEL_NAMES
+from .utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+ZONES = ('A', 'B', 'C', 'D')
+ZONE_UNKNOWN = -1  # 窗口内数据不足
+
+# 各机器类别的区域边界 (mm/s RMS): (A/B, B/C, C/D)
+MACHINE_CLASSES = {
+    # ISO 10816-1
+    'I': (0.71, 1.8, 4.5),      # 小型机器 (≤ 15 kW)
+    'II': (1.12, 2.8, 7.1),     # 中型机器 (15 ~ 75 kW), 或安装在专用基础上的 ≤ 300 kW 机器
+    'III': (1.8, 4.5, 11.2),    # 大型机器, 刚性基础
+    'IV': (2.8, 7.1, 18.0),     # 大型机器, 柔性基础
+    # ISO 10816-3 / 20816-3
+    'group1_rigid': (2.3, 4.5, 7.1),      # 300 kW ~ 50 MW
+    'group1_flexible': (3.5, 7.1, 11.0),
+    'group2_rigid': (1.4, 2.8, 4.5),      # 15 ~ 300 kW
+    'group2_flexible': (2.3, 4.5, 7.1),
+}
+DEFAULT_MACHINE_CLASS = 'II'
+DEFAULT_SEVERITY_CHANNELS = ('speed_x', 'speed_y', 'speed_z')
+
+SeverityEvent = namedtuple('SeverityEvent', ['time', 'device', 'channel', 'old_zone', 'new_zone', 'rms'])
+
+
+def zone_name(zone: int) -> str:
+    return ZONES[zone] if 0 <= zone < len(ZONES) else '-'
+
+
+class SeverityEvaluator:
+    """
+    多设备滑动窗口 RMS 与区域分类
+
+    Args:
+        devices: 设备名称列表
+        window: RMS 窗口的采样数 (按设备采样率换算, 例如 20 Hz x 10 s = 200)
+        channels: 参与评估的通道 (默认三轴振动速度)
+        source_channels: evaluate 传入数据的通道顺序 (默认 channels.CHANNEL_NAMES)
+        min_fill: 窗口内有效采样达到 window x min_fill 后才给出区域
+        hysteresis: 回差比例, RMS 低于边界 x (1 - hysteresis) 才回到较好的区域, 避免在边界附近反复切换
+    """
+
+    def __init__(self, devices: Sequence[str], window: int = 200,
+                 channels: Sequence[str] = DEFAULT_SEVERITY_CHANNELS,
+                 source_channels: Sequence[str] = CHANNEL_NAMES, min_fill: float = 0.5,
+                 hysteresis: float = 0.05):
+        if window < 1:
+            raise ValueError("window 必须大于 0")
+        self.devices = list(devices)
+        self.channels = list(channels)
+        self.window = window
+        self.min_count = max(1, int(np.ceil(window * min_fill)))
+        self.hysteresis = hysteresis
+        self._device_index = {name: i for i, name in enumerate(self.devices)}
+        self._columns = np.array([list(source_channels).index(name) for name in self.channels])
+        n_devices, n_channels = len(self.devices), len(self.channels)
+        self.limits = np.tile(np.array(MACHINE_CLASSES[DEFAULT_MACHINE_CLASS]), (n_devices, 1))
+        self._limit_ab, self._limit_bc, self._limit_cd = (self.limits[:, i:i + 1] for i in range(3))  # 视图
+        self._all_rows = np.arange(n_devices)
+        self.machine_classes = [DEFAULT_MACHINE_CLASS] * n_devices
+        # 状态: 平方值缓冲区 (NaN 记为 0, 另记有效标志), 累加和与有效个数
+        self._squares = np.zeros((n_devices, window, n_channels))
+        self._valid = np.zeros((n_devices, window, n_channels), dtype=bool)
+        self._sum = np.zeros((n_devices, n_channels))
+        self._count = np.zeros((n_devices, n_channels), dtype=np.int64)
+        self._position = np.zeros(n_devices, dtype=np.int64)
+        self._updates = 0
+        self.zones = np.full((n_devices, n_channels), ZONE_UNKNOWN, dtype=np.int8)
+
+    @classmethod
+    def from_config(cls, config, devices: Sequence[str],
+                    source_channels: Sequence[str] = CHANNEL_NAMES) -> 'SeverityEvaluator':
+        """
+        从配置创建
+
+        [Severity] 中 window (采样数)、channels (逗号分隔的通道名)、hysteresis、machine_class (默认类别),
+        <设备名>_machine_class 按设备覆盖。source_channels 为 evaluate 传入数据的通道顺序。
+        """
+        channels = [name.strip() for name in
+                    config.get('Severity', 'channels', fallback=','.join(DEFAULT_SEVERITY_CHANNELS)).split(',')
+                    if name.strip()]
+        evaluator = cls(devices, window=config.getint('Severity', 'window', fallback=200), channels=channels,
+                        source_channels=source_channels, hysteresis=config.getfloat('Severity', 'hysteresis', fallback=0.05))
+        default_class = config.get('Severity', 'machine_class', fallback=DEFAULT_MACHINE_CLASS).strip()
+        for device in evaluator.devices:
+            evaluator.set_machine_class(
+                device, config.get('Severity', f'{device}_machine_class', fallback=default_class).strip())
+        return evaluator
+
+    def set_machine_class(self, device: str, machine_class: str):
+        """设置设备的机器类别 (MACHINE_CLASSES 中的键)"""
+        if machine_class not in MACHINE_CLASSES:
+            raise ValueError(f"未知的机器类别: {machine_class}, 可选 {', '.join(MACHINE_CLASSES)}")
+        i = self._device_index[device]
+        self.machine_classes[i] = machine_class
+        self.limits[i] = MACHINE_CLASSES[machine_class]
+
+    @property
+    def rms(self) -> np.ndarray:
+        """当前各 (设备, 通道) 的窗口 RMS, 数据不足时为 NaN"""
+        rms = np.sqrt(np.maximum(self._sum, 0.0) / np.maximum(self._count, 1))
+        rms[self._count < self.min_count] = np.nan
+        return rms
+
+    def evaluate(self, values, timestamp: float) -> List[SeverityEvent]:
+        """
+        加入一次采样并重新分类
+
+        Args:
+            values: 形状为 (设备数, source_channels 数) 的数组; 只有一个设备时也可以传入一维数组
+            timestamp: 采样时间 (秒)
+
+        Returns:
+            list: 区域发生变化的事件
+        """
+        values = np.asarray(values, dtype=float).reshape(len(self.devices), -1)[:, self._columns]
+        squares = values * values
+        valid = squares == squares  # 非 NaN
+        present = valid.any(axis=1)  # 本次有数据的设备
+        if present.all():
+            rows = self._all_rows
+        else:
+            rows = np.flatnonzero(present)
+            if len(rows) == 0:
+                return []
+            squares, valid = squares[rows], valid[rows]
+        np.copyto(squares, 0.0, where=~valid)
+        position = self._position[rows]
+        self._sum[rows] += squares - self._squares[rows, position]
+        self._count[rows] += valid.view(np.int8) - self._valid[rows, position].view(np.int8)
+        self._squares[rows, position] = squares
+        self._valid[rows, position] = valid
+        self._position[rows] = (position + 1) % self.window
+        self._updates += 1
+        if self._updates >= self.window:  # 定期重新求和, 消除累加误差
+            self._sum = self._squares.sum(axis=1)
+            self._updates = 0
+        return self._classify(timestamp)
+
+    def evaluate_batch(self, timestamps: Sequence[float], values) -> List[SeverityEvent]:
+        """按时间顺序加入一批采样, values 形状为 (采样数, 设备数, source_channels 数)"""
+        events = []
+        for timestamp, row in zip(timestamps, np.asarray(values, dtype=float)):
+            events.extend(self.evaluate(row, timestamp))
+        return events
+
+    def _classify(self, timestamp: float) -> List[SeverityEvent]:
+        rms = self.rms
+        # NaN 与任何边界比较都为 False, 之后统一标记为 ZONE_UNKNOWN
+        zones = ((rms >= self._limit_ab).view(np.int8) + (rms >= self._limit_bc).view(np.int8)
+                 + (rms >= self._limit_cd).view(np.int8))
+        better = zones < self.zones
+        if better.any():  # 向较好区域变化时按降低后的边界判断
+            relaxed = (rms[:, :, None] >= self.limits[:, None, :] * (1 - self.hysteresis)).sum(axis=2)
+            zones[better] = np.minimum(self.zones, relaxed)[better]
+        zones[np.isnan(rms)] = ZONE_UNKNOWN
+        changed = zones != self.zones
+        if not changed.any():
+            return []
+        events = []
+        for d, c in zip(*np.nonzero(changed)):
+            event = SeverityEvent(timestamp, self.devices[d], self.channels[c],
+                                  zone_name(self.zones[d, c]), zone_name(zones[d, c]), float(rms[d, c]))
+            events.append(event)
+            if zones[d, c] >= 2 and zones[d, c] > self.zones[d, c]:
+                logger.warning(f"振动烈度: {event.device} {event.channel} 进入区域 {event.new_zone} "
+                               f"({event.rms:.2f} mm/s RMS, 类别 {self.machine_classes[d]})")
+            else:
+                logger.info(f"振动烈度: {event.device} {event.channel} {event.old_zone} -> {event.new_zone}")
+        self.zones = zones
+        return events
+
+    def device_zone(self, device: str) -> int:
+        """设备的总体区域 (各通道中最差的), 数据不足时为 ZONE_UNKNOWN"""
+        return int(self.zones[self._device_index[device]].max())
+
+    def device_summary(self, device: str) -> Dict[str, Optional[float]]:
+        """设备各通道的窗口 RMS (mm/s), 数据不足时为 None"""
+        rms = self.rms[self._device_index[device]]
+        return {name: None if np.isnan(value) else float(value) for name, value in zip(self.channels, rms)}
+
+    def reset(self):
+        """清除窗口和区域"""
+        self._squares[:] = 0.0
+        self._valid[:] = False
+        self._sum[:] = 0.0
+        self._count[:] = 0
+        self._position[:] = 0
+        self._updates = 0
+        self.zones[:] = ZONE_UNKNOWN
@@ -0,0 +1,411 @@
+"""
+长期趋势存储
+
+采样在写入时连续汇总为多级时间桶 (默认 1 秒 / 1 分钟 / 1 小时), 每个桶保存各通道的最小值、最大值、均值和 RMS,
+追加写入定长记录文件; 查询时选用仍满足所需分辨率的最粗一级, 一年的趋势图只需读取几千条小时记录。
+
+目录结构: <directory>/<设备名>/
+    meta.json                通道 (设备数据键, 顺序同 channels.RECORD_KEYS) 和级别
+    <级别秒数>s_<段号>.bin    该级别的记录, 按桶开始时间递增; 段号 = 桶开始时间 // 段长度
+
+记录格式见 record_dtype: 桶开始时间 (float64 秒), 采样数 (uint32), 各通道 min / max / mean / rms (float32)。
+高一级的桶由低一级已完成的桶合并得到 (内存中保留各通道精确的计数、和与平方和), 不重复处理原始采样。
+进程异常退出时文件末尾可能有不完整的记录, 读取时忽略, 再次打开写入时截掉; 尚未完成的桶在 close() 时写入,
+重新启动后同一个桶的两条记录在读取时合并。
+"""
+import json
+import os
+import threading
+import time
+from collections import namedtuple
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from .channels import CHANNELS, RECORD_KEYS
+from .utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+FORMAT_VERSION = 1
+DEFAULT_LEVELS = (1, 60, 3600)
+# 每个段文件覆盖的时间 (秒), 使单个文件保持在几十 MB 以内
+SEGMENT_SECONDS = {1: 86400, 60: 86400 * 32, 3600: 86400 * 366}
+
+# 查询结果: level 为所用级别 (秒), time 形状 (n,), 其余形状 (n, 所选通道数)
+TrendData = namedtuple('TrendData', ['level', 'time', 'count', 'min', 'max', 'mean', 'rms'])
+
+_KEY_BY_NAME = {channel.name: channel.key for channel in CHANNELS}
+_KEY_BY_NAME.update({channel.label: channel.key for channel in CHANNELS})
+
+
+def record_dtype(channels: int) -> np.dtype:
+    return np.dtype([
+        ('time', '<f8'),
+        ('count', '<u4'),
+        ('min', '<f4', (channels,)),
+        ('max', '<f4', (channels,)),
+        ('mean', '<f4', (channels,)),
+        ('rms', '<f4', (channels,)),
+    ])
+
+
+def segment_seconds(level: int) -> int:
+    return SEGMENT_SECONDS.get(level, max(86400, level * 1000))
+
+
+def trend_directory(config) -> str:
+    """[Trend] directory, 留空时为 data_record/trend (与记录文件同一目录)"""
+    directory = config.get('Trend', 'directory', fallback='').strip()
+    return directory or os.path.join(os.path.dirname(__file__), 'data_record', 'trend')
+
+
+class _Aggregate:
+    """一组时间桶的精确汇总 (内部类): time 形状 (n,), 其余形状 (n, 通道数)"""
+
+    __slots__ = ('time', 'count', 'min', 'max', 'sum', 'sumsq')
+
+    def __init__(self, time, count, min_, max_, sum_, sumsq):
+        self.time, self.count, self.min, self.max, self.sum, self.sumsq = time, count, min_, max_, sum_, sumsq
+
+    @classmethod
+    def from_samples(cls, timestamps: np.ndarray, values: np.ndarray) -> '_Aggregate':
+        """每个原始采样作为只含一个采样的桶, NaN 不计入"""
+        valid = ~np.isnan(values)
+        filled = np.where(valid, values, 0.0)
+        return cls(timestamps, valid.astype(np.int64), np.where(valid, values, np.inf),
+                   np.where(valid, values, -np.inf), filled, filled * filled)
+
+    @classmethod
+    def concatenate(cls, parts: Sequence['_Aggregate']) -> '_Aggregate':
+        return cls(*(np.concatenate([getattr(part, name) for part in parts]) for name in cls.__slots__))
+
+    def __len__(self):
+        return len(self.time)
+
+    def take(self, index: slice) -> '_Aggregate':
+        return _Aggregate(*(getattr(self, name)[index] for name in self.__slots__))
+
+    def merge_first(self, other: '_Aggregate'):
+        """把只有一个桶的 other 并入第一个桶"""
+        self.count[0] += other.count[0]
+        np.minimum(self.min[0], other.min[0], out=self.min[0])
+        np.maximum(self.max[0], other.max[0], out=self.max[0])
+        self.sum[0] += other.sum[0]
+        self.sumsq[0] += other.sumsq[0]
+
+    def to_records(self, dtype: np.dtype) -> np.ndarray:
+        records = np.empty(len(self), dtype=dtype)
+        records['time'] = self.time
+        records['count'] = self.count.max(axis=1)
+        empty = self.count == 0
+        with np.errstate(invalid='ignore', divide='ignore'):
+            records['min'] = np.where(empty, np.nan, self.min)
+            records['max'] = np.where(empty, np.nan, self.max)
+            records['mean'] = self.sum / self.count
+            records['rms'] = np.sqrt(self.sumsq / self.count)
+        return records
+
+
+class _LevelAccumulator:
+    """单个级别的滚动汇总 (内部类): 保留当前未完成的桶, 输入按时间递增的汇总行, 返回已完成的桶"""
+
+    def __init__(self, seconds: int):
+        self.seconds = seconds
+        self.bucket = None  # 当前桶编号 (开始时间 // seconds)
+        self.open = None    # 当前桶的汇总 (1 行)
+
+    def add(self, rows: _Aggregate) -> Optional[_Aggregate]:
+        ids = np.floor(rows.time / self.seconds).astype(np.int64)
+        if self.bucket is not None:
+            ids = np.maximum(ids, self.bucket)  # 时间回退的采样并入当前桶
+        ids = np.maximum.accumulate(ids)
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(ids)) + 1))
+        grouped = _Aggregate(ids[starts] * float(self.seconds), np.add.reduceat(rows.count, starts),
+                             np.minimum.reduceat(rows.min, starts), np.maximum.reduceat(rows.max, starts),
+                             np.add.reduceat(rows.sum, starts), np.add.reduceat(rows.sumsq, starts))
+        if self.open is not None:
+            if ids[0] == self.bucket:
+                grouped.merge_first(self.open)
+            else:
+                grouped = _Aggregate.concatenate([self.open, grouped])
+        self.open = grouped.take(slice(-1, None))
+        self.bucket = int(ids[-1])
+        return grouped.take(slice(None, -1)) if len(grouped) > 1 else None
+
+    def flush(self) -> Optional[_Aggregate]:
+        """取出当前未完成的桶"""
+        pending, self.open, self.bucket = self.open, None, None
+        return pending
+
+
+class _DeviceWriter:
+    """单个设备的多级汇总和文件追加 (内部类)"""
+
+    def __init__(self, directory: str, levels: Sequence[int], dtype: np.dtype, retention: Dict[int, float]):
+        self.directory = directory
+        self.dtype = dtype
+        self.retention = retention
+        self.accumulators = [_LevelAccumulator(level) for level in levels]
+        self.files = {}  # 级别 -> (段号, 文件对象)
+
+    def add(self, timestamps: np.ndarray, values: np.ndarray):
+        rows = _Aggregate.from_samples(timestamps, values)
+        for accumulator in self.accumulators:
+            rows = accumulator.add(rows)
+            if rows is None:
+                break
+            self._write(accumulator.seconds, rows)
+
+    def _write(self, level: int, rows: _Aggregate):
+        records = rows.to_records(self.dtype)
+        segments = np.floor(records['time'] / segment_seconds(level)).astype(np.int64)
+        bounds = np.concatenate(([0], np.flatnonzero(np.diff(segments)) + 1, [len(records)]))
+        for begin, end in zip(bounds[:-1], bounds[1:]):
+            f = self._segment_file(level, int(segments[begin]))
+            f.write(records[begin:end].tobytes())
+            f.flush()
+
+    def _segment_file(self, level: int, segment: int):
+        current = self.files.get(level)
+        if current is not None and current[0] == segment:
+            return current[1]
+        if current is not None:
+            current[1].close()
+        path = os.path.join(self.directory, f"{level}s_{segment}.bin")
+        f = open(path, 'ab')
+        partial = f.tell() % self.dtype.itemsize
+        if partial:  # 上次异常退出时写了一半的记录
+            f.truncate(f.tell() - partial)
+            f.seek(0, os.SEEK_END)
+            logger.warning(f"趋势文件末尾有不完整的记录, 已截断: {path}")
+        self.files[level] = (segment, f)
+        self._apply_retention(level, segment)
+        return f
+
+    def _apply_retention(self, level: int, current_segment: int):
+        days = self.retention.get(level)
+        if not days:
+            return
+        size = segment_seconds(level)
+        oldest = int(((current_segment + 1) * size - days * 86400) // size)
+        for segment, path in _segment_files(self.directory, level):
+            if segment < oldest:
+                os.remove(path)
+                logger.info(f"已删除过期的趋势文件: {path}")
+
+    def close(self):
+        # 未完成的桶写入本级, 并连同本级新完成的桶并入上一级, 保证各级别都包含最后一段数据
+        carry = None
+        for accumulator in self.accumulators:
+            parts = []
+            if carry is not None:
+                completed = accumulator.add(carry)
+                if completed is not None:
+                    parts.append(completed)
+            pending = accumulator.flush()
+            if pending is not None:
+                parts.append(pending)
+            if not parts:
+                break
+            carry = _Aggregate.concatenate(parts)
+            self._write(accumulator.seconds, carry)
+        for _, f in self.files.values():
+            f.close()
+        self.files = {}
+
+
+def _segment_files(directory: str, level: int) -> List:
+    """某级别的段文件 [(段号, 路径)], 按段号排序"""
+    prefix = f"{level}s_"
+    result = []
+    for name in os.listdir(directory) if os.path.isdir(directory) else ():
+        if name.startswith(prefix) and name.endswith('.bin'):
+            try:
+                result.append((int(name[len(prefix):-4]), os.path.join(directory, name)))
+            except ValueError:
+                continue
+    return sorted(result)
+
+
+def _merge_restarted(records: np.ndarray) -> np.ndarray:
+    """
+    合并开始时间相同的记录: 程序在某个桶中途关闭后又重新启动时, 同一个桶会写入两条记录。
+    均值和 RMS 按采样数加权 (采样数取各通道的最大值, 通道缺失数据不一致时为近似值)。
+    """
+    times = records['time']
+    if len(times) < 2 or not (times[1:] == times[:-1]).any():
+        return records
+    starts = np.concatenate(([0], np.flatnonzero(times[1:] != times[:-1]) + 1))
+    weights = records['count'].astype(float)[:, None]
+    merged = records[starts].copy()
+    merged['count'] = np.add.reduceat(records['count'], starts)
+    merged['min'] = np.fmin.reduceat(records['min'], starts)
+    merged['max'] = np.fmax.reduceat(records['max'], starts)
+    total = np.maximum(merged['count'].astype(float), 1.0)[:, None]
+    with np.errstate(invalid='ignore'):
+        merged['mean'] = np.add.reduceat(np.nan_to_num(records['mean']) * weights, starts) / total
+        merged['rms'] = np.sqrt(np.add.reduceat(np.nan_to_num(records['rms']) ** 2 * weights, starts) / total)
+    return merged
+
+
+class TrendStore:
+    """
+    多设备长期趋势存储
+
+    Args:
+        directory: 根目录, 每个设备一个子目录
+        levels: 汇总级别 (秒), 由细到粗, 每级应为上一级的整数倍
+        retention: 级别 -> 保留天数, 例如 {1: 30} 表示 1 秒级只保留最近 30 天; 未列出的级别永久保留
+        channels: 写入数据的通道 (设备数据键), 默认 channels.RECORD_KEYS; 须与采样监听器数组的列一致,
+                  设备有派生通道时为 DeviceModel.record_keys
+    """
+
+    def __init__(self, directory: str, levels: Sequence[int] = DEFAULT_LEVELS,
+                 retention: Optional[Dict[int, float]] = None, channels: Sequence[str] = RECORD_KEYS):
+        levels = sorted(int(level) for level in levels)
+        if not levels or levels[0] < 1 or any(b % a for a, b in zip(levels, levels[1:])):
+            raise ValueError(f"级别必须为正整数且每级是上一级的整数倍: {levels}")
+        self.directory = directory
+        self.levels = levels
+        self.retention = dict(retention or {})
+        self.channels = list(channels)
+        self.dtype = record_dtype(len(self.channels))
+        self._writers: Dict[str, _DeviceWriter] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config, channels: Sequence[str] = RECORD_KEYS) -> 'TrendStore':
+        """[Trend] 中 directory、levels (逗号分隔的秒数)、<级别>s_retention_days; channels 同构造函数"""
+        levels = [int(level) for level in
+                  config.get('Trend', 'levels', fallback=','.join(map(str, DEFAULT_LEVELS))).split(',') if level.strip()]
+        retention = {level: config.getfloat('Trend', f'{level}s_retention_days', fallback=0) for level in levels}
+        return cls(trend_directory(config), levels, {k: v for k, v in retention.items() if v > 0}, channels)
+
+    # ---- 写入 ----
+
+    def _device_directory(self, device: str) -> str:
+        return os.path.join(self.directory, device)
+
+    def _writer(self, device: str) -> _DeviceWriter:
+        writer = self._writers.get(device)
+        if writer is not None:
+            return writer
+        with self._lock:
+            if device not in self._writers:
+                directory = self._device_directory(device)
+                os.makedirs(directory, exist_ok=True)
+                meta_path = os.path.join(directory, 'meta.json')
+                meta = {'version': FORMAT_VERSION, 'channels': self.channels, 'levels': self.levels}
+                if os.path.exists(meta_path):
+                    with open(meta_path, encoding='utf-8') as f:
+                        existing = json.load(f)
+                    if existing.get('channels') != self.channels or existing.get('version') != FORMAT_VERSION:
+                        raise ValueError(f"趋势目录 {directory} 的通道或格式与当前配置不一致")
+                with open(meta_path, 'w', encoding='utf-8') as f:
+                    json.dump(meta, f)
+                self._writers[device] = _DeviceWriter(directory, self.levels, self.dtype, self.retention)
+        return self._writers[device]
+
+    def append(self, device: str, timestamps: Sequence[float], values) -> None:
+        """
+        写入一批采样
+
+        Args:
+            timestamps: 形状 (n,), 秒 (time.time()), 应按时间递增
+            values: 形状 (n, 通道数), 通道顺序同 channels
+        """
+        timestamps = np.asarray(timestamps, dtype=float)
+        values = np.asarray(values, dtype=float).reshape(len(timestamps), len(self.channels))
+        if len(timestamps):
+            self._writer(device).add(timestamps, values)
+
+    def on_device_samples(self, device, timestamps, values):
+        """DeviceModel 采样监听器"""
+        self.append(device.device_name, timestamps, values)
+
+    def attach(self, device):
+        """连续汇总某设备的采样"""
+        device.add_listener(self.on_device_samples)
+
+    def detach(self, device):
+        device.remove_listener(self.on_device_samples)
+
+    def close(self):
+        """写入各级别未完成的桶并关闭文件"""
+        with self._lock:
+            for writer in self._writers.values():
+                writer.close()
+            self._writers = {}
+
+    # ---- 查询 ----
+
+    def devices(self) -> List[str]:
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(name for name in os.listdir(self.directory)
+                      if os.path.exists(os.path.join(self.directory, name, 'meta.json')))
+
+    def choose_level(self, resolution: Optional[float]) -> int:
+        """不超过 resolution (秒/点) 的最粗级别; 未指定或比最细级别还细时为最细级别"""
+        if resolution is None:
+            return self.levels[0]
+        candidates = [level for level in self.levels if level <= resolution]
+        return candidates[-1] if candidates else self.levels[0]
+
+    def _columns(self, channels: Optional[Iterable[str]]) -> List[int]:
+        if channels is None:
+            return list(range(len(self.channels)))
+        columns = []
+        for name in channels:
+            key = _KEY_BY_NAME.get(name, name)  # 通道名、中文标签或设备数据键
+            if key not in self.channels:
+                raise ValueError(f"未知的通道: {name}")
+            columns.append(self.channels.index(key))
+        return columns
+
+    def read_level(self, device: str, level: int, start: float, end: float) -> np.ndarray:
+        """读取某级别 [start, end) 内的记录 (结构化数组)"""
+        directory = self._device_directory(device)
+        size = segment_seconds(level)
+        first, last = int(start // size), int(end // size)
+        parts = []
+        for segment, path in _segment_files(directory, level):
+            if segment < first or segment > last:
+                continue
+            count = os.path.getsize(path) // self.dtype.itemsize  # 忽略末尾不完整的记录
+            if count == 0:
+                continue
+            records = np.memmap(path, dtype=self.dtype, mode='r', shape=(count,))
+            times = records['time']
+            lo, hi = np.searchsorted(times, start, 'left'), np.searchsorted(times, end, 'left')
+            parts.append(np.array(records[lo:hi]))
+            del records
+        if not parts:
+            return np.empty(0, dtype=self.dtype)
+        return _merge_restarted(np.concatenate(parts))
+
+    def query(self, device: str, start: float, end: float, resolution: Optional[float] = None,
+              max_points: Optional[int] = None, channels: Optional[Iterable[str]] = None) -> TrendData:
+        """
+        查询趋势
+
+        Args:
+            start, end: 时间范围 (秒, time.time())
+            resolution: 所需分辨率 (秒/点); 给出 max_points 时取 (end - start) / max_points
+            channels: 通道名、中文标签或设备数据键, 默认全部
+
+        选用不超过所需分辨率的最粗级别; 该级别在范围内没有数据 (例如已超过保留期) 时依次改用更粗的级别。
+        """
+        if max_points:
+            resolution = (end - start) / max_points
+        columns = self._columns(channels)
+        chosen = self.choose_level(resolution)
+        records = None
+        for level in self.levels[self.levels.index(chosen):]:
+            records = self.read_level(device, level, start, end)
+            if len(records):
+                chosen = level
+                break
+        return TrendData(chosen, records['time'], records['count'], records['min'][:, columns],
+                         records['max'][:, columns], records['mean'][:, columns], records['rms'][:, columns])
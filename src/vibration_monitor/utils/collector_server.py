@@ -1,58 +1,368 @@
+"""
+远程采集服务器 (asyncio)
 
-# comm_socket.py
-import socket
+单个事件循环接受任意多个远程采集端的 TCP 连接, 接收按长度分帧的二进制采样批次,
+写入对应的 RemoteDevice (与本地设备相同的 get_data 接口), 并可回调给记录、分析等消费者。
+
+报文格式 (长度和计数为大端整数, 采样数据为小端 IEEE 754):
+    帧          = 消息长度 (uint32, 不含自身) + 消息
+    消息        = 版本 (uint8) + 类型 (uint8) + 消息体
+    HELLO 消息体 = 设备名称 (UTF-8); 连接后的第一条消息, 声明后续批次所属设备
+    BATCH 消息体 = 通道数 (uint16) + 采样数 (uint32)
+                  + 时间戳 float64[采样数] + 数值 float32[采样数 x 通道数] (按采样行存放)
+通道顺序同 channels.RECORD_KEYS。
+
+同一编码也用于向下游发布实时数据 (utils/publisher.py):
+    SUBSCRIBE 消息体 = 订阅条件 (UTF-8 JSON)
+    SAMPLES 消息体   = 设备名称长度 (uint8) + 设备名称 (UTF-8) + BATCH 消息体
+
+背压: 解码后的批次进入有界队列, 由单个任务依次交给设备和消费者; 队列满时连接处理协程
+停止读取 socket, TCP 接收窗口随之填满, 发送端的 drain() 会等待, 而不是在服务端无限堆积。
+"""
+import asyncio
+import json
+import struct
 import threading
 import time
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from ..device.remote_device import RemoteDevice
+from ..exceptions import ProtocolError
+from .logger import setup_logger
+from .metrics import metrics
+
+logger = setup_logger(__name__)
+
+PROTOCOL_VERSION = 1
+MSG_HELLO = 1
+MSG_BATCH = 2
+MSG_SUBSCRIBE = 3
+MSG_SAMPLES = 4
+FRAME_HEADER = struct.Struct(">I")
+MESSAGE_HEADER = struct.Struct(">BB")
+BATCH_HEADER = struct.Struct(">HI")
+TIMESTAMP_DTYPE = np.dtype("<f8")
+VALUE_DTYPE = np.dtype("<f4")
+MAX_FRAME_BYTES = 16 * 1024 * 1024
+MAX_CLOSED_CONNECTIONS = 1024  # 统计中最多保留的已关闭连接数
+
+
+def encode_hello(device_name: str) -> bytes:
+    """编码 HELLO 帧"""
+    message = MESSAGE_HEADER.pack(PROTOCOL_VERSION, MSG_HELLO) + device_name.encode("utf-8")
+    return FRAME_HEADER.pack(len(message)) + message
+
+
+def encode_batch(timestamps, values) -> bytes:
+    """
+    编码一个采样批次帧
+
+    Args:
+        timestamps: 形状 (n,) 的采样时间 (秒)
+        values: 形状 (n, 通道数) 的采样值
+    """
+    return _encode_batch(MSG_BATCH, b"", timestamps, values)
+
+
+def encode_samples(device_name: str, timestamps, values) -> bytes:
+    """编码一个带设备名称的采样帧 (发布给订阅者)"""
+    name = device_name.encode("utf-8")[:255]
+    return _encode_batch(MSG_SAMPLES, bytes((len(name),)) + name, timestamps, values)
+
+
+def encode_subscribe(devices=None, channels=None, decimation: int = 1) -> bytes:
+    """编码订阅请求帧, devices / channels 为 None 表示全部"""
+    body = json.dumps({"devices": devices, "channels": channels, "decimation": decimation}).encode("utf-8")
+    message = MESSAGE_HEADER.pack(PROTOCOL_VERSION, MSG_SUBSCRIBE) + body
+    return FRAME_HEADER.pack(len(message)) + message
+
+
+def _encode_batch(msg_type: int, prefix: bytes, timestamps, values) -> bytes:
+    timestamps = np.ascontiguousarray(timestamps, dtype=TIMESTAMP_DTYPE)
+    values = np.ascontiguousarray(values, dtype=VALUE_DTYPE)
+    if values.ndim != 2 or values.shape[0] != timestamps.shape[0]:
+        raise ValueError(f"采样数组形状不匹配: timestamps {timestamps.shape}, values {values.shape}")
+    body = BATCH_HEADER.pack(values.shape[1], values.shape[0])
+    length = MESSAGE_HEADER.size + len(prefix) + len(body) + timestamps.nbytes + values.nbytes
+    return b"".join((FRAME_HEADER.pack(length), MESSAGE_HEADER.pack(PROTOCOL_VERSION, msg_type),
+                     prefix, body, timestamps.tobytes(), values.tobytes()))
+
+
+async def read_message(reader: asyncio.StreamReader, max_frame_bytes: int = MAX_FRAME_BYTES) -> bytes:
+    """
+    读取一帧并返回其中的消息 (不含长度前缀)
+
+    Raises:
+        asyncio.IncompleteReadError: 对端关闭连接
+        ProtocolError: 帧长度超过上限
+    """
+    (length,) = FRAME_HEADER.unpack(await reader.readexactly(FRAME_HEADER.size))
+    if length > max_frame_bytes:
+        raise ProtocolError(f"帧长度 {length} 超过上限 {max_frame_bytes}")
+    return await reader.readexactly(length)
+
+
+def decode_message(message: bytes):
+    """
+    解码一条消息 (不含长度前缀)
+
+    Returns:
+        tuple: (MSG_HELLO, 设备名称), (MSG_BATCH, (timestamps, values)),
+               (MSG_SUBSCRIBE, 订阅条件 dict) 或 (MSG_SAMPLES, (设备名称, timestamps, values));
+               数组直接引用 message 的内存
+
+    Raises:
+        ProtocolError: 版本、类型或长度不正确
+    """
+    if len(message) < MESSAGE_HEADER.size:
+        raise ProtocolError("消息过短")
+    version, msg_type = MESSAGE_HEADER.unpack_from(message)
+    if version != PROTOCOL_VERSION:
+        raise ProtocolError(f"不支持的协议版本: {version}")
+    offset = MESSAGE_HEADER.size
+    if msg_type == MSG_HELLO:
+        try:
+            return MSG_HELLO, bytes(message[offset:]).decode("utf-8")
+        except UnicodeDecodeError as e:
+            raise ProtocolError(f"设备名称不是有效的 UTF-8: {e}") from e
+    if msg_type == MSG_BATCH:
+        return MSG_BATCH, _decode_batch(message, offset)
+    if msg_type == MSG_SAMPLES:
+        if len(message) < offset + 1 or len(message) < offset + 1 + message[offset]:
+            raise ProtocolError("设备名称不完整")
+        name_end = offset + 1 + message[offset]
+        device_name = bytes(message[offset + 1:name_end]).decode("utf-8", errors="replace")
+        return MSG_SAMPLES, (device_name,) + _decode_batch(message, name_end)
+    if msg_type == MSG_SUBSCRIBE:
+        try:
+            request = json.loads(bytes(message[offset:]).decode("utf-8"))
+        except ValueError as e:
+            raise ProtocolError(f"订阅请求格式错误: {e}") from e
+        if not isinstance(request, dict):
+            raise ProtocolError("订阅请求应为 JSON 对象")
+        return MSG_SUBSCRIBE, request
+    raise ProtocolError(f"未知的消息类型: {msg_type}")
 
 
-class SocketMaster:
-    def __init__(self, host='127.0.0.1', port=50007, on_message=None):
+def _decode_batch(message: bytes, offset: int):
+    if len(message) < offset + BATCH_HEADER.size:
+        raise ProtocolError("批次头不完整")
+    n_channels, n_samples = BATCH_HEADER.unpack_from(message, offset)
+    offset += BATCH_HEADER.size
+    expected = offset + n_samples * (TIMESTAMP_DTYPE.itemsize + n_channels * VALUE_DTYPE.itemsize)
+    if len(message) != expected:
+        raise ProtocolError(f"批次长度错误: 应为 {expected} 字节, 实际 {len(message)} 字节")
+    timestamps = np.frombuffer(message, TIMESTAMP_DTYPE, n_samples, offset)
+    offset += timestamps.nbytes
+    values = np.frombuffer(message, VALUE_DTYPE, n_samples * n_channels, offset).reshape(n_samples, n_channels)
+    return timestamps, values
+
+
+class ConnectionStats:
+    """单个连接的统计"""
+
+    def __init__(self, peer: str):
+        self.peer = peer
+        self.device_name: Optional[str] = None
+        self.connected_at = time.time()
+        self.bytes_received = 0
+        self.batches = 0
+        self.samples = 0
+        self.protocol_errors = 0
+        self.backpressure_seconds = 0.0  # 因队列已满而暂停读取的累计时间
+        self.closed = False
+
+    def as_dict(self) -> Dict:
+        elapsed = max(time.time() - self.connected_at, 1e-9)
+        return {
+            "peer": self.peer,
+            "device": self.device_name,
+            "bytes": self.bytes_received,
+            "batches": self.batches,
+            "samples": self.samples,
+            "samples_per_s": self.samples / elapsed,
+            "protocol_errors": self.protocol_errors,
+            "backpressure_seconds": self.backpressure_seconds,
+            "closed": self.closed,
+        }
+
+
+class CollectorServer:
+    """
+    远程采集服务器
+
+    Args:
+        host, port: 监听地址, port 为 0 时由系统分配 (启动后更新)
+        devices: 设备名称 -> 设备 的字典; 收到未登记设备的数据时自动创建 RemoteDevice 并加入
+        on_batch: 可选回调 (设备, timestamps, values), 在事件循环线程中按到达顺序调用, 不应阻塞
+        max_pending_batches: 待处理批次队列长度, 决定背压触发点
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 50007, devices: Dict = None,
+                 on_batch: Callable = None, max_pending_batches: int = 256,
+                 max_frame_bytes: int = MAX_FRAME_BYTES):
         self.host = host
         self.port = port
-        self.on_message = on_message
-        self._running = False
-        self._server_socket = None
-
-    def start(self):
-        threading.Thread(target=self._run, daemon=True).start()
-
-    def _run(self):
-        self._running = True
-        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-            self._server_socket = s
-            s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-            s.bind((self.host, self.port))
-            s.listen()
-            print(f"[主站] 监听中 {self.host}:{self.port}...")
-            while self._running:
-                try:
-                    s.settimeout(1.0)  # 防止长时间阻塞
-                    conn, addr = s.accept()
-                    threading.Thread(target=self._handle_client, args=(conn,), daemon=True).start()
-                except socket.timeout:
-                    continue
-                except OSError:
-                    break  # socket 已关闭
-
-    def _handle_client(self, conn):
-        with conn:
-            while self._running:
-                try:
-                    data = conn.recv(1024)
-                    if not data:
-                        break
-                    message = data.decode()
-                    print(f"[主站] 收到消息: {message}")
-                    if self.on_message:
-                        self.on_message(message)
-                except:
-                    break
+        self.devices = devices if devices is not None else {}
+        self.on_batch = on_batch
+        self.max_pending_batches = max_pending_batches
+        self.max_frame_bytes = max_frame_bytes
+        self.connections: List[ConnectionStats] = []
+        self._queue: Optional[asyncio.Queue] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+        self._m_samples = metrics.counter("collector.samples")
+        self._m_batches = metrics.counter("collector.batches")
+        self._m_connections = metrics.gauge("collector.connections")
+        self._m_queue_depth = metrics.gauge("collector.queue_depth")
+        self._m_batch_ns = metrics.histogram("collector.batch_ns")
+
+    async def serve(self):
+        """启动监听并一直运行, 直到任务被取消"""
+        self._queue = asyncio.Queue(maxsize=self.max_pending_batches)
+        consumer = asyncio.ensure_future(self._consume())
+        try:
+            self._server = await asyncio.start_server(self._handle_client, self.host, self.port,
+                                                      backlog=4096, limit=1024 * 1024)
+            self.port = self._server.sockets[0].getsockname()[1]
+            self._ready.set()
+            logger.info(f"采集服务器已启动: {self.host}:{self.port}")
+            async with self._server:
+                await self._server.serve_forever()
+        finally:
+            consumer.cancel()
+            await asyncio.gather(consumer, return_exceptions=True)
+
+    def start(self) -> int:
+        """在后台线程中启动服务器, 返回监听端口"""
+        self._thread = threading.Thread(target=self._run_in_thread, daemon=True)
+        self._thread.start()
+        if not self._ready.wait(timeout=5):
+            raise RuntimeError("采集服务器启动超时")
+        return self.port
 
     def stop(self):
-        print("[主站] 正在关闭 socket...")
-        self._running = False
-        if self._server_socket:
-            self._server_socket.close()
-            self._server_socket = None
-        print("[主站] socket 已关闭")
+        """停止后台线程中的服务器"""
+        if self._loop is not None and self._server is not None:
+            self._loop.call_soon_threadsafe(self._server.close)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        logger.info("采集服务器已停止")
+
+    def stats(self) -> List[Dict]:
+        """各连接的统计"""
+        return [connection.as_dict() for connection in list(self.connections)]
+
+    def get_device(self, name: str):
+        """按名称取设备, 不存在时创建 RemoteDevice"""
+        device = self.devices.get(name)
+        if device is None:
+            device = RemoteDevice(name, f"collector://{self.host}:{self.port}")
+            device.open_device()
+            self.devices[name] = device
+            logger.info(f"新的远程设备: {name}")
+        return device
+
+    def _run_in_thread(self):
+        self._loop = asyncio.new_event_loop()
+        try:
+            self._loop.run_until_complete(self.serve())
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._loop.close()
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        peer = writer.get_extra_info("peername")
+        stats = ConnectionStats(f"{peer[0]}:{peer[1]}" if peer else "?")
+        if len(self.connections) > 2 * MAX_CLOSED_CONNECTIONS:
+            closed = [c for c in self.connections if c.closed]
+            drop = set(map(id, closed[:len(closed) - MAX_CLOSED_CONNECTIONS]))
+            self.connections = [c for c in self.connections if id(c) not in drop]
+        self.connections.append(stats)
+        self._m_connections.set(sum(not c.closed for c in self.connections))
+        device = None
+        try:
+            while True:
+                message = await read_message(reader, self.max_frame_bytes)
+                stats.bytes_received += FRAME_HEADER.size + len(message)
+                msg_type, body = decode_message(message)
+                if msg_type == MSG_HELLO:
+                    stats.device_name = body
+                    device = self.get_device(body)
+                    continue
+                if msg_type != MSG_BATCH:
+                    raise ProtocolError(f"采集连接不接受此类消息: {msg_type}")
+                if device is None:
+                    raise ProtocolError("收到采样批次前未声明设备 (HELLO)")
+                if self._queue.full():
+                    start = time.monotonic()
+                    await self._queue.put((stats, device, body))
+                    stats.backpressure_seconds += time.monotonic() - start
+                else:
+                    self._queue.put_nowait((stats, device, body))
+        except asyncio.IncompleteReadError:
+            pass  # 对端关闭连接
+        except ProtocolError as e:
+            stats.protocol_errors += 1
+            logger.error(f"采集连接 {stats.peer} 报文错误, 断开连接: {e}")
+        except ConnectionError as e:
+            logger.warning(f"采集连接 {stats.peer} 异常断开: {e}")
+        finally:
+            stats.closed = True
+            self._m_connections.set(sum(not c.closed for c in self.connections))
+            writer.close()
+
+    async def _consume(self):
+        """按到达顺序把批次交给设备和消费者"""
+        queue = self._queue
+        while True:
+            stats, device, (timestamps, values) = await queue.get()
+            start = time.perf_counter_ns()
+            try:
+                device.ingest(timestamps, values)
+                if self.on_batch is not None:
+                    self.on_batch(device, timestamps, values)
+            except Exception as e:
+                logger.exception(f"处理采样批次失败 ({stats.device_name}): {e}")
+            n = len(timestamps)
+            stats.batches += 1
+            stats.samples += n
+            self._m_batches.inc()
+            self._m_samples.inc(n)
+            self._m_queue_depth.set(queue.qsize())
+            self._m_batch_ns.record(time.perf_counter_ns() - start)
+
+
+class CollectorClient:
+    """远程采集端: 连接服务器, 声明设备名称后发送采样批次 (asyncio)"""
+
+    def __init__(self, host: str, port: int, device_name: str):
+        self.host = host
+        self.port = port
+        self.device_name = device_name
+        self._writer: Optional[asyncio.StreamWriter] = None
+
+    async def connect(self):
+        _, self._writer = await asyncio.open_connection(self.host, self.port)
+        self._writer.write(encode_hello(self.device_name))
+        await self._writer.drain()
+
+    async def send_batch(self, timestamps, values):
+        """发送一个批次; 服务器繁忙时在 drain() 处等待 (背压)"""
+        self._writer.write(encode_batch(timestamps, values))
+        await self._writer.drain()
 
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except ConnectionError:
+                pass
+            self._writer = None
@@ -1,19 +1,83 @@
+import atexit
 import logging
+import logging.handlers
 import os
-from ..config import Config  # 导入 Config 类, 修正相对导入
+import queue
+import threading
+import time
+from ..config import get_config  # 共享配置实例, config.ini应在项目根目录
 
-# 创建 Config 实例,config.ini应在项目根目录
-config = Config()
+PACKAGE_LOGGER = 'vibration_monitor'  # 包内各模块 logger 的公共父级
 
-def setup_logger(name):
-    """配置日志记录器"""
+# 全局日志管道: 各线程只把记录放入队列, 由 QueueListener 线程统一写文件和控制台
+_lock = threading.Lock()
+_queue_handler = None
+_listener = None
+_level = logging.INFO
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    按代码位置 (logger 名称, 行号) 限流
+
+    每个位置在 interval 秒内最多放行 burst 条, 其余丢弃并计数;
+    下一个时间窗口放行的第一条记录末尾附上被抑制的条数。CRITICAL 不限流。
+    过滤器挂在队列处理器上, 在各记录日志的线程中调用, 窗口状态的读改写由锁保护。
+    """
+
+    def __init__(self, interval: float = 5.0, burst: int = 5):
+        super().__init__()
+        self.interval = interval
+        self.burst = burst
+        self._windows = {}  # (name, lineno) -> [窗口开始时间, 已放行条数, 已抑制条数]
+        self._windows_lock = threading.Lock()
+        self.suppressed = 0  # 累计抑制条数
+
+    def filter(self, record):
+        if self.interval <= 0 or record.levelno >= logging.CRITICAL:
+            return True
+        key = (record.name, record.lineno)
+        now = time.monotonic()
+        with self._windows_lock:
+            window = self._windows.get(key)
+            if window is not None and now - window[0] < self.interval:
+                if window[1] < self.burst:
+                    window[1] += 1
+                    return True
+                window[2] += 1
+                self.suppressed += 1
+                return False
+            suppressed = window[2] if window is not None else 0
+            self._windows[key] = [now, 1, 0]
+        if suppressed:
+            record.msg = f"{record.getMessage()} (此前 {self.interval:g} 秒内已抑制 {suppressed} 条相同位置的日志)"
+            record.args = None
+        return True
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """队列满时直接丢弃记录 (计数), 保证采集线程不会因日志而阻塞"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
 
+
+def _start_pipeline():
+    """创建全局日志管道 (只执行一次)"""
+    global _queue_handler, _listener, _level
+    config = get_config()
     # 从配置文件读取日志级别和文件名
     log_level_str = config.get('Logging', 'log_level', fallback='INFO')
-    log_file = config.get('Logging', 'log_file', fallback='vibration_monitor.log')
+    log_file = config.get('Logging', 'log_file', fallback='vibration_monitor.log').strip()
     # 获取日志级别
-    level = _parse_log_level(log_level_str)
-
+    _level = _parse_log_level(log_level_str)
 
     formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 
@@ -21,24 +85,61 @@ def setup_logger(name):
     current_dir = os.path.dirname(os.path.abspath(__file__))
     log_file_path = os.path.join(current_dir, '..', '..', '..', log_file)
 
-    # 使用 FileHandler 写入日志文件,并设置为UTF-8编码
-    file_handler = logging.FileHandler(log_file_path, encoding='utf-8')
+    # 按大小滚动的日志文件, UTF-8 编码
+    file_handler = logging.handlers.RotatingFileHandler(
+        log_file_path, encoding='utf-8', delay=True,
+        maxBytes=config.getint('Logging', 'max_bytes', fallback=10 * 1024 * 1024),
+        backupCount=config.getint('Logging', 'backup_count', fallback=5))
     file_handler.setFormatter(formatter)
-    # 设置日志级别,从配置文件读取
-    file_handler.setLevel(level)
+    file_handler.setLevel(_level)
 
     # 使用 StreamHandler 输出到控制台
     console_handler = logging.StreamHandler()
     console_handler.setFormatter(formatter)
-    console_handler.setLevel(level)
+    console_handler.setLevel(_level)
+
+    log_queue = queue.Queue(maxsize=config.getint('Logging', 'queue_size', fallback=10000))
+    _queue_handler = NonBlockingQueueHandler(log_queue)
+    _queue_handler.addFilter(RateLimitFilter(
+        interval=config.getfloat('Logging', 'rate_limit_interval', fallback=5.0),
+        burst=config.getint('Logging', 'rate_limit_burst', fallback=5)))
+    _listener = logging.handlers.QueueListener(log_queue, file_handler, console_handler,
+                                               respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
 
-    logger = logging.getLogger(name)
-    logger.setLevel(level)
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)  # 添加到控制台的handler
+    package_logger = logging.getLogger(PACKAGE_LOGGER)
+    package_logger.setLevel(_level)
+    package_logger.addHandler(_queue_handler)
 
+
+def setup_logger(name):
+    """
+    获取日志记录器
+
+    所有 logger 共用同一个 QueueHandler, 重复调用不会重复添加处理器或重复打开日志文件。
+    包内模块 (vibration_monitor.*) 通过父级 logger 输出, 其他名称的 logger 直接挂接队列处理器。
+    """
+    with _lock:
+        if _queue_handler is None:
+            _start_pipeline()
+        logger = logging.getLogger(name)
+        if name != PACKAGE_LOGGER and not name.startswith(PACKAGE_LOGGER + '.'):
+            logger.setLevel(_level)
+            if _queue_handler not in logger.handlers:
+                logger.addHandler(_queue_handler)
     return logger
 
+
+def shutdown_logging():
+    """停止后台写日志线程, 写完队列中剩余的记录"""
+    global _listener
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
 def _parse_log_level(level_str):
     """
     解析日志级别字符串，支持 int 和 str 两种输入。
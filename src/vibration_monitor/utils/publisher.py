@@ -0,0 +1,316 @@
+"""
+实时数据发布
+
+SamplePublisher 把设备采样 (DeviceModel.add_listener) 按时间窗口攒成批次, 通过 TCP 或
+Unix 域套接字广播给订阅者; 报文编码与远程采集相同 (见 utils/collector_server.py)。
+
+订阅者连接后先发送 SUBSCRIBE 消息 (JSON):
+    {"devices": ["WTVB01"] 或 null, "channels": ["52", "58"] 或 null, "decimation": 10}
+之后持续收到 SAMPLES 帧; 帧中的通道顺序即订阅时给出的 channels (为 null 时为发布的全部通道,
+默认 channels.RECORD_KEYS; 设备有派生通道时为 DeviceModel.record_keys, 派生通道按名称订阅, 如 "speed_mag")。
+
+采集线程只把采样追加到待发送缓冲区, 编码和发送都在发布线程的事件循环中完成;
+每个订阅者有独立的有界发送队列, 消费过慢时丢弃新帧并计数, 不会拖慢采集或其他订阅者。
+"""
+import asyncio
+import os
+import threading
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from ..channels import RECORD_KEYS
+from ..exceptions import ProtocolError
+from .collector_server import (MSG_SAMPLES, MSG_SUBSCRIBE, decode_message, encode_samples,
+                               encode_subscribe, read_message)
+from .logger import setup_logger
+from .metrics import metrics
+
+logger = setup_logger(__name__)
+
+TCP_SCHEME = "tcp://"
+UNIX_SCHEME = "unix://"
+
+
+def parse_address(address: str):
+    """
+    解析发布地址
+
+    Returns:
+        tuple: ("tcp", host, port) 或 ("unix", path, None)
+    """
+    if address.startswith(UNIX_SCHEME):
+        return "unix", address[len(UNIX_SCHEME):], None
+    if address.startswith(TCP_SCHEME):
+        address = address[len(TCP_SCHEME):]
+    host, _, port = address.rpartition(":")
+    if not port.isdigit():
+        raise ValueError(f"无效的发布地址: {address}")
+    return "tcp", host or "127.0.0.1", int(port)
+
+
+class Subscription:
+    """一个订阅者连接: 过滤条件、抽取状态、发送队列和统计"""
+
+    def __init__(self, peer: str, request: Dict, max_pending_frames: int, record_keys: Sequence[str] = RECORD_KEYS):
+        devices = request.get("devices")
+        channels = request.get("channels")
+        self.peer = peer
+        self.devices = set(devices) if devices else None
+        self.channels = list(channels) if channels else list(record_keys)
+        unknown = [key for key in self.channels if key not in record_keys]
+        if unknown:
+            raise ProtocolError(f"未知的通道: {unknown}")
+        self.channel_index = np.array([list(record_keys).index(key) for key in self.channels])
+        self.decimation = max(1, int(request.get("decimation") or 1))
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_pending_frames)
+        self._sample_counts: Dict[str, int] = {}  # 每个设备已收到的采样数, 用于跨批次保持抽取相位
+        self.frames_sent = 0
+        self.frames_dropped = 0
+        self.samples_sent = 0
+        self.bytes_sent = 0
+
+    def wants(self, device_name: str) -> bool:
+        return self.devices is None or device_name in self.devices
+
+    def select(self, device_name: str, timestamps: np.ndarray, values: np.ndarray):
+        """按抽取因子和通道过滤一批采样, 没有剩余采样时返回 None"""
+        if self.decimation > 1:
+            seen = self._sample_counts.get(device_name, 0)
+            self._sample_counts[device_name] = seen + len(timestamps)
+            start = (-seen) % self.decimation
+            timestamps = timestamps[start::self.decimation]
+            values = values[start::self.decimation]
+        if len(timestamps) == 0:
+            return None
+        return timestamps, values[:, self.channel_index]
+
+    def as_dict(self) -> Dict:
+        return {
+            "peer": self.peer,
+            "devices": sorted(self.devices) if self.devices else None,
+            "channels": self.channels,
+            "decimation": self.decimation,
+            "frames_sent": self.frames_sent,
+            "frames_dropped": self.frames_dropped,
+            "samples_sent": self.samples_sent,
+            "bytes_sent": self.bytes_sent,
+            "queue_depth": self.queue.qsize(),
+        }
+
+
+class SamplePublisher:
+    """
+    实时采样发布服务器
+
+    Args:
+        address: tcp://host:port 或 unix:///path/to/socket; TCP 端口为 0 时由系统分配
+        batch_interval: 攒批时间窗口 (秒)
+        max_pending_frames: 每个订阅者的发送队列长度, 超出后丢帧
+        record_keys: 送来的采样各列的键, 默认 channels.RECORD_KEYS; 发布带派生通道的设备时为 DeviceModel.record_keys
+    """
+
+    def __init__(self, address: str = "tcp://127.0.0.1:50008", batch_interval: float = 0.05,
+                 max_pending_frames: int = 64, record_keys: Sequence[str] = RECORD_KEYS):
+        self.address = address
+        self.record_keys = tuple(record_keys)
+        self.kind, self.host, self.port = parse_address(address)
+        self.batch_interval = batch_interval
+        self.max_pending_frames = max_pending_frames
+        self.subscriptions: List[Subscription] = []
+        self._pending: Dict[str, List] = {}  # 设备名称 -> [(timestamps, values), ...]
+        self._pending_lock = threading.Lock()
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+        self._m_frames = metrics.counter("publisher.frames")
+        self._m_dropped = metrics.counter("publisher.frames_dropped")
+        self._m_subscribers = metrics.gauge("publisher.subscribers")
+
+    # ---- 数据入口 (任意线程) ----
+
+    def publish(self, device_name: str, timestamps, values):
+        """追加一批采样到待发送缓冲区, 只做一次加锁追加, 不阻塞调用线程"""
+        if not self.subscriptions:
+            return
+        with self._pending_lock:
+            self._pending.setdefault(device_name, []).append((timestamps, values))
+
+    def on_device_samples(self, device, timestamps, values):
+        """DeviceModel 采样监听器"""
+        self.publish(device.device_name, timestamps, values)
+
+    def attach(self, device):
+        """发布某设备的采样"""
+        device.add_listener(self.on_device_samples)
+
+    def detach(self, device):
+        device.remove_listener(self.on_device_samples)
+
+    # ---- 服务器 ----
+
+    async def serve(self):
+        """启动监听并一直运行, 直到任务被取消"""
+        if self.kind == "unix":
+            if os.path.exists(self.host):
+                os.remove(self.host)  # 上次异常退出遗留的套接字文件
+            self._server = await asyncio.start_unix_server(self._handle_subscriber, self.host)
+        else:
+            self._server = await asyncio.start_server(self._handle_subscriber, self.host, self.port)
+            self.port = self._server.sockets[0].getsockname()[1]
+            self.address = f"{TCP_SCHEME}{self.host}:{self.port}"
+        flusher = asyncio.ensure_future(self._flush_loop())
+        self._ready.set()
+        logger.info(f"实时数据发布已启动: {self.address}")
+        try:
+            async with self._server:
+                await self._server.serve_forever()
+        finally:
+            flusher.cancel()
+            await asyncio.gather(flusher, return_exceptions=True)
+            if self.kind == "unix" and os.path.exists(self.host):
+                os.remove(self.host)
+
+    def start(self) -> str:
+        """在后台线程中启动, 返回实际监听地址"""
+        self._thread = threading.Thread(target=self._run_in_thread, daemon=True)
+        self._thread.start()
+        if not self._ready.wait(timeout=5):
+            raise RuntimeError("实时数据发布启动超时")
+        return self.address
+
+    def stop(self):
+        if self._loop is not None and self._server is not None:
+            self._loop.call_soon_threadsafe(self._server.close)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        logger.info("实时数据发布已停止")
+
+    def stats(self) -> List[Dict]:
+        return [subscription.as_dict() for subscription in list(self.subscriptions)]
+
+    def _run_in_thread(self):
+        self._loop = asyncio.new_event_loop()
+        try:
+            self._loop.run_until_complete(self.serve())
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._loop.close()
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.batch_interval)
+            self.flush()
+
+    def flush(self):
+        """把待发送缓冲区按设备合并成批次, 分发到各订阅者的发送队列 (事件循环线程中调用)"""
+        with self._pending_lock:
+            pending, self._pending = self._pending, {}
+        for device_name, chunks in pending.items():
+            if len(chunks) == 1:
+                timestamps, values = chunks[0]
+            else:
+                timestamps = np.concatenate([np.asarray(c[0]) for c in chunks])
+                values = np.concatenate([np.asarray(c[1]) for c in chunks])
+            for subscription in self.subscriptions:
+                if not subscription.wants(device_name):
+                    continue
+                selected = subscription.select(device_name, timestamps, values)
+                if selected is None:
+                    continue
+                frame = encode_samples(device_name, *selected)
+                try:
+                    subscription.queue.put_nowait((frame, len(selected[0])))
+                    self._m_frames.inc()
+                except asyncio.QueueFull:
+                    subscription.frames_dropped += 1  # 订阅者消费过慢, 丢弃新帧
+                    self._m_dropped.inc()
+
+    async def _handle_subscriber(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        peer = writer.get_extra_info("peername") or self.address
+        peer = f"{peer[0]}:{peer[1]}" if isinstance(peer, tuple) else str(peer)
+        subscription = None
+        closed = None
+        try:
+            msg_type, request = decode_message(await read_message(reader))
+            if msg_type != MSG_SUBSCRIBE:
+                raise ProtocolError(f"订阅连接的第一条消息应为 SUBSCRIBE, 收到 {msg_type}")
+            subscription = Subscription(peer, request, self.max_pending_frames, self.record_keys)
+            self.subscriptions.append(subscription)
+            self._m_subscribers.set(len(self.subscriptions))
+            logger.info(f"新的订阅者 {peer}: 设备 {request.get('devices')}, 通道 {subscription.channels}, "
+                        f"抽取 1/{subscription.decimation}")
+            closed = asyncio.ensure_future(reader.read())  # 订阅者断开时返回 (订阅后不再发送数据)
+            while True:
+                get = asyncio.ensure_future(subscription.queue.get())
+                done, _ = await asyncio.wait((get, closed), return_when=asyncio.FIRST_COMPLETED)
+                if get not in done:
+                    get.cancel()
+                    break
+                frame, n_samples = get.result()
+                writer.write(frame)
+                await writer.drain()
+                subscription.frames_sent += 1
+                subscription.samples_sent += n_samples
+                subscription.bytes_sent += len(frame)
+        except asyncio.IncompleteReadError:
+            pass
+        except ProtocolError as e:
+            logger.error(f"订阅者 {peer} 报文错误, 断开连接: {e}")
+        except ConnectionError as e:
+            logger.info(f"订阅者 {peer} 断开: {e}")
+        finally:
+            if closed is not None:
+                closed.cancel()
+                await asyncio.gather(closed, return_exceptions=True)
+            if subscription is not None:
+                self.subscriptions.remove(subscription)
+                self._m_subscribers.set(len(self.subscriptions))
+                logger.info(f"订阅者 {peer} 已断开, 发送 {subscription.frames_sent} 帧, "
+                            f"丢弃 {subscription.frames_dropped} 帧")
+            writer.close()
+
+
+class SampleSubscriber:
+    """订阅端 (asyncio): async for device_name, timestamps, values in subscriber.frames()"""
+
+    def __init__(self, address: str, devices: List[str] = None, channels: List[str] = None,
+                 decimation: int = 1):
+        self.address = address
+        self.devices = devices
+        self.channels = channels
+        self.decimation = decimation
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+
+    async def connect(self):
+        kind, host, port = parse_address(self.address)
+        if kind == "unix":
+            self._reader, self._writer = await asyncio.open_unix_connection(host)
+        else:
+            self._reader, self._writer = await asyncio.open_connection(host, port)
+        self._writer.write(encode_subscribe(self.devices, self.channels, self.decimation))
+        await self._writer.drain()
+
+    async def frames(self):
+        """逐帧产出 (设备名称, timestamps, values), 连接关闭时结束"""
+        while True:
+            try:
+                message = await read_message(self._reader)
+            except asyncio.IncompleteReadError:
+                return
+            msg_type, body = decode_message(message)
+            if msg_type == MSG_SAMPLES:
+                yield body
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except ConnectionError:
+                pass
+            self._writer = None
@@ -0,0 +1,281 @@
+"""
+共享内存采样环形缓冲区
+
+采集进程把设备采样写入 multiprocessing.shared_memory 中的环形缓冲区, 分析/特征提取等工作进程按名称
+只读挂接, 直接在共享内存上得到 numpy 视图, 不需要序列化 (pickle) 或复制采样数据。
+
+内存布局 (小端):
+    [0, 64)                          头部: magic, version, capacity, channels, max_batch, write_index, sequence
+    [64, 64 + 8 * capacity)          时间戳 float64[capacity]
+    [..., + 8 * capacity * channels) 采样值 float64[capacity, channels], 通道顺序同 channels.RECORD_KEYS,
+                                     设备有派生通道时其后依次为各派生通道 (同 DeviceModel.record_keys)
+
+write_index 为累计写入的采样数 (绝对序号), 第 i 个采样位于槽位 i % capacity; 只有一个写入者。
+写入时 sequence 先加一 (奇数表示正在写), 写完数据和 write_index 后再加一。写入者把大批次拆成不超过
+max_batch 的小块, 因此读者只要满足 start >= write_index + max_batch - capacity, 视图中的数据就不会被覆盖,
+读者处理完视图后可用 SampleRingReader.valid(start) 确认。
+"""
+import threading
+from multiprocessing import resource_tracker, shared_memory
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from ..channels import RECORD_KEYS
+from .logger import setup_logger
+from .metrics import metrics
+
+logger = setup_logger(__name__)
+
+_attach_lock = threading.Lock()
+
+MAGIC = 0x56425247  # "VBRG"
+VERSION = 1
+HEADER_BYTES = 64
+HEADER_DTYPE = np.dtype([
+    ('magic', '<u4'),
+    ('version', '<u4'),
+    ('capacity', '<u8'),
+    ('channels', '<u4'),
+    ('max_batch', '<u4'),
+    ('write_index', '<u8'),
+    ('sequence', '<u8'),
+])
+
+
+def _buffer_size(capacity: int, channels: int) -> int:
+    return HEADER_BYTES + 8 * capacity * (1 + channels)
+
+
+def _attach_shared_memory(name: str) -> shared_memory.SharedMemory:
+    """
+    挂接已有的共享内存
+
+    挂接方不登记到 resource_tracker: 否则 spawn 启动的工作进程退出时, 其 resource_tracker 会删除写入者的共享内存;
+    fork 启动时与父进程共用 resource_tracker, 先登记再注销又会注销掉写入者自己的登记。
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        pass
+    with _attach_lock:
+        register = resource_tracker.register
+        resource_tracker.register = lambda name, rtype: None
+        try:
+            return shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+
+class _RingViews:
+    """在共享内存上建立头部、时间戳和采样值的 numpy 视图"""
+
+    def __init__(self, shm: shared_memory.SharedMemory, capacity: int, channels: int, readonly: bool):
+        self.shm = shm
+        self.header = np.ndarray((), dtype=HEADER_DTYPE, buffer=shm.buf)
+        self.timestamps = np.ndarray((capacity,), dtype='<f8', buffer=shm.buf, offset=HEADER_BYTES)
+        self.values = np.ndarray((capacity, channels), dtype='<f8', buffer=shm.buf,
+                                 offset=HEADER_BYTES + 8 * capacity)
+        if readonly:
+            self.timestamps.flags.writeable = False
+            self.values.flags.writeable = False
+
+    def release(self):
+        # 共享内存关闭前必须先释放所有视图
+        self.header = self.timestamps = self.values = None
+
+
+class SampleRing:
+    """
+    环形缓冲区写入端 (采集进程)
+
+    Args:
+        name: 共享内存名称, 为 None 时由系统生成 (见 name 属性)
+        capacity: 可保存的采样数
+        channels: 每个采样的通道数, 挂接带派生通道的设备时为 len(DeviceModel.record_keys)
+        max_batch: 单次写入的最大采样数, 更大的批次会被拆分
+    """
+
+    def __init__(self, name: Optional[str] = None, capacity: int = 65536, channels: int = len(RECORD_KEYS),
+                 max_batch: int = 1024):
+        if not 0 < max_batch < capacity:
+            raise ValueError("max_batch 必须小于 capacity")
+        self.capacity = capacity
+        self.channels = channels
+        self.max_batch = max_batch
+        self._shm = shared_memory.SharedMemory(name=name, create=True, size=_buffer_size(capacity, channels))
+        self.name = self._shm.name
+        self._views = _RingViews(self._shm, capacity, channels, readonly=False)
+        header = self._views.header
+        header['capacity'] = capacity
+        header['channels'] = channels
+        header['max_batch'] = max_batch
+        header['write_index'] = 0
+        header['sequence'] = 0
+        header['version'] = VERSION
+        header['magic'] = MAGIC  # 最后写 magic, 读者据此判断头部已初始化
+        self._m_samples = metrics.counter("shared_ring.samples")
+        logger.info(f"共享内存环形缓冲区已创建: {self.name} ({capacity} 个采样 x {channels} 通道)")
+
+    @property
+    def write_index(self) -> int:
+        return int(self._views.header['write_index'])
+
+    def write(self, timestamps, values):
+        """
+        追加一批采样
+
+        Args:
+            timestamps: 形状 (n,) 的采样时间
+            values: 形状 (n, channels) 的采样值
+        """
+        timestamps = np.asarray(timestamps, dtype='<f8')
+        values = np.asarray(values, dtype='<f8')
+        for start in range(0, len(timestamps), self.max_batch):
+            self._write_chunk(timestamps[start:start + self.max_batch], values[start:start + self.max_batch])
+        self._m_samples.inc(len(timestamps))
+
+    def _write_chunk(self, timestamps: np.ndarray, values: np.ndarray):
+        views = self._views
+        header = views.header
+        n = len(timestamps)
+        index = int(header['write_index'])
+        slot = index % self.capacity
+        first = min(n, self.capacity - slot)
+        header['sequence'] += 1  # 奇数: 写入中
+        views.timestamps[slot:slot + first] = timestamps[:first]
+        views.values[slot:slot + first] = values[:first]
+        if first < n:  # 回绕到缓冲区开头
+            views.timestamps[:n - first] = timestamps[first:]
+            views.values[:n - first] = values[first:]
+        header['write_index'] = index + n
+        header['sequence'] += 1
+
+    def on_device_samples(self, device, timestamps, values):
+        """DeviceModel 采样监听器"""
+        self.write(timestamps, values)
+
+    def attach(self, device):
+        """把某设备的采样写入缓冲区"""
+        device.add_listener(self.on_device_samples)
+
+    def detach(self, device):
+        device.remove_listener(self.on_device_samples)
+
+    def close(self, unlink: bool = True):
+        """关闭共享内存; unlink 为 True 时同时删除 (已挂接的读者在各自关闭前仍可访问)"""
+        if self._views is None:
+            return
+        self._views.release()
+        self._views = None
+        self._shm.close()
+        if unlink:
+            self._shm.unlink()
+        logger.info(f"共享内存环形缓冲区已关闭: {self.name}")
+
+
+class SampleRingReader:
+    """
+    环形缓冲区只读端 (分析/特征工作进程)
+
+    每个读者维护自己的读取位置 (cursor, 绝对序号)。返回的数组都是共享内存上的只读视图,
+    回绕时分为两段; 需要连续数组时使用 latest_array (会复制)。
+
+    Args:
+        name: 写入端的共享内存名称 (SampleRing.name)
+        from_start: True 时从缓冲区中最旧的采样开始读, 否则只读挂接之后写入的采样
+    """
+
+    def __init__(self, name: str, from_start: bool = False):
+        self.name = name
+        self._shm = _attach_shared_memory(name)
+        header = np.ndarray((), dtype=HEADER_DTYPE, buffer=self._shm.buf)
+        if int(header['magic']) != MAGIC or int(header['version']) != VERSION:
+            del header
+            self._shm.close()
+            raise ValueError(f"共享内存 {name} 不是采样环形缓冲区或版本不兼容")
+        self.capacity = int(header['capacity'])
+        self.channels = int(header['channels'])
+        self.max_batch = int(header['max_batch'])
+        del header
+        self._views = _RingViews(self._shm, self.capacity, self.channels, readonly=True)
+        self.cursor = self.oldest_index() if from_start else self.write_index
+        self.overruns = 0  # 因读取过慢被覆盖而跳过的采样数
+
+    @property
+    def write_index(self) -> int:
+        return int(self._views.header['write_index'])
+
+    @property
+    def sequence(self) -> int:
+        return int(self._views.header['sequence'])
+
+    def oldest_index(self) -> int:
+        """当前可安全读取的最旧采样序号"""
+        return max(0, self.write_index + self.max_batch - self.capacity)
+
+    def valid(self, start: int) -> bool:
+        """序号 start 及之后的采样是否仍未被覆盖 (处理完视图后调用以确认数据有效)"""
+        return start >= self.oldest_index()
+
+    def segments(self, start: int, stop: int) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """序号 [start, stop) 的采样视图, 回绕时为两段"""
+        if stop <= start:
+            return []
+        begin = start % self.capacity
+        end = begin + (stop - start)
+        views = self._views
+        if end <= self.capacity:
+            return [(views.timestamps[begin:end], views.values[begin:end])]
+        end -= self.capacity
+        return [(views.timestamps[begin:], views.values[begin:]),
+                (views.timestamps[:end], views.values[:end])]
+
+    def read(self, max_samples: Optional[int] = None) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        读取自上次读取以来的新采样并前移读取位置
+
+        读取过慢导致数据被覆盖时, 从最旧的有效采样继续并累计 overruns。
+        """
+        stop = self.write_index
+        oldest = max(0, stop + self.max_batch - self.capacity)
+        if self.cursor < oldest:
+            self.overruns += oldest - self.cursor
+            self.cursor = oldest
+        if max_samples is not None:
+            stop = min(stop, self.cursor + max_samples)
+        segments = self.segments(self.cursor, stop)
+        self.cursor = stop
+        return segments
+
+    def latest(self, n: int) -> Tuple[int, List[Tuple[np.ndarray, np.ndarray]]]:
+        """
+        最近 n 个采样的视图 (不移动读取位置)
+
+        Returns:
+            tuple: (起始序号, 视图段列表); 可用采样不足 n 个时返回全部可用采样
+        """
+        stop = self.write_index
+        start = max(stop - n, max(0, stop + self.max_batch - self.capacity))
+        return start, self.segments(start, stop)
+
+    def latest_array(self, n: int) -> Tuple[np.ndarray, np.ndarray]:
+        """最近 n 个采样的连续数组 (复制), 复制后确认数据未被覆盖, 否则重试"""
+        while True:
+            start, segments = self.latest(n)
+            if len(segments) == 1:
+                timestamps, values = segments[0][0].copy(), segments[0][1].copy()
+            elif segments:
+                timestamps = np.concatenate([s[0] for s in segments])
+                values = np.concatenate([s[1] for s in segments])
+            else:
+                return np.empty(0), np.empty((0, self.channels))
+            if self.valid(start):
+                return timestamps, values
+
+    def close(self):
+        if self._views is None:
+            return
+        self._views.release()
+        self._views = None
+        self._shm.close()
@@ -0,0 +1,5 @@
+"""pytest 公共配置: 直接从源码目录导入 vibration_monitor, 无需先安装"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
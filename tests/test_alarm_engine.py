@@ -0,0 +1,147 @@
+"""报警引擎: 回差、最短持续时间、变化率, 多设备与报警日志"""
+import configparser
+import csv
+
+import numpy as np
+import pytest
+
+from vibration_monitor.alarm_engine import (EVENT_CLEARED, EVENT_RAISED, REASON_HIGH, REASON_RATE, AlarmEngine,
+                                            AlarmLog)
+
+NAN = float('nan')
+
+
+def make_engine(devices=('A',), **rule):
+    engine = AlarmEngine(list(devices), channels=['speed_x', 'temperature'])
+    engine.set_rule('speed_x', **rule)
+    return engine
+
+
+def kinds(events):
+    return [(event.device, event.channel, event.kind, event.reason) for event in events]
+
+
+def test_hysteresis_clears_only_below_band():
+    engine = make_engine(high=10.0, hysteresis=1.0)
+    assert kinds(engine.evaluate([10.5, NAN], 0.0)) == [('A', 'speed_x', EVENT_RAISED, REASON_HIGH)]
+    assert engine.evaluate([9.5, NAN], 1.0) == []  # 回到上限以下但仍在回差带内
+    assert engine.is_active('A', 'speed_x')
+    assert engine.evaluate([10.2, NAN], 2.0) == []  # 已在报警中, 不重复产生事件
+    events = engine.evaluate([9.0, NAN], 3.0)
+    assert kinds(events) == [('A', 'speed_x', EVENT_CLEARED, REASON_HIGH)]
+    assert events[0].value == 9.0 and events[0].limit == 10.0
+    assert not engine.is_active('A', 'speed_x')
+
+
+def test_min_duration_requires_continuous_condition():
+    engine = make_engine(high=10.0, min_duration=2.0)
+    assert engine.evaluate([11, NAN], 0.0) == []
+    assert engine.evaluate([11, NAN], 1.5) == []
+    assert engine.evaluate([9, NAN], 1.8) == []  # 条件中断, 重新计时
+    assert engine.evaluate([11, NAN], 2.0) == []
+    assert engine.evaluate([11, NAN], 3.9) == []
+    assert kinds(engine.evaluate([11, NAN], 4.0)) == [('A', 'speed_x', EVENT_RAISED, REASON_HIGH)]
+
+
+def test_missing_values_do_not_change_state():
+    engine = make_engine(high=10.0, min_duration=1.0)
+    engine.evaluate([11, NAN], 0.0)
+    assert engine.evaluate([NAN, NAN], 0.5) == []  # 缺失不打断计时
+    assert kinds(engine.evaluate([11, NAN], 1.0)) == [('A', 'speed_x', EVENT_RAISED, REASON_HIGH)]
+    assert engine.evaluate([NAN, NAN], 2.0) == []  # 缺失不解除报警
+    assert engine.is_active('A', 'speed_x')
+
+
+def test_rate_limit():
+    engine = make_engine(high=100.0, rate_limit=5.0)
+    assert engine.evaluate([0.0, NAN], 0.0) == []  # 第一个采样没有变化率
+    assert engine.evaluate([4.0, NAN], 1.0) == []  # 4 /s
+    events = engine.evaluate([10.0, NAN], 2.0)     # 6 /s
+    assert kinds(events) == [('A', 'speed_x', EVENT_RAISED, REASON_RATE)]
+    assert events[0].limit == 5.0
+    assert engine.evaluate([20.0, NAN], 3.0) == []  # 10 /s, 仍在报警
+    assert kinds(engine.evaluate([24.0, NAN], 4.0)) == [('A', 'speed_x', EVENT_CLEARED, REASON_RATE)]  # 4 /s
+    assert engine.evaluate([24.0, NAN], 4.0) == []  # 同一时刻 (dt = 0) 不计算变化率
+
+
+def test_devices_are_independent_and_batch_matches_single():
+    values = np.array([[[5, NAN], [12, NAN]],
+                       [[12, NAN], [12, NAN]],
+                       [[5, NAN], [5, NAN]]], dtype=float)
+    timestamps = [0.0, 1.0, 2.0]
+    single = make_engine(devices=('A', 'B'), high=10.0, hysteresis=0.5)
+    expected = [event for t, row in zip(timestamps, values) for event in single.evaluate(row, t)]
+    batch = make_engine(devices=('A', 'B'), high=10.0, hysteresis=0.5)
+    events = batch.evaluate_batch(timestamps, values)
+    assert events == expected
+    assert [(e.time, e.device, e.kind) for e in events] == [
+        (0.0, 'B', EVENT_RAISED), (1.0, 'A', EVENT_RAISED), (2.0, 'A', EVENT_CLEARED), (2.0, 'B', EVENT_CLEARED)]
+    np.testing.assert_array_equal(batch.device_state('A'), [False, False])
+
+
+def test_batch_matches_single_with_gaps_duration_and_rate():
+    rng = np.random.default_rng(3)
+    timestamps = np.cumsum(rng.choice([0.0, 0.1, 0.3], size=400))
+    values = rng.normal(9.0, 2.0, size=(400, 3, 2)) + np.sin(np.arange(400) / 15)[:, None, None] * 3
+    values[rng.random(values.shape) < 0.1] = NAN
+
+    def engine():
+        result = AlarmEngine(['A', 'B', 'C'], channels=['speed_x', 'temperature'])
+        result.set_rule('speed_x', high=10.0, hysteresis=1.0, min_duration=0.4, rate_limit=40.0)
+        result.set_rule('temperature', rate_limit=25.0)
+        return result
+
+    single = engine()
+    expected = [event for t, row in zip(timestamps, values) for event in single.evaluate(row, t)]
+    batch = engine()
+    events = []
+    for part in np.array_split(np.arange(400), [7, 8, 150, 151, 290]):  # 状态跨批延续, 包括单个采样的批
+        events.extend(batch.evaluate_batch(timestamps[part], values[part]))
+    assert {event.reason for event in expected} == {REASON_HIGH, REASON_RATE}
+    assert events == expected
+    for name in ('active', 'active_reason', '_pending_since', '_last_value', '_last_time'):
+        np.testing.assert_array_equal(getattr(batch, name), getattr(single, name))
+    assert batch.evaluate_batch([], np.empty((0, 3, 2))) == []
+
+
+def test_reset_clears_state_without_events():
+    engine = make_engine(high=10.0)
+    engine.evaluate([11, NAN], 0.0)
+    engine.reset()
+    assert not engine.is_active('A', 'speed_x')
+    assert kinds(engine.evaluate([11, NAN], 1.0)) == [('A', 'speed_x', EVENT_RAISED, REASON_HIGH)]
+
+
+def test_from_config_rules():
+    config = configparser.ConfigParser()
+    config.read_string("""
+[Thresholds]
+speed_x = 8
+[Alarm]
+hysteresis_ratio = 0.25
+min_duration = 0.5
+speed_x_rate = 3
+temperature_min_duration = 10
+""")
+    engine = AlarmEngine.from_config(config, ['A'], channels=['speed_x', 'temperature', 'speed_mag'])
+    assert engine.high[0] == 8 and engine.hysteresis[0] == 2 and engine.rate_limit[0] == 3
+    assert engine.high[1] == 50.0 and engine.min_duration[1] == 10  # 默认上限, 按通道覆盖的持续时间
+    assert np.isnan(engine.high[2])  # 没有上限的派生通道不报警
+    assert engine.evaluate([0, 0, 1e9], 0.0) == []
+
+
+def test_alarm_log_appends_csv(tmp_path):
+    path = tmp_path / "alarms" / "alarm_log.csv"
+    engine = AlarmEngine(['A'], channels=['speed_x'], log=AlarmLog(str(path)))
+    engine.set_rule('speed_x', high=1.0)
+    engine.evaluate([2.0], 0.0)
+    engine.evaluate([0.0], 1.0)
+    engine.close()
+    reopened = AlarmLog(str(path))  # 追加, 不重复写表头
+    reopened.close()
+    with open(path, encoding='utf-8-sig') as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == AlarmLog.HEADER
+    assert [row[1:5] for row in rows[1:]] == [['A', 'speed_x', EVENT_RAISED, REASON_HIGH],
+                                              ['A', 'speed_x', EVENT_CLEARED, REASON_HIGH]]
+    assert len(engine.log.recent) == 2
@@ -0,0 +1,123 @@
+"""多传感器对齐: 交错到达、批内乱序、迟到采样、最长等待与间断"""
+import numpy as np
+import pytest
+
+from vibration_monitor.alignment import StreamAligner
+
+KEYS = ['a', 'b']
+
+
+def linear(t, offset=0.0):
+    """线性信号, 网格点上的插值结果是精确的"""
+    t = np.asarray(t, dtype=float)
+    return np.column_stack([2 * t + offset, -3 * t + offset])
+
+
+def collect(aligner):
+    blocks = []
+    aligner.add_listener(lambda _, block: blocks.append(block))
+
+    def joined():
+        return (np.concatenate([b.time for b in blocks]), np.concatenate([b.values for b in blocks], axis=1),
+                np.concatenate([b.valid for b in blocks], axis=1))
+    return blocks, joined
+
+
+def test_interleaved_devices_merge_on_common_grid():
+    aligner = StreamAligner(['A', 'B'], fs=10, max_latency=10, record_keys=KEYS)
+    blocks, joined = collect(aligner)
+    ta = np.arange(0, 3, 0.07)
+    tb = np.arange(0.03, 3, 0.11)
+    # 两台设备的小批交错到达
+    for start in range(0, 45, 3):
+        aligner.push('A', ta[start:start + 3], linear(ta[start:start + 3]))
+        aligner.push('B', tb[start // 2:start // 2 + 2], linear(tb[start // 2:start // 2 + 2], 1.0))
+    aligner.push('B', tb[22:], linear(tb[22:], 1.0))
+    aligner.flush()
+
+    time, values, valid = joined()
+    np.testing.assert_allclose(np.diff(time), 0.1)  # 连续、按时间顺序, 没有重复的网格点
+    assert time[0] == pytest.approx(0.0) and time[-1] <= max(ta[-1], tb[-1]) + 1e-9
+    inside_a = (time >= ta[0]) & (time <= ta[-1])
+    inside_b = (time >= tb[0]) & (time <= tb[-1])
+    np.testing.assert_array_equal(valid[0], inside_a)
+    np.testing.assert_array_equal(valid[1], inside_b)
+    np.testing.assert_allclose(values[0][inside_a], linear(time[inside_a]))
+    np.testing.assert_allclose(values[1][inside_b], linear(time[inside_b], 1.0))
+    assert np.isnan(values[1][~inside_b]).all()  # 不外推
+    assert aligner.blocks_emitted == len(blocks) and aligner.late_samples == 0
+
+
+def test_grid_waits_for_slowest_device():
+    aligner = StreamAligner(['A', 'B'], fs=10, max_latency=10, record_keys=KEYS)
+    blocks, joined = collect(aligner)
+    t = np.arange(0, 1.01, 0.05)
+    aligner.push('A', t, linear(t))
+    assert blocks == []  # B 还没有数据
+    aligner.push('B', t[:9], linear(t[:9]))
+    assert joined()[0][-1] == pytest.approx(0.4)
+    aligner.push('B', t[9:], linear(t[9:]))
+    assert joined()[0][-1] == pytest.approx(1.0)
+
+
+def test_out_of_order_batches_are_sorted():
+    aligner = StreamAligner(['A'], fs=10, max_latency=10, record_keys=KEYS)
+    blocks, joined = collect(aligner)
+    t = np.arange(0, 2, 0.05)
+    order = np.random.default_rng(0).permutation(len(t))
+    aligner.push('A', t[order[:20]], linear(t[order[:20]]))  # 同一批内的乱序
+    aligner.push('A', t[order[20:]], linear(t[order[20:]]))
+    aligner.flush()
+    time, values, valid = joined()
+    assert valid[0].all()
+    np.testing.assert_allclose(values[0], linear(time))
+
+
+def test_max_latency_advances_without_stalled_device_and_counts_late_samples():
+    aligner = StreamAligner(['A', 'B'], fs=10, max_latency=0.5, record_keys=KEYS)
+    blocks, joined = collect(aligner)
+    t = np.arange(0, 0.35, 0.05)
+    aligner.push('A', t, linear(t))
+    aligner.push('B', t, linear(t))
+    t = np.arange(0.35, 2.0, 0.05)
+    aligner.push('A', t, linear(t))  # B 停止发送
+    time, values, valid = joined()
+    assert time[-1] == pytest.approx(t[-1] - 0.5, abs=0.05)
+    assert valid[0].all()
+    late = time > 0.31
+    assert not valid[1][late].any() and np.isnan(values[1][late]).all()
+    assert valid[1][~late].all()
+
+    # B 恢复后, 对应已输出网格点的采样只计数, 新采样用于之后的网格点
+    t_b = np.arange(0.35, 2.5, 0.05)
+    aligner.push('B', t_b, linear(t_b))
+    assert aligner.late_samples > 0
+    time, values, valid = joined()
+    np.testing.assert_allclose(np.diff(time), 0.1)
+    assert valid[1][-1]
+
+
+def test_gap_longer_than_max_gap_is_invalid():
+    aligner = StreamAligner(['A'], fs=10, max_latency=10, record_keys=KEYS)
+    blocks, joined = collect(aligner)
+    t = np.concatenate([np.arange(10) / 10, np.arange(20, 30) / 10])
+    aligner.push('A', t, linear(t))
+    aligner.flush()
+    time, values, valid = joined()
+    gap = (time > 0.9 + 1e-9) & (time < 2.0 - 1e-9)
+    assert not valid[0][gap].any() and np.isnan(values[0][gap]).all()
+    assert valid[0][~gap].all()  # 间断两端恰好落在网格点上的采样仍有效
+    np.testing.assert_allclose(values[0][~gap], linear(time[~gap]))
+
+
+def test_channel_selection():
+    aligner = StreamAligner(['A'], fs=10, channels=['b'], record_keys=KEYS)
+    blocks, joined = collect(aligner)
+    t = np.arange(0, 1.01, 0.1)
+    aligner.push('A', t, linear(t))
+    assert joined()[1].shape[-1] == 1
+    np.testing.assert_allclose(joined()[1][0, :, 0], -3 * joined()[0])
+    with pytest.raises(ValueError):
+        StreamAligner(['A'], fs=10, channels=['c'], record_keys=KEYS)
+    with pytest.raises(ValueError):
+        StreamAligner(['A'], fs=0)
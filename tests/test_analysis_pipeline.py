@@ -0,0 +1,148 @@
+"""分析流水线: 缓存命中、参数与数据变化时的失效、LRU 淘汰与进度回调"""
+import numpy as np
+import pytest
+
+from vibration_monitor.analysis_pipeline import AnalysisPipeline, content_hash, default_pipeline
+
+
+def counting_pipeline(max_entries=64):
+    """a -> b -> c, a -> d; 记录每个步骤的计算次数"""
+    calls = []
+    pipeline = AnalysisPipeline(max_entries)
+    pipeline.add_source('x')
+    pipeline.add_stage('a', lambda x, scale=1: calls.append('a') or np.asarray(x) * scale, ['x'], scale=1)
+    pipeline.add_stage('b', lambda a, offset=0: calls.append('b') or a + offset, ['a'], offset=0)
+    pipeline.add_stage('c', lambda b: calls.append('c') or float(b.sum()), ['b'])
+    pipeline.add_stage('d', lambda a: calls.append('d') or float(a.max()), ['a'])
+    return pipeline, calls
+
+
+def test_repeated_compute_hits_cache():
+    pipeline, calls = counting_pipeline()
+    pipeline.set_source('x', np.arange(4.0))
+    assert pipeline.compute('c') == 6.0
+    assert calls == ['a', 'b', 'c']
+    assert pipeline.compute('c') == 6.0
+    assert pipeline.compute('d') == 3.0  # a 已缓存, 只计算 d
+    assert calls == ['a', 'b', 'c', 'd']
+    assert (pipeline.hits, pipeline.misses) == (2, 4)
+
+
+def test_param_change_invalidates_only_downstream():
+    pipeline, calls = counting_pipeline()
+    pipeline.set_source('x', np.arange(4.0))
+    pipeline.compute('c')
+    pipeline.compute('d')
+    calls.clear()
+    pipeline.set_params('b', offset=1)
+    assert pipeline.compute('c') == 10.0
+    assert pipeline.compute('d') == 3.0
+    assert calls == ['b', 'c']
+    pipeline.set_params('b', offset=0)  # 回到旧参数: 旧结果仍在缓存中
+    assert pipeline.compute('c') == 6.0
+    assert calls == ['b', 'c']
+    with pytest.raises(ValueError):
+        pipeline.set_params('b', missing=1)
+
+
+def test_source_change_invalidates_everything_and_keys_replace_hashing():
+    pipeline, calls = counting_pipeline()
+    pipeline.set_source('x', np.arange(4.0))
+    pipeline.compute('c')
+    pipeline.set_source('x', np.arange(4.0))  # 内容相同: 命中
+    pipeline.compute('c')
+    assert calls == ['a', 'b', 'c']
+    pipeline.set_source('x', np.arange(5.0))
+    assert pipeline.compute('c') == 10.0
+    assert calls == ['a', 'b', 'c'] * 2
+    calls.clear()
+    pipeline.set_source('x', np.ones(3), key=('speed_x', 7))  # 调用方给出的版本号作为键
+    pipeline.compute('c')
+    pipeline.set_source('x', np.zeros(3), key=('speed_x', 7))  # 同一版本号视为同一数据
+    assert pipeline.compute('c') == 3.0
+    pipeline.set_source('x', np.zeros(3), key=('speed_x', 8))
+    assert pipeline.compute('c') == 0.0
+    assert calls == ['a', 'b', 'c'] * 2
+
+
+def test_lru_eviction():
+    pipeline, calls = counting_pipeline(max_entries=3)
+    pipeline.set_source('x', np.arange(4.0))
+    pipeline.compute('c')
+    pipeline.compute('d')  # a, b, c, d 中最久未使用的 b 被淘汰
+    assert len(pipeline) == 3 and pipeline.evictions == 1
+    calls.clear()
+    pipeline.compute('d')
+    assert calls == []
+    pipeline.compute('c')  # c 仍在缓存中, 不需要 b
+    assert calls == []
+    pipeline.set_params('c')
+    pipeline.clear_cache()
+    pipeline.compute('c')
+    assert calls == ['a', 'b', 'c']
+
+
+def test_progress_callback_counts_recomputed_stages_and_can_abort():
+    pipeline, calls = counting_pipeline()
+    pipeline.set_source('x', np.arange(4.0))
+    pipeline.compute('b')
+    steps = []
+    pipeline.compute('c', lambda stage, done, total: steps.append((stage, done, total)))
+    assert steps == [('c', 0, 1)]
+
+    class Abort(Exception):
+        pass
+
+    def abort_at_b(stage, done, total):
+        if stage == 'b':
+            raise Abort
+    pipeline.set_params('a', scale=2)
+    with pytest.raises(Abort):
+        pipeline.compute('c', abort_at_b)
+    calls.clear()
+    assert pipeline.compute('c') == 12.0
+    assert calls == ['b', 'c']  # 中止前完成的 a 保留在缓存中
+
+
+def test_graph_validation():
+    pipeline, _ = counting_pipeline()
+    with pytest.raises(ValueError):
+        pipeline.add_stage('e', lambda y: y, ['y'])  # 输入须先添加
+    with pytest.raises(ValueError):
+        pipeline.add_stage('a', lambda x: x, ['x'])
+    with pytest.raises(ValueError):
+        pipeline.compute('c')  # 数据源尚未设置
+    with pytest.raises(KeyError):
+        pipeline.compute('missing')
+    assert pipeline.dependencies('c') == ['a', 'b', 'c']
+
+
+def test_content_hash():
+    assert content_hash(np.arange(3)) == content_hash(np.arange(3))
+    assert content_hash(np.arange(3)) != content_hash(np.arange(3.0))  # dtype 不同
+    assert content_hash({'a': 1, 'b': 2}) == content_hash({'b': 2, 'a': 1})
+    assert content_hash((1, 2)) != content_hash([1, 2])
+    with pytest.raises(TypeError):
+        content_hash(object())
+
+
+def test_default_pipeline_shares_filter_between_tabs():
+    fs = 200.0
+    t = np.arange(2000) / fs
+    signal = np.sin(2 * np.pi * 5 * t) + 0.5 * np.sin(2 * np.pi * 60 * t)
+    pipeline = default_pipeline()
+    pipeline.set_source('signal', (t, signal), key=('speed_x', 1))
+    pipeline.set_params('filter', filter_type='低通', cutoff=20.0)
+    filtered = pipeline.compute('filtered_signal')
+    misses = pipeline.misses
+    freqs, amplitude = pipeline.compute('filtered_spectrum')
+    assert pipeline.misses == misses + 3  # 滤波结果共用, 只计算去趋势、加窗和频谱
+    assert freqs[amplitude.argmax()] == pytest.approx(5.0, abs=0.2)
+    assert amplitude[np.abs(freqs - 60).argmin()] < 1e-3 * amplitude.max()  # 60 Hz 分量被滤除
+    assert filtered.shape == signal.shape
+    pipeline.set_params('window', window='hann')
+    misses = pipeline.misses
+    pipeline.compute('spectrum')
+    pipeline.set_params('window', window='boxcar')
+    pipeline.compute('spectrum')
+    assert pipeline.misses == misses + 5  # uniform 已缓存; detrend 计算一次, 两种窗各算一次 window 和 spectrum
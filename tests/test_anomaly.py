@@ -0,0 +1,98 @@
+"""自适应基线: 预热后的 z 分数、偏差截断、缺失数据与基线的保存恢复"""
+import numpy as np
+import pytest
+
+from vibration_monitor.anomaly import AnomalyDetector, half_life_alpha
+
+NAN = float('nan')
+
+
+def trained(devices=('A',), channels=('speed_x', 'temperature'), n=200, **kwargs):
+    detector = AnomalyDetector(list(devices), list(channels), warmup=50, half_life=500, **kwargs)
+    rng = np.random.default_rng(0)
+    samples = rng.normal([5.0, 40.0], [0.5, 0.1], size=(n, len(devices), len(channels)))
+    detector.update_batch(samples)
+    return detector, samples
+
+
+def test_half_life_alpha():
+    alpha = half_life_alpha(100)
+    assert (1 - alpha) ** 100 == pytest.approx(0.5)
+    with pytest.raises(ValueError):
+        half_life_alpha(0)
+
+
+def test_no_score_during_warmup_then_z_against_baseline():
+    detector = AnomalyDetector(['A'], ['speed_x'], warmup=10)
+    samples = np.arange(10, dtype=float)
+    z = detector.update_batch(samples.reshape(-1, 1, 1))
+    assert np.isnan(z).all()
+    # 预热期间系数为 1/n, 即累计均值和 (总体) 方差
+    assert detector.mean[0, 0] == pytest.approx(samples.mean())
+    assert detector.var[0, 0] == pytest.approx(samples.var())
+    z = detector.update([20.0])
+    assert z[0, 0] == pytest.approx((20.0 - samples.mean()) / samples.std())
+    assert detector.anomalous[0, 0]  # 约 5.2σ > 4
+
+
+def test_spike_after_warmup_is_flagged_but_clipped_when_learning():
+    detector, samples = trained()
+    mean, std = detector.mean[0, 0], np.sqrt(detector.var[0, 0])
+    z = detector.update([[mean + 20 * std, 40.0]])
+    assert z[0, 0] == pytest.approx(20.0)
+    assert detector.anomalous[0, 0] and not detector.anomalous[0, 1]
+    assert detector.device_score('A') == (pytest.approx(20.0), 'speed_x')
+    # 学习时偏差截断在 clip_z 个标准差, 单次冲击对均值的影响有限
+    assert detector.mean[0, 0] - mean <= 4 * std / 200  # 第 201 个采样, 系数 1/201
+    detector.update([[NAN, 40.0]])
+    assert detector.anomalous[0, 0]  # 缺失的数据不改变状态
+    assert np.isnan(detector.z[0, 0])
+    detector.update([[mean, 40.0]])
+    assert not detector.anomalous[0, 0]
+
+
+def test_constant_channel_uses_min_std():
+    detector = AnomalyDetector(['A'], ['temperature'], warmup=5, min_std=0.01)
+    detector.update_batch(np.full((5, 1, 1), 30.0))
+    assert detector.update([30.05])[0, 0] == pytest.approx(5.0)
+
+
+def test_batch_matches_single():
+    values = np.random.default_rng(2).normal(size=(120, 2, 3))
+    values[::9, 0, 1] = NAN
+    single = AnomalyDetector(['A', 'B'], ['a', 'b', 'c'], warmup=20, half_life=30)
+    expected = np.stack([single.update(row) for row in values])
+    batch = AnomalyDetector(['A', 'B'], ['a', 'b', 'c'], warmup=20, half_life=30)
+    np.testing.assert_array_equal(batch.update_batch(values), expected)
+    assert batch.update_batch(np.empty((0, 2, 3))).shape == (0, 2, 3)
+
+
+def test_save_load_round_trip_by_name(tmp_path):
+    detector, _ = trained(devices=('A', 'B'))
+    path = str(tmp_path / "state" / "anomaly.npz")
+    detector.save(path)
+    assert not [name for name in (tmp_path / "state").iterdir() if name.suffix == '.tmp']
+
+    # 设备和通道的顺序不同、新增了设备和通道: 按名称恢复, 其余保持未学习
+    restored = AnomalyDetector(['C', 'B', 'A'], ['temperature', 'speed_z', 'speed_x'], warmup=50, half_life=500)
+    assert restored.load(path) == 4
+    for device in ('A', 'B'):
+        expected = detector.baseline(device)
+        baseline = restored.baseline(device)
+        assert baseline['speed_x'] == pytest.approx(expected['speed_x'])
+        assert baseline['temperature'] == pytest.approx(expected['temperature'])
+        assert baseline['speed_z'] is None
+    assert restored.baseline('C') == {'temperature': None, 'speed_z': None, 'speed_x': None}
+    # 恢复后不必重新预热
+    z = restored.update([[NAN] * 3, [NAN] * 3, [40.0, NAN, 5.0]])
+    assert not np.isnan(z[2, [0, 2]]).any()
+
+
+def test_load_missing_or_unrelated_file(tmp_path):
+    detector = AnomalyDetector(['A'], ['speed_x'])
+    assert detector.load(str(tmp_path / "missing.npz")) == 0
+    other = AnomalyDetector(['X'], ['speed_x'])
+    path = str(tmp_path / "other.npz")
+    other.save(path)
+    assert detector.load(path) == 0
+    assert detector.baseline('A') == {'speed_x': None}
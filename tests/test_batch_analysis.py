@@ -0,0 +1,98 @@
+"""批量分析: 按时间段定位读取, 检查点键"""
+import csv
+import json
+import os
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from vibration_monitor import data_analysis
+from vibration_monitor.batch_analysis import chunk_offsets, completed_tasks, plan_tasks, run_batch
+from vibration_monitor.channels import RECORD_KEYS
+from vibration_monitor.data_recorder import load_recording
+
+RATE = 10.0
+START = datetime(2024, 5, 1, 8, 0, 0).timestamp()
+OPTIONS = {
+    'channels': ["58", "59", "60"],
+    'feeding_channel': None,
+    'target_weight': 100.0,
+    'tolerance': 1.0,
+    'thresholds': dict(data_analysis.DEFAULT_FEEDING_THRESHOLDS),
+    'peaks': 3,
+}
+
+
+def make_values(n):
+    rng = np.random.default_rng(0)
+    values = np.round(rng.normal(size=(n, len(RECORD_KEYS))), 4)
+    values[::7, 3] = np.nan  # 空值
+    return values
+
+
+def write_csv(path, n, offset=0):
+    values = make_values(offset + n)[offset:]
+    with open(path, 'a' if offset else 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.writer(f)
+        if not offset:
+            writer.writerow(['记录时间', '设备名称'] + list(RECORD_KEYS))
+        for i, row in enumerate(values, offset):
+            stamp = datetime.fromtimestamp(START + i / RATE).strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
+            writer.writerow([stamp, 'dev'] + ['' if v != v else str(v) for v in row])
+    return str(path)
+
+
+def write_npy(path, n):
+    np.save(path, np.column_stack([np.arange(n) / RATE, make_values(n)]))
+    return str(path)
+
+
+@pytest.mark.parametrize("suffix", ['.csv', '.npy'])
+def test_chunks_read_only_their_rows(tmp_path, suffix):
+    path = (write_csv if suffix == '.csv' else write_npy)(tmp_path / f"recording{suffix}", 605)
+    times, values = load_recording(path)
+    relative = times - times[0]
+    tasks = plan_tasks([path], chunk_seconds=13)
+    assert [task.start for task in tasks] == [0, 13, 26, 39, 52]
+    for task in tasks:
+        chunk_times, chunk_values = load_recording(path, task.begin, task.end)
+        mask = relative >= task.start - 1e-6
+        if task.stop is not None:
+            mask &= relative < task.stop - 1e-6
+        assert chunk_times == pytest.approx(times[mask])
+        np.testing.assert_array_equal(chunk_values, values[mask])
+
+
+def test_csv_offsets_are_row_starts(tmp_path):
+    path = write_csv(tmp_path / "recording.csv", 100)
+    offsets = chunk_offsets(path, [0, 2.5, 5, 100])
+    with open(path, 'rb') as f:
+        data = f.read()
+    header_end = data.index(b'\n') + 1
+    assert offsets[0] == header_end
+    assert offsets[-1] == len(data)  # 超出记录时长: 文件末尾
+    for offset in offsets[1:3]:
+        assert data[offset - 1:offset] == b'\n'
+    assert data[offsets[1]:].startswith(datetime.fromtimestamp(START + 2.5).strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
+                                        .encode())
+
+
+def test_checkpoint_skips_only_unchanged_tasks(tmp_path):
+    path = write_csv(tmp_path / "recording.csv", 300)
+    summary = str(tmp_path / "summary.jsonl")
+    tasks = plan_tasks([path], chunk_seconds=10)
+    assert run_batch(tasks, summary, OPTIONS, workers=1)['completed'] == 3
+    assert run_batch(tasks, summary, OPTIONS, workers=1)['skipped'] == 3
+
+    changed = dict(OPTIONS, peaks=5)  # 参数改变: 全部重新分析
+    assert run_batch(tasks, summary, changed, workers=1)['completed'] == 3
+
+    write_csv(path, 50, offset=300)  # 文件被追加 (大小、修改时间改变)
+    os.utime(path, ns=(1, 1))
+    stats = run_batch(plan_tasks([path], chunk_seconds=10), summary, changed, workers=1)
+    assert stats['skipped'] == 0 and stats['completed'] == 4
+    with open(summary, encoding='utf-8') as f:
+        records = [json.loads(line) for line in f]
+    assert len(completed_tasks(summary)) == 10
+    assert records[-1]['samples'] == 50
@@ -0,0 +1,53 @@
+"""通道登记表: 列号、查找、派生的通道表与寄存器映射"""
+import numpy as np
+import pytest
+
+from vibration_monitor.alarm_engine import DEFAULT_THRESHOLDS
+from vibration_monitor.channels import (CHANNEL_COLUMNS, CHANNEL_INDEX, CHANNEL_KEYS, CHANNEL_NAMES, CHANNELS,
+                                        KEY_COLUMNS, MONITORED_CHANNELS, RECORD_KEYS, ChannelId, record_values)
+from vibration_monitor.device import wtvb01_protocol as protocol
+
+
+def test_values_are_contiguous_columns_in_record_key_order():
+    assert [int(channel) for channel in ChannelId] == list(range(len(ChannelId)))
+    assert RECORD_KEYS == tuple(channel.key for channel in ChannelId)
+    assert len(set(RECORD_KEYS)) == len(RECORD_KEYS)
+    assert len({channel.label for channel in ChannelId}) == len(ChannelId)
+    for key, channel in KEY_COLUMNS.items():
+        assert RECORD_KEYS[channel] == key and channel.register == int(key)
+
+
+@pytest.mark.parametrize("text", [6, "58", "speed_x", "SPEED_X", " Speed_X ", "速度X", "速度x"])
+def test_parse_accepts_column_key_name_and_label(text):
+    assert ChannelId.parse(text) is ChannelId.SPEED_X
+
+
+@pytest.mark.parametrize("text", ["speed_w", "61", ""])
+def test_parse_unknown_raises_key_error(text):
+    with pytest.raises(KeyError):
+        ChannelId.parse(text)
+    with pytest.raises(ValueError):
+        ChannelId.parse(99)
+
+
+def test_monitored_channel_table_follows_registry():
+    assert len(CHANNELS) == 13 and ChannelId.GYRO_X not in MONITORED_CHANNELS
+    for i, (channel, row) in enumerate(zip(MONITORED_CHANNELS, CHANNELS)):
+        assert row == (channel.config_name, channel.key, channel.label, channel.unit)
+        assert CHANNEL_INDEX[row.name] == i and CHANNEL_NAMES[i] == row.name and CHANNEL_KEYS[i] == row.key
+    assert set(CHANNEL_NAMES) == set(DEFAULT_THRESHOLDS)  # 每个监测通道都有默认报警上限
+    values = np.arange(len(RECORD_KEYS), dtype=float) * 10
+    np.testing.assert_array_equal(values[CHANNEL_COLUMNS], [10 * int(channel) for channel in MONITORED_CHANNELS])
+
+
+def test_record_values_orders_by_record_keys():
+    values = record_values({"58": 1.5, "64": 25.0, "unknown": 3.0})
+    assert values.shape == (len(RECORD_KEYS),)
+    assert values[ChannelId.SPEED_X] == 1.5 and values[ChannelId.TEMPERATURE] == 25.0
+    assert np.isnan(np.delete(values, [ChannelId.SPEED_X, ChannelId.TEMPERATURE])).all()
+
+
+def test_registers_decode_into_registry_columns():
+    assert set(protocol.REGISTER_CHANNELS.values()) == set(ChannelId)
+    for register, channel in protocol.REGISTER_CHANNELS.items():
+        assert channel.register == register and protocol.REGISTER_KEYS[register] == channel.key
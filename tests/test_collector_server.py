@@ -0,0 +1,137 @@
+"""远程采集服务器: 报文编解码、报文错误与端到端接收"""
+import asyncio
+import struct
+import time
+
+import numpy as np
+import pytest
+
+from vibration_monitor.channels import RECORD_KEYS
+from vibration_monitor.exceptions import ProtocolError
+from vibration_monitor.utils import collector_server as cs
+
+N_CHANNELS = len(RECORD_KEYS)
+
+
+def batch(n, start=0.0, seed=0):
+    rng = np.random.default_rng(seed)
+    return start + np.arange(n) * 0.01, rng.normal(size=(n, N_CHANNELS))
+
+
+def message_of(frame: bytes) -> bytes:
+    (length,) = cs.FRAME_HEADER.unpack_from(frame)
+    assert length == len(frame) - cs.FRAME_HEADER.size
+    return frame[cs.FRAME_HEADER.size:]
+
+
+def test_frame_round_trip():
+    assert cs.decode_message(message_of(cs.encode_hello("泵站-1"))) == (cs.MSG_HELLO, "泵站-1")
+
+    timestamps, values = batch(50)
+    msg_type, (decoded_t, decoded_v) = cs.decode_message(message_of(cs.encode_batch(timestamps, values)))
+    assert msg_type == cs.MSG_BATCH
+    np.testing.assert_array_equal(decoded_t, timestamps)  # 时间戳为 float64
+    np.testing.assert_array_equal(decoded_v, values.astype(np.float32))
+
+    msg_type, (name, decoded_t, decoded_v) = cs.decode_message(
+        message_of(cs.encode_samples("A", timestamps[:3], values[:3, :2])))
+    assert (msg_type, name, decoded_v.shape) == (cs.MSG_SAMPLES, "A", (3, 2))
+
+    msg_type, request = cs.decode_message(message_of(cs.encode_subscribe(["A"], ["58"], 4)))
+    assert (msg_type, request) == (cs.MSG_SUBSCRIBE, {"devices": ["A"], "channels": ["58"], "decimation": 4})
+
+    msg_type, (empty_t, empty_v) = cs.decode_message(message_of(cs.encode_batch([], np.empty((0, 3)))))
+    assert empty_t.shape == (0,) and empty_v.shape == (0, 3)
+    with pytest.raises(ValueError):
+        cs.encode_batch([0.0, 1.0], np.zeros((3, N_CHANNELS)))
+
+
+@pytest.mark.parametrize("message", [
+    b"\x01",                                                     # 过短
+    bytes((2, cs.MSG_HELLO)) + b"A",                             # 版本
+    bytes((1, 99)),                                              # 类型
+    bytes((1, cs.MSG_BATCH)) + b"\x00",                          # 批次头不完整
+    message_of(cs.encode_batch(*batch(4)))[:-1],                 # 批次长度
+    bytes((1, cs.MSG_SUBSCRIBE)) + b"[1, 2]",                    # 订阅条件不是对象
+    bytes((1, cs.MSG_SUBSCRIBE)) + b"{",                         # JSON 错误
+    bytes((1, cs.MSG_SAMPLES, 5)) + b"AB",                       # 设备名称不完整
+    bytes((1, cs.MSG_HELLO)) + b"\xff\xfe",                      # 设备名称编码
+])
+def test_malformed_messages_raise_protocol_error(message):
+    with pytest.raises(ProtocolError):
+        cs.decode_message(message)
+
+
+def test_read_message_rejects_oversized_frame():
+    async def read(data, limit):
+        reader = asyncio.StreamReader()
+        reader.feed_data(data)
+        reader.feed_eof()
+        return await cs.read_message(reader, limit)
+
+    frame = cs.encode_hello("A")
+    assert asyncio.run(read(frame, 1024)) == message_of(frame)
+    with pytest.raises(ProtocolError):
+        asyncio.run(read(struct.pack(">I", 2048) + bytes(2048), 1024))
+    with pytest.raises(asyncio.IncompleteReadError):
+        asyncio.run(read(frame[:-1], 1024))
+
+
+@pytest.fixture
+def server():
+    received = []
+    server = cs.CollectorServer(port=0, max_pending_batches=4, on_batch=lambda device, timestamps, values:
+                                received.append((device.device_name, np.array(timestamps), np.array(values))))
+    server.start()
+    server.received = received
+    yield server
+    server.stop()
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "等待超时"
+        time.sleep(0.01)
+
+
+def test_clients_stream_batches_into_remote_devices(server):
+    batches = {name: [batch(40, start=i, seed=i) for i in range(10)] for name in ("A", "B")}
+
+    async def send(name):
+        client = cs.CollectorClient("127.0.0.1", server.port, name)
+        await client.connect()
+        for timestamps, values in batches[name]:
+            await client.send_batch(timestamps, values)
+        await client.close()
+
+    async def main():
+        await asyncio.gather(send("A"), send("B"))
+
+    asyncio.run(main())
+    wait_for(lambda: sum(s["batches"] for s in server.stats()) == 20)  # 统计在回调之后更新
+    for name in ("A", "B"):
+        got = [(t, v) for device, t, v in server.received if device == name]  # 同一连接内按顺序到达
+        np.testing.assert_array_equal(np.concatenate([t for t, _ in got]),
+                                      np.concatenate([t for t, _ in batches[name]]))
+        device = server.devices[name]
+        assert device.samples_received == 400
+        np.testing.assert_allclose(device.values, batches[name][-1][1][-1], rtol=1e-6)
+    stats = server.stats()
+    assert sorted(s["device"] for s in stats) == ["A", "B"]
+    assert all(s["batches"] == 10 and s["samples"] == 400 and s["protocol_errors"] == 0 for s in stats)
+
+
+def test_batch_before_hello_closes_connection(server):
+    async def send():
+        reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+        writer.write(cs.encode_batch(*batch(3)))
+        await writer.drain()
+        data = await asyncio.wait_for(reader.read(), timeout=5)  # 服务器断开连接
+        writer.close()
+        return data
+
+    assert asyncio.run(send()) == b""
+    wait_for(lambda: any(s["closed"] for s in server.stats()))
+    assert server.stats()[0]["protocol_errors"] == 1
+    assert server.received == [] and server.devices == {}
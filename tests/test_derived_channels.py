@@ -0,0 +1,134 @@
+"""派生通道: 表达式检查, 按帧/按批计算一次并随采样数组交给各使用方"""
+import configparser
+import logging
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from vibration_monitor.channels import RECORD_KEYS, ChannelId
+from vibration_monitor.device.derived_channels import (DEFAULT_DERIVED_CHANNELS, SOURCE_KEYS, DerivedChannel,
+                                                       DerivedChannels, compile_expression)
+from vibration_monitor.device.remote_device import RemoteDevice
+from vibration_monitor.device.simulator import ReplayDevice
+
+SPEED = [ChannelId.SPEED_X, ChannelId.SPEED_Y, ChannelId.SPEED_Z]
+
+
+def raw_samples(n, seed=0):
+    return np.random.default_rng(seed).normal(size=(n, len(RECORD_KEYS)))
+
+
+@pytest.mark.parametrize("expression", [
+    "__import__('os').system('ls')",
+    "speed_x.__class__",
+    "(lambda: 1)()",
+    "[speed_x, speed_y][0]",
+    "speed_x if speed_y else 0",
+    "speed_x > 1",
+    "'abc'",
+    "norm(speed_x, out=speed_y)",
+    "eval('1')",
+    "np.sqrt(speed_x)",
+    "open",
+    "unknown_x + 1",
+    "speed_x +",
+    "(yield speed_x)",
+])
+def test_unsafe_or_invalid_expressions_are_rejected(expression):
+    with pytest.raises(ValueError):
+        compile_expression(expression, list(SOURCE_KEYS))
+
+
+def test_allowed_expression_reports_used_variables():
+    code, used = compile_expression("-sqrt(speed_x ** 2 + abs(speed_y)) % 3 + max(temperature, 1.5)",
+                                    list(SOURCE_KEYS))
+    assert sorted(used) == ['speed_x', 'speed_y', 'temperature']
+    assert eval(code, {'__builtins__': {}}, {'sqrt': np.sqrt, 'abs': np.abs, 'max': np.maximum,
+                                             'speed_x': 3.0, 'speed_y': -7.0, 'temperature': 1.0}) == \
+        pytest.approx(-4.0 % 3 + 1.5)
+
+
+def test_names_must_be_new_and_references_must_come_first():
+    with pytest.raises(ValueError):
+        DerivedChannels([DerivedChannel('speed_x', '速度', 'mm/s', 'speed_y')])
+    with pytest.raises(ValueError):
+        DerivedChannels([DerivedChannel('norm', '模', '', 'speed_y')])
+    with pytest.raises(ValueError):
+        DerivedChannels([DerivedChannel('speed_db', '速度dB', 'dB', '20 * log10(speed_mag)'),
+                         DerivedChannel('speed_mag', '速度合成', 'mm/s', 'norm(speed_x, speed_y, speed_z)')])
+
+
+def test_from_config_skips_invalid_definitions(caplog):
+    parser = configparser.ConfigParser()
+    parser.read_string("""
+[DerivedChannels]
+enabled = true
+disp_mag =
+speed_db = 速度dB, dB, 20 * log10(speed_mag)
+bad_call = 坏, , __import__('os')
+bad_format = 只有标签
+""")
+    caplog.set_level(logging.WARNING)
+    derived = DerivedChannels.from_config(SimpleNamespace(config=parser))
+    assert derived.names == ['accel_mag', 'speed_mag', 'speed_db']
+    assert sum('bad_call' in r.getMessage() or 'bad_format' in r.getMessage() for r in caplog.records) == 2
+    assert DerivedChannels.from_config(None).names == [channel.name for channel in DEFAULT_DERIVED_CHANNELS]
+
+
+def test_fill_frame_and_extend_batch_agree():
+    derived = DerivedChannels()
+    values = raw_samples(50)
+    records = derived.extend(values)
+    assert records.shape == (50, len(derived.record_keys))
+    np.testing.assert_array_equal(records[:, :len(RECORD_KEYS)], values)
+    speed_mag = records[:, derived.record_keys.index('speed_mag')]
+    np.testing.assert_allclose(speed_mag, np.linalg.norm(values[:, SPEED], axis=1))
+    frame = np.append(values[7], np.full(len(derived), np.nan))
+    assert derived.fill(frame) is frame
+    np.testing.assert_allclose(frame, records[7])
+
+
+def test_later_channels_use_earlier_ones():
+    derived = DerivedChannels([DerivedChannel('speed_mag', '速度合成', 'mm/s', 'norm(speed_x, speed_y, speed_z)'),
+                               DerivedChannel('speed_db', '速度dB', 'dB', '20 * log10(speed_mag)')])
+    records = derived.extend(raw_samples(5))
+    speed_mag, speed_db = records[:, derived.columns].T
+    np.testing.assert_allclose(speed_db, 20 * np.log10(speed_mag))
+
+
+def test_replay_device_emits_derived_columns_once_per_frame(tmp_path, monkeypatch):
+    values = raw_samples(10)
+    path = tmp_path / "recording.npy"
+    np.save(path, np.column_stack([np.arange(10) * 0.1, values]))
+    device = ReplayDevice("replay", str(path), speed=0)
+    device.derived = DerivedChannels()
+    calls = []
+    evaluate = device.derived.evaluate
+    monkeypatch.setattr(device.derived, 'evaluate', lambda sources: calls.append(1) or evaluate(sources))
+    batches = []
+    device.add_listener(lambda _, stamps, batch: batches.append(batch))
+    device.open_device()
+    device.start_data_acquisition()
+    device._thread.join(timeout=5)
+    device.close_device()
+
+    received = np.concatenate(batches)
+    assert len(calls) == 10
+    np.testing.assert_allclose(received, DerivedChannels().extend(values))
+    assert device.get_data('speed_mag') == pytest.approx(received[-1, device.record_keys.index('speed_mag')])
+
+
+def test_remote_batch_is_evaluated_once(monkeypatch):
+    device = RemoteDevice("remote")
+    device.derived = DerivedChannels()
+    calls = []
+    evaluate = device.derived.evaluate
+    monkeypatch.setattr(device.derived, 'evaluate', lambda sources: calls.append(1) or evaluate(sources))
+    batches = []
+    device.add_listener(lambda _, stamps, batch: batches.append(batch))
+    values = raw_samples(200)
+    assert device.ingest(np.arange(200) * 0.01, values)
+    assert len(calls) == 1
+    assert batches[0].shape == (200, len(device.record_keys))
+    np.testing.assert_allclose(device.values, batches[0][-1])
@@ -0,0 +1,115 @@
+"""诊断分析: 轴承特征频率、包络谱、频带扫描与阶次跟踪"""
+import configparser
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from scipy.signal import hilbert
+
+from vibration_monitor import diagnostics
+from vibration_monitor.diagnostics import DEFAULT_BEARINGS, DiagnosticAnalyzer
+
+FS = 5000.0
+
+
+def test_defect_orders_of_6205():
+    orders = diagnostics.defect_orders(DEFAULT_BEARINGS['6205'])
+    assert orders == pytest.approx({'BPFO': 3.585, 'BPFI': 5.415, 'BSF': 2.357, 'FTF': 0.398}, abs=1e-3)
+    frequencies = diagnostics.defect_frequencies(DEFAULT_BEARINGS['6205'], 25.0)
+    assert frequencies['BPFO'] == pytest.approx(25.0 * orders['BPFO'])
+    markers = diagnostics.defect_markers(DEFAULT_BEARINGS['6205'], 25.0, harmonics=2)
+    assert len(markers) == 8
+    assert ('2×BPFI', pytest.approx(2 * frequencies['BPFI'])) in markers
+
+
+def test_bearing_table_from_config():
+    parser = configparser.ConfigParser()
+    parser.read_string("""
+[Bearings]
+nu206 = 13, 9.0, 46.0
+7205b = 13, 7.9, 38.5, 40
+bad = 0, 1, 2
+""")
+    table = diagnostics.bearing_table(SimpleNamespace(config=parser))
+    assert set(table) == {'6203', '6205', 'NU206', '7205B'}
+    assert table['7205B'].contact_angle == 40 and table['NU206'].balls == 13
+    assert diagnostics.bearing_table() == DEFAULT_BEARINGS
+
+
+def modulated(carrier=1000.0, modulation=37.0, depth=0.5, n=5000):
+    t = np.arange(n) / FS
+    return t, (1 + depth * np.cos(2 * np.pi * modulation * t)) * np.cos(2 * np.pi * carrier * t)
+
+
+def test_envelope_matches_hilbert_and_envelope_spectrum_shows_modulation():
+    t, x = modulated()
+    analyzer = DiagnosticAnalyzer(t, np.vstack([x, 2 * x]))
+    envelope = analyzer.envelope((900, 1100))
+    np.testing.assert_allclose(envelope[0], np.abs(hilbert(x)), atol=1e-9)
+    np.testing.assert_allclose(envelope[1], 2 * envelope[0])
+    assert analyzer.envelope((900, 1100)) is envelope  # 同一频带取缓存
+
+    freqs, amplitude = analyzer.envelope_spectrum((900, 1100))
+    peak = np.argmax(amplitude[0])
+    assert freqs[peak] == pytest.approx(37.0)
+    assert amplitude[:, peak] == pytest.approx([0.5, 1.0])
+    # 频带外没有能量
+    assert analyzer.envelope((2000, 2400)).max() < 1e-9
+
+
+def test_best_band_finds_impulsive_resonance():
+    rng = np.random.default_rng(0)
+    n = 10000
+    t = np.arange(n) / FS
+    impulses = np.zeros(n)
+    impulses[::int(FS / 43)] = 1.0  # 43 Hz 的冲击激起 1600 Hz 共振
+    ring = np.exp(-np.arange(200) / 20.0) * np.sin(2 * np.pi * 1600 * np.arange(200) / FS)
+    x = np.convolve(impulses, ring)[:n] + rng.normal(scale=0.2, size=n)
+    analyzer = DiagnosticAnalyzer(t, x)
+    (low, high), scores = analyzer.best_band(400)
+    assert low <= 1600 <= high
+    # 纯噪声频带的包络峭度接近瑞利分布的 3.25
+    noise = analyzer.band_sweep([(200, 600)])[0, 0]
+    assert noise < 3.6 < scores[0]
+    # 降采样的包络与全长包络的峭度一致
+    full = diagnostics.kurtosis(analyzer.envelope((low, high)))
+    np.testing.assert_allclose(analyzer.band_sweep([(low, high)])[:, 0], full, rtol=0.05)
+    freqs, amplitude = analyzer.envelope_spectrum((low, high))
+    assert freqs[np.argmax(amplitude[0, 1:]) + 1] == pytest.approx(43, abs=0.6)
+
+
+def test_order_spectrum_tracks_varying_speed():
+    n = 20000
+    t = np.arange(n) / FS
+    shaft_hz = 10 + 10 * t / t[-1]  # 4 秒内 10 → 20 Hz
+    revolutions = np.concatenate(([0.0], np.cumsum((shaft_hz[1:] + shaft_hz[:-1]) / 2 / FS)))
+    x = np.sin(2 * np.pi * 3 * revolutions)  # 3 阶
+    analyzer = DiagnosticAnalyzer(t, x)
+    np.testing.assert_allclose(analyzer.shaft_revolutions(shaft_hz), revolutions)
+    orders, amplitude = analyzer.order_spectrum(shaft_hz, samples_per_rev=32)
+    assert orders[np.argmax(amplitude[0])] == pytest.approx(3.0, abs=0.02)
+    assert amplitude[0].max() > 0.9
+    # 按时间的频谱在 30~60 Hz 间模糊, 峰值远低于 1
+    assert analyzer.amplitude_spectrum()[1].max() < 0.3
+    assert analyzer.resampled(shaft_hz, 32) is analyzer.resampled(shaft_hz.copy(), 32)
+
+
+def test_irregular_timestamps_and_invalid_arguments():
+    t, x = modulated(n=1000)
+    t = t.copy()
+    t[500:] += 0.01  # 中间缺 50 个采样
+    analyzer = DiagnosticAnalyzer(t, x)
+    assert analyzer.fs == pytest.approx(FS) and analyzer.gaps > 0
+    assert analyzer.n == len(analyzer.timestamps) > len(t)
+    with pytest.raises(ValueError):
+        DiagnosticAnalyzer(t[:3], x[:3])
+    with pytest.raises(ValueError):
+        DiagnosticAnalyzer(t, x[:-1])
+    with pytest.raises(ValueError):
+        analyzer.envelope((500, 400))
+    with pytest.raises(ValueError):
+        analyzer.envelope((3000, 3100))  # 超过奈奎斯特频率
+    with pytest.raises(ValueError):
+        analyzer.best_band(3000)
+    with pytest.raises(ValueError):
+        analyzer.order_spectrum(0.01)  # 不足一圈
@@ -0,0 +1,83 @@
+"""界面历史缓冲: 只读视图、容量、搬移与数据版本"""
+import numpy as np
+import pytest
+
+from vibration_monitor.channels import CHANNELS, ChannelId
+from vibration_monitor.history_store import HistoryStore
+
+N_CHANNELS = len(CHANNELS)
+
+
+def sample(i):
+    return [i + c / 100 for c in range(N_CHANNELS)]
+
+
+def test_views_are_read_only_and_not_copies():
+    store = HistoryStore(10)
+    for i in range(3):
+        store.append(float(i), sample(i))
+    timestamps, values = store.timestamps(), store.values()
+    np.testing.assert_array_equal(timestamps, [0, 1, 2])
+    assert values.shape == (N_CHANNELS, 3)
+    assert not timestamps.flags.writeable and not values.flags.writeable
+    with pytest.raises(ValueError):
+        values[0, 0] = 1
+    assert np.shares_memory(store.series('speed_x'), store.values())
+    np.testing.assert_array_equal(store.series('速度X'), store.series(3))
+    np.testing.assert_array_equal(store.series(ChannelId.SPEED_X), store.series(3))  # 按登记表查找, 不作下标
+    store.append(3.0, sample(3))
+    assert timestamps[-1] == 2  # 已取得的视图在搬移之前内容不变
+
+
+def test_keeps_latest_capacity_samples_across_compaction():
+    store = HistoryStore(8)
+    for i in range(50):  # 多次写满并搬移
+        store.append(float(i), sample(i))
+        assert len(store) == min(i + 1, 8)
+        np.testing.assert_array_equal(store.timestamps(), np.arange(max(0, i - 7), i + 1))
+    np.testing.assert_array_equal(store.values()[1], np.arange(42, 50) + 0.01)
+    np.testing.assert_array_equal(store.latest(), sample(49))
+
+
+@pytest.mark.parametrize("batch", [1, 3, 8, 20])
+def test_extend_matches_append(batch):
+    appended, extended = HistoryStore(8), HistoryStore(8)
+    timestamps = np.arange(45, dtype=float)
+    values = np.array([sample(i) for i in range(45)]).T
+    for i in range(45):
+        appended.append(timestamps[i], values[:, i])
+    for start in range(0, 45, batch):
+        extended.extend(timestamps[start:start + batch], values[:, start:start + batch])
+    np.testing.assert_array_equal(extended.timestamps(), appended.timestamps())
+    np.testing.assert_array_equal(extended.values(), appended.values())
+
+
+def test_version_changes_on_every_write_and_clear():
+    store = HistoryStore(4)
+    versions = [store.version]
+    store.append(0.0, sample(0))
+    versions.append(store.version)
+    store.extend([1.0, 2.0], np.array([sample(1), sample(2)]).T)
+    versions.append(store.version)
+    store.extend([], np.empty((N_CHANNELS, 0)))  # 空批次不算写入
+    versions.append(store.version)
+    store.clear()
+    versions.append(store.version)
+    assert versions == [0, 1, 2, 2, 3]
+    assert len(store) == 0 and store.latest() is None
+
+
+def test_snapshot_pairs_version_with_views():
+    store = HistoryStore(4)
+    store.append(0.0, sample(0))
+    snapshot = store.snapshot()
+    assert snapshot.version == store.version
+    np.testing.assert_array_equal(snapshot.timestamps, [0.0])
+    store.append(1.0, sample(1))
+    assert snapshot.version != store.version  # 使用者据此判断需要重新取数据
+    assert len(snapshot.timestamps) == 1
+
+
+def test_invalid_capacity():
+    with pytest.raises(ValueError):
+        HistoryStore(0)
@@ -0,0 +1,41 @@
+"""日志限流过滤器: 时间窗口、抑制计数与多线程"""
+import logging
+import threading
+
+from vibration_monitor.utils.logger import RateLimitFilter
+
+
+def make_record(lineno=10, level=logging.WARNING, msg="数据异常 %d", args=(1,)):
+    return logging.LogRecord("vibration_monitor.test", level, __file__, lineno, msg, args, None)
+
+
+def test_burst_then_suppressed_count_in_next_window(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr("vibration_monitor.utils.logger.time.monotonic", lambda: now[0])
+    limiter = RateLimitFilter(interval=5.0, burst=2)
+    assert [limiter.filter(make_record()) for _ in range(5)] == [True, True, False, False, False]
+    assert limiter.filter(make_record(lineno=11))  # 不同位置分别计数
+    assert limiter.filter(make_record(level=logging.CRITICAL))
+    now[0] = 5.0
+    record = make_record()
+    assert limiter.filter(record)
+    assert record.getMessage() == "数据异常 1 (此前 5 秒内已抑制 3 条相同位置的日志)"
+    assert limiter.suppressed == 3
+
+
+def test_concurrent_threads_share_one_window():
+    limiter = RateLimitFilter(interval=60.0, burst=50)
+    passed = []
+    barrier = threading.Barrier(8)
+
+    def worker():
+        barrier.wait()
+        passed.append(sum(limiter.filter(make_record()) for _ in range(2000)))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sum(passed) == 50
+    assert limiter.suppressed == 8 * 2000 - 50
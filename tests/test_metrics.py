@@ -0,0 +1,86 @@
+"""运行指标: 直方图分桶边界与分位数精度, 指标登记表"""
+import json
+
+import numpy as np
+import pytest
+
+from vibration_monitor.utils.metrics import (SUB_BUCKET_COUNT, Histogram, MetricsDumper, MetricsRegistry)
+
+
+def bucket_of(value):
+    histogram = Histogram("h")
+    histogram.record(value)
+    return histogram.counts.index(1)
+
+
+def test_small_values_are_exact():
+    for value in range(2 * SUB_BUCKET_COUNT):
+        index = bucket_of(value)
+        assert Histogram.bucket_value(index) == value and Histogram.bucket_width(index) == 1
+
+
+@pytest.mark.parametrize("bits", [7, 8, 20, 40, 63])
+def test_each_power_of_two_uses_all_sub_buckets(bits):
+    low, high = 1 << (bits - 1), 1 << bits
+    indexes = [bucket_of(low + (high - low) * i // 200) for i in range(200)]
+    assert len(set(indexes)) == SUB_BUCKET_COUNT
+    assert Histogram.bucket_width(indexes[0]) == low // SUB_BUCKET_COUNT
+
+
+def test_bucket_boundaries():
+    for value in [64, 65, 100, 127, 128, 1000, 123456789, (1 << 63) - 1]:
+        index = bucket_of(value)
+        low, width = Histogram.bucket_value(index), Histogram.bucket_width(index)
+        assert low <= value < low + width
+        assert width <= max(1, low // SUB_BUCKET_COUNT)
+        assert bucket_of(low) == bucket_of(low + width - 1) == index
+        assert bucket_of(low + width) == index + 1
+        assert bucket_of(low - 1) == index - 1
+
+
+def test_percentiles_within_relative_error():
+    values = np.random.default_rng(0).lognormal(mean=12, sigma=2, size=20000).astype(np.int64)
+    histogram = Histogram("latency")
+    for value in values.tolist():
+        histogram.record(value)
+    ordered = np.sort(values)
+    for q in (1, 10, 50, 90, 99, 99.9):
+        exact = ordered[max(1, int(round(q / 100 * len(values)))) - 1]  # 最近秩
+        assert histogram.percentile(q) == pytest.approx(exact, rel=1 / 64)
+    assert histogram.min == ordered[0] and histogram.max == ordered[-1]
+    assert histogram.mean == pytest.approx(values.mean())
+
+
+def test_empty_and_negative():
+    histogram = Histogram("h")
+    assert histogram.percentile(50) == 0.0 and histogram.snapshot()["min"] == 0
+    histogram.record(-5)
+    assert histogram.counts[0] == 1 and histogram.max == 0
+
+
+def test_registry_shares_metrics_by_name():
+    registry = MetricsRegistry()
+    assert registry.counter("frames") is registry.counter("frames")
+    assert registry.get("missing") is None
+    with pytest.raises(TypeError):
+        registry.histogram("frames")
+    registry.counter("frames").inc(3)
+    registry.gauge("depth").set(7)
+    registry.histogram("parse_ns").record(100)
+    snapshot = registry.snapshot()
+    assert list(snapshot) == ["depth", "frames", "parse_ns"]
+    assert snapshot["frames"] == 3 and snapshot["depth"] == 7 and snapshot["parse_ns"]["count"] == 1
+    registry.reset()
+    assert registry.snapshot()["frames"] == 0 and registry.histogram("parse_ns").count == 0
+
+
+def test_dumper_appends_json_lines(tmp_path):
+    registry = MetricsRegistry()
+    registry.counter("frames").inc()
+    path = tmp_path / "metrics" / "metrics.jsonl"
+    dumper = MetricsDumper(str(path), interval=60, registry=registry)
+    dumper.start()
+    registry.counter("frames").inc()
+    dumper.stop()
+    records = [json.loads(line) for line in path.read_text(encoding='utf-8').splitlines()]
+    assert records[-1]["metrics"] == {"frames": 2}
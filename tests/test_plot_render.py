@@ -0,0 +1,79 @@
+"""曲线绘制方式: 配置解析, OpenGL 不可用时的回退"""
+import configparser
+import logging
+import os
+
+import pytest
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+import pyqtgraph as pg  # noqa: E402
+from PyQt5.QtGui import QPainter  # noqa: E402
+from PyQt5.QtWidgets import QApplication  # noqa: E402
+
+from vibration_monitor.gui import plot_render  # noqa: E402
+from vibration_monitor.gui.plot_render import RenderSettings  # noqa: E402
+
+
+@pytest.fixture(scope='module')
+def app():
+    return QApplication.instance() or QApplication([])
+
+
+@pytest.fixture
+def warnings(caplog):
+    """plot_render 记录的警告"""
+    caplog.set_level(logging.WARNING, logger=plot_render.logger.name)
+
+    def messages():
+        return [record.getMessage() for record in caplog.records
+                if record.name == plot_render.logger.name and record.levelno == logging.WARNING]
+    return messages
+
+
+def settings_from(text):
+    config = configparser.ConfigParser()
+    config.read_string(text)
+    return RenderSettings.from_config(config)
+
+
+def test_from_config(warnings):
+    assert settings_from("[Plot]\nrender_mode = Fast\n").mode == 'fast'
+    assert settings_from("").mode == 'default'
+    assert settings_from("[Plot]\nrender_mode = vulkan\n").mode == 'default'
+    assert len(warnings()) == 1
+    with pytest.raises(ValueError):
+        RenderSettings('vulkan')
+
+
+@pytest.mark.parametrize("check", [lambda: False, lambda: 1 / 0])
+def test_opengl_unavailable_falls_back_to_fast(app, monkeypatch, warnings, check):
+    monkeypatch.setattr(plot_render, 'opengl_available', check)
+    settings = RenderSettings('opengl')
+    plot = pg.PlotWidget()
+    settings.setup_plot(plot)
+    curve = plot.plot(pen=settings.pen('r'))
+    assert settings.mode == 'fast'
+    assert not settings.use_opengl
+    assert settings.pen_width == 1 and curve.opts['pen'].width() == 1
+    assert not plot.renderHints() & QPainter.Antialiasing
+    assert plot.getPlotItem().clipToViewMode() and plot.getPlotItem().downsampleMode()[1:] == (True, 'peak')
+    assert warnings() == ["无法创建 OpenGL 上下文, 曲线改用 fast 方式绘制"]
+
+
+def test_opengl_checked_once(app, monkeypatch, warnings):
+    calls = []
+    monkeypatch.setattr(plot_render, 'opengl_available', lambda: calls.append(1) or False)
+    settings = RenderSettings('opengl')
+    for _ in range(3):
+        settings.setup_plot(pg.PlotWidget())
+        settings.pen('g')
+    assert calls == [1]
+    assert len(warnings()) == 1
+
+
+def test_real_opengl_check_does_not_raise(app):
+    """实际检查 (offscreen 平台通常没有 OpenGL 上下文): 要么使用 OpenGL, 要么退回 fast"""
+    settings = RenderSettings('opengl')
+    settings.setup_plot(pg.PlotWidget())
+    assert settings.mode in ('opengl', 'fast')
+    assert settings.use_opengl == (settings.mode == 'opengl')
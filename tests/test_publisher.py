@@ -0,0 +1,134 @@
+"""实时数据发布: 地址解析、订阅过滤与抽取、端到端发布、慢订阅者丢帧"""
+import asyncio
+import socket
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from vibration_monitor.channels import RECORD_KEYS
+from vibration_monitor.exceptions import ProtocolError
+from vibration_monitor.utils.collector_server import encode_subscribe
+from vibration_monitor.utils.publisher import SamplePublisher, SampleSubscriber, Subscription, parse_address
+
+RECORD_KEYS_WITH_DERIVED = RECORD_KEYS + ('speed_mag',)
+
+
+def batch(n, start=0, width=len(RECORD_KEYS_WITH_DERIVED)):
+    index = np.arange(start, start + n)
+    return index * 0.01, index[:, None] + np.arange(width) / 100.0
+
+
+def wait_for(predicate, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "等待超时"
+        time.sleep(0.01)
+
+
+def test_parse_address():
+    assert parse_address("tcp://0.0.0.0:5000") == ("tcp", "0.0.0.0", 5000)
+    assert parse_address(":5000") == ("tcp", "127.0.0.1", 5000)
+    assert parse_address("unix:///tmp/samples.sock") == ("unix", "/tmp/samples.sock", None)
+    with pytest.raises(ValueError):
+        parse_address("tcp://localhost")
+
+
+def test_subscription_keeps_decimation_phase_across_batches():
+    async def make():
+        return Subscription("peer", {"devices": ["A"], "channels": ["speed_mag", "58"], "decimation": 3}, 4,
+                            RECORD_KEYS_WITH_DERIVED)
+    subscription = asyncio.run(make())
+    assert subscription.wants("A") and not subscription.wants("B")
+    kept = []
+    for start, n in [(0, 4), (4, 1), (5, 1), (6, 7)]:
+        selected = subscription.select("A", *batch(n, start))
+        if selected is not None:
+            kept.extend(np.round(selected[0] * 100).astype(int))
+            np.testing.assert_allclose(selected[1][:, 0] - selected[1][:, 1],
+                                       (len(RECORD_KEYS) - int(RECORD_KEYS.index("58"))) / 100.0)
+    assert kept == [0, 3, 6, 9, 12]
+    with pytest.raises(ProtocolError):
+        Subscription("peer", {"channels": ["speed_mag"]}, 4)  # 未发布派生通道
+
+
+@pytest.fixture
+def publisher():
+    publisher = SamplePublisher("tcp://127.0.0.1:0", batch_interval=0.01, max_pending_frames=2,
+                                record_keys=RECORD_KEYS_WITH_DERIVED)
+    publisher.start()
+    yield publisher
+    publisher.stop()
+
+
+def test_subscriber_receives_filtered_frames(publisher):
+    received = []
+
+    async def subscribe():
+        subscriber = SampleSubscriber(publisher.address, devices=["A"], channels=["58", "speed_mag"], decimation=2)
+        await subscriber.connect()
+        async for frame in subscriber.frames():
+            received.append(frame)
+            if sum(len(t) for _, t, _ in received) >= 50:
+                break
+        await subscriber.close()
+
+    thread = threading.Thread(target=asyncio.run, args=(subscribe(),))
+    thread.start()
+    wait_for(lambda: publisher.subscriptions)
+    for start in range(0, 100, 10):
+        publisher.publish("B", *batch(10, start))
+        publisher.publish("A", *batch(10, start))
+        time.sleep(0.005)
+    thread.join(timeout=10)
+    assert not thread.is_alive()
+
+    assert {name for name, _, _ in received} == {"A"}
+    timestamps = np.concatenate([t for _, t, _ in received])
+    values = np.concatenate([v for _, _, v in received])
+    np.testing.assert_allclose(timestamps, np.arange(0, 100, 2) * 0.01)
+    expected = batch(100)[1][::2][:, [RECORD_KEYS.index("58"), len(RECORD_KEYS)]]
+    np.testing.assert_allclose(values, expected, rtol=1e-6)  # 采样值以 float32 发送
+
+
+def test_slow_subscriber_drops_frames_without_blocking_others(publisher):
+    # 慢订阅者: 接收缓冲区很小且从不读取
+    slow = socket.create_connection(("127.0.0.1", publisher.port))
+    slow.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+    slow.sendall(encode_subscribe(channels=None))
+    fast_samples = []
+    stop = threading.Event()
+
+    async def fast():
+        subscriber = SampleSubscriber(publisher.address)
+        await subscriber.connect()
+        async for _, timestamps, _ in subscriber.frames():
+            fast_samples.append(len(timestamps))
+            if stop.is_set():
+                break
+        await subscriber.close()
+
+    thread = threading.Thread(target=asyncio.run, args=(fast(),))
+    thread.start()
+    try:
+        wait_for(lambda: len(publisher.subscriptions) == 2)
+        start = 0
+        deadline = time.monotonic() + 20
+        while not any(s["frames_dropped"] for s in publisher.stats()):
+            assert time.monotonic() < deadline, "慢订阅者没有丢帧"
+            publisher.publish("A", *batch(5000, start))
+            start += 5000
+            time.sleep(0.02)
+        stats = {s["frames_dropped"] > 0: s for s in publisher.stats()}
+        assert stats[True]["queue_depth"] <= 2  # 丢帧的是慢订阅者, 发送队列有界
+        # 快订阅者继续收到数据
+        received = sum(fast_samples)
+        publisher.publish("A", *batch(10, start))
+        wait_for(lambda: sum(fast_samples) > received)
+    finally:
+        stop.set()
+        publisher.publish("A", *batch(10, start + 10))
+        thread.join(timeout=10)
+        slow.close()
+    assert stats[False]["frames_dropped"] == 0
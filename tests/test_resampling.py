@@ -0,0 +1,89 @@
+"""重采样: 抖动时间戳插值到均匀网格, 间断和缺失值的有效标志"""
+import numpy as np
+import pytest
+
+from vibration_monitor.resampling import is_uniform, resample_uniform, sample_rate, to_uniform
+
+FS = 100.0
+
+
+def jittered(n=500, jitter=0.3, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.arange(n) / FS + rng.uniform(-jitter, jitter, n) / FS
+
+
+def test_sample_rate_ignores_single_dropped_frames():
+    t = np.delete(np.arange(200) / FS, [50, 120])
+    assert sample_rate(t) == pytest.approx(FS)
+    with pytest.raises(ValueError):
+        sample_rate([1.0])
+    with pytest.raises(ValueError):
+        sample_rate([1.0, 1.0, 1.0])
+
+
+def test_is_uniform():
+    assert is_uniform(np.arange(100) / FS)
+    assert not is_uniform(jittered())
+    assert is_uniform([0.0, 1.0])
+
+
+def test_linear_signal_is_reproduced_on_the_grid():
+    t = jittered()
+    result = resample_uniform(t, 3.0 * t + 1.0, fs=FS)
+    assert result.fs == FS
+    np.testing.assert_allclose(np.diff(result.time), 1 / FS)
+    assert result.time[0] == t[0] and result.time[-1] <= t[-1]
+    np.testing.assert_allclose(result.values, 3.0 * result.time + 1.0)
+    assert result.valid.all()
+
+
+def test_sine_frequency_survives_resampling():
+    t = jittered(2000)
+    result = resample_uniform(t, np.sin(2 * np.pi * 7.0 * t))
+    spectrum = np.abs(np.fft.rfft(result.values))
+    freqs = np.fft.rfftfreq(len(result.values), 1 / result.fs)
+    assert freqs[spectrum.argmax()] == pytest.approx(7.0, abs=0.1)
+
+
+def test_gaps_are_marked_invalid():
+    t = np.concatenate([np.arange(100), np.arange(105, 200)]) / FS  # 连续丢 4 帧
+    result = resample_uniform(t, np.ones((2, len(t))), fs=FS)
+    gap = (result.time > 0.985) & (result.time < 1.045)  # 区间 [0.99, 1.05) 内的网格点
+    assert not result.valid[gap].any()
+    assert result.valid[~gap].all()
+    assert result.values.shape == (2, len(result.time))
+    single = np.delete(np.arange(100), 50) / FS  # 单个丢帧仍在 max_gap 以内
+    assert resample_uniform(single, np.ones(99), fs=FS).valid.all()
+
+
+def test_missing_values_use_other_endpoint_and_are_invalid():
+    t = jittered(50)
+    values = np.vstack([np.arange(50.0), np.arange(50.0)])
+    values[1, 20] = np.nan
+    result = resample_uniform(t, values, fs=FS)
+    assert not np.isnan(result.values).any()
+    near = (result.time > t[19]) & (result.time < t[21])  # 以缺失采样为端点的区间
+    assert not result.valid[near].any()
+    assert result.valid[~near].all()
+    np.testing.assert_allclose(result.values[0], np.interp(result.time, t, values[0]))
+
+
+def test_timestamps_going_back_are_clamped():
+    t = np.arange(50) / FS
+    t[25] = t[24] - 0.001  # 到达顺序中的小幅回退
+    result = resample_uniform(t, np.arange(50.0), fs=FS)
+    assert np.all(np.diff(result.values) >= 0)
+    with pytest.raises(ValueError):
+        resample_uniform(t, np.arange(10.0))
+
+
+def test_to_uniform_passes_uniform_data_through_without_copy():
+    t = np.arange(100) / FS
+    values = np.sin(t)
+    values[10] = np.nan
+    result = to_uniform(t, values)
+    assert result.values is values or np.shares_memory(result.values, values)
+    assert result.fs == pytest.approx(FS)
+    assert not result.valid[10] and result.valid.sum() == 99
+    resampled = to_uniform(jittered(), np.zeros(500))
+    np.testing.assert_allclose(np.diff(resampled.time), np.diff(resampled.time)[0])
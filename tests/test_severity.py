@@ -0,0 +1,73 @@
+"""振动烈度: 区域划分、回差、滑动窗口 RMS 与多设备"""
+import configparser
+
+import numpy as np
+import pytest
+
+from vibration_monitor.severity import ZONE_UNKNOWN, SeverityEvaluator
+
+NAN = float('nan')
+
+
+def transitions(events):
+    return [(event.device, event.old_zone, event.new_zone) for event in events]
+
+
+def test_zone_transitions_with_hysteresis():
+    # 类别 II 边界 1.12 / 2.8 / 7.1, 回差 10%: 回到较好区域须低于 1.008 / 2.52 / 6.39
+    evaluator = SeverityEvaluator(['A'], window=1, channels=['speed_x'], source_channels=['speed_x'],
+                                  hysteresis=0.1)
+    steps = [(0.5, ('-', 'A')), (2.0, ('A', 'B')), (3.0, ('B', 'C')), (2.7, None), (2.5, ('C', 'B')),
+             (7.5, ('B', 'D')), (6.5, None), (6.0, ('D', 'C')), (1.1, ('C', 'B')), (1.0, ('B', 'A'))]
+    for t, (value, expected) in enumerate(steps):
+        events = evaluator.evaluate([value], float(t))
+        assert transitions(events) == ([('A',) + expected] if expected else []), value
+        if events:
+            assert events[0].rms == pytest.approx(value) and events[0].time == t
+
+
+def test_window_rms_min_fill_and_missing_values():
+    evaluator = SeverityEvaluator(['A', 'B'], window=4, channels=['speed_x', 'speed_y'],
+                                  source_channels=['speed_x', 'speed_y'], min_fill=0.5)
+    assert evaluator.evaluate([[3.0, 3.0], [NAN, NAN]], 0.0) == []
+    assert evaluator.device_summary('A') == {'speed_x': None, 'speed_y': None}  # 少于 2 个有效采样
+    events = evaluator.evaluate([[4.0, 4.0], [NAN, NAN]], 1.0)
+    assert transitions(events) == [('A', '-', 'C'), ('A', '-', 'C')]
+    assert evaluator.device_summary('A')['speed_x'] == pytest.approx(np.sqrt((9 + 16) / 2))
+    assert evaluator.device_zone('B') == ZONE_UNKNOWN  # 整行 NaN: B 的窗口不前进
+    evaluator.evaluate([[NAN, 1.0], [1.0, 1.0]], 2.0)  # 单个通道的 NaN 占一个位置但不计入 RMS
+    for t in range(3, 6):
+        evaluator.evaluate([[1.0, 1.0], [1.0, 1.0]], float(t))
+    # A 的窗口: speed_x 为 NaN, 1, 1, 1 (3 和 4 已滑出); B 只有 4 个采样
+    assert evaluator.device_summary('A') == pytest.approx({'speed_x': 1.0, 'speed_y': 1.0})
+    assert evaluator.device_summary('B') == pytest.approx({'speed_x': 1.0, 'speed_y': 1.0})
+    assert evaluator.device_zone('A') == evaluator.device_zone('B') == 0
+
+
+def test_batch_matches_single():
+    values = np.abs(np.random.default_rng(1).normal(3.0, 2.0, size=(300, 2, 3)))
+    values[::7, 1] = NAN
+    timestamps = np.arange(300) * 0.05
+    single = SeverityEvaluator(['A', 'B'], window=20, source_channels=['speed_x', 'speed_y', 'speed_z'])
+    expected = [event for t, row in zip(timestamps, values) for event in single.evaluate(row, t)]
+    batch = SeverityEvaluator(['A', 'B'], window=20, source_channels=['speed_x', 'speed_y', 'speed_z'])
+    assert batch.evaluate_batch(timestamps, values) == expected
+    assert len(expected) > 4
+    np.testing.assert_array_equal(batch.zones, single.zones)
+
+
+def test_from_config_machine_classes():
+    config = configparser.ConfigParser()
+    config.read_string("""
+[Severity]
+window = 50
+channels = speed_x, speed_z
+machine_class = I
+pump_machine_class = IV
+""")
+    evaluator = SeverityEvaluator.from_config(config, ['fan', 'pump'])
+    assert evaluator.window == 50 and evaluator.channels == ['speed_x', 'speed_z']
+    assert evaluator.machine_classes == ['I', 'IV']
+    np.testing.assert_array_equal(evaluator.limits[1], (2.8, 7.1, 18.0))
+    with pytest.raises(ValueError):
+        evaluator.set_machine_class('fan', 'V')
@@ -0,0 +1,116 @@
+"""共享内存环形缓冲区: 读写、回绕、读取过慢时的覆盖处理"""
+from multiprocessing import shared_memory
+
+import numpy as np
+import pytest
+
+from vibration_monitor.utils.shared_ring import SampleRing, SampleRingReader
+
+CAPACITY = 16
+MAX_BATCH = 4
+
+
+@pytest.fixture
+def ring():
+    ring = SampleRing(capacity=CAPACITY, channels=2, max_batch=MAX_BATCH)
+    yield ring
+    ring.close()
+
+
+@pytest.fixture
+def reader(ring):
+    reader = SampleRingReader(ring.name)
+    yield reader
+    reader.close()
+
+
+def write_range(ring, start, stop):
+    timestamps = np.arange(start, stop, dtype=float)
+    ring.write(timestamps, np.column_stack([timestamps, -timestamps]))
+
+
+def joined(segments):
+    if not segments:
+        return np.empty(0)
+    return np.concatenate([timestamps for timestamps, _ in segments])
+
+
+def test_reader_sees_only_new_samples_as_read_only_views(ring):
+    write_range(ring, 0, 5)
+    reader = SampleRingReader(ring.name)
+    try:
+        assert reader.read() == []
+        write_range(ring, 5, 8)
+        segments = reader.read()
+        np.testing.assert_array_equal(joined(segments), [5, 6, 7])
+        np.testing.assert_array_equal(segments[0][1][:, 1], [-5, -6, -7])
+        assert not segments[0][0].flags.writeable
+        assert reader.read() == []
+    finally:
+        reader.close()
+
+
+def test_wrapped_read_returns_two_segments(ring, reader):
+    write_range(ring, 0, 10)
+    reader.read()
+    write_range(ring, 10, 20)  # 跨过缓冲区末尾
+    segments = reader.read()
+    assert len(segments) == 2
+    np.testing.assert_array_equal(joined(segments), np.arange(10, 20))
+    assert reader.overruns == 0
+
+
+def test_overrun_skips_to_oldest_safe_sample(ring, reader):
+    write_range(ring, 0, 40)  # 读者落后 40 个采样, 超过容量
+    segments = reader.read()
+    oldest = 40 + MAX_BATCH - CAPACITY
+    np.testing.assert_array_equal(joined(segments), np.arange(oldest, 40))
+    assert reader.overruns == oldest
+    assert reader.cursor == 40
+    write_range(ring, 40, 42)
+    np.testing.assert_array_equal(joined(reader.read()), [40, 41])
+    assert reader.overruns == oldest
+
+
+def test_valid_detects_views_overwritten_while_processing(ring, reader):
+    write_range(ring, 0, 8)
+    start = reader.cursor
+    segments = reader.read()
+    assert reader.valid(start)
+    write_range(ring, 8, 8 + CAPACITY)  # 处理期间写入者绕了一圈
+    assert not reader.valid(start)
+    assert joined(segments)[0] != 0  # 视图中的数据已被覆盖
+
+
+def test_large_batches_are_split_and_reads_can_be_limited(ring, reader):
+    write_range(ring, 0, 10)  # 超过 max_batch, 分块写入
+    assert ring.write_index == 10
+    np.testing.assert_array_equal(joined(reader.read(max_samples=3)), [0, 1, 2])
+    np.testing.assert_array_equal(joined(reader.read()), np.arange(3, 10))
+
+
+def test_from_start_and_latest(ring):
+    write_range(ring, 0, 30)
+    reader = SampleRingReader(ring.name, from_start=True)
+    try:
+        assert reader.cursor == reader.oldest_index() == 30 + MAX_BATCH - CAPACITY
+        start, segments = reader.latest(5)
+        assert start == 25
+        np.testing.assert_array_equal(joined(segments), np.arange(25, 30))
+        timestamps, values = reader.latest_array(100)  # 超过可安全读取的数量: 返回全部可用采样
+        np.testing.assert_array_equal(timestamps, np.arange(reader.oldest_index(), 30))
+        assert values.shape == (len(timestamps), 2) and values.flags.writeable
+    finally:
+        reader.close()
+
+
+def test_rejects_foreign_shared_memory_and_bad_batch():
+    other = shared_memory.SharedMemory(create=True, size=256)
+    try:
+        with pytest.raises(ValueError):
+            SampleRingReader(other.name)
+    finally:
+        other.close()
+        other.unlink()
+    with pytest.raises(ValueError):
+        SampleRing(capacity=8, max_batch=8)
@@ -0,0 +1,118 @@
+"""模拟设备: 应答帧、错误注入、进程内传输层的节奏, 回放设备的时间戳"""
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from vibration_monitor.device import wtvb01_protocol as protocol
+from vibration_monitor.device.device_wtvb01 import DeviceWTVB01
+from vibration_monitor.device.simulator import InMemoryTransport, ReplayDevice, SimulatedWTVB01
+
+READ_ALL = protocol.build_read_command(0x50, protocol.DATA_START_REG, protocol.DATA_REG_COUNT)
+
+
+def test_read_response_decodes_to_sample():
+    simulator = SimulatedWTVB01(noise=0.0, seed=1)
+    response = simulator.handle_request(READ_ALL)
+    packets = protocol.FrameParser(0x50).feed(response)
+    assert len(packets) == 1
+    decoded = protocol.decode_registers(packets[0])
+    expected = SimulatedWTVB01(noise=0.0).sample(0.0)
+    for key, value in expected.items():
+        step = protocol.scale_register(int(key), 1)  # 数据键为寄存器地址的十进制
+        assert decoded[key] == pytest.approx(value, abs=step)
+
+
+def test_ignores_other_address_and_bad_crc():
+    simulator = SimulatedWTVB01(address=0x50)
+    assert simulator.handle_request(protocol.build_read_command(0x51, protocol.DATA_START_REG, 1)) is None
+    bad = bytearray(READ_ALL)
+    bad[-1] ^= 0xFF
+    assert simulator.handle_request(bytes(bad)) is None
+    write = protocol.build_write_command(0x50, 0x69, 0xB588)
+    assert simulator.handle_request(write) == write
+
+
+def test_simulated_time_advances_per_frame():
+    simulator = SimulatedWTVB01(rate_hz=50, seed=0)
+    simulator.generate_stream(10)
+    assert simulator.frames_sent == 10
+    assert simulator._sim_time == pytest.approx(10 / 50)
+
+
+def test_injected_crc_errors_are_rejected_by_parser():
+    simulator = SimulatedWTVB01(crc_error_rate=1.0, seed=0)
+    parser = protocol.FrameParser(0x50)
+    assert parser.feed(simulator.generate_stream(20)) == []
+    assert parser.crc_errors == simulator.frames_corrupted == 20
+
+
+def test_parser_resyncs_after_dropped_bytes():
+    simulator = SimulatedWTVB01(byte_drop_rate=0.01, seed=3)
+    stream = simulator.generate_stream(500)
+    parser = protocol.FrameParser(0x50)
+    packets = parser.feed(stream)
+    assert simulator.bytes_dropped > 0
+    assert 0 < len(packets) < 500
+    assert all(len(packet) == protocol.read_response_length(protocol.DATA_REG_COUNT) for packet in packets)
+
+
+def test_in_memory_transport_paces_responses():
+    transport = InMemoryTransport(SimulatedWTVB01(rate_hz=20), timeout=0.2)
+    transport.open()
+    length = protocol.read_response_length(protocol.DATA_REG_COUNT)
+    start = time.monotonic()
+    for _ in range(5):
+        transport.write(READ_ALL)
+        assert len(transport.read(length)) == length
+    assert time.monotonic() - start == pytest.approx(4 / 20, abs=0.1)
+
+
+def test_low_rate_retries_do_not_queue_responses():
+    """帧率低于 1 / 读超时 (sim://5): 读超时后的重发请求不应使应答在缓冲区中堆积"""
+    simulator = SimulatedWTVB01(rate_hz=5, seed=0)
+    transport = InMemoryTransport(simulator)
+    device = DeviceWTVB01("sim", "sim://5", 0, 0x50, transport=transport)
+    samples = []
+    device.add_listener(lambda _, timestamps, values: samples.append(timestamps[-1]))
+    device.open_device()
+    device.start_data_acquisition()
+    time.sleep(1.5)
+    device.stop_data_acquisition()
+    device.close_device()
+    assert len(samples) >= 6  # 5 Hz x 1.5 s
+    assert simulator.frames_sent <= len(samples) + 1
+    assert len(transport._buffer) <= protocol.read_response_length(protocol.DATA_REG_COUNT)
+
+
+@pytest.mark.parametrize("speed", [0, 10])
+def test_replay_timestamps_follow_recorded_intervals(tmp_path, speed):
+    path = tmp_path / "recording.npy"
+    times = np.cumsum(np.r_[0.0, np.full(19, 0.01), 0.05, np.full(9, 0.02)])
+    data = np.column_stack([times, np.tile(np.arange(16, dtype=float), (len(times), 1))])
+    np.save(path, data)
+    device = ReplayDevice("replay", str(path), speed=speed)
+    timestamps = []
+    device.add_listener(lambda _, stamps, values: timestamps.extend(stamps))
+    device.open_device()
+    device.start_data_acquisition()
+    device._thread.join(timeout=5)
+    device.close_device()
+    assert np.diff(timestamps) == pytest.approx(np.diff(times), abs=1e-6)
+
+
+def test_repeated_replay_timestamps_do_not_go_back():
+    path = Path(tempfile.mkdtemp()) / "recording.npy"
+    np.save(path, np.column_stack([np.arange(5) * 0.1, np.zeros((5, 16))]))
+    device = ReplayDevice("replay", str(path), speed=0, repeat=True)
+    timestamps = []
+    device.add_listener(lambda _, stamps, values: timestamps.extend(stamps))
+    device.open_device()
+    device.start_data_acquisition()
+    while device.samples_replayed < 20:
+        time.sleep(0.01)
+    device.close_device()
+    assert np.all(np.diff(timestamps) > 0)
+    assert np.diff(timestamps)[:4] == pytest.approx([0.1] * 4, abs=1e-6)
@@ -0,0 +1,82 @@
+"""界面后台任务: 取消、关闭后重新提交"""
+import os
+import threading
+import time
+
+import pytest
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+from PyQt5.QtWidgets import QApplication  # noqa: E402
+
+from vibration_monitor.gui.task_runner import TaskRunner  # noqa: E402
+
+
+@pytest.fixture(scope='module')
+def app():
+    return QApplication.instance() or QApplication([])
+
+
+def wait_for(app, condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.005)
+    return condition()
+
+
+def analysis_threads():
+    return [thread for thread in threading.enumerate() if thread.name.startswith('analysis')]
+
+
+def test_newer_task_replaces_older_one(app):
+    runner = TaskRunner()
+    results = []
+    started = threading.Event()
+
+    def slow(token):
+        started.set()
+        while True:
+            token.check()
+            time.sleep(0.005)
+
+    runner.submit('fft', slow, results.append)
+    assert started.wait(2)
+    runner.submit('fft', lambda token: 42, results.append)
+    assert wait_for(app, lambda: not runner.is_busy())
+    assert results == [42]
+    runner.shutdown()
+
+
+def test_shutdown_cancels_queued_tasks_and_keeps_one_worker(app):
+    before = len(analysis_threads())
+    runner = TaskRunner()
+    results = []
+    started = threading.Event()
+    release = threading.Event()
+    running = []
+    overlap = []
+
+    def slow(token):
+        running.append('slow')
+        started.set()
+        release.wait(2)  # 模拟还没有到达检查点的计算
+        running.remove('slow')
+
+    def fresh(token):
+        overlap.append(list(running))
+        return 'again'
+
+    runner.submit('fft', slow, results.append)
+    assert started.wait(2)
+    runner.submit('features', lambda token: 'queued', results.append)  # 排队中, 关闭时取消
+    runner.shutdown()
+    assert not runner.is_busy()
+
+    runner.submit('fft', fresh, results.append)  # 窗口再次打开后
+    time.sleep(0.05)
+    assert overlap == []  # 旧任务结束前新任务不开始
+    release.set()
+    assert wait_for(app, lambda: results == ['again'])
+    assert overlap == [[]]
+    assert len(analysis_threads()) <= before + 1
+    runner.shutdown()
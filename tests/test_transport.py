@@ -0,0 +1,133 @@
+"""传输层: RTU over TCP / Modbus TCP 与本地回环网关, 共用连接上的请求应答对应"""
+import pytest
+
+from vibration_monitor.channels import RECORD_KEYS
+from vibration_monitor.device import wtvb01_protocol as protocol
+from vibration_monitor.device.device_wtvb01 import DeviceWTVB01
+from vibration_monitor.device.loopback_gateway import MODE_MODBUS_TCP, MODE_RTU, LoopbackGateway, RegisterSlave
+from vibration_monitor.device.transport import ConnectionPool, ModbusTcpTransport, TcpRtuTransport
+
+RAW_A = list(range(100, 100 + protocol.DATA_REG_COUNT))
+RAW_B = [0xFFFF - i for i in range(protocol.DATA_REG_COUNT)]
+FRAME_LENGTH = protocol.read_response_length(protocol.DATA_REG_COUNT)
+
+
+@pytest.fixture(params=[MODE_RTU, MODE_MODBUS_TCP])
+def gateway(request):
+    gateway = LoopbackGateway([RegisterSlave(0x50, RAW_A), RegisterSlave(0x51, RAW_B)], mode=request.param)
+    gateway.start()
+    yield gateway
+    gateway.stop()
+
+
+def make_transport(gateway, pool, timeout=1.0):
+    cls = TcpRtuTransport if gateway.mode == MODE_RTU else ModbusTcpTransport
+    return cls(gateway.host, gateway.port, timeout=timeout, inter_byte_timeout=0.05, pool=pool)
+
+
+def test_read_registers(gateway):
+    transport = make_transport(gateway, ConnectionPool())
+    transport.open()
+    try:
+        transport.write(protocol.build_read_command(0x50, protocol.DATA_START_REG, protocol.DATA_REG_COUNT))
+        assert transport.read(FRAME_LENGTH) == protocol.build_read_response(0x50, RAW_A)
+    finally:
+        transport.close()
+
+
+def test_write_register_is_echoed(gateway):
+    transport = make_transport(gateway, ConnectionPool())
+    transport.open()
+    try:
+        command = protocol.build_write_command(0x51, 0x69, 0xB588)
+        transport.write(command)
+        assert transport.read(len(command)) == command
+        assert gateway.slaves[0x51].registers[0x69] == 0xB588
+    finally:
+        transport.close()
+
+
+def test_no_reply_times_out_with_empty_read(gateway):
+    transport = make_transport(gateway, ConnectionPool(), timeout=0.1)
+    transport.open()
+    try:
+        transport.write(protocol.build_read_command(0x7F, protocol.DATA_START_REG, 1))  # 网关上没有该从站
+        assert transport.read(FRAME_LENGTH) == b""
+    finally:
+        transport.close()
+
+
+def test_devices_share_one_connection(gateway):
+    pool = ConnectionPool()
+    first, second = make_transport(gateway, pool), make_transport(gateway, pool)
+    first.open()
+    second.open()
+    try:
+        assert first._connection is second._connection
+        assert first.lock is second.lock
+        for transport, address, raw in ((first, 0x50, RAW_A), (second, 0x51, RAW_B), (first, 0x50, RAW_A)):
+            with transport.lock:
+                transport.write(protocol.build_read_command(address, protocol.DATA_START_REG, protocol.DATA_REG_COUNT))
+                assert transport.read(FRAME_LENGTH) == protocol.build_read_response(address, raw)
+    finally:
+        first.close()
+        second.close()
+
+
+def test_modbus_transaction_ids_are_unique_per_connection():
+    gateway = LoopbackGateway([RegisterSlave(0x50, RAW_A), RegisterSlave(0x51, RAW_B)], mode=MODE_MODBUS_TCP)
+    gateway.start()
+    pool = ConnectionPool()
+    first, second = ModbusTcpTransport(gateway.host, gateway.port, pool=pool), \
+        ModbusTcpTransport(gateway.host, gateway.port, pool=pool)
+    first.open()
+    second.open()
+    try:
+        seen = []
+        for transport, address in ((first, 0x50), (second, 0x51), (first, 0x50), (second, 0x51)):
+            with transport.lock:
+                transport.write(protocol.build_read_command(address, protocol.DATA_START_REG, 1))
+                seen.append(transport._connection.transaction_id)
+                assert transport.read(protocol.read_response_length(1))
+        assert seen == [1, 2, 3, 4]
+    finally:
+        first.close()
+        second.close()
+        gateway.stop()
+
+
+def test_stopped_device_consumes_its_pending_reply(gateway):
+    """请求发出后采集被停止, 应答仍由该设备读走, 不留给共用连接上的下一个设备"""
+    pool = ConnectionPool()
+    first = DeviceWTVB01("A", gateway.url, 0, 0x50, transport=make_transport(gateway, pool))
+    second = DeviceWTVB01("B", gateway.url, 0, 0x51, transport=make_transport(gateway, pool))
+    first.open_device()
+    second.open_device()
+    try:
+        assert not first.loop  # 相当于在请求发出之后 stop_data_acquisition
+        with first.transport.lock:
+            first.read_data()
+            first._read_frame()
+        assert first.sample_time is not None
+        with second.transport.lock:
+            second.read_data()
+            second._read_frame()
+        assert second.parser.resync_bytes == 0
+        assert second.get_data("52") == pytest.approx(protocol.scale_register(0x34, protocol.to_signed(RAW_B[0])))
+    finally:
+        first.close_device()
+        second.close_device()
+
+
+def test_device_polls_through_gateway(gateway):
+    device = DeviceWTVB01("A", gateway.url, 0, 0x50, transport=make_transport(gateway, ConnectionPool()))
+    device.open_device()
+    try:
+        with device.transport.lock:
+            device.read_data()
+            device._read_frame()
+    finally:
+        device.close_device()
+    expected = protocol.decode_registers(protocol.build_read_response(0x50, RAW_A))
+    assert device.values.tolist() == pytest.approx([expected[key] for key in RECORD_KEYS])
+    assert device.get_data("58") == expected["58"]
@@ -0,0 +1,142 @@
+"""长期趋势存储: 多级汇总、查询级别选择、重启合并与文件维护"""
+import os
+
+import numpy as np
+import pytest
+
+from vibration_monitor.trend_store import TrendStore
+
+T0 = 1_699_999_980.0  # 60 秒的整数倍
+CHANNELS = ['58', '64']
+
+
+def make_samples(seconds, rate=10, start=T0):
+    timestamps = start + np.arange(int(seconds * rate)) / rate
+    values = np.column_stack([np.sin(timestamps - start), 20 + 0.01 * (timestamps - start)])
+    return timestamps, values
+
+
+def expected_buckets(timestamps, values, level):
+    ids = np.floor(timestamps / level)
+    result = {}
+    for bucket in np.unique(ids):
+        rows = values[ids == bucket]
+        result[bucket * level] = (len(rows), rows.min(axis=0), rows.max(axis=0), rows.mean(axis=0),
+                                  np.sqrt((rows ** 2).mean(axis=0)))
+    return result
+
+
+def assert_matches(records, timestamps, values, level):
+    expected = expected_buckets(timestamps, values, level)
+    assert list(records['time']) == list(expected)
+    for record in records:
+        count, low, high, mean, rms = expected[record['time']]
+        assert record['count'] == count
+        np.testing.assert_allclose(record['min'], low, rtol=1e-6)
+        np.testing.assert_allclose(record['max'], high, rtol=1e-6)
+        np.testing.assert_allclose(record['mean'], mean, rtol=1e-5, atol=1e-6)
+        np.testing.assert_allclose(record['rms'], rms, rtol=1e-5)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return TrendStore(str(tmp_path / "trend"), levels=(1, 10, 60), channels=CHANNELS)
+
+
+def test_rollups_match_direct_statistics(store):
+    timestamps, values = make_samples(130)
+    for start in range(0, len(timestamps), 37):  # 任意批次大小
+        store.append('dev', timestamps[start:start + 37], values[start:start + 37])
+    # 关闭前只写入已完成的桶: 60 秒级的第二个桶要等 10 秒级的 [120, 130) 桶完成后才完成
+    assert store.read_level('dev', 10, T0, T0 + 200)['time'].tolist() == [T0 + 10 * i for i in range(12)]
+    assert store.read_level('dev', 60, T0, T0 + 200)['time'].tolist() == [T0]
+    store.close()
+    for level in (1, 10, 60):
+        assert_matches(store.read_level('dev', level, T0, T0 + 200), timestamps, values, level)
+
+
+def test_missing_values_are_not_counted(store):
+    timestamps, values = make_samples(2)
+    values[::2, 0] = np.nan
+    store.append('dev', timestamps, values)
+    store.close()
+    records = store.read_level('dev', 1, T0, T0 + 10)
+    assert records['count'].tolist() == [10, 10]  # 记录中的采样数取各通道最大值
+    np.testing.assert_allclose(records['mean'][:, 0], [np.nanmean(values[:10, 0]), np.nanmean(values[10:, 0])],
+                               rtol=1e-5, atol=1e-6)
+
+
+def test_restart_inside_bucket_merges_records(tmp_path):
+    timestamps, values = make_samples(90)
+    directory = str(tmp_path / "trend")
+    half = len(timestamps) // 2 + 3  # 在 60 秒桶和 10 秒桶中途重启
+    for part in (slice(None, half), slice(half, None)):
+        store = TrendStore(directory, levels=(1, 10, 60), channels=CHANNELS)
+        store.append('dev', timestamps[part], values[part])
+        store.close()
+    for level in (10, 60):
+        assert_matches(store.read_level('dev', level, T0, T0 + 200), timestamps, values, level)
+
+
+def test_query_chooses_coarsest_level_within_resolution(store):
+    timestamps, values = make_samples(180)
+    store.append('dev', timestamps, values)
+    store.close()
+    assert store.choose_level(None) == 1
+    assert store.choose_level(0.5) == 1
+    assert store.choose_level(30) == 10
+    assert store.choose_level(3600) == 60
+    data = store.query('dev', T0, T0 + 180, max_points=3, channels=['speed_x'])
+    assert data.level == 60 and len(data.time) == 3
+    assert data.mean.shape == (3, 1)
+    data = store.query('dev', T0, T0 + 180, resolution=10, channels=['温度', '58'])
+    assert data.level == 10 and data.mean.shape == (18, 2)
+    with pytest.raises(ValueError):
+        store.query('dev', T0, T0 + 10, channels=['accel_x'])  # 未写入的通道
+
+
+def test_query_falls_back_to_coarser_level(store, tmp_path):
+    timestamps, values = make_samples(120)
+    store.append('dev', timestamps, values)
+    store.close()
+    for name in os.listdir(tmp_path / "trend" / "dev"):
+        if name.startswith('1s_'):
+            os.remove(tmp_path / "trend" / "dev" / name)  # 相当于超过保留期
+    assert store.query('dev', T0, T0 + 120, resolution=1).level == 10
+
+
+def test_partial_record_is_ignored_and_truncated(store, tmp_path):
+    timestamps, values = make_samples(3)
+    store.append('dev', timestamps, values)
+    store.close()
+    path = next(p for p in (tmp_path / "trend" / "dev").iterdir() if p.name.startswith('1s_'))
+    with open(path, 'ab') as f:
+        f.write(b'\x00' * 5)  # 异常退出时写了一半的记录
+    assert len(store.read_level('dev', 1, T0, T0 + 10)) == 3
+    later = TrendStore(store.directory, levels=(1, 10, 60), channels=CHANNELS)
+    later.append('dev', *make_samples(2, start=T0 + 3))
+    later.close()
+    assert os.path.getsize(path) % store.dtype.itemsize == 0
+    assert store.read_level('dev', 1, T0, T0 + 10)['time'].tolist() == [T0 + i for i in range(5)]
+
+
+def test_retention_removes_old_segments(tmp_path):
+    directory = str(tmp_path / "trend")
+    store = TrendStore(directory, levels=(1, 60), retention={1: 1}, channels=CHANNELS)
+    store.append('dev', *make_samples(2))
+    store.append('dev', *make_samples(2, start=T0 + 3 * 86400))  # 三天后: 1 秒级的旧段过期
+    store.close()
+    assert len(store.read_level('dev', 1, T0, T0 + 10)) == 0
+    assert len(store.read_level('dev', 60, T0, T0 + 120)) == 1  # 未设置保留期的级别不删除
+
+
+def test_rejects_inconsistent_directory_and_levels(tmp_path):
+    directory = str(tmp_path / "trend")
+    store = TrendStore(directory, channels=CHANNELS)
+    store.append('dev', *make_samples(1))
+    store.close()
+    other = TrendStore(directory, channels=['58'])
+    with pytest.raises(ValueError):
+        other.append('dev', *make_samples(1))
+    with pytest.raises(ValueError):
+        TrendStore(directory, levels=(1, 45, 60))
@@ -0,0 +1,144 @@
+"""WTVB01 协议: 有符号换算、寄存器解析和拆帧"""
+import numpy as np
+import pytest
+
+from vibration_monitor.channels import ChannelId
+from vibration_monitor.device import wtvb01_protocol as protocol
+
+
+@pytest.mark.parametrize('raw, expected', [
+    (0x0000, 0),
+    (0x0001, 1),
+    (0x7FFF, 32767),
+    (0x8000, -32768),
+    (0x8001, -32767),
+    (0xFFFF, -1),
+])
+def test_to_signed_is_twos_complement(raw, expected):
+    assert protocol.to_signed(raw) == expected
+
+
+@pytest.mark.parametrize('reg_addr, value', [(0x34, -1.5), (0x37, -250.0), (0x3D, -90.0), (0x40, -12.34), (0x41, -7)])
+def test_unscale_round_trip_negative_values(reg_addr, value):
+    raw = protocol.unscale_register(reg_addr, value)
+    decoded = protocol.scale_register(reg_addr, protocol.to_signed(raw))
+    assert decoded == pytest.approx(value, abs=protocol.scale_register(reg_addr, 1))
+
+
+def modbus_crc(data):
+    """逐位计算的 CRC-16/MODBUS, 用于核对查表实现"""
+    crc = 0xFFFF
+    for byte in data:
+        crc ^= byte
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0xA001 if crc & 1 else crc >> 1
+    return crc
+
+
+@pytest.mark.parametrize('frame', [
+    protocol.build_read_command(0x50, protocol.DATA_START_REG, protocol.DATA_REG_COUNT),
+    protocol.build_write_command(0x51, 0x69, 0xB588),
+    protocol.build_read_response(0x50, list(range(protocol.DATA_REG_COUNT))),
+])
+def test_frames_carry_valid_modbus_crc(frame):
+    assert modbus_crc(frame) == 0  # 含 CRC 的整帧校验结果为 0
+
+
+def test_decode_registers_scales_by_register():
+    raw = [0] * protocol.DATA_REG_COUNT
+    raw[0] = 0x8000       # 加速度X: -16 g
+    raw[1] = 0x4000       # 加速度Y: 8 g
+    raw[3] = 0xFFFF       # 角速度X: -1 LSB
+    raw[6] = 123          # 速度X: 不换算
+    raw[9] = 0xC000       # 角度X: -90°
+    raw[12] = 2534        # 温度: 25.34 °C
+    raw[18] = 0xFFFE      # 频率Z
+    values = protocol.decode_registers(protocol.build_read_response(0x50, raw))
+    assert list(values) == [str(reg) for reg in range(protocol.DATA_START_REG, 0x47)]  # 寄存器地址的十进制
+    assert values["52"] == -16.0
+    assert values["53"] == 8.0
+    assert values["55"] == pytest.approx(-2000 / 32768)
+    assert values["58"] == 123
+    assert values["61"] == -90.0
+    assert values["64"] == pytest.approx(25.34)
+    assert values["70"] == -2
+
+
+def test_decode_registers_start_reg_and_unknown_registers():
+    values = protocol.decode_registers(protocol.build_read_response(0x50, [100, 200]), start_reg=0x46)
+    assert values == {"70": 100, str(0x47): 200}  # 未知寄存器以地址作为键
+    packet = list(protocol.build_read_response(0x50, [1]))
+    packet[2] = 3
+    with pytest.raises(ValueError):
+        protocol.decode_registers(packet)
+
+
+def test_register_keys_come_from_channel_registry():
+    assert protocol.REGISTER_KEYS == {channel.register: channel.key for channel in ChannelId}
+    assert all(int(key) == reg for reg, key in protocol.REGISTER_KEYS.items())
+
+
+def test_decode_values_writes_channel_columns():
+    raw = [(i * 2749 + 0x8013) & 0xFFFF for i in range(protocol.DATA_REG_COUNT)]
+    packet = list(protocol.build_read_response(0x50, raw))
+    expected = protocol.decode_registers(packet)
+    out = np.full(len(ChannelId) + 2, -1.0)  # 更宽的数组 (派生通道列) 不受影响
+    protocol.decode_values(packet, out)
+    assert [out[channel] for channel in ChannelId] == [expected[channel.key] for channel in ChannelId]
+    assert out[len(ChannelId):].tolist() == [-1.0, -1.0]
+
+
+def test_decode_values_partial_frame_keeps_other_columns():
+    out = np.zeros(len(ChannelId))
+    protocol.decode_values(list(protocol.build_read_response(0x50, [0xFFFF, 2534])), out, start_reg=0x3F)
+    assert out[ChannelId.TEMPERATURE] == pytest.approx(25.34)  # 0x3F 为角度, 跳过
+    assert np.count_nonzero(out) == 1
+    packet = list(protocol.build_read_response(0x50, [1]))
+    packet[2] = 3
+    with pytest.raises(ValueError):
+        protocol.decode_values(packet, out)
+
+
+def frames(n, address=0x50):
+    return [protocol.build_read_response(address, [i] * protocol.DATA_REG_COUNT) for i in range(n)]
+
+
+def test_parser_reassembles_split_frames():
+    parser = protocol.FrameParser(0x50)
+    stream = b''.join(frames(3))
+    packets = []
+    for i in range(len(stream)):
+        packets.extend(parser.feed(stream[i:i + 1]))
+    assert [bytes(packet) for packet in packets] == frames(3)
+    assert not parser.buffer
+    assert parser.crc_errors == parser.resync_bytes == 0
+
+
+def test_parser_resyncs_on_foreign_bytes():
+    parser = protocol.FrameParser(0x50)
+    other_device = frames(1, address=0x51)[0]
+    wrong_function = bytes([0x50, 0x06])
+    packets = parser.feed(b'\x00\x7f' + other_device + wrong_function + b''.join(frames(2)))
+    assert [bytes(packet) for packet in packets] == frames(2)
+    assert parser.resync_bytes == 2 + len(other_device) + len(wrong_function)
+    assert parser.crc_errors == 0
+
+
+def test_parser_drops_frames_with_bad_crc():
+    parser = protocol.FrameParser(0x50)
+    good = frames(2)
+    bad = bytearray(good[0])
+    bad[5] ^= 0x01
+    packets = parser.feed(bytes(bad) + good[1])
+    assert [bytes(packet) for packet in packets] == [good[1]]
+    assert parser.crc_errors == 1
+
+
+def test_parser_keeps_incomplete_frame_until_reset():
+    parser = protocol.FrameParser(0x50)
+    frame = frames(1)[0]
+    assert parser.feed(frame[:10]) == []
+    assert len(parser.buffer) == 10
+    parser.reset()
+    assert parser.feed(frame[10:]) == []  # 半帧已丢弃, 剩余字节不会拼成有效帧
+    assert [bytes(packet) for packet in parser.feed(frame)] == [frame]